@@ -935,8 +935,8 @@ class OptimizedAIDocumentGenerator:
         # Shutdown thread pool
         self.thread_pool.shutdown(wait=False)
         
-        # Save cache if persistent
+        # Entries are persisted as they are cached; just release the store
         if self.cache_manager and self.cache_manager.semantic_cache:
-            self.cache_manager.semantic_cache._save_cache()
+            self.cache_manager.semantic_cache.close()
         
         logger.info("Cleanup completed")
\ No newline at end of file
@@ -16,11 +16,12 @@ from datetime import datetime, timedelta
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 from pathlib import Path
 import asyncio
 from functools import lru_cache
 
+from devdocai.llm_adapter.persistent_cache import PersistentCacheStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +57,8 @@ class SemanticCache:
     - Document fragment caching
     - Template compilation caching
     - Performance metrics tracking
+    - Persistent SQLite store shared across processes; entries are
+      written individually and read back on demand, never loaded in bulk
     """
     
     def __init__(
@@ -74,7 +77,7 @@ class SemanticCache:
             similarity_threshold: Minimum similarity for cache hit (0-1)
             ttl_seconds: Time-to-live for cache entries
             enable_persistence: Whether to persist cache to disk
-            cache_dir: Directory for cache persistence
+            cache_dir: Directory for the persistent store
         """
         self.max_size = max_size
         self.similarity_threshold = similarity_threshold
@@ -98,16 +101,16 @@ class SemanticCache:
             "hits": 0,
             "misses": 0,
             "semantic_hits": 0,
+            "persistent_hits": 0,
             "evictions": 0,
             "total_requests": 0
         }
         
         # Persistence
+        self.store: Optional[PersistentCacheStore] = None
         if enable_persistence:
             self.cache_dir = cache_dir or Path.home() / ".devdocai" / "cache"
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-            self.cache_file = self.cache_dir / "semantic_cache.pkl"
-            self._load_cache()
+            self.store = PersistentCacheStore(self.cache_dir / "semantic_cache.db")
         
         logger.info(f"Initialized SemanticCache with max_size={max_size}, threshold={similarity_threshold}")
     
@@ -165,6 +168,43 @@ class SemanticCache:
         
         return None
     
+    def _insert(self, prompt_hash: str, prompt: str, response: Dict[str, Any],
+                metadata: Optional[Dict[str, Any]] = None,
+                timestamp: Optional[float] = None) -> CacheEntry:
+        """Add an entry to the in-memory cache."""
+        embedding = self._compute_embedding(prompt)
+        
+        # Check size limit
+        if prompt_hash not in self.cache and len(self.cache) >= self.max_size:
+            self._evict_lru()
+        
+        entry = CacheEntry(
+            key=prompt_hash,
+            prompt_hash=prompt_hash,
+            response=response,
+            prompt_embedding=embedding,
+            metadata=metadata or {}
+        )
+        if timestamp is not None:
+            entry.timestamp = timestamp
+        
+        self.cache[prompt_hash] = entry
+        if embedding is not None:
+            self.prompt_embeddings[prompt_hash] = embedding
+        
+        # Move to end (most recent)
+        self.cache.move_to_end(prompt_hash)
+        return entry
+    
+    async def _run_store(self, operation, *args) -> Any:
+        """Run a store call off the event loop; failures are logged."""
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, operation, *args)
+        except Exception as e:
+            logger.warning(f"Persistent cache operation failed: {e}")
+            return None
+    
     def _evict_lru(self):
         """Evict least recently used entry."""
         if self.cache:
@@ -215,6 +255,21 @@ class SemanticCache:
                 if prompt_hash in self.prompt_embeddings:
                     del self.prompt_embeddings[prompt_hash]
         
+        # Try the persistent store, which other processes also fill
+        elif self.store:
+            value = await self._run_store(self.store.get, prompt_hash)
+            if value is not None:
+                entry = self._insert(
+                    prompt_hash, prompt, value["response"], value.get("metadata"),
+                    timestamp=value.get("timestamp")
+                )
+                if not entry.is_expired(self.ttl_seconds):
+                    entry.update_access()
+                    self.stats["hits"] += 1
+                    self.stats["persistent_hits"] += 1
+                    logger.info(f"Cache hit (persistent): {prompt_hash[:8]}...")
+                    return entry.response
+        
         # Try semantic matching if enabled
         if use_semantic:
             embedding = self._compute_embedding(prompt)
@@ -256,35 +311,19 @@ class SemanticCache:
             context: Additional context
             metadata: Optional metadata to store with entry
         """
-        # Compute identifiers
         prompt_hash = self._compute_hash(prompt, context)
-        embedding = self._compute_embedding(prompt)
-        
-        # Check size limit
-        if len(self.cache) >= self.max_size:
-            self._evict_lru()
-        
-        # Create and store entry
-        entry = CacheEntry(
-            key=prompt_hash,
-            prompt_hash=prompt_hash,
-            response=response,
-            prompt_embedding=embedding,
-            metadata=metadata or {}
-        )
-        
-        self.cache[prompt_hash] = entry
-        if embedding is not None:
-            self.prompt_embeddings[prompt_hash] = embedding
-        
-        # Move to end (most recent)
-        self.cache.move_to_end(prompt_hash)
+        entry = self._insert(prompt_hash, prompt, response, metadata)
         
         logger.debug(f"Cached response: {prompt_hash[:8]}... (cache size: {len(self.cache)})")
         
-        # Persist if enabled
-        if self.enable_persistence:
-            await self._save_cache_async()
+        # Write this entry through to the persistent store
+        if self.store:
+            value = {
+                "response": response,
+                "metadata": entry.metadata,
+                "timestamp": entry.timestamp
+            }
+            await self._run_store(self.store.put, prompt_hash, value, self.ttl_seconds)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics."""
@@ -309,70 +348,17 @@ class SemanticCache:
         }
     
     def clear(self):
-        """Clear all cache entries."""
+        """Clear all cache entries, including the persistent store."""
         self.cache.clear()
         self.prompt_embeddings.clear()
+        if self.store:
+            self.store.clear()
         logger.info("Cache cleared")
     
-    async def _save_cache_async(self):
-        """Save cache to disk asynchronously."""
-        if not self.enable_persistence:
-            return
-        
-        try:
-            # Run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._save_cache)
-        except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
-    
-    def _save_cache(self):
-        """Save cache to disk."""
-        if not self.enable_persistence:
-            return
-        
-        try:
-            cache_data = {
-                "cache": dict(self.cache),
-                "embeddings": self.prompt_embeddings,
-                "stats": self.stats,
-                "is_fitted": self.is_fitted
-            }
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-            
-            logger.debug(f"Saved cache to {self.cache_file}")
-        except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
-    
-    def _load_cache(self):
-        """Load cache from disk."""
-        if not self.enable_persistence or not self.cache_file.exists():
-            return
-        
-        try:
-            with open(self.cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-            
-            self.cache = OrderedDict(cache_data.get("cache", {}))
-            self.prompt_embeddings = cache_data.get("embeddings", {})
-            self.stats = cache_data.get("stats", self.stats)
-            self.is_fitted = cache_data.get("is_fitted", False)
-            
-            # Remove expired entries
-            expired_keys = [
-                key for key, entry in self.cache.items()
-                if entry.is_expired(self.ttl_seconds)
-            ]
-            for key in expired_keys:
-                del self.cache[key]
-                if key in self.prompt_embeddings:
-                    del self.prompt_embeddings[key]
-            
-            logger.info(f"Loaded cache from {self.cache_file} ({len(self.cache)} entries)")
-        except Exception as e:
-            logger.warning(f"Failed to load cache: {e}")
+    def close(self):
+        """Close the persistent store."""
+        if self.store:
+            self.store.close()
 
 
 class FragmentCache:
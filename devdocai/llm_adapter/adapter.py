@@ -68,7 +68,9 @@ class LLMAdapter:
         # Initialize fallback manager
         self.fallback_manager = FallbackManager(
             providers=self.providers,
-            fallback_strategy=self.config.fallback_strategy
+            fallback_strategy=self.config.fallback_strategy,
+            hedge_requests=self.config.hedge_requests,
+            hedge_budget=self.config.hedge_budget
         )
         
         # Initialize MIAIR integration
@@ -125,7 +125,8 @@ class OptimizedLLMAdapter:
         self.batch_processor = BatchProcessor(
             max_batch_size=10,
             max_wait_time_ms=100,
-            enable_coalescing=True
+            enable_coalescing=True,
+            token_estimator=self._estimate_request_tokens
         )
         
         # Smart batcher for cost optimization
@@ -203,7 +204,9 @@ class OptimizedLLMAdapter:
         # Initialize fallback manager
         self.fallback_manager = FallbackManager(
             providers=self.providers,
-            fallback_strategy=self.config.fallback_strategy
+            fallback_strategy=self.config.fallback_strategy,
+            hedge_requests=self.config.hedge_requests,
+            hedge_budget=self.config.hedge_budget
         )
         
         # Register batch processors
@@ -646,6 +649,14 @@ class OptimizedLLMAdapter:
         
         return Decimal("0.01")  # Default estimate
     
+    def _estimate_request_tokens(self, request: LLMRequest) -> int:
+        """Estimate prompt plus completion tokens for batch packing."""
+        prompt_tokens = self.token_optimizer.token_counter.count_messages_tokens(
+            request.messages,
+            request.model
+        )
+        return prompt_tokens + (request.max_tokens or 0)
+    
     def _estimate_provider_cost(
         self,
         provider_name: str,
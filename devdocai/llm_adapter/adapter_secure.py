@@ -89,7 +89,9 @@ class SecureLLMAdapter:
         # Initialize fallback manager with circuit breakers
         self.fallback_manager = FallbackManager(
             providers=self.providers,
-            fallback_strategy=self.config.fallback_strategy
+            fallback_strategy=self.config.fallback_strategy,
+            hedge_requests=self.config.hedge_requests,
+            hedge_budget=self.config.hedge_budget
         )
         
         # Initialize MIAIR integration
@@ -55,10 +55,12 @@ class UnifiedConfig:
     enable_rate_limiting: bool = False
     enable_audit_logging: bool = False
     enable_rbac: bool = False
+    enable_request_coalescing: bool = True  # Identical in-flight requests share one call
     
     # Performance settings
     cache_size: int = 1000
     cache_ttl_seconds: int = 3600
+    cache_persistent_path: Optional[str] = None  # Shared on-disk L2 cache
     batch_size: int = 10
     batch_timeout_ms: int = 100
     connection_pool_size: int = 10
@@ -146,8 +148,13 @@ class UnifiedLLMAdapter:
             "batched_requests": 0,
             "validation_blocks": 0,
             "rate_limit_hits": 0,
-            "fallback_uses": 0
+            "fallback_uses": 0,
+            "coalesced_requests": 0,
+            "coalesced_streams": 0
         }
+        
+        # In-flight provider calls by request key (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     def _init_core_components(self) -> None:
         """Initialize core components used in all modes."""
@@ -186,13 +193,16 @@ class UnifiedLLMAdapter:
         # Performance components
         if self.unified_config.enable_cache:
             from .cache import ResponseCache, CacheManager
+            from .persistent_cache import PersistentCacheStore
             self.cache_manager = CacheManager()
             # Create a ResponseCache with the desired settings
+            persistent_path = self.unified_config.cache_persistent_path
             self.response_cache = ResponseCache(
                 max_size=self.unified_config.cache_size,
                 default_ttl_seconds=self.unified_config.cache_ttl_seconds,
                 similarity_threshold=0.95,
-                enable_semantic_matching=True
+                enable_semantic_matching=True,
+                persistent_store=PersistentCacheStore(persistent_path) if persistent_path else None
             )
         else:
             self.cache_manager = None
@@ -339,7 +349,9 @@ class UnifiedLLMAdapter:
         if self.providers:
             self.fallback_manager = FallbackManager(
                 providers=self.providers,
-                fallback_strategy=self.config.fallback_strategy
+                fallback_strategy=self.config.fallback_strategy,
+                hedge_requests=self.config.hedge_requests,
+                hedge_budget=self.config.hedge_budget
             )
     
     async def query(
@@ -379,6 +391,61 @@ class UnifiedLLMAdapter:
             self.metrics["cache_hits"] += 1
             return cached_response
         
+        if self.unified_config.enable_request_coalescing:
+            response = await self._coalesced_execute(request, provider)
+        else:
+            response = await self._execute(request, provider)
+        
+        # Audit logging (if enabled)
+        if self.audit_logger:
+            await self.audit_logger.log_request(
+                request, response, time.time() - start_time
+            )
+        
+        return response
+    
+    def _flight_key(self, request: LLMRequest, provider: Optional[str]) -> str:
+        """Key under which identical requests share one provider call."""
+        from .cache import ResponseCache
+        return f"{provider or ''}:{ResponseCache._generate_cache_key(request)}"
+    
+    async def _coalesced_execute(
+        self,
+        request: LLMRequest,
+        provider: Optional[str]
+    ) -> LLMResponse:
+        """
+        Execute a request once for all identical concurrent callers.
+        
+        The first caller starts the provider call as a task; callers arriving
+        before it finishes await the same task and receive its response or
+        error. Callers await it shielded, so cancelling one caller does not
+        cancel the call for the others.
+        """
+        key = self._flight_key(request, provider)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(request, provider))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        else:
+            self.metrics["coalesced_requests"] += 1
+        return await asyncio.shield(task)
+    
+    def _finish_flight(self, key: str, task: asyncio.Future) -> None:
+        """Forget a finished call so later requests go to cache or provider."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the error retrieved even if every caller was cancelled
+            task.exception()
+    
+    async def _execute(
+        self,
+        request: LLMRequest,
+        provider: Optional[str]
+    ) -> LLMResponse:
+        """Optimize, send and cache a request that missed the cache."""
         # Token optimization (if enabled)
         if self.token_optimizer:
             request = await self.token_optimizer.optimize_request(request)
@@ -392,13 +459,7 @@ class UnifiedLLMAdapter:
         
         # Cache response (if enabled)
         if self.response_cache:
-            await self.response_cache.store(request, response)
-        
-        # Audit logging (if enabled)
-        if self.audit_logger:
-            await self.audit_logger.log_request(
-                request, response, time.time() - start_time
-            )
+            await self.response_cache.put(request, response)
         
         return response
     
@@ -532,16 +593,46 @@ class UnifiedLLMAdapter:
         else:
             target_provider = next(iter(self.providers.values()))
         
-        # Stream with optional buffering
-        if self.streaming_manager:
-            async for chunk in self.streaming_manager.stream_with_buffer(
-                target_provider, request
-            ):
+        # Identical concurrent streams share one provider stream
+        if (self.streaming_manager and self.streaming_manager.enable_multiplexing
+                and self.unified_config.enable_request_coalescing):
+            async for chunk in self._multiplexed_stream(request, provider, target_provider):
                 yield chunk
         else:
             async for chunk in target_provider.stream(request):
                 yield chunk
     
+    async def _multiplexed_stream(
+        self,
+        request: LLMRequest,
+        provider: Optional[str],
+        target_provider: BaseProvider
+    ) -> AsyncGenerator[str, None]:
+        """
+        Join an identical stream whose first chunk is still in the
+        multiplexer's replay buffer, or start one through the streaming
+        manager's multiplexer.
+        """
+        key = self._flight_key(request, provider)
+        manager = self.streaming_manager
+        multiplexer = manager.multiplexers.get(key)
+        consumer_id = await multiplexer.join() if multiplexer else None
+        if consumer_id is not None:
+            self.metrics["coalesced_streams"] += 1
+        else:
+            consumer_ids = await manager.create_multiplexed_stream(
+                key, provider or "default", target_provider.stream(request)
+            )
+            multiplexer = manager.multiplexers[key]
+            consumer_id = consumer_ids[0]
+        
+        try:
+            async for chunk in multiplexer.consume(consumer_id):
+                if not chunk.is_final:
+                    yield chunk.content
+        finally:
+            await multiplexer.remove_consumer(consumer_id)
+    
     async def synthesize(
         self,
         request: Union[LLMRequest, Dict[str, Any]],
@@ -7,10 +7,13 @@ Implements intelligent request batching with:
 - Configurable batch sizes and timeouts
 - Priority-based processing
 - Batch optimization for cost efficiency
+- Continuous micro-batching with token-aware packing, per-priority
+  deadlines and separate streaming/standard lanes
 """
 
 import asyncio
 import hashlib
+import itertools
 import json
 import time
 import logging
@@ -35,6 +38,29 @@ class RequestPriority(Enum):
     BATCH = 4  # Lowest priority, for batch operations
 
 
+class BatchLane(Enum):
+    """Scheduling lanes; streaming work never queues behind bulk work."""
+    STANDARD = "standard"
+    STREAMING = "streaming"
+
+
+# Share of the lane's max wait a request of each priority may spend queued
+# before its batch is flushed
+PRIORITY_WAIT_FACTORS: Dict[RequestPriority, float] = {
+    RequestPriority.CRITICAL: 0.0,
+    RequestPriority.HIGH: 0.25,
+    RequestPriority.NORMAL: 1.0,
+    RequestPriority.LOW: 2.0,
+    RequestPriority.BATCH: 10.0,
+}
+
+
+def estimate_request_tokens(request: LLMRequest) -> int:
+    """Rough token estimate: prompt characters / 4 plus the completion budget."""
+    prompt_chars = sum(len(message.get("content") or "") for message in request.messages)
+    return prompt_chars // 4 + (request.max_tokens or 0)
+
+
 @dataclass
 class BatchRequest:
     """Individual request in a batch."""
@@ -44,6 +70,8 @@ class BatchRequest:
     timestamp: float = field(default_factory=time.time)
     request_hash: str = field(default="")
     retries: int = 0
+    estimated_tokens: int = 0
+    deadline: float = 0.0
     
     def __post_init__(self):
         """Generate request hash if not provided."""
@@ -56,7 +84,9 @@ class BatchRequest:
             "messages": self.request.messages,
             "model": self.request.model,
             "temperature": self.request.temperature,
-            "max_tokens": self.request.max_tokens
+            "max_tokens": self.request.max_tokens,
+            # Streaming and standard requests run in different lanes
+            "stream": bool(self.request.stream)
         }
         key_str = json.dumps(key_data, sort_keys=True)
         return hashlib.sha256(key_str.encode()).hexdigest()
@@ -101,6 +131,197 @@ class BatchStats:
         )
 
 
+@dataclass
+class LaneStats:
+    """Statistics for one provider lane."""
+    total_batches: int = 0
+    total_requests: int = 0
+    deadline_flushes: int = 0
+    fill_ratio_sum: float = 0.0
+    wait_times_ms: deque = field(default_factory=lambda: deque(maxlen=1000))
+    
+    def record_batch(self, wait_times_ms: List[float], fill_ratio: float, deadline_flush: bool):
+        """Update statistics after a batch is dispatched."""
+        self.total_batches += 1
+        self.total_requests += len(wait_times_ms)
+        self.fill_ratio_sum += fill_ratio
+        self.wait_times_ms.extend(wait_times_ms)
+        if deadline_flush:
+            self.deadline_flushes += 1
+    
+    @property
+    def average_fill_ratio(self) -> float:
+        """Average batch fill (by count or tokens, whichever is higher)."""
+        return self.fill_ratio_sum / self.total_batches if self.total_batches else 0.0
+    
+    def wait_percentile(self, percentile: float) -> float:
+        """Queue wait percentile over recent requests, in milliseconds."""
+        if not self.wait_times_ms:
+            return 0.0
+        samples = sorted(self.wait_times_ms)
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+
+class MicroBatchScheduler:
+    """
+    Token-aware micro-batch packing for one provider lane.
+    
+    Requests wait in priority order and carry a deadline derived from their
+    priority. A batch is ready as soon as the queue can fill it (by count or
+    token budget) or the earliest deadline passes. Packing takes overdue
+    requests first, then the rest by priority, first-fit against the token
+    budget, so a large request never holds small ones back; a request over
+    the budget is sent alone.
+    """
+    
+    def __init__(
+        self,
+        max_batch_size: int = 10,
+        max_batch_tokens: int = 16000,
+        lookahead: Optional[int] = None
+    ):
+        """
+        Initialize scheduler.
+        
+        Args:
+            max_batch_size: Maximum requests per batch
+            max_batch_tokens: Estimated token budget per batch
+            lookahead: Requests that may be skipped while packing one batch
+        """
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.lookahead = lookahead or max_batch_size * 4
+        self.queued_tokens = 0
+        
+        # Both heaps index the pending map; taken and superseded entries are
+        # dropped lazily
+        self._pending: Dict[int, BatchRequest] = {}
+        self._by_hash: Dict[str, int] = {}
+        self._by_priority: List[Tuple[int, float, int]] = []
+        self._by_deadline: List[Tuple[float, int]] = []
+        self._sequence = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def add(self, request: BatchRequest) -> None:
+        """Queue a request."""
+        seq = next(self._sequence)
+        self._pending[seq] = request
+        self._by_hash[request.request_hash] = seq
+        self.queued_tokens += request.estimated_tokens
+        heapq.heappush(self._by_priority, (request.priority.value, request.timestamp, seq))
+        heapq.heappush(self._by_deadline, (request.deadline, seq))
+    
+    def promote(self, request_hash: str, priority: RequestPriority, deadline: float) -> bool:
+        """
+        Raise a queued request to a higher priority or earlier deadline.
+        
+        Used when an identical request is coalesced onto a queued one, so
+        the shared request is scheduled for the most urgent of its callers.
+        
+        Args:
+            request_hash: Hash of the queued request
+            priority: Priority of the coalesced request
+            deadline: Deadline of the coalesced request
+            
+        Returns:
+            True if the queued request was changed
+        """
+        seq = self._by_hash.get(request_hash)
+        if seq is None:
+            return False
+        request = self._pending[seq]
+        changed = False
+        if priority.value < request.priority.value:
+            request.priority = priority
+            heapq.heappush(self._by_priority, (priority.value, request.timestamp, seq))
+            changed = True
+        if deadline < request.deadline:
+            request.deadline = deadline
+            heapq.heappush(self._by_deadline, (deadline, seq))
+            changed = True
+        return changed
+    
+    def next_deadline(self) -> Optional[float]:
+        """Earliest deadline among queued requests."""
+        heap = self._by_deadline
+        while heap and heap[0][1] not in self._pending:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+    
+    def is_full(self) -> bool:
+        """Whether the queue can fill a batch."""
+        return (
+            len(self._pending) >= self.max_batch_size or
+            self.queued_tokens >= self.max_batch_tokens
+        )
+    
+    def is_ready(self, now: float) -> bool:
+        """Whether a batch should be dispatched now."""
+        if not self._pending:
+            return False
+        if self.is_full():
+            return True
+        deadline = self.next_deadline()
+        return deadline is not None and deadline <= now
+    
+    def take_batch(self, now: float) -> List[BatchRequest]:
+        """
+        Pack the next batch.
+        
+        Args:
+            now: Current time; requests past their deadline go first
+            
+        Returns:
+            Requests in the batch
+        """
+        batch: List[BatchRequest] = []
+        tokens = self._pack(self._by_deadline, batch, 0, due=now)
+        self._pack(self._by_priority, batch, tokens)
+        return batch
+    
+    def _pack(
+        self,
+        heap: List[Tuple],
+        batch: List[BatchRequest],
+        tokens: int,
+        due: Optional[float] = None
+    ) -> int:
+        """Move requests from a heap into the batch first-fit; return batch tokens."""
+        skipped = []
+        
+        while (
+            heap and len(batch) < self.max_batch_size and
+            tokens < self.max_batch_tokens and len(skipped) < self.lookahead
+        ):
+            entry = heap[0]
+            seq = entry[-1]
+            if seq not in self._pending:
+                heapq.heappop(heap)
+                continue
+            if due is not None and entry[0] > due:
+                break
+            
+            heapq.heappop(heap)
+            request = self._pending[seq]
+            if batch and tokens + request.estimated_tokens > self.max_batch_tokens:
+                skipped.append(entry)
+                continue
+            
+            del self._pending[seq]
+            if self._by_hash.get(request.request_hash) == seq:
+                del self._by_hash[request.request_hash]
+            self.queued_tokens -= request.estimated_tokens
+            batch.append(request)
+            tokens += request.estimated_tokens
+        
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        
+        return tokens
+
+
 class RequestQueue:
     """Priority queue for batch requests."""
     
@@ -207,9 +428,11 @@ class BatchProcessor:
     Intelligent batch processor for LLM requests.
     
     Features:
-    - Automatic batch formation based on size and time
+    - Continuous micro-batching: batches are dispatched as soon as they are
+      full or a deadline passes, and run concurrently
+    - Token-aware packing by priority (see MicroBatchScheduler)
+    - Separate lanes for streaming and non-streaming work
     - Request coalescing for identical prompts
-    - Priority-based processing
     - Retry logic with exponential backoff
     - Cost-optimized batching
     """
@@ -219,7 +442,13 @@ class BatchProcessor:
         max_batch_size: int = 10,
         max_wait_time_ms: float = 100,
         enable_coalescing: bool = True,
-        max_retries: int = 3
+        max_retries: int = 3,
+        max_batch_tokens: int = 16000,
+        stream_max_wait_time_ms: float = 10,
+        max_concurrent_batches: int = 4,
+        max_queue_size: int = 10000,
+        priority_wait_factors: Optional[Dict[RequestPriority, float]] = None,
+        token_estimator: Optional[Callable[[LLMRequest], int]] = None
     ):
         """
         Initialize batch processor.
@@ -229,25 +458,40 @@ class BatchProcessor:
             max_wait_time_ms: Maximum wait time for batch formation
             enable_coalescing: Enable request coalescing
             max_retries: Maximum retry attempts
+            max_batch_tokens: Estimated token budget per batch
+            stream_max_wait_time_ms: Maximum wait time in the streaming lane
+            max_concurrent_batches: Batches in flight per provider lane
+            max_queue_size: Maximum queued requests per provider lane
+            priority_wait_factors: Share of the max wait per priority
+                (defaults to PRIORITY_WAIT_FACTORS)
+            token_estimator: Estimates a request's tokens
+                (defaults to estimate_request_tokens)
         """
         self.max_batch_size = max_batch_size
         self.max_wait_time_ms = max_wait_time_ms
         self.enable_coalescing = enable_coalescing
         self.max_retries = max_retries
-        
-        # Request queues by provider
-        self.queues: Dict[str, RequestQueue] = defaultdict(
-            lambda: RequestQueue(max_size=10000)
-        )
+        self.max_batch_tokens = max_batch_tokens
+        self.stream_max_wait_time_ms = stream_max_wait_time_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_queue_size = max_queue_size
+        self.priority_wait_factors = priority_wait_factors or PRIORITY_WAIT_FACTORS
+        self.token_estimator = token_estimator or estimate_request_tokens
+        
+        # Schedulers by (provider, lane)
+        self.schedulers: Dict[Tuple[str, BatchLane], MicroBatchScheduler] = {}
+        self._wakeups: Dict[Tuple[str, BatchLane], asyncio.Event] = {}
+        self._in_flight: Dict[Tuple[str, BatchLane], Set[asyncio.Task]] = defaultdict(set)
         
         # Coalescing map for deduplication
         self.pending_requests: Dict[str, List[asyncio.Future]] = defaultdict(list)
         
         # Processing tasks
-        self.processing_tasks: Dict[str, asyncio.Task] = {}
+        self.processing_tasks: Dict[Tuple[str, BatchLane], asyncio.Task] = {}
         
         # Statistics
         self.stats: Dict[str, BatchStats] = defaultdict(BatchStats)
+        self.lane_stats: Dict[Tuple[str, BatchLane], LaneStats] = defaultdict(LaneStats)
         
         # Batch processors (provider-specific)
         self.processors: Dict[str, Callable] = {}
@@ -290,72 +534,146 @@ class BatchProcessor:
         # Create future for response
         future = asyncio.Future()
         
+        lane = BatchLane.STREAMING if request.stream else BatchLane.STANDARD
+        max_wait_ms = (
+            self.stream_max_wait_time_ms if lane is BatchLane.STREAMING
+            else self.max_wait_time_ms
+        )
+        now = time.time()
+        
         # Create batch request
         batch_request = BatchRequest(
             request=request,
             priority=priority,
-            future=future
+            future=future,
+            timestamp=now,
+            estimated_tokens=self.token_estimator(request),
+            deadline=now + max_wait_ms * self.priority_wait_factors.get(priority, 1.0) / 1000
         )
         
-        # Check for coalescing opportunity
+        key = (provider, lane)
+        
+        # Check for coalescing opportunity (the hash includes the lane)
         if self.enable_coalescing and batch_request.request_hash in self.pending_requests:
-            # Coalesce with existing request
+            # Coalesce with existing request, scheduled for its most urgent caller
             self.pending_requests[batch_request.request_hash].append(future)
             self.stats[provider].coalesced_requests += 1
+            scheduler = self.schedulers.get(key)
+            if scheduler is not None and scheduler.promote(
+                batch_request.request_hash, priority, batch_request.deadline
+            ):
+                self._wakeups[key].set()
             self.logger.debug(
                 f"Coalesced request {batch_request.request_hash[:8]}... "
                 f"({len(self.pending_requests[batch_request.request_hash])} waiting)"
             )
         else:
-            # Add to queue
-            queue = self.queues[provider]
-            added = await queue.put(batch_request)
+            # Add to the lane's scheduler
+            scheduler = self._get_scheduler(key)
             
-            if not added:
+            if len(scheduler) >= self.max_queue_size:
                 raise ValueError(f"Queue full for provider {provider}")
             
+            scheduler.add(batch_request)
+            
             if self.enable_coalescing:
                 self.pending_requests[batch_request.request_hash].append(future)
             
-            # Start processor if not running
-            if provider not in self.processing_tasks or self.processing_tasks[provider].done():
-                self.processing_tasks[provider] = asyncio.create_task(
-                    self._process_queue(provider)
+            # Start processor if not running, and wake it
+            if key not in self.processing_tasks or self.processing_tasks[key].done():
+                self.processing_tasks[key] = asyncio.create_task(
+                    self._process_lane(provider, lane)
                 )
+            self._wakeups[key].set()
         
         # Wait for response
         return await future
     
-    async def _process_queue(self, provider: str) -> None:
+    def _get_scheduler(self, key: Tuple[str, BatchLane]) -> MicroBatchScheduler:
+        """Get or create the scheduler for a provider lane."""
+        if key not in self.schedulers:
+            self.schedulers[key] = MicroBatchScheduler(
+                max_batch_size=self.max_batch_size,
+                max_batch_tokens=self.max_batch_tokens
+            )
+            self._wakeups[key] = asyncio.Event()
+        return self.schedulers[key]
+    
+    async def _process_lane(self, provider: str, lane: BatchLane) -> None:
         """
-        Process requests from queue for a provider.
+        Continuously dispatch micro-batches for a provider lane.
+        
+        A batch is released as soon as it is full or a deadline passes, and
+        up to max_concurrent_batches run at once, so a slow batch does not
+        hold back the ones queued behind it.
         
         Args:
             provider: Provider name
+            lane: Lane to serve
         """
-        self.logger.info(f"Started batch processor for {provider}")
-        queue = self.queues[provider]
+        self.logger.info(f"Started {lane.value} batch lane for {provider}")
+        key = (provider, lane)
+        scheduler = self.schedulers[key]
+        wakeup = self._wakeups[key]
+        in_flight = self._in_flight[key]
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        
+        def on_done(task: asyncio.Task) -> None:
+            in_flight.discard(task)
+            slots.release()
         
         while True:
             try:
-                # Get batch from queue
-                batch = await queue.get_batch(
-                    self.max_batch_size,
-                    self.max_wait_time_ms
-                )
+                now = time.time()
+                if not scheduler.is_ready(now):
+                    # Sleep until a request arrives or the next deadline
+                    deadline = scheduler.next_deadline()
+                    timeout = None if deadline is None else max(deadline - now, 0)
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
                 
+                # The batch keeps filling while we wait for a free slot
+                await slots.acquire()
+                now = time.time()
+                full = scheduler.is_full()
+                batch = scheduler.take_batch(now)
                 if not batch:
-                    # No requests, wait a bit
-                    await asyncio.sleep(0.1)
+                    slots.release()
                     continue
                 
-                # Process batch
-                await self._process_batch(provider, batch)
+                self._record_dispatch(key, batch, now, deadline_flush=not full)
+                task = asyncio.create_task(self._process_batch(provider, batch))
+                in_flight.add(task)
+                task.add_done_callback(on_done)
                 
             except Exception as e:
-                self.logger.error(f"Error processing queue for {provider}: {e}")
+                self.logger.error(f"Error processing {lane.value} lane for {provider}: {e}")
                 await asyncio.sleep(1)  # Back off on error
     
+    def _record_dispatch(
+        self,
+        key: Tuple[str, BatchLane],
+        batch: List[BatchRequest],
+        now: float,
+        deadline_flush: bool
+    ) -> None:
+        """Record queue wait and fill ratio for a dispatched batch."""
+        scheduler = self.schedulers[key]
+        tokens = sum(req.estimated_tokens for req in batch)
+        fill_ratio = min(1.0, max(
+            len(batch) / scheduler.max_batch_size,
+            tokens / scheduler.max_batch_tokens
+        ))
+        self.lane_stats[key].record_batch(
+            [(now - req.timestamp) * 1000 for req in batch],
+            fill_ratio,
+            deadline_flush
+        )
+    
     async def _process_batch(
         self,
         provider: str,
@@ -406,15 +724,14 @@ class BatchProcessor:
             for i, (request_hash, (request, futures)) in enumerate(unique_requests.items()):
                 response = responses[i] if i < len(responses) else None
                 
+                # Include requests coalesced onto this one while it was queued
+                futures = futures + self.pending_requests.pop(request_hash, [])
+                
                 if response:
                     # Success - set result for all coalesced requests
                     for future in futures:
                         if not future.done():
                             future.set_result(response)
-                    
-                    # Clear from pending
-                    if request_hash in self.pending_requests:
-                        del self.pending_requests[request_hash]
                 else:
                     # Failure - set exception
                     error = ProviderError(
@@ -444,8 +761,9 @@ class BatchProcessor:
             
             # Set exception for all futures
             for req in batch:
-                if not req.future.done():
-                    req.future.set_exception(e)
+                for future in [req.future] + self.pending_requests.pop(req.request_hash, []):
+                    if not future.done():
+                        future.set_exception(e)
             
             # Update statistics
             self.stats[provider].update_batch(
@@ -487,8 +805,9 @@ class BatchProcessor:
                     response_time_ms=50
                 )
                 
-                if not req.future.done():
-                    req.future.set_result(response)
+                for future in [req.future] + self.pending_requests.pop(req.request_hash, []):
+                    if not future.done():
+                        future.set_result(response)
                     
             except Exception as e:
                 if not req.future.done():
@@ -501,20 +820,25 @@ class BatchProcessor:
         Args:
             provider: Specific provider to flush, or None for all
         """
-        providers = [provider] if provider else list(self.queues.keys())
+        keys = [
+            key for key in self.schedulers
+            if provider is None or key[0] == provider
+        ]
         
-        for prov in providers:
-            queue = self.queues[prov]
+        for key in keys:
+            scheduler = self.schedulers[key]
             
-            while await queue.size() > 0:
-                batch = await queue.get_batch(
-                    self.max_batch_size,
-                    max_wait_time_ms=0  # Don't wait
-                )
-                if batch:
-                    await self._process_batch(prov, batch)
+            while scheduler:
+                now = time.time()
+                batch = scheduler.take_batch(float("inf"))  # Everything is due
+                self._record_dispatch(key, batch, now, deadline_flush=False)
+                await self._process_batch(key[0], batch)
+            
+            # Let batches already dispatched finish
+            if self._in_flight[key]:
+                await asyncio.gather(*self._in_flight[key], return_exceptions=True)
         
-        self.logger.info(f"Flushed queues for {providers}")
+        self.logger.info(f"Flushed queues for {sorted({key[0] for key in keys})}")
     
     def get_stats(self, provider: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -539,15 +863,37 @@ class BatchProcessor:
                     stats.successful_batches / stats.total_batches
                     if stats.total_batches > 0 else 0
                 ),
-                "total_processing_time_ms": stats.total_processing_time_ms
+                "total_processing_time_ms": stats.total_processing_time_ms,
+                "lanes": {
+                    lane.value: self._get_lane_stats((prov, lane))
+                    for prov, lane in self.schedulers
+                    if prov == provider
+                }
             }
         else:
             # Return all provider stats
+            providers = set(self.stats) | {prov for prov, _ in self.schedulers}
             return {
                 prov: self.get_stats(prov)
-                for prov in self.stats.keys()
+                for prov in providers
             }
     
+    def _get_lane_stats(self, key: Tuple[str, BatchLane]) -> Dict[str, Any]:
+        """Queue depth, wait percentiles and fill ratio for a provider lane."""
+        scheduler = self.schedulers[key]
+        stats = self.lane_stats[key]
+        return {
+            "queue_depth": len(scheduler),
+            "queued_tokens": scheduler.queued_tokens,
+            "in_flight_batches": len(self._in_flight[key]),
+            "total_batches": stats.total_batches,
+            "total_requests": stats.total_requests,
+            "wait_p50_ms": stats.wait_percentile(0.50),
+            "wait_p95_ms": stats.wait_percentile(0.95),
+            "batch_fill_ratio": stats.average_fill_ratio,
+            "deadline_flushes": stats.deadline_flushes
+        }
+    
     async def shutdown(self) -> None:
         """Shutdown batch processor."""
         self._running = False
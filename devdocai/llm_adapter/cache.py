@@ -3,9 +3,10 @@ M008: Advanced Caching System for LLM Adapter.
 
 Implements intelligent caching with:
 - LRU cache for exact matches
-- Semantic similarity matching (mock implementation without API keys)
+- Semantic similarity matching with local embeddings (see embeddings.py)
 - TTL-based expiration
 - Provider-specific caching
+- Optional persistent L2 shared across processes (see persistent_cache.py)
 - Cache statistics and monitoring
 """
 
@@ -14,13 +15,16 @@ import hashlib
 import json
 import time
 import logging
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
 import numpy as np
 
 from .providers.base import LLMRequest, LLMResponse
+from .embeddings import EmbeddingBackend, create_embedding_backend
+from .persistent_cache import PersistentCacheStore
+from .vector_index import SemanticIndex
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +60,7 @@ class CacheStats:
     evictions: int = 0
     semantic_matches: int = 0
     exact_matches: int = 0
+    persistent_hits: int = 0
     expired_evictions: int = 0
     size_evictions: int = 0
     total_response_time_saved_ms: float = 0
@@ -75,10 +80,12 @@ class CacheStats:
 class LRUCache:
     """Thread-safe LRU cache implementation."""
     
-    def __init__(self, max_size: int = 1000):
+    def __init__(self, max_size: int = 1000,
+                 on_evict: Optional[Callable[[str], None]] = None):
         self.max_size = max_size
         self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
         self._lock = asyncio.Lock()
+        self.on_evict = on_evict
     
     async def get(self, key: str) -> Optional[CacheEntry]:
         """Get item from cache and move to end (most recently used)."""
@@ -90,6 +97,8 @@ class LRUCache:
                     entry.update_access()
                     return entry
                 # Entry expired, don't re-add
+                if self.on_evict:
+                    self.on_evict(key)
                 return None
             return None
     
@@ -108,11 +117,16 @@ class LRUCache:
                 evicted += 1
             
             # Check if we need to evict for size
-            if len(self.cache) >= self.max_size:
+            if key not in self.cache and len(self.cache) >= self.max_size:
                 # Remove least recently used
-                self.cache.popitem(last=False)
+                lru_key, _ = self.cache.popitem(last=False)
+                expired_keys.append(lru_key)
                 evicted += 1
             
+            if self.on_evict:
+                for k in expired_keys:
+                    self.on_evict(k)
+            
             self.cache[key] = entry
             return evicted
     
@@ -133,10 +147,12 @@ class ResponseCache:
     
     Features:
     - Exact match caching with LRU eviction
-    - Semantic similarity matching (mock without embeddings API)
+    - Semantic similarity matching with a pluggable local embedding backend
     - Provider-specific caching
     - TTL-based expiration
     - Cache warming and preloading
+    - Optional persistent store as L2; exact-key misses in memory are
+      looked up there and promoted, so warming is lazy
     - Performance statistics
     """
     
@@ -145,7 +161,9 @@ class ResponseCache:
         max_size: int = 1000,
         default_ttl_seconds: int = 3600,
         similarity_threshold: float = 0.95,
-        enable_semantic_matching: bool = True
+        enable_semantic_matching: bool = True,
+        embedding_backend: Optional[EmbeddingBackend] = None,
+        persistent_store: Optional[PersistentCacheStore] = None
     ):
         """
         Initialize response cache.
@@ -155,17 +173,21 @@ class ResponseCache:
             default_ttl_seconds: Default TTL for cache entries
             similarity_threshold: Threshold for semantic similarity matching
             enable_semantic_matching: Enable semantic similarity matching
+            embedding_backend: Embeds prompts; defaults to cached hashing embeddings
+            persistent_store: Shared on-disk L2 behind the in-memory cache
         """
         self.max_size = max_size
         self.default_ttl = default_ttl_seconds
         self.similarity_threshold = similarity_threshold
         self.enable_semantic = enable_semantic_matching
+        self.embedding_backend = embedding_backend or create_embedding_backend()
+        self.persistent_store = persistent_store
         
-        # Main cache storage
-        self.cache = LRUCache(max_size)
+        # Main cache storage; evictions drop the entry's embedding
+        self.cache = LRUCache(max_size, on_evict=self._drop_embedding)
         
-        # Index for semantic search (mock implementation)
-        self.embedding_index: Dict[str, np.ndarray] = {}
+        # Vector index for semantic search, partitioned by (provider, model)
+        self.semantic_index = SemanticIndex(dim=self.embedding_backend.dim)
         
         # Provider-specific caches
         self.provider_caches: Dict[str, LRUCache] = defaultdict(
@@ -186,7 +208,8 @@ class ResponseCache:
         
         self.logger = logging.getLogger(f"{__name__}.ResponseCache")
     
-    def _generate_cache_key(self, request: LLMRequest) -> str:
+    @staticmethod
+    def _generate_cache_key(request: LLMRequest) -> str:
         """Generate deterministic cache key from request."""
         # Create a stable hash from request parameters
         key_data = {
@@ -206,44 +229,13 @@ class ResponseCache:
         key_str = json.dumps(key_data, sort_keys=True)
         return hashlib.sha256(key_str.encode()).hexdigest()
     
-    def _mock_generate_embedding(self, text: str) -> np.ndarray:
-        """
-        Generate mock embedding for text (without actual embedding API).
-        
-        In production, this would call an embedding API like OpenAI's text-embedding-3-small.
-        For now, we'll create a deterministic mock embedding based on text features.
-        """
-        # Mock embedding based on text features
-        features = []
-        
-        # Length feature
-        features.append(len(text) / 1000.0)
-        
-        # Character distribution (simplified)
-        char_counts = defaultdict(int)
-        for char in text.lower():
-            if char.isalpha():
-                char_counts[char] += 1
-        
-        # Add normalized character frequencies for a-z
-        for char in 'abcdefghijklmnopqrstuvwxyz':
-            features.append(char_counts[char] / (len(text) + 1))
-        
-        # Word count feature
-        features.append(len(text.split()) / 100.0)
-        
-        # Average word length
-        words = text.split()
-        avg_word_len = sum(len(w) for w in words) / (len(words) + 1)
-        features.append(avg_word_len / 10.0)
-        
-        # Pad to fixed size (e.g., 384 dimensions like small embeddings)
-        while len(features) < 384:
-            # Add deterministic padding based on text hash
-            hash_val = hashlib.md5(f"{text}{len(features)}".encode()).hexdigest()
-            features.append(int(hash_val[:8], 16) / (2**32))
-        
-        return np.array(features[:384], dtype=np.float32)
+    def _generate_embedding(self, text: str) -> np.ndarray:
+        """Embed prompt text with the configured local backend."""
+        return self.embedding_backend.embed(text)
+    
+    def _drop_embedding(self, cache_key: str) -> None:
+        """Remove an evicted or invalidated entry from the semantic index."""
+        self.semantic_index.delete(cache_key)
     
     def _calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings."""
@@ -277,36 +269,26 @@ class ResponseCache:
         
         # Generate embedding for request
         prompt_text = " ".join([msg["content"] for msg in request.messages])
-        query_embedding = self._mock_generate_embedding(prompt_text)
+        query_embedding = self._generate_embedding(prompt_text)
         
-        # Search through cache entries
+        # Vectorized lookup in the (provider, model) partitions; no cache lock
         best_match: Optional[Tuple[float, CacheEntry]] = None
-        cache_size = await self.cache.size()
-        
-        # Check main cache
-        async with self.cache._lock:
-            for key, entry in self.cache.cache.items():
-                if entry.is_expired():
-                    continue
-                
-                # Filter by provider if specified
-                if provider and entry.provider != provider:
-                    continue
-                
-                # Filter by model if strict matching needed
-                if entry.model != request.model:
-                    continue
-                
-                # Calculate similarity
-                if entry.prompt_embedding is not None:
-                    similarity = self._calculate_similarity(
-                        query_embedding, 
-                        entry.prompt_embedding
-                    )
-                    
-                    if similarity >= self.similarity_threshold:
-                        if best_match is None or similarity > best_match[0]:
-                            best_match = (similarity, entry)
+        while best_match is None:
+            match = self.semantic_index.search(
+                query_embedding,
+                self.similarity_threshold,
+                provider=provider,
+                model=request.model
+            )
+            if match is None:
+                break
+            key, similarity = match
+            entry = self.cache.cache.get(key)
+            if entry is None or entry.is_expired():
+                # Expired, or evicted while we searched: try the next best
+                self._drop_embedding(key)
+                continue
+            best_match = (similarity, entry)
         
         if best_match:
             self.stats.semantic_matches += 1
@@ -360,6 +342,17 @@ class ResponseCache:
                 )
                 return entry.response
         
+        # Try the persistent store (shared with other processes)
+        if self.persistent_store:
+            entry = await self._load_persistent(request, cache_key)
+            if entry and (not provider or entry.provider == provider):
+                self.stats.hits += 1
+                self.stats.exact_matches += 1
+                self.stats.persistent_hits += 1
+                self.stats.total_response_time_saved_ms += entry.response.response_time_ms
+                self.logger.debug(f"Cache hit (persistent): {cache_key[:8]}...")
+                return entry.response
+        
         # Try semantic matching if enabled
         if use_semantic and self.enable_semantic:
             entry = await self.find_semantic_match(request, provider)
@@ -397,19 +390,47 @@ class ResponseCache:
         if ttl_seconds is None:
             ttl_seconds = self.ttl_config.get(content_type, self.default_ttl)
         
+        timestamp = time.time()
+        await self._store_local(cache_key, request, response, ttl_seconds, timestamp)
+        
+        # Write through to the persistent store
+        if self.persistent_store:
+            value = {
+                "response": response.model_dump(mode="json"),
+                "timestamp": timestamp,
+                "ttl_seconds": ttl_seconds
+            }
+            await self._run_persistent(
+                self.persistent_store.put, cache_key, value, ttl_seconds,
+                response.provider, response.model
+            )
+        
+        self.logger.debug(
+            f"Cached response: {cache_key[:8]}... (TTL: {ttl_seconds}s, "
+            f"Provider: {response.provider})"
+        )
+    
+    async def _store_local(
+        self,
+        cache_key: str,
+        request: LLMRequest,
+        response: LLMResponse,
+        ttl_seconds: int,
+        timestamp: float
+    ) -> CacheEntry:
+        """Store an entry in the in-memory caches and semantic index."""
         # Generate embedding for semantic search
         prompt_text = " ".join([msg["content"] for msg in request.messages])
         embedding = None
         if self.enable_semantic:
-            embedding = self._mock_generate_embedding(prompt_text)
-            self.embedding_index[cache_key] = embedding
+            embedding = self._generate_embedding(prompt_text)
         
         # Create cache entry
         entry = CacheEntry(
             response=response,
             request_hash=cache_key,
             prompt_embedding=embedding,
-            timestamp=time.time(),
+            timestamp=timestamp,
             ttl_seconds=ttl_seconds,
             provider=response.provider,
             model=response.model
@@ -420,6 +441,10 @@ class ResponseCache:
         self.stats.evictions += evicted
         if evicted > 0:
             self.stats.size_evictions += evicted
+        if embedding is not None:
+            self.semantic_index.insert(
+                cache_key, embedding, provider=response.provider, model=response.model
+            )
         
         # Store in provider-specific cache if applicable
         if response.provider:
@@ -428,9 +453,30 @@ class ResponseCache:
             )
             self.stats.evictions += provider_evicted
         
-        self.logger.debug(
-            f"Cached response: {cache_key[:8]}... (TTL: {ttl_seconds}s, "
-            f"Provider: {response.provider})"
+        return entry
+    
+    async def _run_persistent(self, operation, *args) -> Any:
+        """Run a persistent store call off the event loop; failures are misses."""
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, operation, *args)
+        except Exception as e:
+            self.logger.warning(f"Persistent cache operation failed: {e}")
+            return None
+    
+    async def _load_persistent(self, request: LLMRequest, cache_key: str) -> Optional[CacheEntry]:
+        """Look up a key in the persistent store and promote a hit to memory."""
+        value = await self._run_persistent(self.persistent_store.get, cache_key)
+        if value is None:
+            return None
+        try:
+            response = LLMResponse.model_validate(value["response"])
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable persistent entry {cache_key[:8]}...: {e}")
+            return None
+        # Keep the original expiry rather than restarting the TTL
+        return await self._store_local(
+            cache_key, request, response, value["ttl_seconds"], value["timestamp"]
         )
     
     async def invalidate(
@@ -459,8 +505,9 @@ class ResponseCache:
                 if cache_key in self.cache.cache:
                     del self.cache.cache[cache_key]
                     invalidated += 1
-                    if cache_key in self.embedding_index:
-                        del self.embedding_index[cache_key]
+                    self._drop_embedding(cache_key)
+            if self.persistent_store:
+                await self._run_persistent(self.persistent_store.delete, [cache_key])
         
         elif provider or model:
             # Invalidate by provider or model
@@ -474,9 +521,10 @@ class ResponseCache:
                 
                 for key in keys_to_remove:
                     del self.cache.cache[key]
-                    if key in self.embedding_index:
-                        del self.embedding_index[key]
+                    self._drop_embedding(key)
                     invalidated += 1
+            if self.persistent_store:
+                await self._run_persistent(self.persistent_store.delete_where, provider, model)
         
         self.logger.info(f"Invalidated {invalidated} cache entries")
         return invalidated
@@ -510,21 +558,36 @@ class ResponseCache:
             "misses": self.stats.misses,
             "exact_matches": self.stats.exact_matches,
             "semantic_matches": self.stats.semantic_matches,
+            "persistent_hits": self.stats.persistent_hits,
             "evictions": self.stats.evictions,
             "expired_evictions": self.stats.expired_evictions,
             "size_evictions": self.stats.size_evictions,
             "avg_time_saved_ms": self.stats.avg_time_saved_ms,
             "total_time_saved_ms": self.stats.total_response_time_saved_ms,
             "semantic_enabled": self.enable_semantic,
-            "provider_caches": list(self.provider_caches.keys())
+            "semantic_index": self.semantic_index.get_stats(),
+            "embedding_backend": self.embedding_backend.name,
+            "provider_caches": list(self.provider_caches.keys()),
+            "persistent": (
+                await self._run_persistent(self.persistent_store.get_stats)
+                if self.persistent_store else None
+            )
         }
     
-    async def clear(self) -> None:
-        """Clear all cache entries and reset statistics."""
+    async def clear(self, include_persistent: bool = True) -> None:
+        """
+        Clear all cache entries and reset statistics.
+        
+        Args:
+            include_persistent: Also empty the persistent store, which
+                other processes share
+        """
         await self.cache.clear()
         for provider_cache in self.provider_caches.values():
             await provider_cache.clear()
-        self.embedding_index.clear()
+        self.semantic_index.clear()
+        if include_persistent and self.persistent_store:
+            await self._run_persistent(self.persistent_store.clear)
         self.stats = CacheStats()
         self.logger.info("Cache cleared")
 
@@ -549,7 +612,9 @@ class CacheManager:
         default_ttl_seconds: int = 3600,
         similarity_threshold: float = 0.95,
         enable_semantic_matching: bool = True,
-        is_default: bool = False
+        is_default: bool = False,
+        embedding_backend: Optional[EmbeddingBackend] = None,
+        persistent_path: Optional[str] = None
     ) -> ResponseCache:
         """
         Create a new cache instance.
@@ -561,6 +626,8 @@ class CacheManager:
             similarity_threshold: Semantic similarity threshold
             enable_semantic_matching: Enable semantic matching
             is_default: Set as default cache
+            embedding_backend: Prompt embedding backend (default: hashing)
+            persistent_path: SQLite file for a persistent L2 shared across processes
             
         Returns:
             Created cache instance
@@ -569,7 +636,9 @@ class CacheManager:
             max_size=max_size,
             default_ttl_seconds=default_ttl_seconds,
             similarity_threshold=similarity_threshold,
-            enable_semantic_matching=enable_semantic_matching
+            enable_semantic_matching=enable_semantic_matching,
+            embedding_backend=embedding_backend,
+            persistent_store=PersistentCacheStore(persistent_path) if persistent_path else None
         )
         
         self.caches[name] = cache
@@ -32,6 +32,7 @@ class FallbackStrategy(str, Enum):
     COST_OPTIMIZED = "cost_optimized"  # Prefer cheaper providers
     QUALITY_OPTIMIZED = "quality_optimized"  # Prefer higher quality
     PARALLEL = "parallel"  # Try multiple providers simultaneously
+    LATENCY_OPTIMIZED = "latency_optimized"  # Prefer lowest recent latency
 
 
 class CostLimits(BaseModel):
@@ -185,6 +186,8 @@ class LLMConfig(BaseModel):
     # Fallback configuration
     fallback_strategy: FallbackStrategy = Field(default=FallbackStrategy.SEQUENTIAL)
     fallback_enabled: bool = Field(default=True)
+    hedge_requests: bool = Field(default=False)  # Race a backup when the primary is slow
+    hedge_budget: float = Field(default=0.05, ge=0.0, le=1.0)  # Max fraction of requests hedged
     
     # Multi-LLM synthesis
     synthesis: SynthesisConfig = Field(default_factory=SynthesisConfig)
@@ -3,12 +3,20 @@ M008: Cost Tracking and Budget Management.
 
 Tracks LLM usage costs across all providers with daily/monthly budget limits,
 cost alerts, and usage analytics.
+
+Usage is persisted to an append-only SQLite ledger. Recording usage appends
+one row and updates the daily/monthly rollup rows in the same transaction,
+so the cost of a write does not grow with history. Startup loads only the
+rollups and alert history; individual records are read back on demand for
+analytics. Records past the retention window are compacted away
+periodically.
 """
 
-import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from collections import defaultdict
@@ -18,6 +26,37 @@ from .config import CostLimits, UsageRecord
 
 logger = logging.getLogger(__name__)
 
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    total_cost TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_records_timestamp ON usage_records (timestamp);
+CREATE TABLE IF NOT EXISTS daily_costs (
+    day TEXT PRIMARY KEY,
+    cost TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS monthly_costs (
+    month TEXT PRIMARY KEY,
+    cost TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alerts_sent (
+    alert_key TEXT PRIMARY KEY,
+    sent_at TEXT NOT NULL
+);
+"""
+
+
+def _decimal_add(total: str, amount: str) -> str:
+    """SQL function adding two costs stored as decimal strings, without rounding."""
+    return str(Decimal(total) + Decimal(amount))
+
 
 class UsageStats:
     """Statistics for LLM usage and costs."""
@@ -65,34 +104,69 @@ class CostTracker:
     automated alerts, and detailed usage analytics.
     """
     
-    def __init__(self, cost_limits: CostLimits, storage_path: Optional[Path] = None):
+    def __init__(
+        self,
+        cost_limits: CostLimits,
+        storage_path: Optional[Path] = None,
+        retention_days: int = 90,
+        compaction_interval: int = 1000
+    ):
         """
         Initialize cost tracker.
         
         Args:
             cost_limits: Cost configuration and limits
-            storage_path: Path to store usage data (defaults to ./data/usage.json)
+            storage_path: Path to store usage data (defaults to ./data/usage.json).
+                The ledger is kept next to it with a .db suffix; an existing
+                JSON file at this path is imported once and renamed.
+            retention_days: Days of individual records and daily totals kept
+            compaction_interval: Records between compaction passes
         """
         self.cost_limits = cost_limits
-        self.storage_path = storage_path or Path("./data/usage.json")
+        self.storage_path = Path(storage_path or "./data/usage.json")
+        self.ledger_path = self.storage_path.with_suffix(".db")
+        self.retention_days = retention_days
+        self.compaction_interval = compaction_interval
+        self._records_since_compaction = 0
         
         # Create storage directory if needed
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # In-memory usage tracking
-        self._usage_records: List[UsageRecord] = []
+        # Running totals (loaded from the rollup tables)
         self._daily_costs: Dict[str, Decimal] = defaultdict(lambda: Decimal("0"))  # date -> cost
         self._monthly_costs: Dict[str, Decimal] = defaultdict(lambda: Decimal("0"))  # year-month -> cost
         
         # Alert history
         self._alerts_sent: Dict[str, datetime] = {}  # alert_key -> last_sent_time
         
-        # Load existing data
+        self._conn = sqlite3.connect(
+            str(self.ledger_path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(LEDGER_SCHEMA)
+        self._conn.create_function("decimal_add", 2, _decimal_add, deterministic=True)
+        
+        # Import a legacy JSON usage file, then load rollups
+        self._migrate_json_storage()
         self._load_usage_data()
         
         # Cleanup old data on startup
         self._cleanup_old_data()
     
+    @property
+    def _usage_records(self) -> List[UsageRecord]:
+        """All retained usage records, oldest first (read from the ledger)."""
+        rows = self._conn.execute("SELECT record FROM usage_records ORDER BY id")
+        return [UsageRecord.model_validate_json(record) for (record,) in rows]
+    
+    @_usage_records.setter
+    def _usage_records(self, records: Iterable[UsageRecord]) -> None:
+        """Replace the ledger's records (rollups are left unchanged)."""
+        with self._transaction():
+            self._conn.execute("DELETE FROM usage_records")
+            self._append_records(records)
+    
     async def record_usage(self, usage_record: UsageRecord) -> List[CostAlert]:
         """
         Record LLM usage and check for budget alerts.
@@ -103,21 +177,50 @@ class CostTracker:
         Returns:
             List of cost alerts triggered by this usage
         """
-        # Add to records
-        self._usage_records.append(usage_record)
-        
         # Update daily and monthly totals
         usage_date = usage_record.timestamp.date()
-        usage_month = usage_date.strftime("%Y-%m")
+        day_key = usage_date.isoformat()
+        month_key = usage_date.strftime("%Y-%m")
         
-        self._daily_costs[usage_date.isoformat()] += usage_record.total_cost
-        self._monthly_costs[usage_month] += usage_record.total_cost
+        daily_total = self._daily_costs[day_key] + usage_record.total_cost
+        monthly_total = self._monthly_costs[month_key] + usage_record.total_cost
+        cost = str(usage_record.total_cost)
+        
+        # Append the record and add it to the stored rollups in one transaction;
+        # other trackers on the same ledger add to the same rows
+        try:
+            with self._transaction():
+                self._append_records([usage_record])
+                # Read back in the same transaction (RETURNING needs SQLite 3.35)
+                self._conn.execute(
+                    "INSERT INTO daily_costs (day, cost) VALUES (?, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET cost = decimal_add(cost, excluded.cost)",
+                    (day_key, cost)
+                )
+                (stored_daily,), = self._conn.execute(
+                    "SELECT cost FROM daily_costs WHERE day = ?", (day_key,)
+                ).fetchall()
+                self._conn.execute(
+                    "INSERT INTO monthly_costs (month, cost) VALUES (?, ?) "
+                    "ON CONFLICT(month) DO UPDATE SET cost = decimal_add(cost, excluded.cost)",
+                    (month_key, cost)
+                )
+                (stored_monthly,), = self._conn.execute(
+                    "SELECT cost FROM monthly_costs WHERE month = ?", (month_key,)
+                ).fetchall()
+            daily_total, monthly_total = Decimal(stored_daily), Decimal(stored_monthly)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save usage data: {e}")
+        
+        self._daily_costs[day_key] = daily_total
+        self._monthly_costs[month_key] = monthly_total
         
         # Check for alerts
         alerts = self._check_cost_alerts()
         
-        # Save updated data
-        await self._save_usage_data()
+        self._records_since_compaction += 1
+        if self._records_since_compaction >= self.compaction_interval:
+            self._cleanup_old_data()
         
         return alerts
     
@@ -153,40 +256,39 @@ class CostTracker:
         stats = UsageStats()
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # Filter records
-        filtered_records = [
-            record for record in self._usage_records
-            if (record.timestamp >= cutoff_date and
-                (provider_filter is None or record.provider == provider_filter))
-        ]
+        # Only the columns needed, for records inside the window
+        query = (
+            "SELECT timestamp, provider, model, input_tokens, output_tokens, total_cost "
+            "FROM usage_records WHERE timestamp >= ?"
+        )
+        params: List[Any] = [cutoff_date.isoformat()]
+        if provider_filter is not None:
+            query += " AND provider = ?"
+            params.append(provider_filter)
         
         # Calculate statistics
-        for record in filtered_records:
+        for timestamp, provider, model, input_tokens, output_tokens, cost in (
+            self._conn.execute(query, params)
+        ):
+            tokens = input_tokens + output_tokens
+            cost = Decimal(cost)
             stats.total_requests += 1
-            stats.total_tokens += record.input_tokens + record.output_tokens
-            stats.total_cost += record.total_cost
+            stats.total_tokens += tokens
+            stats.total_cost += cost
             
             # Provider breakdown
-            stats.provider_breakdown[record.provider]["requests"] += 1
-            stats.provider_breakdown[record.provider]["tokens"] += (
-                record.input_tokens + record.output_tokens
-            )
-            stats.provider_breakdown[record.provider]["cost"] += record.total_cost
+            stats.provider_breakdown[provider]["requests"] += 1
+            stats.provider_breakdown[provider]["tokens"] += tokens
+            stats.provider_breakdown[provider]["cost"] += cost
             
             # Model breakdown
-            stats.model_breakdown[record.model]["requests"] += 1
-            stats.model_breakdown[record.model]["tokens"] += (
-                record.input_tokens + record.output_tokens
-            )
-            stats.model_breakdown[record.model]["cost"] += record.total_cost
-            
-            # Daily breakdown
-            day_key = record.timestamp.date().isoformat()
-            stats.daily_costs[day_key] += record.total_cost
+            stats.model_breakdown[model]["requests"] += 1
+            stats.model_breakdown[model]["tokens"] += tokens
+            stats.model_breakdown[model]["cost"] += cost
             
-            # Hourly breakdown
-            hour_key = record.timestamp.strftime("%Y-%m-%d %H:00")
-            stats.hourly_costs[hour_key] += record.total_cost
+            # Daily and hourly breakdown (ISO timestamps: YYYY-MM-DDTHH...)
+            stats.daily_costs[timestamp[:10]] += cost
+            stats.hourly_costs[f"{timestamp[:10]} {timestamp[11:13]}:00"] += cost
         
         return stats
     
@@ -255,7 +357,7 @@ class CostTracker:
                     percentage=daily_percentage,
                     message=f"Daily spending is {daily_percentage:.1%} of limit (${daily_cost}/${self.cost_limits.daily_limit_usd})"
                 ))
-                self._alerts_sent[alert_key] = datetime.utcnow()
+                self._mark_alert_sent(alert_key)
         
         # Daily emergency threshold
         if (self.cost_limits.emergency_stop_enabled and 
@@ -270,7 +372,7 @@ class CostTracker:
                     percentage=daily_percentage,
                     message=f"EMERGENCY: Daily spending at {daily_percentage:.1%} of limit!"
                 ))
-                self._alerts_sent[alert_key] = datetime.utcnow()
+                self._mark_alert_sent(alert_key)
         
         # Check monthly alerts
         monthly_percentage = float(monthly_cost / self.cost_limits.monthly_limit_usd)
@@ -287,7 +389,7 @@ class CostTracker:
                     percentage=monthly_percentage,
                     message=f"Monthly spending is {monthly_percentage:.1%} of limit (${monthly_cost}/${self.cost_limits.monthly_limit_usd})"
                 ))
-                self._alerts_sent[alert_key] = datetime.utcnow()
+                self._mark_alert_sent(alert_key)
         
         # Monthly emergency threshold
         if (self.cost_limits.emergency_stop_enabled and
@@ -302,7 +404,7 @@ class CostTracker:
                     percentage=monthly_percentage,
                     message=f"EMERGENCY: Monthly spending at {monthly_percentage:.1%} of limit!"
                 ))
-                self._alerts_sent[alert_key] = datetime.utcnow()
+                self._mark_alert_sent(alert_key)
         
         return alerts
     
@@ -315,105 +417,127 @@ class CostTracker:
         # Don't send same alert more than once per hour
         return (datetime.utcnow() - last_sent).seconds > 3600
     
+    def _mark_alert_sent(self, alert_key: str) -> None:
+        """Remember when an alert was sent, across restarts."""
+        sent_at = datetime.utcnow()
+        self._alerts_sent[alert_key] = sent_at
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO alerts_sent (alert_key, sent_at) VALUES (?, ?)",
+                (alert_key, sent_at.isoformat())
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save alert history: {e}")
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on error."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _append_records(self, records: Iterable[UsageRecord]) -> None:
+        """Append records to the ledger; caller manages the transaction."""
+        self._conn.executemany(
+            "INSERT INTO usage_records (timestamp, provider, model, input_tokens, "
+            "output_tokens, total_cost, record) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (record.timestamp.isoformat(), record.provider, record.model,
+                 record.input_tokens, record.output_tokens, str(record.total_cost),
+                 record.model_dump_json())
+                for record in records
+            ]
+        )
+    
     def _load_usage_data(self) -> None:
-        """Load usage data from storage."""
+        """Load rollups and alert history from the ledger."""
         try:
-            if not self.storage_path.exists():
-                return
-            
-            with open(self.storage_path, 'r') as f:
-                data = json.load(f)
-            
-            # Load usage records
-            records_data = data.get('usage_records', [])
-            for record_data in records_data:
-                # Convert string timestamps back to datetime
-                record_data['timestamp'] = datetime.fromisoformat(record_data['timestamp'])
-                # Convert string decimals back to Decimal
-                for field in ['input_cost', 'output_cost', 'total_cost']:
-                    record_data[field] = Decimal(str(record_data[field]))
-                
-                self._usage_records.append(UsageRecord(**record_data))
-            
-            # Load aggregated costs
-            daily_costs = data.get('daily_costs', {})
-            for date_str, cost in daily_costs.items():
-                self._daily_costs[date_str] = Decimal(str(cost))
+            for day, cost in self._conn.execute("SELECT day, cost FROM daily_costs"):
+                self._daily_costs[day] = Decimal(cost)
             
-            monthly_costs = data.get('monthly_costs', {})
-            for month_str, cost in monthly_costs.items():
-                self._monthly_costs[month_str] = Decimal(str(cost))
+            for month, cost in self._conn.execute("SELECT month, cost FROM monthly_costs"):
+                self._monthly_costs[month] = Decimal(cost)
             
-            # Load alert history
-            alerts_sent = data.get('alerts_sent', {})
-            for alert_key, timestamp_str in alerts_sent.items():
-                self._alerts_sent[alert_key] = datetime.fromisoformat(timestamp_str)
+            for alert_key, sent_at in self._conn.execute("SELECT alert_key, sent_at FROM alerts_sent"):
+                self._alerts_sent[alert_key] = datetime.fromisoformat(sent_at)
             
-            logger.info(f"Loaded {len(self._usage_records)} usage records from {self.storage_path}")
+            logger.info(
+                f"Loaded {len(self._daily_costs)} daily and {len(self._monthly_costs)} "
+                f"monthly totals from {self.ledger_path}"
+            )
             
-        except Exception as e:
+        except (sqlite3.Error, ValueError) as e:
             logger.error(f"Failed to load usage data: {e}")
     
-    async def _save_usage_data(self) -> None:
-        """Save usage data to storage."""
+    def _migrate_json_storage(self) -> None:
+        """Import a usage file written by the JSON storage, then rename it."""
+        if (self.storage_path == self.ledger_path or not self.storage_path.exists()
+                or self.storage_path.stat().st_size == 0):
+            return
+        
         try:
-            # Prepare data for serialization
-            data = {
-                'usage_records': [],
-                'daily_costs': {},
-                'monthly_costs': {},
-                'alerts_sent': {}
-            }
-            
-            # Convert usage records
-            for record in self._usage_records:
-                record_dict = record.model_dump()
-                # Convert datetime to string
-                record_dict['timestamp'] = record.timestamp.isoformat()
-                # Convert Decimal to string for JSON serialization
-                for field in ['input_cost', 'output_cost', 'total_cost']:
-                    record_dict[field] = str(record_dict[field])
-                data['usage_records'].append(record_dict)
-            
-            # Convert daily costs
-            for date_str, cost in self._daily_costs.items():
-                data['daily_costs'][date_str] = str(cost)
-            
-            # Convert monthly costs
-            for month_str, cost in self._monthly_costs.items():
-                data['monthly_costs'][month_str] = str(cost)
-            
-            # Convert alert timestamps
-            for alert_key, timestamp in self._alerts_sent.items():
-                data['alerts_sent'][alert_key] = timestamp.isoformat()
+            with open(self.storage_path, 'r') as f:
+                data = json.load(f)
             
-            # Write to file atomically
-            temp_path = self.storage_path.with_suffix('.tmp')
-            with open(temp_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            records = [
+                UsageRecord.model_validate(record_data)
+                for record_data in data.get('usage_records', [])
+            ]
+            with self._transaction():
+                self._append_records(records)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO daily_costs (day, cost) VALUES (?, ?)",
+                    [(day, str(cost)) for day, cost in data.get('daily_costs', {}).items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO monthly_costs (month, cost) VALUES (?, ?)",
+                    [(month, str(cost)) for month, cost in data.get('monthly_costs', {}).items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO alerts_sent (alert_key, sent_at) VALUES (?, ?)",
+                    list(data.get('alerts_sent', {}).items())
+                )
             
-            # Atomic rename
-            temp_path.replace(self.storage_path)
+            self.storage_path.replace(self.storage_path.with_suffix('.json.migrated'))
+            logger.info(f"Imported {len(records)} usage records from {self.storage_path}")
             
         except Exception as e:
-            logger.error(f"Failed to save usage data: {e}")
+            logger.error(f"Failed to import usage data from {self.storage_path}: {e}")
     
     def _cleanup_old_data(self) -> None:
-        """Remove old usage records to prevent unbounded growth."""
-        cutoff_date = datetime.utcnow() - timedelta(days=90)  # Keep 90 days
+        """Compact the ledger: drop records, daily totals and alerts past retention."""
+        self._records_since_compaction = 0
+        cutoff_date = datetime.utcnow() - timedelta(days=self.retention_days)
+        cutoff_date_str = (date.today() - timedelta(days=self.retention_days)).isoformat()
         
-        original_count = len(self._usage_records)
-        self._usage_records = [
-            record for record in self._usage_records
-            if record.timestamp >= cutoff_date
+        # Clean up old alert history (keep 30 days)
+        alert_cutoff = datetime.utcnow() - timedelta(days=30)
+        old_alerts = [
+            alert_key for alert_key, timestamp in self._alerts_sent.items()
+            if timestamp < alert_cutoff
         ]
         
-        removed_count = original_count - len(self._usage_records)
+        try:
+            with self._transaction():
+                removed_count = self._conn.execute(
+                    "DELETE FROM usage_records WHERE timestamp < ?", (cutoff_date.isoformat(),)
+                ).rowcount
+                self._conn.execute("DELETE FROM daily_costs WHERE day < ?", (cutoff_date_str,))
+                self._conn.executemany(
+                    "DELETE FROM alerts_sent WHERE alert_key = ?", [(key,) for key in old_alerts]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to compact usage ledger: {e}")
+            return
+        
         if removed_count > 0:
             logger.info(f"Cleaned up {removed_count} old usage records")
         
-        # Clean up old daily costs (keep 90 days)
-        cutoff_date_str = (date.today() - timedelta(days=90)).isoformat()
+        # Clean up old daily costs (keep retention window)
         old_dates = [
             date_str for date_str in self._daily_costs.keys()
             if date_str < cutoff_date_str
@@ -421,11 +545,10 @@ class CostTracker:
         for old_date in old_dates:
             del self._daily_costs[old_date]
         
-        # Clean up old alert history (keep 30 days)
-        alert_cutoff = datetime.utcnow() - timedelta(days=30)
-        old_alerts = [
-            alert_key for alert_key, timestamp in self._alerts_sent.items()
-            if timestamp < alert_cutoff
-        ]
         for old_alert in old_alerts:
-            del self._alerts_sent[old_alert]
\ No newline at end of file
+            del self._alerts_sent[old_alert]
+    
+    def close(self) -> None:
+        """Close the ledger."""
+        self._conn.close()
+
@@ -0,0 +1,247 @@
+"""
+M008: Local embedding backends for semantic cache keys.
+
+Embeddings are computed offline, without an embeddings API:
+
+- HashingEmbedding (default): signed feature hashing of character
+  n-grams. Hashes are computed with NumPy over the UTF-8 bytes of a whole
+  batch at once, so cost is linear in prompt length with no per-character
+  Python loop.
+- SentenceTransformerEmbedding: a small local transformer model, used
+  when sentence-transformers is installed.
+- CachedEmbedding: LRU cache keyed by prompt hash in front of any backend.
+
+All backends return unit-length float32 rows, so cosine similarity is a
+dot product.
+"""
+
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None
+
+logger = logging.getLogger(__name__)
+
+# 64-bit FNV prime and a splitmix64 finalizer constant for hash mixing
+_PRIME = np.uint64(0x100000001B3)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+
+class EmbeddingBackend(ABC):
+    """Interface for text embedding backends."""
+
+    name: str = "base"
+    dim: int
+
+    @abstractmethod
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed several texts; returns a (len(texts), dim) float32 array."""
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text."""
+        return self.embed_batch([text])[0]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedding(EmbeddingBackend):
+    """
+    Feature-hashed character n-gram embedding.
+
+    Each lowercased text is padded with spaces so n-grams at word edges
+    mark word boundaries. Every n-gram is hashed to a dimension and a sign;
+    counts are damped with log1p so long prompts are not dominated by
+    repeated n-grams.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 384, ngram_range: Tuple[int, int] = (3, 5)):
+        """
+        Initialize the backend.
+
+        Args:
+            dim: Embedding dimensions
+            ngram_range: Smallest and largest character n-gram lengths
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        encoded = [f" {' '.join(text.lower().split())} ".encode('utf-8') for text in texts]
+        lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+        # Document of every byte position, to drop n-grams spanning two texts
+        owners = np.repeat(np.arange(len(texts)), lengths)
+
+        buckets, signs, documents = [], [], []
+        with np.errstate(over='ignore'):
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                count = len(data) - n + 1
+                if count <= 0:
+                    continue
+                hashes = np.full(count, np.uint64(n), dtype=np.uint64)
+                for offset in range(n):
+                    hashes = (hashes ^ data[offset:offset + count]) * _PRIME
+                hashes ^= hashes >> np.uint64(31)
+                hashes *= _MIX
+                hashes ^= hashes >> np.uint64(29)
+
+                valid = owners[:count] == owners[n - 1:]
+                hashes = hashes[valid]
+                buckets.append((hashes % np.uint64(self.dim)).astype(np.int64))
+                signs.append(np.where(hashes >> np.uint64(63), -1.0, 1.0))
+                documents.append(owners[:count][valid])
+
+        if not buckets:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        positions = np.concatenate(documents) * self.dim + np.concatenate(buckets)
+        counts = np.bincount(positions, weights=np.concatenate(signs),
+                             minlength=len(texts) * self.dim)
+        matrix = counts.reshape(len(texts), self.dim)
+        return _normalize_rows(np.sign(matrix) * np.log1p(np.abs(matrix)))
+
+
+class SentenceTransformerEmbedding(EmbeddingBackend):
+    """Embedding from a local sentence-transformers model."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: str = "cpu",
+                 batch_size: int = 32):
+        """
+        Load the model.
+
+        Args:
+            model_name: Model name or local path
+            device: Torch device
+            batch_size: Texts per forward pass
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers is required for SentenceTransformerEmbedding")
+        self.model = SentenceTransformer(model_name, device=device)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        )
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+class CachedEmbedding(EmbeddingBackend):
+    """LRU cache of embeddings keyed by a hash of the text."""
+
+    def __init__(self, backend: EmbeddingBackend, max_size: int = 4096):
+        """
+        Wrap a backend.
+
+        Args:
+            backend: Backend computing cache misses
+            max_size: Embeddings kept in the cache
+        """
+        self.backend = backend
+        self.name = f"cached-{backend.name}"
+        self.dim = backend.dim
+        self.max_size = max_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    result[i] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            # One backend call for all distinct misses
+            vectors = self.backend.embed_batch([texts[indices[0]] for indices in missing.values()])
+            with self._lock:
+                for (key, indices), vector in zip(missing.items(), vectors):
+                    result[indices] = vector
+                    vector = vector.copy()
+                    vector.setflags(write=False)
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def clear(self):
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and hit rate."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': self.backend.name,
+                'size': len(self._cache),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+def create_embedding_backend(backend: str = "hashing", cache_size: int = 4096,
+                             **options) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name.
+
+    Args:
+        backend: "hashing" or "sentence-transformers"
+        cache_size: Size of the embedding cache in front of it (0 disables)
+        **options: Backend constructor arguments
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend == HashingEmbedding.name:
+        embedder: EmbeddingBackend = HashingEmbedding(**options)
+    elif backend == SentenceTransformerEmbedding.name:
+        embedder = SentenceTransformerEmbedding(**options)
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return CachedEmbedding(embedder, cache_size) if cache_size else embedder
@@ -3,11 +3,17 @@ M008: Fallback Manager for Error Handling and Provider Chaining.
 
 Implements intelligent fallback strategies when providers fail, including
 retry logic, circuit breaker patterns, and cost-optimized provider selection.
+
+Live per-provider latency (EWMA and a p95 over recent calls) drives the
+latency-optimized strategy and hedged requests: when the primary provider
+runs past its p95, a backup provider is raced against it and the loser is
+cancelled, within a budget on the fraction of requests hedged.
 """
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Callable, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass
@@ -51,6 +57,44 @@ class CircuitBreakerState:
     next_attempt_time: Optional[datetime] = None
 
 
+class LatencyStats:
+    """Live latency statistics for one provider."""
+    
+    def __init__(self, alpha: float = 0.2, window: int = 100):
+        """
+        Initialize statistics.
+        
+        Args:
+            alpha: EWMA weight of the newest sample
+            window: Recent samples kept for percentiles
+        """
+        self.alpha = alpha
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.ewma_ms: Optional[float] = None
+        self._p95_ms: Optional[float] = None
+    
+    def record(self, latency_ms: float) -> None:
+        """Add a latency sample."""
+        if self.ewma_ms is None:
+            self.ewma_ms = latency_ms
+        else:
+            self.ewma_ms = self.alpha * latency_ms + (1 - self.alpha) * self.ewma_ms
+        self.samples.append(latency_ms)
+        self._p95_ms = None
+    
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+    
+    @property
+    def p95_ms(self) -> Optional[float]:
+        """95th percentile of the recent window (cached until the next sample)."""
+        if self._p95_ms is None and self.samples:
+            ordered = sorted(self.samples)
+            self._p95_ms = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        return self._p95_ms
+
+
 class FallbackManager:
     """
     Manages fallback strategies and circuit breaker patterns for LLM providers.
@@ -58,7 +102,8 @@ class FallbackManager:
     Implements intelligent error handling with:
     - Circuit breaker pattern to avoid hammering failed providers
     - Configurable retry strategies with exponential backoff  
-    - Cost-optimized and quality-optimized provider selection
+    - Cost-optimized, quality-optimized and latency-optimized provider selection
+    - Hedged requests against slow providers
     - Detailed fallback attempt logging for analytics
     """
     
@@ -69,7 +114,13 @@ class FallbackManager:
         max_retries: int = 3,
         base_retry_delay: float = 1.0,
         circuit_breaker_threshold: int = 5,
-        circuit_breaker_timeout: int = 60
+        circuit_breaker_timeout: int = 60,
+        hedge_requests: bool = False,
+        hedge_budget: float = 0.05,
+        hedge_min_delay_ms: float = 50.0,
+        latency_window: int = 100,
+        latency_alpha: float = 0.2,
+        min_latency_samples: int = 10
     ):
         """
         Initialize fallback manager.
@@ -81,6 +132,12 @@ class FallbackManager:
             base_retry_delay: Base delay between retries (seconds)
             circuit_breaker_threshold: Failures before opening circuit
             circuit_breaker_timeout: Seconds to wait before trying again
+            hedge_requests: Race a backup provider once the primary runs past its p95
+            hedge_budget: Maximum fraction of requests that may send a hedge
+            hedge_min_delay_ms: Lower bound on the wait before hedging
+            latency_window: Recent calls per provider used for p95
+            latency_alpha: EWMA weight of the newest latency sample
+            min_latency_samples: Samples needed before a provider's p95 is trusted
         """
         self.providers = providers
         self.fallback_strategy = fallback_strategy
@@ -97,6 +154,132 @@ class FallbackManager:
         # Fallback attempt history
         self.fallback_attempts: List[FallbackAttempt] = []
         
+        # Live latency statistics for each provider
+        self.latency_window = latency_window
+        self.latency_alpha = latency_alpha
+        self.min_latency_samples = min_latency_samples
+        self.latency_stats: Dict[str, LatencyStats] = {
+            name: LatencyStats(latency_alpha, latency_window) for name in providers.keys()
+        }
+        
+        # Hedging
+        self.hedge_requests = hedge_requests
+        self.hedge_budget = hedge_budget
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self.hedge_stats = {
+            "requests": 0,
+            "hedged": 0,
+            "backup_wins": 0,
+            "budget_exhausted": 0
+        }
+    
+    def record_latency(self, provider_name: str, latency_ms: float) -> None:
+        """
+        Record a provider call latency.
+        
+        Args:
+            provider_name: Provider that served the call
+            latency_ms: Time to a complete response (or until cancelled)
+        """
+        stats = self.latency_stats.get(provider_name)
+        if stats is None:
+            stats = self.latency_stats[provider_name] = LatencyStats(
+                self.latency_alpha, self.latency_window
+            )
+        stats.record(latency_ms)
+    
+    def _hedge_delay_ms(self, provider_name: str) -> Optional[float]:
+        """Wait before hedging a provider, or None without enough samples."""
+        stats = self.latency_stats.get(provider_name)
+        if stats is None or stats.count < self.min_latency_samples:
+            return None
+        return max(stats.p95_ms, self.hedge_min_delay_ms)
+    
+    def _take_hedge_budget(self) -> bool:
+        """Spend one hedge if hedges stay within the budgeted fraction."""
+        if self.hedge_stats["hedged"] + 1 > self.hedge_budget * self.hedge_stats["requests"]:
+            self.hedge_stats["budget_exhausted"] += 1
+            return False
+        self.hedge_stats["hedged"] += 1
+        return True
+    
+    async def _timed_generate(
+        self,
+        provider_name: str,
+        request: LLMRequest
+    ) -> LLMResponse:
+        """Call a provider and record its latency on success."""
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
+        response = await self.providers[provider_name].generate(request)
+        self.record_latency(provider_name, (loop.time() - start_time) * 1000)
+        return response
+    
+    async def _generate_hedged(
+        self,
+        primary: str,
+        request: LLMRequest,
+        backups: List[str]
+    ) -> Tuple[str, LLMResponse]:
+        """
+        Call the primary; past its p95, race the first usable backup.
+        
+        Returns:
+            Tuple of (provider that answered, response)
+            
+        Raises:
+            Exception: The primary's error if no call succeeded
+        """
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
+        primary_task = asyncio.ensure_future(self._timed_generate(primary, request))
+        
+        tasks = [primary_task]
+        try:
+            delay_ms = self._hedge_delay_ms(primary)
+            backup = next(
+                (name for name in backups
+                 if name != primary and name in self.providers
+                 and self.providers[name].is_healthy() and self._can_attempt_provider(name)),
+                None
+            )
+            if delay_ms is None or backup is None:
+                return primary, await primary_task
+            
+            done, _ = await asyncio.wait({primary_task}, timeout=delay_ms / 1000)
+            if done or not self._take_hedge_budget():
+                return primary, await primary_task
+            
+            logger.info(f"Hedging {primary} with {backup} after {delay_ms:.0f}ms")
+            backup_task = asyncio.ensure_future(self._timed_generate(backup, request))
+            tasks.append(backup_task)
+            names = {primary_task: primary, backup_task: backup}
+            pending = {primary_task, backup_task}
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        for loser in pending:
+                            loser.cancel()
+                        if pending:
+                            await asyncio.gather(*pending, return_exceptions=True)
+                        if task is backup_task:
+                            self.hedge_stats["backup_wins"] += 1
+                            # The primary took at least this long; keep its stats honest
+                            self.record_latency(primary, (loop.time() - start_time) * 1000)
+                        return names[task], task.result()
+                    if task is backup_task:
+                        logger.warning(f"Hedge to {backup} failed: {task.exception()}")
+                        self._record_failure(backup, task.exception())
+            
+            raise primary_task.exception()
+        finally:
+            # Do not leave calls running if this caller is cancelled
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
     async def execute_with_fallback(
         self,
         request: LLMRequest,
@@ -125,6 +308,11 @@ class FallbackManager:
         attempts = []
         last_error = None
         
+        # Only the first call of a request is hedged
+        hedge = self.hedge_requests and len(provider_order) > 1
+        if hedge:
+            self.hedge_stats["requests"] += 1
+        
         # Try providers in order
         for provider_name in provider_order:
             provider = self.providers.get(provider_name)
@@ -148,12 +336,19 @@ class FallbackManager:
                 try:
                     # Execute request
                     start_time = asyncio.get_event_loop().time()
-                    response = await provider.generate(request)
+                    served_by = provider_name
+                    if hedge:
+                        hedge = False
+                        served_by, response = await self._generate_hedged(
+                            provider_name, request, provider_order
+                        )
+                    else:
+                        response = await self._timed_generate(provider_name, request)
                     response_time = (asyncio.get_event_loop().time() - start_time) * 1000
                     
                     # Record successful attempt
                     attempt = FallbackAttempt(
-                        provider_name=provider_name,
+                        provider_name=served_by,
                         attempt_number=attempt_num,
                         error=None,
                         success=True,
@@ -165,7 +360,7 @@ class FallbackManager:
                     self.fallback_attempts.append(attempt)
                     
                     # Update circuit breaker
-                    self._record_success(provider_name)
+                    self._record_success(served_by)
                     
                     return response, attempts
                     
@@ -324,6 +519,17 @@ class FallbackManager:
             else:
                 return remaining
                 
+        elif self.fallback_strategy == FallbackStrategy.LATENCY_OPTIMIZED:
+            # Sort by recent latency (lowest first); unmeasured providers are
+            # tried first so they gain samples
+            remaining = available_providers[1:] if preferred_provider else available_providers
+            remaining.sort(key=self._latency_rank)
+            
+            if preferred_provider:
+                return [preferred_provider] + remaining
+            else:
+                return remaining
+                
         elif self.fallback_strategy == FallbackStrategy.PARALLEL:
             # For parallel strategy, return all providers (will be handled differently)
             return available_providers
@@ -338,6 +544,10 @@ class FallbackManager:
             else:
                 return remaining
     
+    def _latency_rank(self, provider_name: str) -> float:
+        stats = self.latency_stats.get(provider_name)
+        return stats.ewma_ms if stats is not None and stats.ewma_ms is not None else 0.0
+    
     def _can_attempt_provider(self, provider_name: str) -> bool:
         """Check if provider can be attempted (circuit breaker check)."""
         circuit = self.circuit_breakers.get(provider_name)
@@ -398,6 +608,7 @@ class FallbackManager:
         
         for name, provider in self.providers.items():
             circuit = self.circuit_breakers.get(name, CircuitBreakerState())
+            latency = self.latency_stats.get(name) or LatencyStats()
             
             # Get recent attempt statistics
             recent_attempts = [
@@ -419,7 +630,10 @@ class FallbackManager:
                 "recent_success_rate": success_rate,
                 "recent_attempts": total_attempts,
                 "priority": provider.config.priority,
-                "quality_score": provider.config.quality_score
+                "quality_score": provider.config.quality_score,
+                "latency_ewma_ms": latency.ewma_ms,
+                "latency_p95_ms": latency.p95_ms,
+                "latency_samples": latency.count
             }
         
         return status
@@ -0,0 +1,261 @@
+"""
+M008: Persistent response cache shared across processes.
+
+A SQLite file in WAL mode holds cached payloads so every worker process
+on a host, and the next process after a restart, reuses responses instead
+of paying for the same LLM call again. The in-memory ResponseCache sits in
+front of it as L1.
+
+- Payloads are JSON, zlib-compressed once they pass a small size.
+- Entries carry an absolute expiry; expired rows are never returned and
+  are purged during maintenance.
+- The store is bounded by entry count and payload bytes; maintenance
+  evicts least recently accessed rows first.
+- Writes are single statements or short IMMEDIATE transactions, so
+  concurrent processes serialize on SQLite's lock instead of overwriting
+  each other's state.
+- Nothing is loaded at startup: lookups read single rows on demand.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    compressed INTEGER NOT NULL,
+    provider TEXT,
+    model TEXT,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_last_accessed ON cache_entries (last_accessed);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries (expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_provider_model ON cache_entries (provider, model);
+"""
+
+
+class PersistentCacheStore:
+    """SQLite-backed key/value cache with TTL and size-bounded eviction."""
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 max_entries: int = 100000,
+                 max_bytes: int = 512 * 1024 * 1024,
+                 compress_min_bytes: int = 512,
+                 compression_level: int = 6,
+                 maintenance_interval: int = 256,
+                 touch_interval_seconds: float = 60.0):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite file, shared by every process using the cache
+            max_entries: Entries kept before least recently used are evicted
+            max_bytes: Stored payload bytes kept before eviction
+            compress_min_bytes: Smaller payloads are stored uncompressed
+            compression_level: zlib level for larger payloads
+            maintenance_interval: Writes between purge/eviction passes
+            touch_interval_seconds: Minimum age before a read refreshes
+                last_accessed, so hot keys do not turn every read into a write
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.compression_level = compression_level
+        self.maintenance_interval = maintenance_interval
+        self.touch_interval = touch_interval_seconds
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._writes = 0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'expired': 0,
+            'bytes_written': 0,
+            'bytes_uncompressed': 0
+        }
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _encode(self, value: Any) -> tuple:
+        data = json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+        self.stats['bytes_uncompressed'] += len(data)
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, self.compression_level)
+            if len(compressed) < len(data):
+                return compressed, 1
+        return data, 0
+
+    @staticmethod
+    def _decode(payload: bytes, compressed: int) -> Any:
+        if compressed:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None if missing or expired."""
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT payload, compressed, expires_at, last_accessed FROM cache_entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        payload, compressed, expires_at, last_accessed = row
+        if expires_at <= now:
+            self.stats['misses'] += 1
+            self.stats['expired'] += 1
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        if now - last_accessed >= self.touch_interval:
+            conn.execute("UPDATE cache_entries SET last_accessed = ? WHERE key = ?", (now, key))
+        self.stats['hits'] += 1
+        try:
+            return self._decode(payload, compressed)
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key[:8]}...: {e}")
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+
+    def put(self, key: str, value: Any, ttl_seconds: float,
+            provider: Optional[str] = None, model: Optional[str] = None) -> None:
+        """Store a JSON-serializable value, replacing any previous one."""
+        payload, compressed = self._encode(value)
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, payload, compressed, provider, model, "
+            "size_bytes, created_at, expires_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, payload, compressed, provider, model, len(payload), now, now + ttl_seconds, now)
+        )
+        self.stats['writes'] += 1
+        self.stats['bytes_written'] += len(payload)
+        self._writes += 1
+        if self._writes % self.maintenance_interval == 0:
+            self.maintain()
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """Delete entries by key; returns how many existed."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        cursor = self._connection().executemany(
+            "DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys]
+        )
+        return cursor.rowcount
+
+    def delete_where(self, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        """Delete every entry for a provider or a model."""
+        clauses, params = [], []
+        if provider:
+            clauses.append("provider = ?")
+            params.append(provider)
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        if not clauses:
+            return 0
+        cursor = self._connection().execute(
+            f"DELETE FROM cache_entries WHERE {' OR '.join(clauses)}", params
+        )
+        return cursor.rowcount
+
+    def maintain(self) -> Dict[str, int]:
+        """Purge expired entries, then evict LRU entries over the bounds."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM cache_entries WHERE expires_at <= ?", (now,)
+            ).rowcount
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+            ).fetchone()
+            evicted = 0
+            if count > self.max_entries or size > self.max_bytes:
+                # Evict down to 90% of both bounds so maintenance is not rerun at once
+                target_count = int(self.max_entries * 0.9)
+                target_bytes = int(self.max_bytes * 0.9)
+                rows = conn.execute(
+                    "SELECT key, size_bytes FROM cache_entries ORDER BY last_accessed"
+                )
+                victims = []
+                for key, size_bytes in rows:
+                    if count <= target_count and size <= target_bytes:
+                        break
+                    victims.append((key,))
+                    count -= 1
+                    size -= size_bytes
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+                evicted = len(victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.stats['expired'] += expired
+        self.stats['evictions'] += evicted
+        return {'expired': expired, 'evicted': evicted}
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store counters with current size."""
+        count, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+        uncompressed = self.stats['bytes_uncompressed']
+        return {
+            **self.stats,
+            'entries': count,
+            'size_bytes': size,
+            'compression_ratio': (
+                self.stats['bytes_written'] / uncompressed if uncompressed else 1.0
+            ),
+            'path': str(self.path)
+        }
+
+    def close(self) -> None:
+        """Close every connection opened by this store."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
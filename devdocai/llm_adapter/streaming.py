@@ -5,7 +5,8 @@ Implements efficient streaming with:
 - Async generators for all providers
 - Stream processing pipelines
 - Chunk buffering and optimization
-- Stream multiplexing for multiple consumers
+- Stream multiplexing for multiple consumers (ring buffer with per-consumer
+  cursors, lag policies and late-joiner replay)
 - Progress tracking and metrics
 """
 
@@ -22,6 +23,18 @@ from .providers.base import LLMRequest, LLMResponse
 logger = logging.getLogger(__name__)
 
 
+class LagPolicy(Enum):
+    """What a multiplexer does when a consumer falls a full buffer behind."""
+    DROP = "drop"  # Overwrite; the consumer skips to the oldest buffered chunk
+    BLOCK = "block"  # Producer waits for the consumer, up to a timeout
+    DISCONNECT = "disconnect"  # The consumer is cut off
+
+
+class SlowConsumerError(Exception):
+    """Raised to a consumer disconnected for lagging behind its stream."""
+    pass
+
+
 class StreamState(Enum):
     """Stream processing states."""
     IDLE = "idle"
@@ -106,10 +119,23 @@ class StreamBuffer:
         self.min_chunk_size = min_chunk_size
         
         self.buffer: deque = deque(maxlen=max_size)
-        self.pending_chunk: Optional[StreamChunk] = None
+        
+        # Small chunks being aggregated; joined once when emitted
+        self._pending_parts: List[str] = []
+        self._pending_size = 0
+        self._pending_tokens = 0
+        self._pending_first: Optional[StreamChunk] = None
+        
         self.last_flush_time = time.time()
         self._lock = asyncio.Lock()
     
+    @property
+    def pending_chunk(self) -> Optional[StreamChunk]:
+        """Aggregated chunk that has not been emitted yet."""
+        if self._pending_first is None:
+            return None
+        return self._build_pending()
+    
     async def add(self, chunk: StreamChunk) -> Optional[StreamChunk]:
         """
         Add chunk to buffer.
@@ -127,46 +153,37 @@ class StreamBuffer:
                 len(chunk.content) < self.min_chunk_size and
                 not chunk.is_final
             ):
-                # Aggregate with pending chunk
-                if self.pending_chunk:
-                    self.pending_chunk.content += chunk.content
-                    self.pending_chunk.token_count += chunk.token_count
-                else:
-                    self.pending_chunk = chunk
+                # Aggregate with pending parts
+                if self._pending_first is None:
+                    self._pending_first = chunk
+                self._pending_parts.append(chunk.content)
+                self._pending_size += len(chunk.content)
+                self._pending_tokens += chunk.token_count
                 
                 # Check if aggregated chunk is large enough
-                if self.pending_chunk and len(self.pending_chunk.content) >= self.min_chunk_size:
-                    to_emit = self.pending_chunk
-                    self.pending_chunk = None
-                    return to_emit
+                if self._pending_size >= self.min_chunk_size:
+                    return self._take_pending()
                 
                 return None
             
             # Flush pending if exists
-            if self.pending_chunk:
-                self.buffer.append(self.pending_chunk)
-                self.pending_chunk = None
+            pending = self._take_pending()
+            if pending:
+                self.buffer.append(pending)
             
             # Add current chunk
             self.buffer.append(chunk)
             
             # Check if we need to flush
             if self._should_flush():
-                return await self.flush_one()
+                return self._pop_one()
             
             return None
     
     async def flush_one(self) -> Optional[StreamChunk]:
         """Flush one chunk from buffer."""
         async with self._lock:
-            if self.buffer:
-                self.last_flush_time = time.time()
-                return self.buffer.popleft()
-            elif self.pending_chunk:
-                chunk = self.pending_chunk
-                self.pending_chunk = None
-                return chunk
-            return None
+            return self._pop_one()
     
     async def flush_all(self) -> List[StreamChunk]:
         """Flush all chunks from buffer."""
@@ -174,13 +191,43 @@ class StreamBuffer:
             chunks = list(self.buffer)
             self.buffer.clear()
             
-            if self.pending_chunk:
-                chunks.append(self.pending_chunk)
-                self.pending_chunk = None
+            pending = self._take_pending()
+            if pending:
+                chunks.append(pending)
             
             self.last_flush_time = time.time()
             return chunks
     
+    def _pop_one(self) -> Optional[StreamChunk]:
+        """Pop the oldest chunk; caller holds the lock."""
+        if self.buffer:
+            self.last_flush_time = time.time()
+            return self.buffer.popleft()
+        return self._take_pending()
+    
+    def _build_pending(self) -> StreamChunk:
+        """Build the aggregated chunk from pending parts."""
+        first = self._pending_first
+        if len(self._pending_parts) == 1:
+            return first
+        return StreamChunk(
+            content="".join(self._pending_parts),
+            token_count=self._pending_tokens,
+            timestamp=first.timestamp,
+            metadata=first.metadata
+        )
+    
+    def _take_pending(self) -> Optional[StreamChunk]:
+        """Remove and return the aggregated chunk, if any."""
+        if self._pending_first is None:
+            return None
+        chunk = self._build_pending()
+        self._pending_parts = []
+        self._pending_size = 0
+        self._pending_tokens = 0
+        self._pending_first = None
+        return chunk
+    
     def _should_flush(self) -> bool:
         """Check if buffer should be flushed."""
         # Flush if buffer is full
@@ -264,51 +311,98 @@ class StreamMultiplexer:
     """
     Multiplexer for broadcasting streams to multiple consumers.
     
+    Chunks are stored once in a fixed-size ring buffer and every consumer
+    holds a cursor into it, so memory stays flat however many consumers
+    read the stream. A consumer that falls a full buffer behind is handled
+    by the lag policy (drop, block or disconnect), and late joiners can
+    replay whatever is still buffered.
+    
     Features:
     - Single source, multiple consumers
     - Independent consumer progress
     - Backpressure handling
+    - Late-joiner replay
     - Consumer lifecycle management
     """
     
     def __init__(
         self,
         buffer_size: int = 100,
-        slow_consumer_timeout_ms: float = 5000
+        slow_consumer_timeout_ms: float = 5000,
+        lag_policy: LagPolicy = LagPolicy.BLOCK
     ):
         """
         Initialize stream multiplexer.
         
         Args:
-            buffer_size: Buffer size per consumer
-            slow_consumer_timeout_ms: Timeout for slow consumers
+            buffer_size: Chunks kept in the ring buffer
+            slow_consumer_timeout_ms: How long a blocked producer waits for
+                a lagging consumer before disconnecting it
+            lag_policy: Handling of consumers a full buffer behind
         """
         self.buffer_size = buffer_size
         self.slow_consumer_timeout_ms = slow_consumer_timeout_ms
+        self.lag_policy = lag_policy
+        
+        # Chunk n lives in slot n % buffer_size; chunks_sent is the next n
+        self._ring: List[Optional[StreamChunk]] = [None] * buffer_size
+        self.chunks_sent = 0
+        
+        # Consumer ID -> sequence number of its next chunk
+        self.consumers: Dict[str, int] = {}
+        self.disconnected: Set[str] = set()
+        self.dropped_chunks = 0
         
-        self.consumers: Dict[str, asyncio.Queue] = {}
-        self.consumer_tasks: Dict[str, asyncio.Task] = {}
         self.state = StreamState.IDLE
+        self.error: Optional[BaseException] = None
+        self._final_chunk: Optional[StreamChunk] = None
         self._consumer_id = 0
-        self._lock = asyncio.Lock()
+        
+        # Swapped on every publish so each waiter wakes once per chunk
+        self._published = asyncio.Event()
+        self._advanced = asyncio.Event()
         
         self.logger = logging.getLogger(f"{__name__}.StreamMultiplexer")
     
-    async def add_consumer(self) -> str:
+    @property
+    def oldest_buffered(self) -> int:
+        """Sequence number of the oldest chunk still in the buffer."""
+        return max(0, self.chunks_sent - self.buffer_size)
+    
+    async def add_consumer(self, replay: bool = False) -> str:
         """
         Add new consumer.
         
+        Args:
+            replay: Start from the oldest buffered chunk instead of the
+                next live one
+        
         Returns:
             Consumer ID
         """
-        async with self._lock:
-            consumer_id = f"consumer_{self._consumer_id}"
-            self._consumer_id += 1
-            
-            self.consumers[consumer_id] = asyncio.Queue(maxsize=self.buffer_size)
-            
-            self.logger.debug(f"Added consumer {consumer_id}")
-            return consumer_id
+        return self._new_consumer(self.oldest_buffered if replay else self.chunks_sent)
+    
+    def _new_consumer(self, cursor: int) -> str:
+        """Register a consumer reading from the given sequence number."""
+        consumer_id = f"consumer_{self._consumer_id}"
+        self._consumer_id += 1
+        
+        self.consumers[consumer_id] = cursor
+        
+        self.logger.debug(f"Added consumer {consumer_id} at chunk {cursor}")
+        return consumer_id
+    
+    async def join(self) -> Optional[str]:
+        """
+        Add a consumer only if it would still see the whole stream.
+        
+        Returns:
+            Consumer ID replaying from the first chunk, or None once the
+            first chunk has left the buffer or the stream has failed
+        """
+        if self.oldest_buffered > 0 or self.state == StreamState.ERROR:
+            return None
+        return self._new_consumer(0)
     
     async def remove_consumer(self, consumer_id: str) -> None:
         """
@@ -317,15 +411,59 @@ class StreamMultiplexer:
         Args:
             consumer_id: Consumer to remove
         """
-        async with self._lock:
-            if consumer_id in self.consumers:
-                del self.consumers[consumer_id]
-                
-                if consumer_id in self.consumer_tasks:
-                    self.consumer_tasks[consumer_id].cancel()
-                    del self.consumer_tasks[consumer_id]
-                
-                self.logger.debug(f"Removed consumer {consumer_id}")
+        if self.consumers.pop(consumer_id, None) is not None:
+            self._advanced.set()  # A blocked producer may have room now
+            self.logger.debug(f"Removed consumer {consumer_id}")
+        self.disconnected.discard(consumer_id)
+    
+    def _disconnect(self, consumer_ids: List[str]) -> None:
+        """Cut off lagging consumers; they get SlowConsumerError."""
+        for consumer_id in consumer_ids:
+            self.logger.warning(
+                f"Consumer {consumer_id} is too slow, disconnecting"
+            )
+            self.consumers.pop(consumer_id, None)
+            self.disconnected.add(consumer_id)
+        self._wake_consumers()
+    
+    def _wake_consumers(self) -> None:
+        """Wake every consumer waiting for a chunk."""
+        self._published.set()
+        self._published = asyncio.Event()
+    
+    def _lagging(self) -> List[str]:
+        """Consumers whose next chunk would be overwritten by the next publish."""
+        limit = self.chunks_sent - self.buffer_size
+        return [
+            consumer_id for consumer_id, cursor in self.consumers.items()
+            if cursor <= limit
+        ]
+    
+    async def _make_room(self) -> None:
+        """Apply the lag policy before a buffer slot is overwritten."""
+        if self.chunks_sent < self.buffer_size or self.lag_policy == LagPolicy.DROP:
+            return
+        
+        lagging = self._lagging()
+        if not lagging:
+            return
+        
+        if self.lag_policy == LagPolicy.BLOCK:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.slow_consumer_timeout_ms / 1000
+            while lagging:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._advanced.clear()
+                try:
+                    await asyncio.wait_for(self._advanced.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                lagging = self._lagging()
+        
+        if lagging:
+            self._disconnect(lagging)
     
     async def broadcast(
         self,
@@ -341,47 +479,26 @@ class StreamMultiplexer:
         
         try:
             async for chunk in stream:
-                # Send to all consumers
-                async with self._lock:
-                    dead_consumers = []
-                    
-                    for consumer_id, queue in self.consumers.items():
-                        try:
-                            # Try to put with timeout
-                            await asyncio.wait_for(
-                                queue.put(chunk),
-                                timeout=self.slow_consumer_timeout_ms / 1000
-                            )
-                        except asyncio.TimeoutError:
-                            self.logger.warning(
-                                f"Consumer {consumer_id} is too slow, marking for removal"
-                            )
-                            dead_consumers.append(consumer_id)
-                        except Exception as e:
-                            self.logger.error(f"Error sending to consumer {consumer_id}: {e}")
-                            dead_consumers.append(consumer_id)
-                    
-                    # Remove dead consumers
-                    for consumer_id in dead_consumers:
-                        await self.remove_consumer(consumer_id)
-            
-            # Send final chunk
-            final_chunk = StreamChunk(
-                content="",
-                token_count=0,
-                is_final=True
-            )
-            
-            async with self._lock:
-                for queue in self.consumers.values():
-                    await queue.put(final_chunk)
+                await self._make_room()
+                self._ring[self.chunks_sent % self.buffer_size] = chunk
+                self.chunks_sent += 1
+                self._wake_consumers()
             
             self.state = StreamState.COMPLETED
             
         except Exception as e:
             self.logger.error(f"Broadcast error: {e}")
+            self.error = e
             self.state = StreamState.ERROR
             raise
+        finally:
+            # Final chunk ends every consumer, including on error
+            self._final_chunk = StreamChunk(
+                content="",
+                token_count=0,
+                is_final=True
+            )
+            self._wake_consumers()
     
     async def consume(
         self,
@@ -395,23 +512,59 @@ class StreamMultiplexer:
             
         Yields:
             Stream chunks
+            
+        Raises:
+            SlowConsumerError: If the consumer was disconnected for lagging
+            Exception: The source stream's error, if broadcasting failed
         """
-        if consumer_id not in self.consumers:
+        if consumer_id not in self.consumers and consumer_id not in self.disconnected:
             raise ValueError(f"Unknown consumer: {consumer_id}")
         
-        queue = self.consumers[consumer_id]
-        
         while True:
-            try:
-                chunk = await queue.get()
+            cursor = self.consumers.get(consumer_id)
+            if cursor is None:
+                if consumer_id in self.disconnected:
+                    raise SlowConsumerError(f"Consumer {consumer_id} fell too far behind")
+                return  # Removed
+            
+            if cursor < self.chunks_sent:
+                oldest = self.oldest_buffered
+                if cursor < oldest:
+                    # Overwritten under the drop policy; skip ahead
+                    self.dropped_chunks += oldest - cursor
+                    cursor = oldest
+                chunk = self._ring[cursor % self.buffer_size]
+                self.consumers[consumer_id] = cursor + 1
+                self._advanced.set()
                 yield chunk
-                
-                if chunk.is_final:
-                    break
-                    
-            except Exception as e:
-                self.logger.error(f"Consumer {consumer_id} error: {e}")
-                break
+                continue
+            
+            if self._final_chunk is not None:
+                if self.error is not None:
+                    raise self.error
+                yield self._final_chunk
+                return
+            
+            await self._published.wait()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get multiplexer statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        lags = [self.chunks_sent - cursor for cursor in self.consumers.values()]
+        return {
+            "state": self.state.value,
+            "consumers": len(self.consumers),
+            "chunks_sent": self.chunks_sent,
+            "buffered_chunks": self.chunks_sent - self.oldest_buffered,
+            "max_consumer_lag": max(lags, default=0),
+            "dropped_chunks": self.dropped_chunks,
+            "disconnected_consumers": len(self.disconnected),
+            "lag_policy": self.lag_policy.value
+        }
 
 
 class StreamingManager:
@@ -429,7 +582,9 @@ class StreamingManager:
         self,
         enable_buffering: bool = True,
         enable_multiplexing: bool = True,
-        target_time_to_first_token_ms: float = 200
+        target_time_to_first_token_ms: float = 200,
+        multiplexer_buffer_size: int = 256,
+        lag_policy: LagPolicy = LagPolicy.BLOCK
     ):
         """
         Initialize streaming manager.
@@ -438,10 +593,15 @@ class StreamingManager:
             enable_buffering: Enable stream buffering
             enable_multiplexing: Enable stream multiplexing
             target_time_to_first_token_ms: Target TTFT
+            multiplexer_buffer_size: Chunks each multiplexer keeps for
+                lagging consumers and late-joiner replay
+            lag_policy: Handling of consumers a full buffer behind
         """
         self.enable_buffering = enable_buffering
         self.enable_multiplexing = enable_multiplexing
         self.target_ttft = target_time_to_first_token_ms
+        self.multiplexer_buffer_size = multiplexer_buffer_size
+        self.lag_policy = lag_policy
         
         # Active streams
         self.active_streams: Dict[str, StreamMetrics] = {}
@@ -584,7 +744,10 @@ class StreamingManager:
             List of consumer IDs
         """
         # Create multiplexer
-        multiplexer = StreamMultiplexer()
+        multiplexer = StreamMultiplexer(
+            buffer_size=self.multiplexer_buffer_size,
+            lag_policy=self.lag_policy
+        )
         self.multiplexers[request_id] = multiplexer
         
         # Add consumers
@@ -612,6 +775,9 @@ class StreamingManager:
             # Convert LLMResponse to StreamChunk
             async def response_to_chunks():
                 async for response in source:
+                    if not isinstance(response, LLMResponse):
+                        yield StreamChunk(content=str(response), token_count=0)
+                        continue
                     yield StreamChunk(
                         content=response.content,
                         token_count=response.usage.completion_tokens if response.usage else 0,
@@ -626,8 +792,8 @@ class StreamingManager:
         except Exception as e:
             self.logger.error(f"Broadcast error for {request_id}: {e}")
         finally:
-            # Clean up
-            if request_id in self.multiplexers:
+            # Clean up, unless a newer stream already took the ID
+            if self.multiplexers.get(request_id) is multiplexer:
                 del self.multiplexers[request_id]
     
     def get_metrics(self, request_id: Optional[str] = None) -> Dict[str, Any]:
@@ -7,14 +7,17 @@ Implements token optimization with:
 - Context window management
 - Redundancy elimination
 - Semantic compression
+- Memoized token counting (LRU keyed by encoding and content hash)
+- Single-pass prompt compression with an incremental safety bound
 """
 
 import re
 import hashlib
 import logging
-from typing import Dict, List, Optional, Any, Tuple, Set
+import threading
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Set
 from dataclasses import dataclass, field
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 import tiktoken  # For accurate token counting
 
 logger = logging.getLogger(__name__)
@@ -45,11 +48,20 @@ class TokenCounter:
     """
     Accurate token counting for different models.
     
-    Uses tiktoken for OpenAI models, approximations for others.
+    Uses tiktoken for OpenAI models, approximations for others. Exact
+    counts are memoized in an LRU keyed by encoding and a hash of the text,
+    so stable prompt prefixes and system prompts are encoded once.
     """
     
-    def __init__(self):
-        """Initialize token counter."""
+    def __init__(self, cache_size: int = 10000, batch_min_chars: int = 32 * 1024):
+        """
+        Initialize token counter.
+        
+        Args:
+            cache_size: Token counts kept in the LRU (0 disables caching)
+            batch_min_chars: Total length of cache misses from which they are
+                encoded with encode_batch; smaller sets are encoded one by one
+        """
         self.encoders = {}
         self.model_mappings = {
             "gpt-4": "cl100k_base",
@@ -60,6 +72,14 @@ class TokenCounter:
             "code-davinci-002": "p50k_base",
         }
         
+        # Memoized counts: (encoding, text digest) -> tokens
+        self.cache_size = cache_size
+        self.batch_min_chars = batch_min_chars
+        self._cache: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
         # Try to load tiktoken encoders
         self._load_encoders()
     
@@ -82,18 +102,75 @@ class TokenCounter:
         Returns:
             Token count
         """
+        return self.count_tokens_many([text], model)[0]
+    
+    def count_tokens_many(self, texts: Sequence[str], model: str = "gpt-3.5-turbo") -> List[int]:
+        """
+        Count tokens in several texts, encoding each distinct cache miss once.
+        
+        Args:
+            texts: Texts to count tokens for
+            model: Model name
+            
+        Returns:
+            Token count per text
+        """
         # Get encoding for model
         encoding_name = self.model_mappings.get(model)
         
-        if encoding_name and encoding_name in self.encoders:
-            # Use tiktoken for accurate count
-            encoder = self.encoders[encoding_name]
-            return len(encoder.encode(text))
-        else:
+        if not (encoding_name and encoding_name in self.encoders):
             # Fallback to approximation (1 token ≈ 4 chars or 0.75 words)
-            words = len(text.split())
-            chars = len(text)
-            return max(chars // 4, int(words * 0.75))
+            return [max(len(text) // 4, int(len(text.split()) * 0.75)) for text in texts]
+        
+        counts: List[Optional[int]] = [None] * len(texts)
+        keys = [(encoding_name, self._digest(text)) for text in texts]
+        missing: Dict[Tuple[str, bytes], List[int]] = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                count = self._cache.get(key)
+                if count is not None:
+                    self._cache.move_to_end(key)
+                    counts[i] = count
+                    self.cache_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.cache_misses += 1
+        
+        if missing:
+            # Use tiktoken for accurate count. encode_batch starts a thread pool
+            # per call, which only pays off for large amounts of text
+            encoder = self.encoders[encoding_name]
+            misses = [texts[indices[0]] for indices in missing.values()]
+            if len(misses) > 1 and sum(map(len, misses)) >= self.batch_min_chars:
+                lengths = [len(tokens) for tokens in encoder.encode_batch(misses)]
+            else:
+                lengths = [len(encoder.encode(text)) for text in misses]
+            with self._cache_lock:
+                for (key, indices), length in zip(missing.items(), lengths):
+                    for i in indices:
+                        counts[i] = length
+                    if self.cache_size:
+                        self._cache[key] = length
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return counts
+    
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Token count cache size and hit rate."""
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / total if total else 0.0
+            }
     
     def count_messages_tokens(
         self,
@@ -115,13 +192,84 @@ class TokenCounter:
         formatting_tokens = len(messages) * 4
         
         content_tokens = sum(
-            self.count_tokens(msg.get("content", ""), model)
-            for msg in messages
+            self.count_tokens_many([msg.get("content", "") for msg in messages], model)
         )
         
         return formatting_tokens + content_tokens
 
 
+class ConversationTokenAccumulator:
+    """
+    Running token count for one conversation.
+    
+    Conversations grow by appending messages, so each update only counts
+    messages after the longest prefix unchanged since the previous update.
+    """
+    
+    def __init__(self, token_counter: TokenCounter, model: str = "gpt-3.5-turbo"):
+        """
+        Initialize accumulator.
+        
+        Args:
+            token_counter: Counter used for new messages
+            model: Model name
+        """
+        self.token_counter = token_counter
+        self.model = model
+        self._contents: List[str] = []
+        self._counts: List[int] = []
+        self._cumulative: List[int] = []  # running sums of _counts
+        self.messages_counted = 0
+    
+    def update(self, messages: List[Dict[str, str]]) -> List[int]:
+        """
+        Account for the conversation's current messages.
+        
+        Args:
+            messages: Full message list, usually the previous one plus new messages
+            
+        Returns:
+            Content token count per message
+        """
+        contents = [msg.get("content", "") for msg in messages]
+        prefix = 0
+        limit = min(len(contents), len(self._contents))
+        while prefix < limit and contents[prefix] == self._contents[prefix]:
+            prefix += 1
+        
+        new_counts = self.token_counter.count_tokens_many(contents[prefix:], self.model)
+        self.messages_counted += len(new_counts)
+        
+        self._contents = contents
+        del self._counts[prefix:]
+        del self._cumulative[prefix:]
+        running = self._cumulative[-1] if self._cumulative else 0
+        for count in new_counts:
+            running += count
+            self._counts.append(count)
+            self._cumulative.append(running)
+        
+        return list(self._counts)
+    
+    @property
+    def content_tokens(self) -> int:
+        """Content tokens of the last update."""
+        return self._cumulative[-1] if self._cumulative else 0
+    
+    @property
+    def total_tokens(self) -> int:
+        """Tokens including per-message formatting, as count_messages_tokens."""
+        return self.content_tokens + len(self._counts) * 4
+
+
+def _shorten_list(match: 're.Match') -> str:
+    """Keep the first two items of a matched list of more than three."""
+    items = match.group(0).split(',')
+    if len(items) > 3:
+        return f"{', '.join(items[:2])}, etc."
+    return match.group(0)
+
+
 class PromptCompressor:
     """
     Intelligent prompt compression techniques.
@@ -138,7 +286,8 @@ class PromptCompressor:
         self,
         aggressive_mode: bool = False,
         preserve_code_blocks: bool = True,
-        max_compression_ratio: float = 0.5
+        max_compression_ratio: float = 0.5,
+        token_counter: Optional[TokenCounter] = None
     ):
         """
         Initialize prompt compressor.
@@ -147,6 +296,7 @@ class PromptCompressor:
             aggressive_mode: Enable aggressive compression
             preserve_code_blocks: Don't compress code blocks
             max_compression_ratio: Maximum compression (safety limit)
+            token_counter: Shared token counter (a new one if None)
         """
         self.aggressive_mode = aggressive_mode
         self.preserve_code_blocks = preserve_code_blocks
@@ -192,14 +342,35 @@ class PromptCompressor:
             "particularly", "especially", "specifically"
         }
         
-        self.token_counter = TokenCounter()
+        self.token_counter = token_counter or TokenCounter()
         self.stats = TokenStats()
         
+        # Precompiled once: every abbreviation in a single alternation
+        self.abbreviation_regex = re.compile(
+            '|'.join(re.escape(full) for full in self.abbreviations), re.IGNORECASE
+        )
+        self.code_block_regex = re.compile(r'(```[\s\S]*?```)')
+        self.list_regex = re.compile(r'\b(\w+(?:,\s*\w+){3,})\b')
+        # Filler words and abbreviations never span whitespace, so aggressive
+        # rewriting is memoized per word ('' for a filler word); prose reuses
+        # a small vocabulary
+        self._rewritten_words: Dict[str, str] = {}
+        self.max_rewrite_cache = 50000
+        
         self.logger = logging.getLogger(f"{__name__}.PromptCompressor")
     
     def compress(self, text: str, model: str = "gpt-3.5-turbo") -> str:
         """
-        Compress text using multiple strategies.
+        Compress text in a single pass.
+        
+        The text is split once into units (sentences, and code blocks when
+        they are preserved) and every unit is counted in one batched call.
+        Units are then deduplicated and rewritten in one streaming pass,
+        charging removed duplicates against the compression-ratio safety
+        bound as they go, so an over-compressed text is abandoned early.
+        The compressed text is counted whole for the final safety check, and
+        statistics compare it with the whole original text. Code blocks are
+        kept verbatim.
         
         Args:
             text: Text to compress
@@ -208,141 +379,130 @@ class PromptCompressor:
         Returns:
             Compressed text
         """
-        original_tokens = self.token_counter.count_tokens(text, model)
-        
-        # Apply compression techniques in order
-        compressed = text
-        
-        # 1. Normalize whitespace
-        compressed = self._normalize_whitespace(compressed)
-        
-        # 2. Remove redundancy
-        compressed = self._remove_redundancy(compressed)
-        
-        # 3. Apply abbreviations
-        if self.aggressive_mode:
-            compressed = self._apply_abbreviations(compressed)
-        
-        # 4. Remove filler words
-        if self.aggressive_mode:
-            compressed = self._remove_filler_words(compressed)
-        
-        # 5. Compress lists
-        compressed = self._compress_lists(compressed)
-        
-        # 6. Deduplicate content
-        compressed = self._deduplicate_content(compressed)
+        units = self._split_units(text)
+        if not units:
+            return text
         
-        # Check compression ratio safety
-        compressed_tokens = self.token_counter.count_tokens(compressed, model)
+        counts = self.token_counter.count_tokens_many([unit for _, unit in units], model)
+        unit_tokens = sum(counts)
+        budget = unit_tokens * self.max_compression_ratio
+        removed = 0
         
-        if compressed_tokens < original_tokens * (1 - self.max_compression_ratio):
-            # Too much compression, return original
-            self.logger.warning(
-                f"Compression too aggressive ({compressed_tokens}/{original_tokens}), "
-                f"reverting to original"
-            )
-            return text
+        seen = set()
+        kept = []
+        
+        for (is_code, unit), count in zip(units, counts):
+            key = (is_code, unit if is_code else unit.lower())
+            if key in seen:
+                removed += count
+                if removed > budget:
+                    return self._revert(text, unit_tokens - removed, unit_tokens)
+                continue
+            seen.add(key)
+            kept.append((is_code, unit if is_code else self._compress_sentence(unit)))
+        
+        compressed = self._join_units(kept)
+        
+        # Unit counts leave out separators, so statistics count the full texts.
+        # The safety bound stays on unit counts: whitespace is not content
+        original_tokens, compressed_tokens = self.token_counter.count_tokens_many(
+            [text, compressed], model
+        )
+        if compressed_tokens < unit_tokens - budget:
+            return self._revert(text, compressed_tokens, unit_tokens)
         
         # Update statistics
         self.stats.update(original_tokens, compressed_tokens)
         
-        self.logger.debug(
-            f"Compressed {original_tokens} → {compressed_tokens} tokens "
-            f"({self.stats.compression_ratio:.1%} reduction)"
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                f"Compressed {original_tokens} → {compressed_tokens} tokens "
+                f"({self.stats.compression_ratio:.1%} reduction)"
+            )
         
         return compressed
     
-    def _normalize_whitespace(self, text: str) -> str:
-        """Normalize whitespace in text."""
-        # Preserve code blocks
-        if self.preserve_code_blocks:
-            parts = re.split(r'(```[\s\S]*?```)', text)
-            normalized_parts = []
-            
-            for i, part in enumerate(parts):
-                if i % 2 == 0:  # Not a code block
-                    # Normalize whitespace
-                    part = re.sub(r'\s+', ' ', part)
-                    part = re.sub(r'\n\s*\n', '\n\n', part)
-                normalized_parts.append(part)
-            
-            return ''.join(normalized_parts)
+    def _split_units(self, text: str) -> List[Tuple[bool, str]]:
+        """Split text into (is_code, content) units with whitespace normalized."""
+        if self.preserve_code_blocks and '```' in text:
+            segments = self.code_block_regex.split(text)
         else:
-            # Normalize all whitespace
-            text = re.sub(r'\s+', ' ', text)
-            text = re.sub(r'\n\s*\n', '\n\n', text)
-            return text
+            segments = [text]
+        
+        units = []
+        for i, segment in enumerate(segments):
+            if i % 2:  # Code block
+                units.append((True, segment))
+                continue
+            for piece in segment.split('.'):
+                sentence = ' '.join(piece.split())
+                if sentence:
+                    units.append((False, sentence))
+        
+        return units
     
-    def _remove_redundancy(self, text: str) -> str:
-        """Remove redundant content."""
-        # Remove repeated sentences
-        sentences = text.split('.')
-        unique_sentences = []
-        seen = set()
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence and sentence.lower() not in seen:
-                unique_sentences.append(sentence)
-                seen.add(sentence.lower())
-        
-        return '. '.join(unique_sentences) + ('.' if unique_sentences else '')
+    def _compress_sentence(self, sentence: str) -> str:
+        """Apply filler removal, abbreviations and list compression to one sentence."""
+        if self.aggressive_mode:
+            cache = self._rewritten_words
+            rewritten = [
+                cache[word] if word in cache else self._rewrite_word(word)
+                for word in sentence.split(' ')
+            ]
+            # The last word carries the sentence's period, so it is never
+            # dropped as a bare filler word
+            last = rewritten[-1] or sentence.rsplit(' ', 1)[-1]
+            rewritten[-1] = ''
+            rewritten = [word for word in rewritten if word]
+            rewritten.append(last)
+            sentence = ' '.join(rewritten)
+        
+        if sentence.count(',') >= 3:
+            sentence = self.list_regex.sub(_shorten_list, sentence)
+        
+        return sentence
     
-    def _apply_abbreviations(self, text: str) -> str:
-        """Apply common abbreviations."""
-        for full, abbr in self.abbreviations.items():
-            # Case-insensitive replacement
-            pattern = re.compile(re.escape(full), re.IGNORECASE)
-            text = pattern.sub(abbr, text)
-        
-        return text
+    def _rewrite_word(self, word: str) -> str:
+        """Drop a filler word or abbreviate it, memoizing the result."""
+        if len(self._rewritten_words) >= self.max_rewrite_cache:
+            self._rewritten_words.clear()
+        if word.lower() in self.filler_words:
+            rewritten = ''
+        else:
+            rewritten = self.abbreviation_regex.sub(self._abbreviate, word)
+        self._rewritten_words[word] = rewritten
+        return rewritten
     
-    def _remove_filler_words(self, text: str) -> str:
-        """Remove filler words in aggressive mode."""
-        words = text.split()
-        filtered_words = [
-            word for word in words
-            if word.lower() not in self.filler_words
-        ]
-        return ' '.join(filtered_words)
-    
-    def _compress_lists(self, text: str) -> str:
-        """Compress verbose lists."""
-        # Find patterns like "item1, item2, item3, and item4"
-        # Replace with "item1, item2, etc." if more than 3 items
-        
-        def compress_list(match):
-            items = match.group(0).split(',')
-            if len(items) > 3:
-                return f"{', '.join(items[:2])}, etc."
-            return match.group(0)
-        
-        # Simple list pattern
-        pattern = r'\b(\w+(?:,\s*\w+){3,})\b'
-        text = re.sub(pattern, compress_list, text)
-        
-        return text
+    def _abbreviate(self, match: 're.Match') -> str:
+        """Abbreviation for a matched word."""
+        return self.abbreviations.get(match.group(0).lower(), match.group(0))
     
-    def _deduplicate_content(self, text: str) -> str:
-        """Remove duplicate paragraphs or sections."""
-        # Split into paragraphs
-        paragraphs = text.split('\n\n')
-        unique_paragraphs = []
-        seen_hashes = set()
-        
-        for para in paragraphs:
-            para = para.strip()
-            if para:
-                # Create hash of paragraph content
-                para_hash = hashlib.md5(para.lower().encode()).hexdigest()
-                
-                if para_hash not in seen_hashes:
-                    unique_paragraphs.append(para)
-                    seen_hashes.add(para_hash)
+    def _join_units(self, units: List[Tuple[bool, str]]) -> str:
+        """Join sentences with '. ' and set code blocks apart as paragraphs."""
+        parts = []
+        sentences = []
+        
+        for is_code, content in units:
+            if is_code:
+                if sentences:
+                    parts.append('. '.join(sentences) + '.')
+                    sentences = []
+                parts.append(content)
+            else:
+                sentences.append(content)
         
-        return '\n\n'.join(unique_paragraphs)
+        if sentences:
+            parts.append('. '.join(sentences) + '.')
+        
+        return '\n\n'.join(parts)
+    
+    def _revert(self, text: str, compressed_tokens: int, original_tokens: int) -> str:
+        """Return the original text when compression exceeds the safety bound."""
+        self.logger.warning(
+            f"Compression too aggressive ({compressed_tokens}/{original_tokens}), "
+            f"reverting to original"
+        )
+        return text
     
     def compress_messages(
         self,
@@ -388,7 +548,9 @@ class ContextWindowManager:
         self,
         max_context_tokens: int = 4000,
         preserve_system_prompt: bool = True,
-        preserve_recent_messages: int = 3
+        preserve_recent_messages: int = 3,
+        token_counter: Optional[TokenCounter] = None,
+        max_conversations: int = 1000
     ):
         """
         Initialize context window manager.
@@ -397,19 +559,24 @@ class ContextWindowManager:
             max_context_tokens: Maximum context size
             preserve_system_prompt: Always keep system prompt
             preserve_recent_messages: Number of recent messages to preserve
+            token_counter: Shared token counter (a new one if None)
+            max_conversations: Conversation accumulators kept (least recent dropped)
         """
         self.max_context_tokens = max_context_tokens
         self.preserve_system_prompt = preserve_system_prompt
         self.preserve_recent_messages = preserve_recent_messages
         
-        self.token_counter = TokenCounter()
+        self.token_counter = token_counter or TokenCounter()
+        self.max_conversations = max_conversations
+        self.conversations: "OrderedDict[str, ConversationTokenAccumulator]" = OrderedDict()
         self.logger = logging.getLogger(f"{__name__}.ContextWindowManager")
     
     def fit_to_context(
         self,
         messages: List[Dict[str, str]],
         model: str = "gpt-3.5-turbo",
-        importance_scores: Optional[Dict[int, float]] = None
+        importance_scores: Optional[Dict[int, float]] = None,
+        conversation_id: Optional[str] = None
     ) -> List[Dict[str, str]]:
         """
         Fit messages to context window.
@@ -418,6 +585,8 @@ class ContextWindowManager:
             messages: List of messages
             model: Target model
             importance_scores: Optional importance scores for messages
+            conversation_id: Conversation these messages belong to; only
+                messages appended since its last call are counted
             
         Returns:
             Messages that fit in context window
@@ -426,10 +595,12 @@ class ContextWindowManager:
             return []
         
         # Calculate token counts for each message
-        message_tokens = [
-            self.token_counter.count_tokens(msg.get("content", ""), model)
-            for msg in messages
-        ]
+        if conversation_id is not None:
+            message_tokens = self._accumulator(conversation_id, model).update(messages)
+        else:
+            message_tokens = self.token_counter.count_tokens_many(
+                [msg.get("content", "") for msg in messages], model
+            )
         
         total_tokens = sum(message_tokens)
         
@@ -484,6 +655,17 @@ class ContextWindowManager:
         
         return preserved_messages
     
+    def _accumulator(self, conversation_id: str, model: str) -> ConversationTokenAccumulator:
+        """Get (or start) a conversation's accumulator."""
+        accumulator = self.conversations.get(conversation_id)
+        if accumulator is None or accumulator.model != model:
+            accumulator = ConversationTokenAccumulator(self.token_counter, model)
+            self.conversations[conversation_id] = accumulator
+        self.conversations.move_to_end(conversation_id)
+        while len(self.conversations) > self.max_conversations:
+            self.conversations.popitem(last=False)
+        return accumulator
+    
     def summarize_truncated(
         self,
         messages: List[Dict[str, str]],
@@ -540,9 +722,12 @@ class TokenOptimizer:
         self.enable_compression = enable_compression
         self.enable_context_management = enable_context_management
         
-        # Initialize components
-        self.compressor = PromptCompressor(aggressive_mode=aggressive_compression)
+        # Initialize components (sharing one token count cache)
         self.token_counter = TokenCounter()
+        self.compressor = PromptCompressor(
+            aggressive_mode=aggressive_compression,
+            token_counter=self.token_counter
+        )
         
         # Model context limits
         self.model_context_limits = model_context_limits or {
@@ -563,7 +748,8 @@ class TokenOptimizer:
         self,
         messages: List[Dict[str, str]],
         model: str,
-        max_response_tokens: int = 1000
+        max_response_tokens: int = 1000,
+        conversation_id: Optional[str] = None
     ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
         """
         Optimize request for token efficiency.
@@ -572,6 +758,8 @@ class TokenOptimizer:
             messages: Request messages
             model: Target model
             max_response_tokens: Reserved tokens for response
+            conversation_id: Conversation the messages belong to, so stable
+                prefixes are not re-counted for context fitting
             
         Returns:
             Optimized messages and optimization stats
@@ -611,7 +799,8 @@ class TokenOptimizer:
             # Get or create context manager
             if model not in self.context_managers:
                 self.context_managers[model] = ContextWindowManager(
-                    max_context_tokens=available_tokens
+                    max_context_tokens=available_tokens,
+                    token_counter=self.token_counter
                 )
             
             context_manager = self.context_managers[model]
@@ -619,7 +808,7 @@ class TokenOptimizer:
             # Fit to context
             original_count = len(optimized_messages)
             optimized_messages = context_manager.fit_to_context(
-                optimized_messages, model
+                optimized_messages, model, conversation_id=conversation_id
             )
             
             if len(optimized_messages) < original_count:
@@ -687,6 +876,7 @@ class TokenOptimizer:
                 "compression_ratio": self.compressor.stats.compression_ratio,
                 "estimated_cost_saved": self.compressor.stats.estimated_cost_saved
             },
+            "token_count_cache": self.token_counter.get_cache_stats(),
             "active_context_managers": len(self.context_managers),
             "compression_enabled": self.enable_compression,
             "context_management_enabled": self.enable_context_management
@@ -0,0 +1,387 @@
+"""
+M008: Vector index for semantic cache matching.
+
+Stores prompt embeddings as pre-normalized float32 rows, partitioned by
+(provider, model), so a lookup is one matrix-vector product over the
+partition instead of a per-entry similarity loop under the cache lock.
+
+- Writers (insert/delete) serialize on a lock.
+- Readers never lock: each partition publishes an immutable snapshot
+  (matrix, keys, row count). Inserts append past the published row count
+  and deletes tombstone the key, so a reader always sees a consistent
+  prefix. Callers re-check the returned key against their own storage.
+- Tombstones are compacted into a fresh matrix once they dominate.
+- Large partitions switch to an inverted-file (IVF) index: rows are
+  bucketed by their nearest k-means centroid and a query scores only the
+  buckets of its nearest centroids. k-means runs on a background thread
+  over the rows present when it started (rows below the published size
+  are never written again); the result is swapped in under the lock and
+  searches use the flat or previous index until then.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+    """Return a unit-length float32 copy of a vector, or None if it is zero."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+
+class _Snapshot:
+    """Immutable view of a partition published to readers."""
+
+    __slots__ = ('vectors', 'keys', 'size', 'ivf')
+
+    def __init__(self, vectors: np.ndarray, keys: List[Optional[str]], size: int,
+                 ivf: Optional['_IVFIndex']):
+        self.vectors = vectors
+        self.keys = keys
+        self.size = size
+        self.ivf = ivf
+
+
+class _IVFIndex:
+    """
+    Inverted lists over k-means centroids of a partition's rows.
+
+    Each list keeps its own contiguous copy of its vectors, so a probe is
+    a dense matrix-vector product rather than a gather of scattered rows.
+    Lists publish (vectors, rows, count) tuples the same way partitions
+    publish snapshots.
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, nprobe: int):
+        self.centroids = centroids
+        self.nprobe = min(nprobe, len(centroids))
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        self.lists: List[Tuple[np.ndarray, np.ndarray, int]] = []
+        for bucket in range(len(centroids)):
+            rows = np.flatnonzero(assignments == bucket)
+            capacity = max(16, 2 * len(rows))
+            bucket_vectors = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            bucket_vectors[:len(rows)] = vectors[rows]
+            bucket_rows = np.zeros(capacity, dtype=np.int64)
+            bucket_rows[:len(rows)] = rows
+            self.lists.append((bucket_vectors, bucket_rows, len(rows)))
+        self.trained_size = len(vectors)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, nlist: int, nprobe: int,
+              iterations: int = 8, sample_size: int = 16384, seed: int = 0) -> '_IVFIndex':
+        """Run spherical k-means on a sample and bucket every row."""
+        rng = np.random.default_rng(seed)
+        sample = vectors
+        if len(vectors) > sample_size:
+            sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for bucket in range(nlist):
+                members = sample[labels == bucket]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[bucket] = centroid / norm
+        return cls(centroids, vectors, nprobe)
+
+    def assign(self, row: int, vector: np.ndarray):
+        """Bucket a row inserted after training."""
+        bucket = int(np.argmax(self.centroids @ vector))
+        bucket_vectors, bucket_rows, count = self.lists[bucket]
+        if count == len(bucket_rows):
+            grown_vectors = np.zeros((2 * count, bucket_vectors.shape[1]), dtype=np.float32)
+            grown_vectors[:count] = bucket_vectors
+            grown_rows = np.zeros(2 * count, dtype=np.int64)
+            grown_rows[:count] = bucket_rows
+            bucket_vectors, bucket_rows = grown_vectors, grown_rows
+        bucket_vectors[count] = vector
+        bucket_rows[count] = row
+        self.lists[bucket] = (bucket_vectors, bucket_rows, count + 1)
+
+    def score(self, query: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and scores from the buckets nearest to the query."""
+        scores = self.centroids @ query
+        if self.nprobe < len(scores):
+            probe = np.argpartition(-scores, self.nprobe - 1)[:self.nprobe]
+        else:
+            probe = range(len(scores))
+        rows, row_scores = [], []
+        for bucket in probe:
+            bucket_vectors, bucket_rows, count = self.lists[bucket]
+            rows.append(bucket_rows[:count])
+            row_scores.append(bucket_vectors[:count] @ query)
+        rows = np.concatenate(rows)
+        row_scores = np.concatenate(row_scores)
+        # Rows appended after the snapshot was published are not visible yet
+        visible = rows < size
+        return rows[visible], row_scores[visible]
+
+
+class VectorPartition:
+    """Append-only matrix of unit vectors with tombstoned deletes."""
+
+    def __init__(self, dim: int, initial_capacity: int = 256,
+                 ivf_threshold: int = 20000, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._ivf: Optional[_IVFIndex] = None
+        self._training: Optional[threading.Thread] = None
+        # Bumped by compaction, which renumbers rows under a running training
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot(self._vectors, self._keys, 0, None)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def insert(self, key: str, vector: np.ndarray):
+        """Add or replace the vector for a key (vector must be unit length)."""
+        with self._lock:
+            if key in self._rows:
+                self._tombstone(key)
+            size = len(self._keys)
+            if size == len(self._vectors):
+                self._grow()
+            self._vectors[size] = vector
+            self._keys.append(key)
+            self._rows[key] = size
+            if self._ivf is not None:
+                self._ivf.assign(size, self._vectors[size])
+            self._maintain()
+            self._publish()
+
+    def delete(self, key: str) -> bool:
+        """Remove a key; returns False if it was not indexed."""
+        with self._lock:
+            if key not in self._rows:
+                return False
+            self._tombstone(key)
+            self._maintain()
+            self._publish()
+            return True
+
+    def search(self, query: np.ndarray, threshold: float) -> Optional[Tuple[str, float]]:
+        """Best key with cosine similarity >= threshold; lock-free."""
+        snapshot = self._snapshot
+        if snapshot.size == 0:
+            return None
+        if snapshot.ivf is not None:
+            rows, scores = snapshot.ivf.score(query, snapshot.size)
+        else:
+            rows = None
+            scores = snapshot.vectors[:snapshot.size] @ query
+
+        # Visit candidates best first, skipping rows deleted since publication
+        candidates = np.flatnonzero(scores >= threshold)
+        for position in candidates[np.argsort(-scores[candidates])]:
+            row = int(rows[position]) if rows is not None else int(position)
+            key = snapshot.keys[row]
+            if key is not None:
+                return key, float(scores[position])
+        return None
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no IVF training is running; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            thread = self._training
+            if thread is None:
+                return True
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                return False
+
+    def _tombstone(self, key: str):
+        row = self._rows.pop(key)
+        self._keys[row] = None
+
+    def _grow(self):
+        vectors = np.zeros((len(self._vectors) * 2, self.dim), dtype=np.float32)
+        vectors[:len(self._keys)] = self._vectors[:len(self._keys)]
+        self._vectors = vectors
+
+    def _maintain(self):
+        """Compact when tombstones dominate; (re)train IVF as the partition grows."""
+        size = len(self._keys)
+        live = len(self._rows)
+        if size >= 64 and live < size // 2:
+            self._compact()
+        live = len(self._rows)
+        if live < self.ivf_threshold:
+            self._ivf = None
+        elif self._training is None and (self._ivf is None or live >= 2 * self._ivf.trained_size):
+            nlist = max(1, int(math.sqrt(live)))
+            self._training = threading.Thread(
+                target=self._train,
+                args=(self._vectors[:len(self._keys)], nlist, self._generation),
+                name="ivf-training",
+                daemon=True
+            )
+            self._training.start()
+
+    def _train(self, vectors: np.ndarray, nlist: int, generation: int):
+        """Training thread: run k-means off the lock, then swap the index in."""
+        try:
+            ivf = _IVFIndex.train(vectors, nlist, self.nprobe)
+        except Exception as e:
+            logger.error(f"IVF training failed: {e}")
+            with self._lock:
+                self._training = None
+            return
+
+        with self._lock:
+            self._training = None
+            if generation == self._generation and len(self._rows) >= self.ivf_threshold:
+                # Bucket the rows inserted while training ran
+                for row in range(ivf.trained_size, len(self._keys)):
+                    ivf.assign(row, self._vectors[row])
+                self._ivf = ivf
+                logger.debug(f"Trained IVF index with {nlist} lists over {len(vectors)} vectors")
+            # Retrain at once if the partition was compacted or kept growing
+            self._maintain()
+            self._publish()
+
+    def _compact(self):
+        """Copy live rows into a fresh matrix; published snapshots are untouched."""
+        live_rows = sorted(self._rows.values())
+        capacity = max(256, 1 << max(0, len(live_rows) - 1).bit_length())
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:len(live_rows)] = self._vectors[live_rows]
+        self._keys = [self._keys[row] for row in live_rows]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._vectors = vectors
+        self._generation += 1
+        self._ivf = None  # retrained by _maintain on the new rows
+
+    def _publish(self):
+        self._snapshot = _Snapshot(self._vectors, self._keys, len(self._keys), self._ivf)
+
+
+class SemanticIndex:
+    """
+    Vector index partitioned by (provider, model).
+
+    Keys are cache keys; vectors are normalized on insert, so similarity is
+    a plain dot product.
+    """
+
+    def __init__(self, dim: int, ivf_threshold: int = 20000, nprobe: int = 8):
+        """
+        Initialize the index.
+
+        Args:
+            dim: Embedding dimensions
+            ivf_threshold: Partition size above which searches are approximate
+            nprobe: IVF buckets scanned per query
+        """
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._partitions: Dict[Tuple[Hashable, Hashable], VectorPartition] = {}
+        self._locations: Dict[str, Tuple[Hashable, Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._locations
+
+    def insert(self, key: str, vector: np.ndarray,
+               provider: Optional[str] = None, model: Optional[str] = None):
+        """Index a vector for a key, replacing any previous one."""
+        unit = normalize(vector)
+        partition_key = (provider, model)
+        with self._lock:
+            previous = self._locations.get(key)
+            if previous is not None and previous != partition_key:
+                self._partitions[previous].delete(key)
+            if unit is None:
+                if previous == partition_key:
+                    self._partitions[previous].delete(key)
+                self._locations.pop(key, None)
+                return
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                partition = VectorPartition(
+                    self.dim, ivf_threshold=self.ivf_threshold, nprobe=self.nprobe
+                )
+                self._partitions[partition_key] = partition
+            self._locations[key] = partition_key
+            partition.insert(key, unit)
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from the index."""
+        with self._lock:
+            partition_key = self._locations.pop(key, None)
+            if partition_key is None:
+                return False
+            return self._partitions[partition_key].delete(key)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Remove several keys; returns how many were indexed."""
+        return sum(1 for key in keys if self.delete(key))
+
+    def search(self, vector: np.ndarray, threshold: float,
+               provider: Optional[str] = None,
+               model: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed key.
+
+        Args:
+            vector: Query embedding (normalized here)
+            threshold: Minimum cosine similarity
+            provider: Restrict to one provider; None searches every provider
+            model: Model the entry must have been produced by
+
+        Returns:
+            (key, similarity) of the best match, or None
+        """
+        query = normalize(vector)
+        if query is None:
+            return None
+        if provider is not None:
+            partition = self._partitions.get((provider, model))
+            partitions = [partition] if partition is not None else []
+        else:
+            partitions = [p for (_, m), p in list(self._partitions.items()) if m == model]
+
+        best: Optional[Tuple[str, float]] = None
+        for partition in partitions:
+            match = partition.search(query, threshold)
+            if match is not None and (best is None or match[1] > best[1]):
+                best = match
+        return best
+
+    def clear(self):
+        """Drop every partition."""
+        with self._lock:
+            self._partitions = {}
+            self._locations.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Index size and partition layout."""
+        partitions = list(self._partitions.values())
+        return {
+            'vectors': len(self._locations),
+            'partitions': len(partitions),
+            'approximate_partitions': sum(1 for p in partitions if p._ivf is not None),
+            'training_partitions': sum(1 for p in partitions if p._training is not None)
+        }
@@ -32,6 +32,10 @@ from .patterns import PatternRecognizer, PatternAnalysis, Pattern
 from .entropy_optimized import OptimizedShannonEntropyCalculator
 from .scorer_optimized import OptimizedQualityScorer
 from .patterns_optimized import OptimizedPatternRecognizer
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import DocumentStats
+from .entropy_streaming import StreamingEntropyAccumulator, stream_entropy_statistics
+from .sections import SectionedDocumentStats, build_sectioned_stats, split_sections
 
 # Import security components
 from .validators import InputValidator, ValidationConfig, ValidationError
@@ -107,6 +111,14 @@ __all__ = [
     'OptimizedShannonEntropyCalculator',
     'OptimizedQualityScorer',
     'OptimizedPatternRecognizer',
+    'ContentAddressedStore',
+    'content_digest',
+    'DocumentStats',
+    'StreamingEntropyAccumulator',
+    'stream_entropy_statistics',
+    'SectionedDocumentStats',
+    'build_sectioned_stats',
+    'split_sections',
     
     # Security Components
     'InputValidator',
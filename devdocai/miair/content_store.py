@@ -0,0 +1,279 @@
+"""
+Content-addressed result store for MIAIR components.
+
+Provides a full-text content digest that is computed once per document and a
+memory-bounded LRU store keyed by that digest. The entropy calculator, quality
+scorer and pattern recognizer share one store so that a document is hashed
+once and each component caches its results under its own namespace.
+"""
+
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 128-bit digests keep collisions negligible at corpus scale
+DIGEST_SIZE = 16
+
+# Hash in slices so huge documents are never encoded into one large buffer
+_HASH_CHUNK_CHARS = 1 << 20
+
+
+def content_digest(text: str) -> str:
+    """
+    Compute a BLAKE2b digest over the full text.
+
+    The text is encoded and hashed in fixed-size slices so memory overhead
+    stays constant regardless of document size.
+
+    Args:
+        text: Document text
+
+    Returns:
+        Hex digest identifying the content
+    """
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for start in range(0, len(text), _HASH_CHUNK_CHARS):
+        hasher.update(
+            text[start:start + _HASH_CHUNK_CHARS].encode('utf-8', errors='surrogatepass')
+        )
+    return hasher.hexdigest()
+
+
+class ContentAddressedStore:
+    """
+    Thread-safe LRU result store keyed by content digest and namespace.
+
+    Features:
+    - Byte-size accounting based on the serialized size of each result
+    - Optional entry count limit in addition to the byte budget
+    - Optional spill of evicted entries to a local SQLite file, which is
+      consulted on memory misses and bounded by its own byte budget
+    """
+
+    def __init__(self,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: Optional[int] = None,
+                 spill_path: Optional[Union[str, Path]] = None,
+                 spill_max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize content-addressed store.
+
+        Args:
+            max_bytes: Memory budget for cached results
+            max_entries: Optional maximum number of in-memory entries
+            spill_path: Optional SQLite file receiving evicted entries
+            spill_max_bytes: Size budget for the spill file
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.spill_max_bytes = spill_max_bytes
+
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+
+        self._spill_conn: Optional[sqlite3.Connection] = None
+        self._spill_bytes = 0
+        if spill_path is not None:
+            self._open_spill(Path(spill_path))
+
+    @staticmethod
+    def make_key(digest: str, namespace: str) -> str:
+        """Build the storage key for a digest within a namespace."""
+        return f"{namespace}:{digest}"
+
+    def get(self, digest: str, namespace: str) -> Optional[Any]:
+        """
+        Get a cached result.
+
+        Args:
+            digest: Content digest from content_digest()
+            namespace: Result namespace (e.g. 'entropy:all')
+
+        Returns:
+            Cached result or None
+        """
+        key = self.make_key(digest, namespace)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            if self._spill_conn is not None:
+                payload = self._spill_get(key)
+                if payload is not None:
+                    value = pickle.loads(payload)
+                    self.spill_hits += 1
+                    self.hits += 1
+                    self._insert(key, value, len(payload))
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, digest: str, namespace: str, value: Any):
+        """
+        Store a result.
+
+        Args:
+            digest: Content digest from content_digest()
+            namespace: Result namespace
+            value: Result to cache (must be picklable)
+        """
+        key = self.make_key(digest, namespace)
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PickleError, TypeError, AttributeError) as e:
+            logger.debug(f"Result for {namespace} not cacheable: {e}")
+            return
+
+        with self._lock:
+            if len(payload) > self.max_bytes:
+                # Too large for memory; keep it only in the spill file
+                if self._spill_conn is not None:
+                    self._spill_put(key, payload)
+                return
+            self._insert(key, value, len(payload))
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        digest, namespace = key
+        with self._lock:
+            return self.make_key(digest, namespace) in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Clear in-memory and spilled entries."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.spill_hits = 0
+            self.evictions = 0
+            if self._spill_conn is not None:
+                self._spill_conn.execute("DELETE FROM results")
+                self._spill_conn.commit()
+                self._spill_bytes = 0
+
+    def close(self):
+        """Close the spill file if open."""
+        with self._lock:
+            if self._spill_conn is not None:
+                self._spill_conn.close()
+                self._spill_conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total > 0 else 0.0,
+                'evictions': self.evictions,
+                'spill_enabled': self._spill_conn is not None,
+                'spill_hits': self.spill_hits,
+                'spill_bytes': self._spill_bytes
+            }
+
+    def _insert(self, key: str, value: Any, size: int):
+        """Insert entry and evict least recently used entries over budget."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._current_bytes -= previous[1]
+
+        self._entries[key] = (value, size)
+        self._current_bytes += size
+
+        while self._entries and (
+            self._current_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_size
+            self.evictions += 1
+            if self._spill_conn is not None:
+                self._spill_put(
+                    evicted_key,
+                    pickle.dumps(evicted_value, protocol=pickle.HIGHEST_PROTOCOL)
+                )
+
+    def _open_spill(self, path: Path):
+        """Open (or create) the SQLite spill file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed)")
+        conn.commit()
+        row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        self._spill_bytes = int(row[0])
+        self._spill_conn = conn
+
+    def _spill_get(self, key: str) -> Optional[bytes]:
+        """Read a spilled payload and refresh its access time."""
+        row = self._spill_conn.execute(
+            "SELECT value FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._spill_conn.execute(
+            "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        self._spill_conn.commit()
+        return row[0]
+
+    def _spill_put(self, key: str, payload: bytes):
+        """Write a payload to the spill file and prune it to budget."""
+        if len(payload) > self.spill_max_bytes:
+            return
+        old = self._spill_conn.execute(
+            "SELECT size FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if old is not None:
+            self._spill_bytes -= old[0]
+        self._spill_conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), time.time())
+        )
+        self._spill_bytes += len(payload)
+
+        while self._spill_bytes > self.spill_max_bytes:
+            oldest = self._spill_conn.execute(
+                "SELECT key, size FROM results ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not oldest:
+                break
+            for old_key, old_size in oldest:
+                self._spill_conn.execute("DELETE FROM results WHERE key = ?", (old_key,))
+                self._spill_bytes -= old_size
+                if self._spill_bytes <= self.spill_max_bytes:
+                    break
+        self._spill_conn.commit()
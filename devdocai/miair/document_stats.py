@@ -0,0 +1,315 @@
+"""
+Shared text statistics kernel for MIAIR components.
+
+A DocumentStats instance tokenizes a document once and exposes the results
+as NumPy arrays and compact tables (word ids, vocabulary counts, character
+histogram, sentence lengths, line offsets, header and code-block spans).
+The optimized entropy calculator, quality scorer and pattern recognizer all
+compute their metrics from one instance instead of re-scanning the text.
+
+Every feature is computed lazily on first access, so components that are
+served from cache never pay for tokenization.
+"""
+
+import re
+from collections import Counter
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Tokenization patterns shared by all MIAIR components
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_PATTERN = re.compile(r'[.!?]+')
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.+)', re.MULTILINE)
+CODE_BLOCK_PATTERN = re.compile(r'```[\s\S]*?```', re.MULTILINE)
+
+_NEWLINE = ord('\n')
+
+# (start, end, matched text, groups) for one regex match
+Match = Tuple[int, int, str, Tuple[Optional[str], ...]]
+
+# Weights and normalization ceilings for (character, word, sentence) entropy
+AGGREGATE_WEIGHTS = np.array([0.2, 0.5, 0.3])
+AGGREGATE_MAX_VALUES = np.array([6.0, 12.0, 4.0])
+
+
+def shannon_entropy(counts: np.ndarray) -> float:
+    """
+    Shannon entropy in bits of a frequency table.
+
+    Args:
+        counts: Array of non-negative occurrence counts
+
+    Returns:
+        Entropy in bits (0.0 for empty tables)
+    """
+    counts = counts[counts > 0]
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    probabilities = counts / total
+    return float(-np.sum(probabilities * np.log2(probabilities)))
+
+
+def aggregate_entropy(character: float, word: float, sentence: float) -> float:
+    """
+    Weighted aggregate of normalized character, word and sentence entropy.
+
+    Returns:
+        Aggregate entropy in [0, 1]
+    """
+    values = np.array([character, word, sentence])
+    normalized = np.minimum(values / AGGREGATE_MAX_VALUES, 1.0)
+    return float(np.dot(AGGREGATE_WEIGHTS, normalized))
+
+
+class DocumentStats:
+    """
+    Single-pass, lazily evaluated text statistics for one document.
+
+    Attributes are grouped so that each underlying scan runs at most once:
+    - Code points: char histogram and line offsets
+    - Words: lower-cased tokens, word ids and vocabulary counts
+    - Sentences: word and whitespace-token counts per sentence
+    - Markdown structure: header and code-block spans
+    """
+
+    def __init__(self, text: str):
+        """
+        Initialize statistics for a document.
+
+        Args:
+            text: Document text
+        """
+        self.text = text
+        # Regex results keyed by (pattern, flags), see matches()
+        self._matches: Dict[Tuple[str, int], List[Match]] = {}
+
+    @cached_property
+    def lower_text(self) -> str:
+        """Lower-cased document text."""
+        return self.text.lower()
+
+    @cached_property
+    def _codepoints(self) -> np.ndarray:
+        """Document as an array of Unicode code points (one entry per char)."""
+        if not self.text:
+            return np.zeros(0, dtype=np.uint32)
+        return np.frombuffer(
+            self.text.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32
+        )
+
+    @cached_property
+    def _char_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Distinct code points (sorted) and their occurrence counts."""
+        if not self.text:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64)
+        return np.unique(self._codepoints, return_counts=True)
+
+    @property
+    def char_counts(self) -> np.ndarray:
+        """Occurrence count of each distinct character."""
+        return self._char_table[1]
+
+    @cached_property
+    def line_offsets(self) -> np.ndarray:
+        """Start offset of every line."""
+        newlines = np.flatnonzero(self._codepoints == _NEWLINE) + 1
+        return np.concatenate((np.zeros(1, dtype=newlines.dtype), newlines))
+
+    def line_number(self, offset: int) -> int:
+        """1-based line number of a character offset."""
+        return int(np.searchsorted(self.line_offsets, offset, side='right'))
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Lower-cased word tokens."""
+        return WORD_PATTERN.findall(self.lower_text)
+
+    @cached_property
+    def _word_table(self) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Word ids, vocabulary and per-vocabulary counts in one pass."""
+        vocabulary: Dict[str, int] = {}
+        word_ids = np.fromiter(
+            (vocabulary.setdefault(word, len(vocabulary)) for word in self.words),
+            dtype=np.int32,
+            count=len(self.words)
+        )
+        word_counts = np.bincount(word_ids, minlength=len(vocabulary))
+        return word_ids, list(vocabulary), word_counts
+
+    @property
+    def word_ids(self) -> np.ndarray:
+        """Vocabulary id of each word token."""
+        return self._word_table[0]
+
+    @property
+    def vocabulary(self) -> List[str]:
+        """Distinct words in first-occurrence order."""
+        return self._word_table[1]
+
+    @property
+    def word_counts(self) -> np.ndarray:
+        """Occurrence count of each vocabulary word."""
+        return self._word_table[2]
+
+    @property
+    def word_count(self) -> int:
+        """Number of word tokens."""
+        return len(self.words)
+
+    @cached_property
+    def lower_tokens(self) -> List[str]:
+        """Lower-cased whitespace-delimited tokens."""
+        return self.lower_text.split()
+
+    @cached_property
+    def lower_token_counts(self) -> Counter:
+        """Occurrence count of each lower-cased whitespace token."""
+        return Counter(self.lower_tokens)
+
+    @property
+    def token_count(self) -> int:
+        """Number of whitespace-delimited tokens."""
+        return len(self.lower_tokens)
+
+    @cached_property
+    def _sentence_pieces(self) -> List[Tuple[int, int, bool]]:
+        """(words, tokens, non-empty) for every piece between terminators."""
+        pieces = []
+        for sentence in SENTENCE_PATTERN.split(self.text):
+            sentence = sentence.strip()
+            if sentence:
+                pieces.append((len(WORD_PATTERN.findall(sentence)), len(sentence.split()), True))
+            else:
+                pieces.append((0, 0, False))
+        return pieces
+
+    @cached_property
+    def _sentence_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Word and whitespace-token counts for each non-empty sentence."""
+        word_counts = []
+        token_counts = []
+        for words, tokens, non_empty in self._sentence_pieces:
+            if non_empty:
+                word_counts.append(words)
+                token_counts.append(tokens)
+        return (np.array(word_counts, dtype=np.int64),
+                np.array(token_counts, dtype=np.int64))
+
+    @property
+    def sentence_word_counts(self) -> np.ndarray:
+        """Number of word tokens in each sentence."""
+        return self._sentence_table[0]
+
+    @property
+    def sentence_token_counts(self) -> np.ndarray:
+        """Number of whitespace tokens in each sentence."""
+        return self._sentence_table[1]
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of non-empty sentences."""
+        return len(self._sentence_table[0])
+
+    @cached_property
+    def paragraphs(self) -> List[str]:
+        """Non-empty, stripped paragraphs separated by blank lines."""
+        return [p.strip() for p in self.text.split('\n\n') if p.strip()]
+
+    @cached_property
+    def _header_table(self) -> Tuple[List[str], List[str], np.ndarray, List[Tuple[int, int]]]:
+        """Markdown header lines, titles, levels and spans."""
+        lines, titles, levels, spans = [], [], [], []
+        for match in HEADER_PATTERN.finditer(self.text):
+            lines.append(match.group(0))
+            titles.append(match.group(2))
+            levels.append(len(match.group(1)))
+            spans.append(match.span())
+        return lines, titles, np.array(levels, dtype=np.int64), spans
+
+    @property
+    def headers(self) -> List[str]:
+        """Full markdown header lines."""
+        return self._header_table[0]
+
+    @property
+    def header_titles(self) -> List[str]:
+        """Header text without the leading hashes."""
+        return self._header_table[1]
+
+    @property
+    def header_levels(self) -> np.ndarray:
+        """Header depth (number of hashes) for each header."""
+        return self._header_table[2]
+
+    @property
+    def header_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets of each header line."""
+        return self._header_table[3]
+
+    @cached_property
+    def code_block_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets of each fenced code block."""
+        return [match.span() for match in CODE_BLOCK_PATTERN.finditer(self.text)]
+
+    @property
+    def code_blocks(self) -> List[str]:
+        """Fenced code blocks including their fences."""
+        return [self.text[start:end] for start, end in self.code_block_spans]
+
+    def matches(self, regex: re.Pattern) -> List[Match]:
+        """
+        All non-overlapping matches of a compiled pattern, memoized.
+
+        Components that run the same pattern over one document share a
+        single scan. Matches are plain tuples so they can be cached.
+
+        Args:
+            regex: Compiled regular expression
+
+        Returns:
+            (start, end, matched text, groups) tuples in document order
+        """
+        key = (regex.pattern, regex.flags)
+        found = self._matches.get(key)
+        if found is None:
+            found = [(m.start(), m.end(), m.group(), m.groups())
+                     for m in regex.finditer(self.text)]
+            self._matches[key] = found
+        return found
+
+    def findall(self, regex: re.Pattern) -> List[Any]:
+        """Same result as regex.findall(text), served from matches()."""
+        found = self.matches(regex)
+        if regex.groups == 0:
+            return [text for _, _, text, _ in found]
+        if regex.groups == 1:
+            return [groups[0] for _, _, _, groups in found]
+        return [groups for _, _, _, groups in found]
+
+    def precompute(self) -> 'DocumentStats':
+        """Evaluate every table eagerly (e.g. before caching the instance)."""
+        self._char_table
+        self.line_offsets
+        self._word_table
+        self.lower_token_counts
+        self._sentence_pieces
+        self._sentence_table
+        self._terminator_bounds
+        self.paragraphs
+        self._header_table
+        self.code_block_spans
+        return self
+
+    @cached_property
+    def _terminator_bounds(self) -> Optional[Tuple[int, int]]:
+        """End offsets of the first and last sentence terminator runs."""
+        first = SENTENCE_PATTERN.search(self.text)
+        if first is None:
+            return None
+        last_end = first.end()
+        for match in SENTENCE_PATTERN.finditer(self.text, last_end):
+            last_end = match.end()
+        return first.end(), last_end
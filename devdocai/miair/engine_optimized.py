@@ -615,9 +615,10 @@ class OptimizedMIAIREngine:
         
         # Aggregate results using numpy
         if chunk_analyses:
-            # Aggregate entropy stats
-            entropies = [a.entropy_stats for a in chunk_analyses if a]
-            aggregated_entropy = self._aggregate_entropy_stats(entropies)
+            # Exact whole-document entropy from merged frequency tables
+            aggregated_entropy = self.entropy_calc.stream_large_document(
+                content, self.config.chunk_size
+            )
             
             # Aggregate quality metrics
             quality_scores = np.array([a.quality_metrics.overall for a in chunk_analyses if a])
@@ -735,31 +736,6 @@ class OptimizedMIAIREngine:
         # Return addressed patterns
         return [p for p in original_patterns.patterns if p.name in addressed_names]
     
-    def _aggregate_entropy_stats(self, stats_list: List[Dict]) -> Dict[str, Any]:
-        """Aggregate entropy statistics using numpy."""
-        if not stats_list:
-            return {}
-        
-        # Extract values for aggregation
-        entropies = np.array([[s.get('entropy', {}).get('character', 0),
-                               s.get('entropy', {}).get('word', 0),
-                               s.get('entropy', {}).get('sentence', 0)]
-                              for s in stats_list])
-        
-        # Calculate means
-        mean_entropies = np.mean(entropies, axis=0)
-        
-        return {
-            'entropy': {
-                'character': float(mean_entropies[0]),
-                'word': float(mean_entropies[1]),
-                'sentence': float(mean_entropies[2])
-            },
-            'redundancy': float(np.mean([s.get('redundancy', 0) for s in stats_list])),
-            'information_density': float(np.mean([s.get('information_density', 0) for s in stats_list])),
-            'vocabulary_richness': float(np.mean([s.get('vocabulary_richness', 0) for s in stats_list]))
-        }
-    
     def _store_analysis_async(self, analysis: DocumentAnalysis, metadata: Optional[Dict]):
         """Store analysis asynchronously for better performance."""
         if not self.storage:
@@ -8,7 +8,6 @@ configurable engine with mode selection.
 import time
 import logging
 import asyncio
-import hashlib
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -43,6 +42,10 @@ from .scorer_optimized import OptimizedQualityScorer
 from .optimizer import MIAIROptimizer, OptimizationConfig, OptimizationResult
 from .patterns import PatternRecognizer, PatternAnalysis
 from .patterns_optimized import OptimizedPatternRecognizer
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import DocumentStats
+from .sections import build_sectioned_stats
+from .process_pool import create_process_pool, chunked, init_engine_worker, analyze_chunk
 
 # Import M002 storage for integration
 try:
@@ -81,6 +84,12 @@ class UnifiedMIAIRConfig:
     batch_size: int = 100
     max_workers: int = 4
     use_processes: bool = False  # For optimized mode
+    process_min_batch: int = 16  # Smallest batch worth dispatching to processes
+    process_chunk_size: int = 8  # Documents per worker task
+    result_store_max_mb: int = 64  # Shared component result store (optimized mode)
+    result_store_path: Optional[str] = None  # Optional SQLite spill file
+    incremental_sections: bool = False  # Reuse cached per-section statistics (optimized mode)
+    incremental_min_chars: int = 16384  # Smallest document analyzed section by section
     
     # Security settings (for secure mode)
     enable_validation: bool = True
@@ -108,7 +117,13 @@ class UnifiedMIAIRConfig:
             min_quality=self.min_quality,
             max_iterations=self.max_iterations,
             storage_enabled=self.storage_enabled,
-            enable_learning=self.enable_learning
+            enable_learning=self.enable_learning,
+            result_store_max_mb=self.result_store_max_mb,
+            result_store_path=self.result_store_path,
+            process_min_batch=self.process_min_batch,
+            process_chunk_size=self.process_chunk_size,
+            incremental_sections=self.incremental_sections,
+            incremental_min_chars=self.incremental_min_chars
         )
         
         if mode == EngineMode.OPTIMIZED:
@@ -150,6 +165,9 @@ class AnalysisResult:
     validated: bool = False
     encrypted: bool = False
     audit_logged: bool = False
+    
+    # Set when batch analysis of this document failed
+    error: Optional[str] = None
 
 
 class UnifiedMIAIREngine:
@@ -179,11 +197,20 @@ class UnifiedMIAIREngine:
     
     def _initialize_components(self):
         """Initialize core components based on mode."""
+        self.result_store = None
         if self.config.mode == EngineMode.OPTIMIZED:
-            # Use optimized components
-            self.entropy_calculator = OptimizedShannonEntropyCalculator()
-            self.quality_scorer = OptimizedQualityScorer()
-            self.pattern_recognizer = OptimizedPatternRecognizer()
+            # Optimized components share one digest-keyed result store
+            self.result_store = ContentAddressedStore(
+                max_bytes=self.config.result_store_max_mb * 1024 * 1024,
+                spill_path=self.config.result_store_path
+            )
+            self.entropy_calculator = OptimizedShannonEntropyCalculator(
+                result_store=self.result_store
+            )
+            self.quality_scorer = OptimizedQualityScorer(result_store=self.result_store)
+            self.pattern_recognizer = OptimizedPatternRecognizer(
+                result_store=self.result_store
+            )
         else:
             # Use standard components
             self.entropy_calculator = ShannonEntropyCalculator()
@@ -239,6 +266,12 @@ class UnifiedMIAIREngine:
         if self.config.mode == EngineMode.OPTIMIZED:
             # Always enable executor for optimized mode to restore performance
             self.executor = True  # Simple flag - we'll use ThreadPoolExecutor directly in methods
+        
+        # Persistent process pool for batch analysis, created on first use
+        self._process_pool = None
+        
+        # Section reuse counters for incremental analysis
+        self.section_stats = {'reused': 0, 'computed': 0}
     
     def _initialize_storage(self):
         """Initialize storage integration."""
@@ -278,21 +311,22 @@ class UnifiedMIAIREngine:
         if self.config.mode == EngineMode.SECURE:
             content = self._secure_preprocessing(content, document_id, metadata)
         
+        # Extract content string and hash it once for every cache below
+        content_str = self._extract_content(content)
+        digest = content_digest(content_str)
+        
         # Check cache
         cache_key = None
         if self.cache:
-            cache_key = self._compute_cache_key(content, metadata)
+            cache_key = self._compute_cache_key(content_str, metadata, digest)
             cached_result = self.cache.get(cache_key)
             if cached_result:
                 logger.debug(f"Cache hit for document {document_id}")
                 return cached_result
         
-        # Extract content string
-        content_str = self._extract_content(content)
-        
         # Perform analysis based on mode
         if self.config.mode == EngineMode.OPTIMIZED:
-            result = self._analyze_optimized(content_str, document_id, metadata)
+            result = self._analyze_optimized(content_str, document_id, metadata, digest)
         elif self.config.mode == EngineMode.SECURE:
             result = self._analyze_secure(content_str, document_id, metadata)
         else:
@@ -338,24 +372,40 @@ class UnifiedMIAIREngine:
             mode=self.config.mode.value
         )
     
-    def _analyze_optimized(self, content: str, document_id: str, metadata: Optional[Dict]) -> AnalysisResult:
+    def _analyze_optimized(self,
+                           content: str,
+                           document_id: str,
+                           metadata: Optional[Dict],
+                           digest: Optional[str] = None) -> AnalysisResult:
         """Optimized analysis with parallel processing."""
+        digest = digest or content_digest(content)
+        # One tokenization shared by all three components
+        stats = self._document_stats(content)
+        
         # Use ThreadPoolExecutor for optimal performance - avoid ProcessPoolExecutor due to pickle constraints
         if self.executor:
             # Parallel execution using ThreadPoolExecutor for 3-5x speedup
             with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
-                entropy_future = executor.submit(self.entropy_calculator.calculate_entropy, content)
-                metrics_future = executor.submit(self.quality_scorer.score_document, content, metadata)
-                pattern_future = executor.submit(self.pattern_recognizer.analyze, content)
+                entropy_future = executor.submit(
+                    self.entropy_calculator.calculate_entropy, content, 'all', digest, stats
+                )
+                metrics_future = executor.submit(
+                    self.quality_scorer.score_document, content, metadata, digest, stats
+                )
+                pattern_future = executor.submit(
+                    self.pattern_recognizer.analyze, content, None, digest, stats
+                )
                 
                 entropy_result = entropy_future.result()
                 metrics = metrics_future.result()
                 pattern_analysis = pattern_future.result()
         else:
             # Sequential execution fallback
-            entropy_result = self.entropy_calculator.calculate_entropy(content)
-            metrics = self.quality_scorer.score_document(content, metadata)
-            pattern_analysis = self.pattern_recognizer.analyze(content)
+            entropy_result = self.entropy_calculator.calculate_entropy(
+                content, 'all', digest, stats
+            )
+            metrics = self.quality_scorer.score_document(content, metadata, digest, stats)
+            pattern_analysis = self.pattern_recognizer.analyze(content, None, digest, stats)
         
         # Extract aggregate entropy as the main entropy value
         entropy = entropy_result.get('aggregate', 0.0) if isinstance(entropy_result, dict) else entropy_result
@@ -374,6 +424,23 @@ class UnifiedMIAIREngine:
             mode=self.config.mode.value
         )
     
+    def _document_stats(self, content: str) -> DocumentStats:
+        """
+        Build the shared statistics kernel for a document.
+        
+        In incremental mode, large documents are split into header-delimited
+        sections whose statistics are cached in the result store, so after an
+        edit only the changed sections are tokenized and scanned again.
+        """
+        if (self.config.incremental_sections
+                and self.result_store is not None
+                and len(content) >= self.config.incremental_min_chars):
+            stats = build_sectioned_stats(content, self.result_store)
+            self.section_stats['reused'] += stats.reused_sections
+            self.section_stats['computed'] += len(stats.sections) - stats.reused_sections
+            return stats
+        return DocumentStats(content)
+    
     def _analyze_secure(self, content: str, document_id: str, metadata: Optional[Dict]) -> AnalysisResult:
         """Secure analysis with validation and audit logging."""
         # Audit log
@@ -478,12 +545,20 @@ class UnifiedMIAIREngine:
         """
         Analyze multiple documents in batch.
         
+        Results are aligned with the input; documents that fail produce
+        an AnalysisResult with ``error`` set instead of being dropped.
+        
         Args:
             documents: List of documents to analyze
             
         Returns:
-            List of analysis results
+            List of analysis results, one per document
         """
+        if (self.config.mode == EngineMode.OPTIMIZED
+                and self.config.use_processes
+                and len(documents) >= self.config.process_min_batch):
+            return self._batch_analyze_processes(documents)
+        
         if self.config.mode == EngineMode.OPTIMIZED and self.executor and len(documents) > 2:
             # Parallel batch processing for 3-5x speedup
             with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
@@ -498,13 +573,12 @@ class UnifiedMIAIREngine:
                     futures.append(future)
                 
                 results = []
-                for future in futures:
+                for doc, future in zip(documents, futures):
                     try:
-                        result = future.result()
-                        results.append(result)
+                        results.append(future.result())
                     except Exception as e:
-                        logger.error(f"Failed to analyze document in batch: {e}")
-                        continue
+                        logger.error(f"Failed to analyze document {doc.get('id')} in batch: {e}")
+                        results.append(self._failed_result(doc, e))
                 
                 return results
         else:
@@ -520,10 +594,104 @@ class UnifiedMIAIREngine:
                     results.append(result)
                 except Exception as e:
                     logger.error(f"Failed to analyze document {doc.get('id')}: {e}")
-                    continue
+                    results.append(self._failed_result(doc, e))
             
             return results
     
+    def _batch_analyze_processes(self, documents: List[Dict[str, Any]]) -> List[AnalysisResult]:
+        """Analyze a batch in the persistent process pool."""
+        import uuid
+        
+        results: List[Optional[AnalysisResult]] = [None] * len(documents)
+        pending = []
+        cache_keys = {}
+        
+        for index, doc in enumerate(documents):
+            content = doc.get('content')
+            metadata = doc.get('metadata')
+            document_id = doc.get('id') or str(uuid.uuid4())
+            
+            if self.cache:
+                try:
+                    cache_key = self._compute_cache_key(content, metadata)
+                except Exception as e:
+                    results[index] = self._failed_result(doc, e)
+                    continue
+                cached_result = self.cache.get(cache_key)
+                if cached_result:
+                    results[index] = cached_result
+                    continue
+                cache_keys[index] = cache_key
+            
+            pending.append((index, content, document_id, metadata))
+        
+        if pending:
+            pool = self._get_process_pool()
+            submitted = [
+                (chunk, pool.submit(analyze_chunk, list(chunk)))
+                for chunk in chunked(pending, self.config.process_chunk_size)
+            ]
+            
+            for chunk, future in submitted:
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # Chunk lost (worker crash or unpicklable input); isolate the culprit
+                    logger.warning(f"Batch chunk of {len(chunk)} documents failed, retrying singly: {e}")
+                    records = self._retry_chunk_singly(pool, chunk)
+                
+                for index, result, error in records:
+                    doc = documents[index]
+                    if error is not None:
+                        logger.error(f"Failed to analyze document {doc.get('id')}: {error}")
+                        results[index] = self._failed_result(doc, error)
+                        continue
+                    
+                    if index in cache_keys:
+                        self.cache.put(cache_keys[index], result)
+                    if self.storage:
+                        self._store_result(result, doc.get('content'), doc.get('metadata'))
+                    results[index] = result
+        
+        return results
+    
+    def _retry_chunk_singly(self, pool, chunk) -> List[Tuple[int, Any, Optional[str]]]:
+        """Re-run a failed chunk one document per task."""
+        records = []
+        futures = [(item, pool.submit(analyze_chunk, [item])) for item in chunk]
+        for item, future in futures:
+            try:
+                records.extend(future.result())
+            except Exception as e:
+                records.append((item[0], None, f"{type(e).__name__}: {e}"))
+        return records
+    
+    def _get_process_pool(self):
+        """Get the persistent process pool, creating warmed workers on first use."""
+        if self._process_pool is None:
+            self._process_pool = create_process_pool(
+                max_workers=self.config.max_workers,
+                initializer=init_engine_worker,
+                initargs=(self.config,)
+            )
+        return self._process_pool
+    
+    def _failed_result(self, doc: Dict[str, Any], error: Union[str, Exception]) -> AnalysisResult:
+        """Placeholder result recording a per-document batch failure."""
+        if isinstance(error, Exception):
+            error = f"{type(error).__name__}: {error}"
+        return AnalysisResult(
+            document_id=doc.get('id') or '',
+            quality_score=0.0,
+            entropy=0.0,
+            patterns=[],
+            metrics=QualityMetrics(),
+            optimization_suggestions=[],
+            processing_time=0.0,
+            mode=self.config.mode.value,
+            error=error
+        )
+    
     def _extract_content(self, content: Union[str, Dict]) -> str:
         """Extract content string from various formats."""
         if isinstance(content, str):
@@ -533,11 +701,14 @@ class UnifiedMIAIREngine:
         else:
             return str(content)
     
-    def _compute_cache_key(self, content: Any, metadata: Optional[Dict]) -> str:
-        """Compute cache key for content."""
-        content_str = self._extract_content(content)
-        cache_data = f"{content_str}:{metadata}"
-        return hashlib.sha256(cache_data.encode()).hexdigest()
+    def _compute_cache_key(self,
+                           content: Any,
+                           metadata: Optional[Dict],
+                           digest: Optional[str] = None) -> str:
+        """Compute cache key from the content digest and metadata."""
+        digest = digest or content_digest(self._extract_content(content))
+        meta_key = content_digest(str(metadata)) if metadata else ''
+        return f"{digest}:{meta_key}"
     
     def _generate_suggestions(self, metrics: QualityMetrics, patterns: PatternAnalysis) -> List[str]:
         """Generate optimization suggestions."""
@@ -633,6 +804,12 @@ class UnifiedMIAIREngine:
         if self.cache:
             stats['cache'] = self.cache.get_stats()
         
+        if self.result_store is not None:
+            stats['result_store'] = self.result_store.get_stats()
+        
+        if self.config.incremental_sections:
+            stats['incremental'] = dict(self.section_stats)
+        
         # Add resource stats - use fallback if method doesn't exist
         try:
             stats['resources'] = self.resource_monitor.get_stats()
@@ -652,12 +829,19 @@ class UnifiedMIAIREngine:
     
     def cleanup(self):
         """Clean up resources."""
-        if self.executor:
+        if self.executor and hasattr(self.executor, 'shutdown'):
             self.executor.shutdown()
         
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        
         if self.cache:
             self.cache.clear()
         
+        if self.result_store is not None:
+            self.result_store.close()
+        
         logger.info(f"MIAIR Engine ({self.config.mode.value} mode) cleaned up")
 
 
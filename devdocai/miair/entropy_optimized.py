@@ -8,17 +8,18 @@ and advanced caching for high-throughput document processing.
 import math
 import re
 import string
-import hashlib
-from collections import Counter
 from typing import Dict, List, Tuple, Optional, Union
 import numpy as np
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 import multiprocessing as mp
 
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import DocumentStats, shannon_entropy, aggregate_entropy
+from .entropy_streaming import TextSource, stream_entropy_statistics
+from .process_pool import create_process_pool, chunked, init_entropy_worker, entropy_chunk
+
 # Pre-compiled regex patterns for better performance
-WORD_PATTERN = re.compile(r'\b\w+\b')
-SENTENCE_PATTERN = re.compile(r'[.!?]+')
 WHITESPACE_PATTERN = re.compile(r'\s+')
 
 
@@ -29,7 +30,8 @@ class OptimizedShannonEntropyCalculator:
     Performance optimizations:
     - Vectorized numpy operations for frequency calculations
     - Parallel processing for batch operations
-    - Advanced caching with hash-based keys
+    - Content-addressed caching keyed by a full-text digest
+    - Shared DocumentStats kernel so the text is tokenized once
     - Memory pooling for large documents
     - Pre-compiled regex patterns
     """
@@ -37,7 +39,9 @@ class OptimizedShannonEntropyCalculator:
     def __init__(self, 
                  cache_size: int = 512,
                  enable_parallel: bool = True,
-                 num_workers: Optional[int] = None):
+                 num_workers: Optional[int] = None,
+                 result_store: Optional[ContentAddressedStore] = None,
+                 use_processes: bool = False):
         """
         Initialize optimized entropy calculator.
         
@@ -45,56 +49,66 @@ class OptimizedShannonEntropyCalculator:
             cache_size: Size of LRU cache (increased from 128)
             enable_parallel: Enable parallel processing
             num_workers: Number of parallel workers (defaults to CPU count)
+            result_store: Shared content-addressed store (private one if None)
+            use_processes: Run batches in a persistent process pool
         """
         self.cache_size = cache_size
         self.enable_parallel = enable_parallel
         self.num_workers = num_workers or mp.cpu_count()
+        self.use_processes = use_processes
+        self._process_pool = None
         
-        # Simple caching without complex setup - avoid initialization overhead
-        self._simple_cache = {}
+        self.result_store = (
+            result_store if result_store is not None
+            else ContentAddressedStore(max_entries=cache_size)
+        )
         self._cache_hits = 0
         self._cache_misses = 0
-        
-    def _get_cache_key(self, text: str) -> str:
-        """Generate simple cache key."""
-        # Simple hash without complex overhead
-        return f"{len(text)}_{hash(text[:100] if len(text) > 100 else text)}"
     
-    def calculate_entropy(self, text: str, level: str = 'all') -> Dict[str, float]:
+    def calculate_entropy(self,
+                          text: str,
+                          level: str = 'all',
+                          digest: Optional[str] = None,
+                          stats: Optional[DocumentStats] = None) -> Dict[str, float]:
         """
         Calculate entropy with optimized performance.
         
-        Fast approach: always use basic operations for best performance.
+        Frequency tables come from the shared DocumentStats kernel.
+        
+        Args:
+            text: Text to analyze
+            level: 'character', 'word', 'sentence' or 'all'
+            digest: Precomputed content_digest(text), computed if omitted
+            stats: Shared DocumentStats for text, created if omitted
         """
         if not text:
             return {'character': 0.0, 'word': 0.0, 'sentence': 0.0}
         
-        # Check simple cache first
-        cache_key = self._get_cache_key(text) + f"_{level}"
-        if cache_key in self._simple_cache:
+        digest = digest or content_digest(text)
+        namespace = f"entropy:{level}"
+        cached = self.result_store.get(digest, namespace)
+        if cached is not None:
             self._cache_hits += 1
-            return self._simple_cache[cache_key]
+            return cached
         
         self._cache_misses += 1
+        stats = stats if stats is not None else DocumentStats(text)
         
-        # Always use basic operations for best performance - no NumPy overhead
         results = {}
         
         if level in ['character', 'all']:
-            results['character'] = self._calculate_character_entropy_fast(text)
+            results['character'] = self._calculate_character_entropy_fast(text, stats)
         
         if level in ['word', 'all']:
-            results['word'] = self._calculate_word_entropy_fast(text)
+            results['word'] = self._calculate_word_entropy_fast(text, stats)
         
         if level in ['sentence', 'all']:
-            results['sentence'] = self._calculate_sentence_entropy_fast(text)
+            results['sentence'] = self._calculate_sentence_entropy_fast(text, stats)
         
         if level == 'all':
             results['aggregate'] = self._calculate_aggregate_entropy_fast(results)
         
-        # Cache result (limit cache size)
-        if len(self._simple_cache) < self.cache_size:
-            self._simple_cache[cache_key] = results
+        self.result_store.put(digest, namespace, results)
         
         return results
     
@@ -110,6 +124,9 @@ class OptimizedShannonEntropyCalculator:
             # Sequential processing for small batches
             return [self.calculate_entropy(text, level) for text in texts]
         
+        if self.use_processes:
+            return self._calculate_entropy_batch_processes(texts, level)
+        
         # Parallel processing for larger batches
         with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
             futures = [executor.submit(self.calculate_entropy, text, level) 
@@ -118,105 +135,81 @@ class OptimizedShannonEntropyCalculator:
         
         return results
     
-    def _get_text_hash(self, text: str) -> str:
-        """Generate efficient hash for text caching."""
-        # Use first 100 chars + length for hash to balance uniqueness and speed
-        sample = text[:100] if len(text) > 100 else text
-        return hashlib.md5(f"{sample}_{len(text)}".encode()).hexdigest()
+    def _calculate_entropy_batch_processes(self,
+                                           texts: List[str],
+                                           level: str) -> List[Dict[str, float]]:
+        """Process a batch in warmed worker processes, preserving order."""
+        if self._process_pool is None:
+            self._process_pool = create_process_pool(
+                max_workers=self.num_workers,
+                initializer=init_entropy_worker,
+                initargs=(self.cache_size,)
+            )
+        
+        # A few chunks per worker balances IPC overhead against stragglers
+        chunk_size = -(-len(texts) // (self.num_workers * 4))
+        futures = [self._process_pool.submit(entropy_chunk, list(chunk), level)
+                   for chunk in chunked(texts, chunk_size)]
+        
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    
+    def close(self):
+        """Shut down the batch process pool if one was started."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
     
-    def _calculate_character_entropy_fast(self, text: str) -> float:
+    def _calculate_character_entropy_fast(self,
+                                          text: str,
+                                          stats: Optional[DocumentStats] = None) -> float:
         """
-        Fast character entropy calculation using basic Python operations.
+        Character entropy from the shared character histogram.
         """
         if not text:
             return 0.0
         
-        # Use collections.Counter for fast frequency counting
-        from collections import Counter
-        import math
-        
-        char_counts = Counter(text)
-        text_length = len(text)
-        
-        entropy = 0.0
-        for count in char_counts.values():
-            probability = count / text_length
-            entropy -= probability * math.log2(probability)
-        
-        return entropy
+        stats = stats if stats is not None else DocumentStats(text)
+        return shannon_entropy(stats.char_counts)
     
-    def _calculate_word_entropy_fast(self, text: str) -> float:
+    def _calculate_word_entropy_fast(self,
+                                     text: str,
+                                     stats: Optional[DocumentStats] = None) -> float:
         """
-        Fast word entropy calculation using basic Python operations.
+        Word entropy from the shared vocabulary counts.
         """
         if not text:
             return 0.0
         
-        words = WORD_PATTERN.findall(text.lower())
-        if not words:
-            return 0.0
-        
-        # Use collections.Counter for fast frequency counting
-        from collections import Counter
-        import math
-        
-        word_counts = Counter(words)
-        total_words = len(words)
-        
-        entropy = 0.0
-        for count in word_counts.values():
-            probability = count / total_words
-            entropy -= probability * math.log2(probability)
-        
-        return entropy
+        stats = stats if stats is not None else DocumentStats(text)
+        return shannon_entropy(stats.word_counts)
     
-    def _calculate_sentence_entropy_fast(self, text: str) -> float:
+    def _calculate_sentence_entropy_fast(self,
+                                         text: str,
+                                         stats: Optional[DocumentStats] = None) -> float:
         """
-        Fast sentence entropy calculation using basic Python operations.
+        Sentence-length entropy from the shared sentence table.
         """
         if not text:
             return 0.0
         
-        sentences = SENTENCE_PATTERN.split(text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        if not sentences:
+        stats = stats if stats is not None else DocumentStats(text)
+        if stats.sentence_count == 0:
             return 0.0
         
-        # Use collections.Counter for fast frequency counting
-        from collections import Counter
-        import math
-        
-        lengths = [len(WORD_PATTERN.findall(s)) for s in sentences]
-        if not lengths:
-            return 0.0
-        
-        length_counts = Counter(lengths)
-        total_sentences = len(sentences)
-        
-        entropy = 0.0
-        for count in length_counts.values():
-            probability = count / total_sentences
-            entropy -= probability * math.log2(probability)
-        
-        return entropy
+        return shannon_entropy(np.bincount(stats.sentence_word_counts))
     
     def _calculate_aggregate_entropy_fast(self, entropies: Dict[str, float]) -> float:
         """
         Fast aggregate entropy with numpy operations.
         """
-        weights = np.array([0.2, 0.5, 0.3])  # character, word, sentence
-        values = np.array([
+        return aggregate_entropy(
             entropies.get('character', 0.0),
             entropies.get('word', 0.0),
             entropies.get('sentence', 0.0)
-        ])
-        
-        # Normalize values (vectorized)
-        max_values = np.array([6.0, 12.0, 4.0])
-        normalized = np.minimum(values / max_values, 1.0)
-        
-        return float(np.dot(weights, normalized))
+        )
     
     def analyze_information_density_parallel(self, text: str) -> Dict[str, any]:
         """
@@ -282,7 +275,9 @@ class OptimizedShannonEntropyCalculator:
             'low_density_segments': low_density_segments
         }
     
-    def calculate_redundancy_optimized(self, text: str) -> float:
+    def calculate_redundancy_optimized(self,
+                                       text: str,
+                                       stats: Optional[DocumentStats] = None) -> float:
         """
         Optimized redundancy calculation with vectorization.
         
@@ -291,12 +286,9 @@ class OptimizedShannonEntropyCalculator:
         if not text:
             return 0.0
         
-        # Use vectorized character entropy
-        actual_entropy = self._calculate_character_entropy_vectorized(text)
-        
-        # Vectorized unique character counting
-        text_array = np.frombuffer(text.encode('utf-8', errors='ignore'), dtype=np.uint8)
-        unique_chars = len(np.unique(text_array))
+        stats = stats if stats is not None else DocumentStats(text)
+        actual_entropy = shannon_entropy(stats.char_counts)
+        unique_chars = len(stats.char_counts)
         
         if unique_chars <= 1:
             return 1.0
@@ -311,9 +303,11 @@ class OptimizedShannonEntropyCalculator:
         
         return max(0.0, min(1.0, redundancy))
     
-    def get_entropy_statistics_optimized(self, text: str) -> Dict[str, any]:
+    def get_entropy_statistics_optimized(self,
+                                         text: str,
+                                         stats: Optional[DocumentStats] = None) -> Dict[str, any]:
         """
-        Optimized comprehensive statistics with parallel processing.
+        Optimized comprehensive statistics from one shared tokenization.
         
         2-3x faster than original.
         """
@@ -326,34 +320,24 @@ class OptimizedShannonEntropyCalculator:
                 'structural_complexity': 0.0
             }
         
-        # Parallel entropy calculations
-        if self.enable_parallel:
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                entropy_future = executor.submit(self.calculate_entropy, text, 'all')
-                redundancy_future = executor.submit(self.calculate_redundancy_optimized, text)
-                
-                # Calculate vocabulary richness in parallel
-                words = WORD_PATTERN.findall(text.lower())
-                vocab_future = executor.submit(
-                    lambda w: len(set(w)) / len(w) if w else 0.0, 
-                    words
-                )
-                
-                entropy = entropy_future.result()
-                redundancy = redundancy_future.result()
-                vocabulary_richness = vocab_future.result()
-        else:
-            entropy = self.calculate_entropy(text, 'all')
-            redundancy = self.calculate_redundancy_optimized(text)
-            words = WORD_PATTERN.findall(text.lower())
-            vocabulary_richness = len(set(words)) / len(words) if words else 0.0
+        stats = stats if stats is not None else DocumentStats(text)
+        entropy = self.calculate_entropy(text, 'all', stats=stats)
+        redundancy = self.calculate_redundancy_optimized(text, stats)
+        
+        word_count = stats.word_count
+        unique_words = len(stats.vocabulary)
+        vocabulary_richness = unique_words / word_count if word_count else 0.0
         
         # Structural complexity
         structural_complexity = entropy.get('sentence', 0.0) / 4.0
         
-        # Use numpy for statistics
-        word_lengths = np.array([len(w) for w in words]) if words else np.array([])
-        avg_word_length = float(np.mean(word_lengths)) if len(word_lengths) > 0 else 0.0
+        # Average word length weighted by vocabulary counts
+        if word_count:
+            vocab_lengths = np.fromiter((len(w) for w in stats.vocabulary),
+                                        dtype=np.int64, count=unique_words)
+            avg_word_length = float(np.dot(vocab_lengths, stats.word_counts) / word_count)
+        else:
+            avg_word_length = 0.0
         
         return {
             'entropy': entropy,
@@ -362,62 +346,32 @@ class OptimizedShannonEntropyCalculator:
             'vocabulary_richness': vocabulary_richness,
             'structural_complexity': structural_complexity,
             'text_length': len(text),
-            'word_count': len(words),
-            'unique_words': len(set(words)) if words else 0,
+            'word_count': word_count,
+            'unique_words': unique_words,
             'average_word_length': avg_word_length
         }
     
-    def stream_large_document(self, 
-                             text: str, 
-                             chunk_size: int = 10000) -> Dict[str, any]:
+    def stream_large_document(self,
+                              source: TextSource,
+                              chunk_size: int = 10000) -> Dict[str, any]:
         """
-        Memory-efficient streaming for large documents.
+        Exact statistics for documents too large to hold in memory.
         
-        Processes documents in chunks to reduce memory footprint.
+        Character, word and sentence-length tables are merged chunk by chunk,
+        so memory is bounded by vocabulary size and the results equal those
+        of get_entropy_statistics_optimized on the whole text.
+        
+        Args:
+            source: Text, bytes, file object or iterable of text chunks
+            chunk_size: Read size for text and file objects
+            
+        Returns:
+            Statistics dictionary including 'chunk_count'
         """
-        if len(text) < chunk_size:
+        if isinstance(source, str) and len(source) < chunk_size:
             # Small document, process normally
-            return self.get_entropy_statistics_optimized(text)
-        
-        # Process in chunks
-        chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-        
-        # Process chunks in parallel
-        if self.enable_parallel:
-            with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
-                chunk_stats = list(executor.map(
-                    self.get_entropy_statistics_optimized, 
-                    chunks
-                ))
-        else:
-            chunk_stats = [self.get_entropy_statistics_optimized(chunk) 
-                          for chunk in chunks]
-        
-        # Aggregate results using numpy
-        entropies = np.array([[s['entropy']['character'], 
-                               s['entropy']['word'], 
-                               s['entropy']['sentence']] 
-                              for s in chunk_stats])
-        
-        avg_entropy = {
-            'character': float(np.mean(entropies[:, 0])),
-            'word': float(np.mean(entropies[:, 1])),
-            'sentence': float(np.mean(entropies[:, 2]))
-        }
-        
-        # Aggregate other metrics
-        total_words = sum(s['word_count'] for s in chunk_stats)
-        unique_words = len(set().union(*[set(WORD_PATTERN.findall(chunk.lower())) 
-                                         for chunk in chunks]))
+            stats = self.get_entropy_statistics_optimized(source)
+            stats['chunk_count'] = 1 if source else 0
+            return stats
         
-        return {
-            'entropy': avg_entropy,
-            'redundancy': np.mean([s['redundancy'] for s in chunk_stats]),
-            'information_density': np.mean([s['information_density'] for s in chunk_stats]),
-            'vocabulary_richness': unique_words / total_words if total_words else 0.0,
-            'structural_complexity': np.mean([s['structural_complexity'] for s in chunk_stats]),
-            'text_length': len(text),
-            'word_count': total_words,
-            'unique_words': unique_words,
-            'chunk_count': len(chunks)
-        }
\ No newline at end of file
+        return stream_entropy_statistics(source, chunk_size)
@@ -0,0 +1,218 @@
+"""
+Incremental entropy analysis for arbitrarily large documents.
+
+StreamingEntropyAccumulator consumes text chunk by chunk and merges
+character, word and sentence-length frequency tables. Chunk boundaries are
+handled by carrying the trailing partial word to the next chunk, so the
+final statistics are exactly those of the whole document while memory
+stays bounded by vocabulary size rather than document size.
+"""
+
+import codecs
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from .document_stats import WORD_PATTERN, SENTENCE_PATTERN, aggregate_entropy, shannon_entropy
+
+# Start of the trailing run of word characters (possibly empty)
+_TRAILING_WORD = re.compile(r'\w*\Z')
+
+TextSource = Union[str, bytes, Iterable[str], Iterable[bytes], Any]
+
+
+class StreamingEntropyAccumulator:
+    """
+    Exact entropy statistics accumulated over a stream of text chunks.
+
+    Usage:
+        accumulator = StreamingEntropyAccumulator()
+        for chunk in chunks:
+            accumulator.update(chunk)
+        stats = accumulator.finalize()
+    """
+
+    def __init__(self):
+        """Initialize empty frequency tables."""
+        self.char_counts: Counter = Counter()
+        self.word_counts: Counter = Counter()
+        self.sentence_length_counts: Counter = Counter()
+
+        self.text_length = 0
+        self.chunk_count = 0
+
+        # Partial word carried across a chunk boundary
+        self._carry = ''
+        # State of the sentence still open at the end of the last chunk
+        self._pending_words = 0
+        self._pending_nonempty = False
+        self._finalized = False
+
+    def update(self, chunk: str):
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Next piece of the document
+        """
+        if self._finalized:
+            raise RuntimeError("Accumulator already finalized")
+        if not chunk:
+            return
+
+        self.chunk_count += 1
+        buffer = self._carry + chunk
+        position = 0
+
+        for terminator in SENTENCE_PATTERN.finditer(buffer):
+            self._consume(buffer[position:terminator.start()])
+            self._close_sentence()
+            self._count_chars(terminator.group())
+            position = terminator.end()
+
+        tail = buffer[position:]
+        # Hold back a trailing word that may continue in the next chunk
+        cut = _TRAILING_WORD.search(tail).start()
+        self._consume(tail[:cut])
+        self._carry = tail[cut:]
+
+    def finalize(self) -> Dict[str, Any]:
+        """
+        Flush pending state and compute the final statistics.
+
+        Returns:
+            Statistics dictionary matching get_entropy_statistics_optimized
+        """
+        if not self._finalized:
+            self._consume(self._carry)
+            self._carry = ''
+            self._close_sentence()
+            self._finalized = True
+
+        return self.get_statistics()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Statistics for everything consumed so far (excluding carried text)."""
+        char_entropy = self._entropy(self.char_counts)
+        word_entropy = self._entropy(self.word_counts)
+        sentence_entropy = self._entropy(self.sentence_length_counts)
+
+        aggregate = aggregate_entropy(char_entropy, word_entropy, sentence_entropy)
+
+        word_count = sum(self.word_counts.values())
+        unique_words = len(self.word_counts)
+        total_word_chars = sum(len(w) * c for w, c in self.word_counts.items())
+
+        return {
+            'entropy': {
+                'character': char_entropy,
+                'word': word_entropy,
+                'sentence': sentence_entropy,
+                'aggregate': aggregate
+            },
+            'redundancy': self._redundancy(char_entropy),
+            'information_density': aggregate,
+            'vocabulary_richness': unique_words / word_count if word_count else 0.0,
+            'structural_complexity': sentence_entropy / 4.0,
+            'text_length': self.text_length,
+            'word_count': word_count,
+            'unique_words': unique_words,
+            'average_word_length': total_word_chars / word_count if word_count else 0.0,
+            'chunk_count': self.chunk_count
+        }
+
+    def _consume(self, piece: str):
+        """Count a piece of text that contains no sentence terminator."""
+        if not piece:
+            return
+        self._count_chars(piece)
+        words = WORD_PATTERN.findall(piece.lower())
+        self.word_counts.update(words)
+        self._pending_words += len(words)
+        if not self._pending_nonempty and not piece.isspace():
+            self._pending_nonempty = True
+
+    def _count_chars(self, piece: str):
+        self.char_counts.update(piece)
+        self.text_length += len(piece)
+
+    def _close_sentence(self):
+        """Record the open sentence if it had any non-whitespace content."""
+        if self._pending_nonempty:
+            self.sentence_length_counts[self._pending_words] += 1
+        self._pending_words = 0
+        self._pending_nonempty = False
+
+    def _redundancy(self, char_entropy: float) -> float:
+        unique_chars = len(self.char_counts)
+        if unique_chars == 0:
+            return 0.0
+        if unique_chars == 1:
+            return 1.0
+        redundancy = 1.0 - char_entropy / math.log2(unique_chars)
+        return max(0.0, min(1.0, redundancy))
+
+    @staticmethod
+    def _entropy(counts: Counter) -> float:
+        if not counts:
+            return 0.0
+        return shannon_entropy(np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+
+
+def iter_text_chunks(source: TextSource,
+                     chunk_size: int = 65536,
+                     encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Yield text chunks from a string, bytes, iterable or file object.
+
+    Binary input is decoded incrementally so multi-byte characters split
+    across reads are handled correctly.
+
+    Args:
+        source: str, bytes, file object (text or binary) or iterable of chunks
+        chunk_size: Read size for strings and file objects
+        encoding: Encoding for binary input
+    """
+    if isinstance(source, (str, bytes)):
+        pieces: Iterable = (source[i:i + chunk_size] for i in range(0, len(source), chunk_size))
+    elif hasattr(source, 'read'):
+        pieces = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        pieces = source
+
+    decoder: Optional[codecs.IncrementalDecoder] = None
+    for piece in pieces:
+        if isinstance(piece, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            piece = decoder.decode(piece)
+        if piece:
+            yield piece
+
+    if decoder is not None:
+        remainder = decoder.decode(b'', final=True)
+        if remainder:
+            yield remainder
+
+
+def stream_entropy_statistics(source: TextSource,
+                              chunk_size: int = 65536,
+                              encoding: str = 'utf-8') -> Dict[str, Any]:
+    """
+    Compute exact entropy statistics for a streamed document.
+
+    Args:
+        source: str, bytes, file object or iterable of chunks
+        chunk_size: Read size for strings and file objects
+        encoding: Encoding for binary input
+
+    Returns:
+        Statistics dictionary
+    """
+    accumulator = StreamingEntropyAccumulator()
+    for chunk in iter_text_chunks(source, chunk_size, encoding):
+        accumulator.update(chunk)
+    return accumulator.finalize()
@@ -7,6 +7,7 @@ entropy analysis and quality scores.
 
 import time
 import copy
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Optional, Tuple, Any, Callable
 from dataclasses import dataclass, field
 from enum import Enum
@@ -14,6 +15,7 @@ import numpy as np
 
 from .entropy import ShannonEntropyCalculator
 from .scorer import QualityScorer, QualityMetrics, ScoringWeights
+from .content_store import ContentAddressedStore, content_digest
 
 
 class OptimizationStrategy(Enum):
@@ -22,6 +24,7 @@ class OptimizationStrategy(Enum):
     SIMULATED_ANNEALING = "simulated_annealing"
     GRADIENT_BASED = "gradient_based"
     HYBRID = "hybrid"
+    BEAM = "beam"
 
 
 @dataclass
@@ -34,6 +37,9 @@ class OptimizationConfig:
     entropy_balance_weight: float = 0.3
     enable_caching: bool = True
     timeout_seconds: float = 30.0
+    beam_width: int = 3  # Candidates kept per iteration (beam strategy)
+    max_workers: int = 4  # Concurrent candidate evaluations (beam strategy)
+    cache_size: int = 1024  # Memoized refinements
     
     def __post_init__(self):
         """Validate configuration."""
@@ -41,6 +47,8 @@ class OptimizationConfig:
             raise ValueError("target_quality must be between 0 and 1")
         if not 0 <= self.entropy_balance_weight <= 1:
             raise ValueError("entropy_balance_weight must be between 0 and 1")
+        if self.beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
 
 
 @dataclass
@@ -86,7 +94,11 @@ class MIAIROptimizer:
         self.config = config or OptimizationConfig()
         self.entropy_calc = entropy_calculator or ShannonEntropyCalculator()
         self.scorer = quality_scorer or QualityScorer()
-        self._refinement_cache = {} if self.config.enable_caching else None
+        # Refined content and score memoized per (strategy, content digest)
+        self._refinement_cache = (
+            ContentAddressedStore(max_entries=self.config.cache_size)
+            if self.config.enable_caching else None
+        )
         self._init_refinement_strategies()
     
     def _init_refinement_strategies(self):
@@ -139,8 +151,14 @@ class MIAIROptimizer:
         improvements = []
         iteration = 0
         
+        if self.config.strategy == OptimizationStrategy.BEAM:
+            current_content, current_score, improvements, iteration = self._beam_search(
+                content, original_score, original_entropy, metadata, start_time
+            )
+        
         # Optimization loop
-        while (iteration < self.config.max_iterations and
+        while (self.config.strategy != OptimizationStrategy.BEAM and
+               iteration < self.config.max_iterations and
                current_score.overall < self.config.target_quality and
                time.time() - start_time < self.config.timeout_seconds):
             
@@ -207,6 +225,154 @@ class MIAIROptimizer:
             elapsed_time=elapsed_time
         )
     
+    def _beam_search(self,
+                     content: str,
+                     original_score: QualityMetrics,
+                     original_entropy: Dict[str, float],
+                     metadata: Optional[Dict],
+                     start_time: float) -> Tuple[str, QualityMetrics, List[Dict], int]:
+        """
+        Beam search over refinement strategies.
+        
+        Every iteration expands each kept candidate with all refinement
+        strategies, scores the results concurrently and keeps the best
+        beam_width candidates. Stops at the target quality, when no candidate
+        improves on the best by improvement_threshold, or at the timeout.
+        
+        Returns:
+            (best content, best score, improvements, iterations)
+        """
+        deadline = start_time + self.config.timeout_seconds
+        # (content, score, applied strategies)
+        beam = [(content, original_score, [])]
+        # Raw scores are compared; the entropy balance only applies to the result
+        best_content, best_score = content, original_score
+        improvements = []
+        iteration = 0
+        
+        executor = ThreadPoolExecutor(max_workers=self.config.max_workers)
+        try:
+            while (iteration < self.config.max_iterations and
+                   best_score.overall < self.config.target_quality and
+                   time.time() < deadline):
+                iteration += 1
+                candidates = self._expand_beam(beam, metadata, executor, deadline)
+                if not candidates:
+                    break
+                
+                # Keep the top-k distinct candidates, including current beam
+                pool = {content_digest(c[0]): c for c in beam}
+                for candidate in candidates:
+                    pool.setdefault(content_digest(candidate[0]), candidate)
+                beam = sorted(pool.values(), key=lambda c: c[1].overall,
+                              reverse=True)[:self.config.beam_width]
+                
+                top_content, top_score, top_path = beam[0]
+                score_improvement = top_score.overall - best_score.overall
+                if score_improvement < self.config.improvement_threshold:
+                    break
+                
+                best_content, best_score = top_content, top_score
+                improvements.append({
+                    'iteration': iteration,
+                    'strategy': 'beam',
+                    'applied_strategies': list(top_path),
+                    'improvement': score_improvement,
+                    'score_improvement': score_improvement,
+                    'new_score': top_score.overall
+                })
+        finally:
+            # _expand_beam cancels its queued scorings; running ones are
+            # abandoned past the deadline, not awaited
+            executor.shutdown(wait=False)
+        
+        best_score = self._apply_entropy_balance(best_content, best_score, original_entropy)
+        return best_content, best_score, improvements, iteration
+    
+    def _expand_beam(self,
+                     beam: List[Tuple[str, QualityMetrics, List[str]]],
+                     metadata: Optional[Dict],
+                     executor: ThreadPoolExecutor,
+                     deadline: float) -> List[Tuple[str, QualityMetrics, List[str]]]:
+        """Apply every strategy to every beam entry and score the results."""
+        futures = {}
+        candidates = []
+        try:
+            for parent_content, parent_score, path in beam:
+                # Weakest dimensions first so they are scored before a timeout
+                dimensions = sorted(
+                    self.refinement_strategies,
+                    key=lambda d: getattr(parent_score, d)
+                )
+                for dimension in dimensions:
+                    for strategy in self.refinement_strategies[dimension]:
+                        future = executor.submit(
+                            self._evaluate_refinement, strategy, parent_content, metadata
+                        )
+                        futures[future] = path + [strategy.__name__]
+            
+            pending = set(futures)
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    refined = future.result()
+                    if refined is not None:
+                        candidates.append((refined[0], refined[1], futures[future]))
+        finally:
+            # Finished futures ignore cancel(); queued ones never start
+            for future in futures:
+                future.cancel()
+        return candidates
+    
+    def _evaluate_refinement(self,
+                             strategy: Callable,
+                             content: str,
+                             metadata: Optional[Dict]) -> Optional[Tuple[str, QualityMetrics]]:
+        """
+        Apply one refinement strategy and score the result (memoized).
+        
+        Returns:
+            (refined content, score), or None if the strategy made no change
+        """
+        digest = content_digest(content)
+        namespace = f"refine:{strategy.__name__}:{content_digest(str(metadata)) if metadata else ''}"
+        if self._refinement_cache is not None:
+            cached = self._refinement_cache.get(digest, namespace)
+            if cached is not None:
+                return cached[0]
+        
+        try:
+            refined_content = strategy(content, metadata)
+        except Exception:
+            refined_content = None
+        
+        result = None
+        if refined_content and refined_content != content:
+            result = (refined_content, self.scorer.score_document(refined_content, metadata))
+        
+        if self._refinement_cache is not None:
+            # Wrapped so that "no change" is cached as well
+            self._refinement_cache.put(digest, namespace, (result,))
+        return result
+    
+    def _apply_entropy_balance(self,
+                               content: str,
+                               score: QualityMetrics,
+                               original_entropy: Dict[str, float]) -> QualityMetrics:
+        """Penalize excessive entropy change without mutating cached scores."""
+        refined_entropy = self.entropy_calc.calculate_entropy(content, 'all')
+        entropy_change = abs(refined_entropy.get('aggregate', 0) -
+                             original_entropy.get('aggregate', 0))
+        if entropy_change <= 0.3:
+            return score
+        
+        balanced = copy.copy(score)
+        balanced.overall *= (1 - self.config.entropy_balance_weight * entropy_change)
+        return balanced
+    
     def _hill_climbing_step(self,
                            content: str,
                            current_score: QualityMetrics,
@@ -13,9 +13,9 @@ from dataclasses import dataclass, field
 from enum import Enum
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
-from functools import lru_cache
-import hashlib
-import pickle
+
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import DocumentStats
 
 
 class PatternType(Enum):
@@ -78,12 +78,15 @@ class OptimizedPatternRecognizer:
     - Vectorized pattern matching
     - Memory-efficient processing
     - Batch analysis capabilities
+    - Content-addressed result caching keyed by a full-text digest
+    - Shared DocumentStats kernel so the text is tokenized once
     """
     
     def __init__(self, 
                  learning_enabled: bool = True,
                  enable_parallel: bool = True,
-                 cache_size: int = 256):
+                 cache_size: int = 256,
+                 result_store: Optional[ContentAddressedStore] = None):
         """
         Initialize optimized pattern recognizer.
         
@@ -91,6 +94,7 @@ class OptimizedPatternRecognizer:
             learning_enabled: Enable pattern learning from improvements
             enable_parallel: Enable parallel processing
             cache_size: Size of pattern cache
+            result_store: Shared content-addressed store (private one if None)
         """
         self.learning_enabled = learning_enabled
         self.enable_parallel = enable_parallel
@@ -102,7 +106,11 @@ class OptimizedPatternRecognizer:
         
         # Learning storage with memory optimization
         self.learned_patterns = defaultdict(list) if learning_enabled else None
-        self._pattern_cache = {}
+        self.result_store = (
+            result_store if result_store is not None
+            else ContentAddressedStore(max_entries=cache_size)
+        )
+        self._cached_analyses = 0
         
         # Pre-allocate buffers for performance
         self._occurrence_buffer = []
@@ -225,25 +233,38 @@ class OptimizedPatternRecognizer:
                     definition.get('flags', 0) | re.MULTILINE
                 )
     
-    def analyze(self, content: str, metadata: Optional[Dict] = None) -> PatternAnalysis:
+    def analyze(self,
+                content: str,
+                metadata: Optional[Dict] = None,
+                digest: Optional[str] = None,
+                stats: Optional[DocumentStats] = None) -> PatternAnalysis:
         """
         Analyze document with optimized parallel pattern detection.
         
         2-3x faster than original implementation.
+        
+        Args:
+            content: Document content
+            metadata: Optional document metadata
+            digest: Precomputed content_digest(content), computed if omitted
+            stats: Shared DocumentStats for content, created if omitted
         """
         if not content:
             return PatternAnalysis([], {}, {}, [])
         
         # Check cache
-        content_hash = self._get_content_hash(content)
-        if content_hash in self._pattern_cache:
-            return self._pattern_cache[content_hash]
+        digest = digest or content_digest(content)
+        cached = self.result_store.get(digest, 'patterns')
+        if cached is not None:
+            return cached
+        
+        stats = stats if stats is not None else DocumentStats(content)
         
         # Parallel or sequential analysis
         if self.enable_parallel and len(content) > 1000:
-            patterns = self._analyze_parallel(content, metadata)
+            patterns = self._analyze_parallel(content, metadata, stats)
         else:
-            patterns = self._analyze_sequential(content, metadata)
+            patterns = self._analyze_sequential(content, metadata, stats)
         
         # Generate analysis components
         summary = self._generate_summary_optimized(patterns, content)
@@ -258,8 +279,8 @@ class OptimizedPatternRecognizer:
         )
         
         # Cache result
-        if len(self._pattern_cache) < self.cache_size:
-            self._pattern_cache[content_hash] = result
+        self.result_store.put(digest, 'patterns', result)
+        self._cached_analyses += 1
         
         return result
     
@@ -281,14 +302,13 @@ class OptimizedPatternRecognizer:
         
         return results
     
-    def _get_content_hash(self, content: str) -> str:
-        """Generate efficient hash for caching."""
-        sample = content[:500] if len(content) > 500 else content
-        return hashlib.md5(f"{sample}_{len(content)}".encode()).hexdigest()
-    
-    def _analyze_parallel(self, content: str, metadata: Optional[Dict]) -> List[Pattern]:
+    def _analyze_parallel(self,
+                          content: str,
+                          metadata: Optional[Dict],
+                          stats: Optional[DocumentStats] = None) -> List[Pattern]:
         """Analyze patterns in parallel by type."""
         patterns = []
+        stats = stats if stats is not None else DocumentStats(content)
         
         with ThreadPoolExecutor(max_workers=5) as executor:
             futures = {}
@@ -298,14 +318,14 @@ class OptimizedPatternRecognizer:
                 if pattern_type in self.regex_patterns:
                     future = executor.submit(
                         self._analyze_regex_patterns,
-                        content, pattern_type
+                        content, pattern_type, stats
                     )
                     futures[future] = pattern_type
             
             # Submit custom pattern analysis
             custom_future = executor.submit(
                 self._analyze_custom_patterns_optimized,
-                content, metadata
+                content, metadata, stats
             )
             futures[custom_future] = 'custom'
             
@@ -317,47 +337,53 @@ class OptimizedPatternRecognizer:
         
         return patterns
     
-    def _analyze_sequential(self, content: str, metadata: Optional[Dict]) -> List[Pattern]:
+    def _analyze_sequential(self,
+                            content: str,
+                            metadata: Optional[Dict],
+                            stats: Optional[DocumentStats] = None) -> List[Pattern]:
         """Sequential pattern analysis."""
         patterns = []
+        stats = stats if stats is not None else DocumentStats(content)
         
         # Analyze regex patterns
         for pattern_type in PatternType:
             if pattern_type in self.regex_patterns:
-                type_patterns = self._analyze_regex_patterns(content, pattern_type)
+                type_patterns = self._analyze_regex_patterns(content, pattern_type, stats)
                 patterns.extend(type_patterns)
         
         # Analyze custom patterns
-        custom_patterns = self._analyze_custom_patterns_optimized(content, metadata)
+        custom_patterns = self._analyze_custom_patterns_optimized(content, metadata, stats)
         patterns.extend(custom_patterns)
         
         return patterns
     
     def _analyze_regex_patterns(self, 
                                content: str, 
-                               pattern_type: PatternType) -> List[Pattern]:
+                               pattern_type: PatternType,
+                               stats: Optional[DocumentStats] = None) -> List[Pattern]:
         """Analyze regex-based patterns efficiently."""
         patterns = []
+        stats = stats if stats is not None else DocumentStats(content)
         compiled = self.compiled_patterns.get(pattern_type, {})
         definitions = self.regex_patterns.get(pattern_type, {})
         
         for name, regex in compiled.items():
             definition = definitions[name]
             
-            # Fast regex matching
-            matches = list(regex.finditer(content))
+            # Shared, memoized regex scan
+            matches = stats.matches(regex)
             
             if matches:
                 # Vectorized occurrence processing
                 occurrences = []
-                line_positions = self._get_line_positions(content)
+                line_positions = stats.line_offsets
                 
-                for match in matches:
-                    line_num = self._binary_search_line(line_positions, match.start())
+                for start, end, text, _ in matches:
+                    line_num = self._binary_search_line(line_positions, start)
                     occurrences.append({
-                        'text': match.group(),
-                        'start': match.start(),
-                        'end': match.end(),
+                        'text': text,
+                        'start': start,
+                        'end': end,
                         'line': line_num
                     })
                 
@@ -376,9 +402,11 @@ class OptimizedPatternRecognizer:
     
     def _analyze_custom_patterns_optimized(self, 
                                           content: str,
-                                          metadata: Optional[Dict]) -> List[Pattern]:
+                                          metadata: Optional[Dict],
+                                          stats: Optional[DocumentStats] = None) -> List[Pattern]:
         """Analyze custom patterns with optimizations."""
         patterns = []
+        stats = stats if stats is not None else DocumentStats(content)
         
         # Batch custom pattern checks
         custom_checks = {
@@ -390,13 +418,16 @@ class OptimizedPatternRecognizer:
         }
         
         for name, check_func in custom_checks.items():
-            pattern = check_func(content, metadata)
+            pattern = check_func(content, metadata, stats)
             if pattern:
                 patterns.append(pattern)
         
         return patterns
     
-    def _check_missing_introduction(self, content: str, metadata: Optional[Dict]) -> Optional[Pattern]:
+    def _check_missing_introduction(self,
+                                    content: str,
+                                    metadata: Optional[Dict],
+                                    stats: Optional[DocumentStats] = None) -> Optional[Pattern]:
         """Optimized introduction check."""
         lower_content = content[:500].lower() if len(content) > 500 else content.lower()
         intro_markers = {'introduction', 'overview', 'getting started', 'about'}
@@ -420,14 +451,20 @@ class OptimizedPatternRecognizer:
             )
         return None
     
-    def _check_unbalanced_sections(self, content: str, metadata: Optional[Dict]) -> Optional[Pattern]:
+    def _check_unbalanced_sections(self,
+                                   content: str,
+                                   metadata: Optional[Dict],
+                                   stats: Optional[DocumentStats] = None) -> Optional[Pattern]:
         """Optimized section balance check with numpy."""
         section_pattern = re.compile(r'^#{1,3}\s+', re.MULTILINE)
-        sections = section_pattern.split(content)
-        
-        if len(sections) > 2:
-            # Vectorized length calculation
-            section_lengths = np.array([len(s) for s in sections[1:]])
+        stats = stats if stats is not None else DocumentStats(content)
+        matches = stats.matches(section_pattern)
+        
+        if len(matches) > 1:
+            # Vectorized length calculation (text between consecutive headers)
+            starts = np.array([start for start, _, _, _ in matches[1:]] + [len(content)])
+            ends = np.array([end for _, end, _, _ in matches])
+            section_lengths = starts - ends
             
             if len(section_lengths) > 0:
                 avg_length = np.mean(section_lengths)
@@ -451,7 +488,10 @@ class OptimizedPatternRecognizer:
                     )
         return None
     
-    def _check_no_conclusion(self, content: str, metadata: Optional[Dict]) -> Optional[Pattern]:
+    def _check_no_conclusion(self,
+                             content: str,
+                             metadata: Optional[Dict],
+                             stats: Optional[DocumentStats] = None) -> Optional[Pattern]:
         """Optimized conclusion check."""
         last_section = content[-1000:].lower() if len(content) > 1000 else content.lower()
         conclusion_markers = {'conclusion', 'summary', 'recap', 'final thoughts'}
@@ -475,10 +515,14 @@ class OptimizedPatternRecognizer:
             )
         return None
     
-    def _check_missing_code_examples(self, content: str, metadata: Optional[Dict]) -> Optional[Pattern]:
+    def _check_missing_code_examples(self,
+                                     content: str,
+                                     metadata: Optional[Dict],
+                                     stats: Optional[DocumentStats] = None) -> Optional[Pattern]:
         """Optimized code example check."""
         technical_terms = {'function', 'method', 'class', 'api', 'code', 'implementation'}
-        is_technical = any(term in content.lower() for term in technical_terms)
+        content_lower = stats.lower_text if stats is not None else content.lower()
+        is_technical = any(term in content_lower for term in technical_terms)
         
         has_code = '```' in content
         
@@ -499,15 +543,18 @@ class OptimizedPatternRecognizer:
             )
         return None
     
-    def _check_inconsistent_headers(self, content: str, metadata: Optional[Dict]) -> Optional[Pattern]:
+    def _check_inconsistent_headers(self,
+                                    content: str,
+                                    metadata: Optional[Dict],
+                                    stats: Optional[DocumentStats] = None) -> Optional[Pattern]:
         """Optimized header consistency check."""
-        header_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
-        headers = header_pattern.findall(content)
+        stats = stats if stats is not None else DocumentStats(content)
+        headers = stats.header_titles
         
         if headers and len(headers) > 2:
             # Vectorized capitalization analysis
             capitalizations = []
-            for level, text in headers:
+            for text in headers:
                 words = text.split()
                 if words:
                     title_case_ratio = sum(1 for w in words if w[0].isupper()) / len(words)
@@ -534,11 +581,7 @@ class OptimizedPatternRecognizer:
     
     def _get_line_positions(self, content: str) -> np.ndarray:
         """Get line start positions for efficient line number lookup."""
-        positions = [0]
-        for i, char in enumerate(content):
-            if char == '\n':
-                positions.append(i + 1)
-        return np.array(positions)
+        return DocumentStats(content).line_offsets
     
     def _binary_search_line(self, positions: np.ndarray, offset: int) -> int:
         """Binary search for line number from offset."""
@@ -677,7 +720,7 @@ class OptimizedPatternRecognizer:
                 'pattern_name': pattern.name,
                 'severity': pattern.severity,
                 'success': True,
-                'content_hash': self._get_content_hash(original_content)
+                'content_hash': content_digest(original_content)
             }
             transformations.append(transformation)
         
@@ -696,7 +739,7 @@ class OptimizedPatternRecognizer:
             'total_pattern_types': len(PatternType),
             'regex_patterns': sum(len(p) for p in self.regex_patterns.values()),
             'custom_patterns': sum(len(p) for p in self.custom_patterns.values()),
-            'cached_analyses': len(self._pattern_cache)
+            'cached_analyses': self._cached_analyses
         }
         
         if self.learning_enabled and self.learned_patterns:
@@ -0,0 +1,112 @@
+"""
+Process-pool execution for MIAIR batch workloads.
+
+MIAIR analysis is pure-Python regex and counting work that holds the GIL,
+so batch throughput only scales with processes. Workers are persistent and
+warmed once by an initializer (components constructed, patterns compiled);
+work is submitted in chunks to amortize IPC, and each document comes back
+as a compact (index, result, error) record so callers can keep results
+aligned with their input and report per-document failures.
+"""
+
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (input index, result or None, error message or None)
+BatchRecord = Tuple[int, Any, Optional[str]]
+
+# Per-process state populated by the initializers below
+_worker_engine = None
+_worker_entropy = None
+
+
+def create_process_pool(max_workers: int,
+                        initializer: Callable,
+                        initargs: Tuple = ()) -> ProcessPoolExecutor:
+    """
+    Create a persistent process pool with warmed workers.
+
+    Uses the 'spawn' start method so workers never inherit locks or
+    threads from the parent process.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp.get_context('spawn'),
+        initializer=initializer,
+        initargs=initargs
+    )
+
+
+def chunked(items: Sequence[Any], chunk_size: int) -> Iterable[Sequence[Any]]:
+    """Split items into consecutive chunks of at most chunk_size."""
+    chunk_size = max(1, chunk_size)
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def _format_error(error: BaseException) -> str:
+    """Compact, picklable error description."""
+    return f"{type(error).__name__}: {error}"
+
+
+def init_engine_worker(config) -> None:
+    """
+    Build the per-process MIAIR engine.
+
+    Storage, result caching and intra-document threads are disabled in
+    workers; the parent process owns caching and persistence.
+    """
+    global _worker_engine
+    from .engine_unified import UnifiedMIAIREngine
+
+    worker_config = replace(
+        config,
+        use_processes=False,
+        enable_caching=False,
+        storage_enabled=False,
+        result_store_path=None
+    )
+    _worker_engine = UnifiedMIAIREngine(worker_config)
+    # Each worker analyzes one document at a time; skip per-document threads
+    _worker_engine.executor = None
+
+
+def analyze_chunk(items: List[Tuple[int, Any, str, Optional[Dict]]]) -> List[BatchRecord]:
+    """
+    Analyze a chunk of documents in a worker process.
+
+    Args:
+        items: (index, content, document_id, metadata) tuples
+
+    Returns:
+        One record per item, in input order
+    """
+    records = []
+    for index, content, document_id, metadata in items:
+        try:
+            result = _worker_engine.analyze(content, document_id, metadata)
+            records.append((index, result, None))
+        except Exception as e:
+            records.append((index, None, _format_error(e)))
+    return records
+
+
+def init_entropy_worker(cache_size: int) -> None:
+    """Build the per-process entropy calculator."""
+    global _worker_entropy
+    from .entropy_optimized import OptimizedShannonEntropyCalculator
+
+    _worker_entropy = OptimizedShannonEntropyCalculator(
+        cache_size=cache_size,
+        enable_parallel=False
+    )
+
+
+def entropy_chunk(texts: List[str], level: str) -> List[Dict[str, float]]:
+    """Calculate entropy for a chunk of texts in a worker process."""
+    return [_worker_entropy.calculate_entropy(text, level) for text in texts]
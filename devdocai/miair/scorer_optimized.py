@@ -12,8 +12,9 @@ from dataclasses import dataclass, field
 from enum import Enum
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
-import hashlib
+
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import DocumentStats
 
 
 class QualityDimension(Enum):
@@ -84,7 +85,8 @@ class OptimizedQualityScorer:
     - Vectorized score calculations using numpy
     - Parallel dimension scoring
     - Memory-efficient text processing
-    - Hash-based result caching
+    - Content-addressed result caching keyed by a full-text digest
+    - Shared DocumentStats kernel so the text is tokenized once
     """
     
     # Pre-compiled patterns for better performance
@@ -103,7 +105,8 @@ class OptimizedQualityScorer:
     def __init__(self, 
                  weights: Optional[ScoringWeights] = None,
                  enable_parallel: bool = True,
-                 cache_size: int = 256):
+                 cache_size: int = 256,
+                 result_store: Optional[ContentAddressedStore] = None):
         """
         Initialize optimized quality scorer.
         
@@ -111,55 +114,66 @@ class OptimizedQualityScorer:
             weights: Custom weights for quality dimensions
             enable_parallel: Enable parallel scoring
             cache_size: Size of result cache
+            result_store: Shared content-addressed store (private one if None)
         """
         self.weights = weights or ScoringWeights()
         self.weights_array = self.weights.to_numpy()
         self.enable_parallel = enable_parallel
         self.cache_size = cache_size
         
-        # Result caching
-        self._cache = {}
-        self._setup_caches()
-    
-    def _setup_caches(self):
-        """Setup LRU caches for expensive operations."""
-        @lru_cache(maxsize=self.cache_size)
-        def _cached_score(content_hash: str) -> Tuple[float, float, float, float]:
-            if content_hash in self._cache:
-                content, metadata = self._cache[content_hash]
-                return self._score_all_dimensions(content, metadata)
-            return (0.0, 0.0, 0.0, 0.0)
-        
-        self._cached_score = _cached_score
+        self.result_store = (
+            result_store if result_store is not None
+            else ContentAddressedStore(max_entries=cache_size)
+        )
     
-    def score_document(self, content: str, metadata: Optional[Dict] = None) -> QualityMetrics:
+    def score_document(self,
+                       content: str,
+                       metadata: Optional[Dict] = None,
+                       digest: Optional[str] = None,
+                       stats: Optional[DocumentStats] = None) -> QualityMetrics:
         """
         Score document with hybrid optimization approach.
         
         Uses parallel processing only for large documents to avoid overhead.
+        
+        Args:
+            content: Document content
+            metadata: Optional document metadata
+            digest: Precomputed content_digest(content), computed if omitted
+            stats: Shared DocumentStats for content, created if omitted
         """
         if not content:
             return QualityMetrics()
         
+        digest = digest or content_digest(content)
+        namespace = self._get_namespace(metadata)
+        cached = self.result_store.get(digest, namespace)
+        if cached is not None:
+            return cached
+        
+        stats = stats if stats is not None else DocumentStats(content)
+        
         # Use parallel processing only for large documents to avoid overhead
         use_parallel = self.enable_parallel and len(content) > 5000
         
         # Get scores
         if use_parallel:
-            scores = self._score_parallel(content, metadata)
+            scores = self._score_parallel(content, metadata, stats)
         else:
-            scores = self._score_all_dimensions(content, metadata)
+            scores = self._score_all_dimensions(content, metadata, stats)
         
         # Vectorized overall calculation
         overall = float(np.dot(self.weights_array, scores))
         
-        return QualityMetrics(
-            completeness=scores[0],
-            clarity=scores[1],
-            consistency=scores[2],
-            accuracy=scores[3],
+        metrics = QualityMetrics(
+            completeness=float(scores[0]),
+            clarity=float(scores[1]),
+            consistency=float(scores[2]),
+            accuracy=float(scores[3]),
             overall=overall
         )
+        self.result_store.put(digest, namespace, metrics)
+        return metrics
     
     def score_batch(self, 
                    documents: List[Tuple[str, Optional[Dict]]]) -> List[QualityMetrics]:
@@ -179,22 +193,24 @@ class OptimizedQualityScorer:
         
         return results
     
-    def _get_content_hash(self, content: str, metadata: Optional[Dict]) -> str:
-        """Generate efficient hash for caching."""
-        # Use content sample + metadata for unique key
-        sample = content[:200] if len(content) > 200 else content
-        meta_str = str(metadata) if metadata else ""
-        combined = f"{sample}_{len(content)}_{meta_str}"
-        return hashlib.md5(combined.encode()).hexdigest()
+    def _get_namespace(self, metadata: Optional[Dict]) -> str:
+        """Build the result namespace; metadata and weights affect scores."""
+        weights_key = ','.join(f"{w:.6f}" for w in self.weights_array)
+        meta_key = content_digest(str(metadata)) if metadata else ''
+        return f"quality:{content_digest(weights_key)}:{meta_key}"
     
-    def _score_parallel(self, content: str, metadata: Optional[Dict]) -> np.ndarray:
+    def _score_parallel(self,
+                        content: str,
+                        metadata: Optional[Dict],
+                        stats: Optional[DocumentStats] = None) -> np.ndarray:
         """Score all dimensions in parallel."""
+        stats = stats if stats is not None else DocumentStats(content)
         with ThreadPoolExecutor(max_workers=4) as executor:
             futures = {
-                executor.submit(self.score_completeness_optimized, content, metadata): 0,
-                executor.submit(self.score_clarity_optimized, content): 1,
-                executor.submit(self.score_consistency_optimized, content): 2,
-                executor.submit(self.score_accuracy_optimized, content, metadata): 3
+                executor.submit(self.score_completeness_optimized, content, metadata, stats): 0,
+                executor.submit(self.score_clarity_optimized, content, stats): 1,
+                executor.submit(self.score_consistency_optimized, content, stats): 2,
+                executor.submit(self.score_accuracy_optimized, content, metadata, stats): 3
             }
             
             scores = np.zeros(4)
@@ -204,16 +220,23 @@ class OptimizedQualityScorer:
         
         return scores
     
-    def _score_all_dimensions(self, content: str, metadata: Optional[Dict]) -> Tuple[float, float, float, float]:
+    def _score_all_dimensions(self,
+                              content: str,
+                              metadata: Optional[Dict],
+                              stats: Optional[DocumentStats] = None) -> Tuple[float, float, float, float]:
         """Score all dimensions sequentially."""
+        stats = stats if stats is not None else DocumentStats(content)
         return (
-            self.score_completeness_optimized(content, metadata),
-            self.score_clarity_optimized(content),
-            self.score_consistency_optimized(content),
-            self.score_accuracy_optimized(content, metadata)
+            self.score_completeness_optimized(content, metadata, stats),
+            self.score_clarity_optimized(content, stats),
+            self.score_consistency_optimized(content, stats),
+            self.score_accuracy_optimized(content, metadata, stats)
         )
     
-    def score_completeness_optimized(self, content: str, metadata: Optional[Dict] = None) -> float:
+    def score_completeness_optimized(self,
+                                     content: str,
+                                     metadata: Optional[Dict] = None,
+                                     stats: Optional[DocumentStats] = None) -> float:
         """
         Optimized completeness scoring with vectorization.
         
@@ -222,38 +245,38 @@ class OptimizedQualityScorer:
         if not content:
             return 0.0
         
+        stats = stats if stats is not None else DocumentStats(content)
+        
         # Vectorized scoring components
         scores = []
         
-        # Section structure (pre-compiled regex)
-        sections = self.SECTION_PATTERN.findall(content)
-        section_score = min(len(sections) / 5.0, 1.0)
+        # Section structure (shared header scan)
+        section_score = min(len(stats.headers) / 5.0, 1.0)
         scores.append(section_score)
         
-        # Code examples (pre-compiled regex)
-        code_blocks = self.CODE_BLOCK_PATTERN.findall(content)
-        code_score = min(len(code_blocks) / 3.0, 1.0)
+        # Code examples (shared code-block scan)
+        code_score = min(len(stats.code_block_spans) / 3.0, 1.0)
         scores.append(code_score)
         
         # Links/references (pre-compiled regex)
-        links = self.LINK_PATTERN.findall(content)
+        links = stats.findall(self.LINK_PATTERN)
         link_score = min(len(links) / 2.0, 1.0)
         scores.append(link_score)
         
         # TODOs and placeholders penalty (vectorized)
-        todos = len(self.TODO_PATTERN.findall(content))
-        placeholders = len(self.PLACEHOLDER_PATTERN.findall(content))
+        todos = len(stats.findall(self.TODO_PATTERN))
+        placeholders = len(stats.findall(self.PLACEHOLDER_PATTERN))
         incompleteness_penalty = max(0, 1.0 - (todos + placeholders) * 0.1)
         scores.append(incompleteness_penalty)
         
-        # Content length (optimized word counting)
-        word_count = len(content.split())
+        # Content length (shared token count)
+        word_count = stats.token_count
         length_score = min(word_count / 500.0, 1.0)
         scores.append(length_score)
         
         # Essential sections check (vectorized string operations)
         essential_sections = ['introduction', 'usage', 'example', 'reference']
-        content_lower = content.lower()
+        content_lower = stats.lower_text
         found_essentials = sum(1 for section in essential_sections if section in content_lower)
         essential_score = found_essentials / len(essential_sections)
         scores.append(essential_score)
@@ -261,7 +284,9 @@ class OptimizedQualityScorer:
         # Use numpy for mean calculation
         return float(np.mean(scores))
     
-    def score_clarity_optimized(self, content: str) -> float:
+    def score_clarity_optimized(self,
+                                content: str,
+                                stats: Optional[DocumentStats] = None) -> float:
         """
         Optimized clarity scoring with vectorization.
         
@@ -270,15 +295,14 @@ class OptimizedQualityScorer:
         if not content:
             return 0.0
         
+        stats = stats if stats is not None else DocumentStats(content)
         scores = []
         
-        # Sentence analysis (vectorized)
-        sentences = self.SENTENCE_SPLIT_PATTERN.split(content)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Sentence analysis (shared sentence table)
+        sentence_count = stats.sentence_count
         
-        if sentences:
-            # Vectorized sentence length calculation
-            sentence_lengths = np.array([len(s.split()) for s in sentences])
+        if sentence_count:
+            sentence_lengths = stats.sentence_token_counts
             
             # Optimal length scoring (vectorized)
             optimal_length = 17.5
@@ -287,20 +311,19 @@ class OptimizedQualityScorer:
             scores.append(sentence_score)
             
             # Complex sentences (pre-compiled regex)
-            complex_count = len(self.COMPLEX_SENTENCE_PATTERN.findall(content))
-            complexity_score = max(0, 1.0 - complex_count / max(len(sentences), 1) * 2)
+            complex_count = len(stats.findall(self.COMPLEX_SENTENCE_PATTERN))
+            complexity_score = max(0, 1.0 - complex_count / max(sentence_count, 1) * 2)
             scores.append(complexity_score)
         
         # Passive voice (optimized with pre-compiled regex)
-        passive_instances = len(self.PASSIVE_VOICE_PATTERN.findall(content))
-        word_count = len(content.split())
+        passive_instances = len(stats.findall(self.PASSIVE_VOICE_PATTERN))
+        word_count = stats.token_count
         passive_ratio = passive_instances / max(word_count, 1)
         passive_score = max(0, 1.0 - passive_ratio * 20)
         scores.append(passive_score)
         
         # Paragraph structure (vectorized)
-        paragraphs = content.split('\n\n')
-        paragraphs = [p.strip() for p in paragraphs if p.strip()]
+        paragraphs = stats.paragraphs
         
         if paragraphs:
             # Vectorized paragraph scoring
@@ -317,7 +340,7 @@ class OptimizedQualityScorer:
             scores.append(float(np.mean(para_scores)))
         
         # Header clarity (vectorized)
-        headers = self.SECTION_PATTERN.findall(content)
+        headers = stats.headers
         if headers:
             header_word_counts = np.array([len(h.strip('#').strip().split()) for h in headers])
             header_score = float(np.mean(np.minimum(header_word_counts / 3.0, 1.0)))
@@ -325,7 +348,9 @@ class OptimizedQualityScorer:
         
         return float(np.mean(scores)) if scores else 0.5
     
-    def score_consistency_optimized(self, content: str) -> float:
+    def score_consistency_optimized(self,
+                                    content: str,
+                                    stats: Optional[DocumentStats] = None) -> float:
         """
         Optimized consistency scoring with vectorization.
         
@@ -334,11 +359,11 @@ class OptimizedQualityScorer:
         if not content:
             return 0.0
         
+        stats = stats if stats is not None else DocumentStats(content)
         scores = []
         
-        # Terminology consistency (optimized with numpy)
-        words = content.lower().split()
-        words_array = np.array(words)
+        # Terminology consistency (shared token counts)
+        token_counts = stats.lower_token_counts
         
         # Common variations check (vectorized)
         term_variations = {
@@ -350,7 +375,7 @@ class OptimizedQualityScorer:
         
         consistency_scores = []
         for base_term, variations in term_variations.items():
-            counts = np.array([np.sum(words_array == v.lower()) for v in variations])
+            counts = np.array([token_counts.get(v.lower(), 0) for v in variations])
             if counts.sum() > 0:
                 consistency = counts.max() / counts.sum()
                 consistency_scores.append(consistency)
@@ -358,29 +383,25 @@ class OptimizedQualityScorer:
         if consistency_scores:
             scores.append(float(np.mean(consistency_scores)))
         
-        # Code block consistency (pre-compiled regex)
-        code_blocks = self.CODE_BLOCK_PATTERN.findall(content)
+        # Code block consistency (shared code-block scan)
+        code_blocks = stats.code_block_spans
         if code_blocks:
             lang_pattern = re.compile(r'```(\w+)')
-            languages = lang_pattern.findall(content)
+            languages = stats.findall(lang_pattern)
             if languages:
                 lang_consistency = len(languages) / len(code_blocks)
                 scores.append(lang_consistency)
         
         # Header progression (vectorized)
-        headers = self.SECTION_PATTERN.findall(content)
-        if headers:
-            header_levels = np.array([len(re.match(r'^#+', h).group()) for h in headers])
-            
-            # Check progression (vectorized)
-            if len(header_levels) > 1:
-                level_diffs = np.diff(header_levels)
-                progression_score = 1.0 - np.sum(level_diffs > 1) * 0.1
-                scores.append(max(0, progression_score))
+        header_levels = stats.header_levels
+        if len(header_levels) > 1:
+            level_diffs = np.diff(header_levels)
+            progression_score = 1.0 - np.sum(level_diffs > 1) * 0.1
+            scores.append(max(0, progression_score))
         
         # List consistency (optimized regex)
         bullet_pattern = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
-        bullet_lists = bullet_pattern.findall(content)
+        bullet_lists = stats.findall(bullet_pattern)
         if bullet_lists:
             bullet_types = [b.strip()[0] for b in bullet_lists]
             if bullet_types:
@@ -395,7 +416,10 @@ class OptimizedQualityScorer:
         
         return float(np.mean(scores)) if scores else 0.7
     
-    def score_accuracy_optimized(self, content: str, metadata: Optional[Dict] = None) -> float:
+    def score_accuracy_optimized(self,
+                                 content: str,
+                                 metadata: Optional[Dict] = None,
+                                 stats: Optional[DocumentStats] = None) -> float:
         """
         Optimized accuracy scoring with vectorization.
         
@@ -404,23 +428,24 @@ class OptimizedQualityScorer:
         if not content:
             return 0.0
         
+        stats = stats if stats is not None else DocumentStats(content)
         scores = []
         
         # Version information (pre-compiled regex)
-        versions = self.VERSION_PATTERN.findall(content)
+        versions = stats.findall(self.VERSION_PATTERN)
         version_score = min(len(versions) / 2.0, 1.0)
         scores.append(version_score)
         
         # Date recency (vectorized)
-        dates = self.DATE_PATTERN.findall(content)
+        dates = stats.findall(self.DATE_PATTERN)
         if dates:
             dates_array = np.array([int(d) for d in dates])
             recent_dates = np.sum(dates_array >= 2023)
             recency_score = recent_dates / len(dates)
             scores.append(recency_score)
         
-        # Code syntax checking (optimized)
-        code_blocks = self.CODE_BLOCK_PATTERN.findall(content)
+        # Code syntax checking (shared code-block scan)
+        code_blocks = stats.code_blocks
         if code_blocks:
             # Vectorized bracket checking
             syntax_scores = []
@@ -435,7 +460,7 @@ class OptimizedQualityScorer:
                 scores.append(float(np.mean(syntax_scores)))
         
         # Link validation (optimized)
-        links = self.LINK_PATTERN.findall(content)
+        links = stats.findall(self.LINK_PATTERN)
         if links:
             # Vectorized URL validation
             valid_prefixes = ('http://', 'https://', '/', '#', './')
@@ -450,7 +475,7 @@ class OptimizedQualityScorer:
             scores.append(float(np.mean(valid_links)))
         
         # Warnings/deprecation notices (pre-compiled regex)
-        warnings = len(self.WARNING_PATTERN.findall(content))
+        warnings = len(stats.findall(self.WARNING_PATTERN))
         warning_score = min(warnings / 3.0, 1.0)
         scores.append(0.5 + warning_score * 0.5)
         
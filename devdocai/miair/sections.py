@@ -0,0 +1,500 @@
+"""
+Section-aware incremental statistics for large documents.
+
+A document is split into header-delimited sections. Each section's
+DocumentStats (frequency tables, sentence pieces, header and code-block
+spans, regex matches) is cached by section digest, so re-analyzing an
+edited document only tokenizes the sections that changed. The cached
+tables are then merged into a SectionedDocumentStats for the whole text,
+which the optimized components consume like any other DocumentStats.
+
+Sections are only cut before a header line that follows a blank line and
+lies outside fenced code blocks. With that rule words, tokens, paragraphs,
+headers and code blocks never straddle a boundary, so every merged table
+equals the one computed from the full text. Sentences and regex matches
+may straddle a boundary; how each pattern's matches are merged exactly is
+decided from the pattern itself, see scan_mode().
+"""
+
+import logging
+import re
+from collections import Counter
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .content_store import ContentAddressedStore, content_digest
+from .document_stats import HEADER_PATTERN, DocumentStats, Match
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+SECTION_NAMESPACE = 'section'
+SECTION_MATCHES_NAMESPACE = 'section-matches'
+WINDOW_NAMESPACE = 'section-window'
+
+# How matches of a pattern are merged (see scan_mode)
+SCAN_SECTIONS = 'sections'
+SCAN_WINDOWS = 'windows'
+SCAN_FULL = 'full'
+
+_FENCE = '```'
+_BOUNDARY = '\n\n#'
+_HASH_ONLY_LINE = re.compile(r'[ \t]*#+\s*\Z')
+_BLANK_LINE = re.compile(r'\s*\Z')
+
+
+def _code_block_spans(text: str) -> List[Tuple[int, int]]:
+    """Fenced code block spans, paired exactly like CODE_BLOCK_PATTERN."""
+    spans = []
+    start = text.find(_FENCE)
+    while start != -1:
+        end = text.find(_FENCE, start + len(_FENCE))
+        if end == -1:
+            break
+        spans.append((start, end + len(_FENCE)))
+        start = text.find(_FENCE, end + len(_FENCE))
+    return spans
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split a document into header-delimited sections.
+
+    Concatenating the returned sections reproduces the text exactly.
+
+    Args:
+        text: Document text
+
+    Returns:
+        List of sections (a single section if no boundary qualifies)
+    """
+    code_spans = _code_block_spans(text)
+    span_index = 0
+    cuts = [0]
+
+    position = text.find(_BOUNDARY)
+    while position != -1:
+        cut = position + 2
+        while span_index < len(code_spans) and code_spans[span_index][1] <= cut:
+            span_index += 1
+        inside_code = (span_index < len(code_spans)
+                       and code_spans[span_index][0] < cut)
+
+        # A bare '#' line before the blank lines would join the header match
+        line_end = position
+        line_start = text.rfind('\n', 0, line_end) + 1
+        while line_start and _BLANK_LINE.match(text, line_start, line_end):
+            line_end = line_start - 1
+            line_start = text.rfind('\n', 0, line_end) + 1
+        after_hash_line = _HASH_ONLY_LINE.match(text, line_start, line_end) is not None
+
+        if (not inside_code and not after_hash_line
+                and HEADER_PATTERN.match(text, cut) is not None):
+            cuts.append(cut)
+        position = text.find(_BOUNDARY, cut)
+
+    cuts.append(len(text))
+    return [text[start:end] for start, end in zip(cuts, cuts[1:]) if end > start] or [text]
+
+
+_CATEGORY_CLASSES = {
+    sre_constants.CATEGORY_DIGIT: re.compile(r'\d'),
+    sre_constants.CATEGORY_NOT_DIGIT: re.compile(r'\D'),
+    sre_constants.CATEGORY_SPACE: re.compile(r'\s'),
+    sre_constants.CATEGORY_NOT_SPACE: re.compile(r'\S'),
+    sre_constants.CATEGORY_WORD: re.compile(r'\w'),
+    sre_constants.CATEGORY_NOT_WORD: re.compile(r'\W'),
+}
+_TERMINATORS = '.!?'
+_scan_modes: Dict[Tuple[str, int], str] = {}
+
+
+class _Unsafe(Exception):
+    """The pattern looks beyond its match or depends on the string ends."""
+
+
+def _in_set(items, char: str) -> bool:
+    """Whether a parsed character class contains a character."""
+    negate = False
+    member = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            member = member or chr(av) == char
+        elif op is sre_constants.RANGE:
+            member = member or av[0] <= ord(char) <= av[1]
+        elif op is sre_constants.CATEGORY:
+            category = _CATEGORY_CLASSES.get(av)
+            member = member or category is None or category.match(char) is not None
+        else:
+            member = True
+    return member != negate
+
+
+def _can_match(items, chars: str, flags: int) -> bool:
+    """
+    Whether a parsed pattern can consume any of chars (conservative).
+
+    Raises:
+        _Unsafe: For lookarounds and string anchors, whose result in a
+            section or window scan can differ from the full text
+    """
+    found = False
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            found |= chr(av) in chars
+        elif op is sre_constants.NOT_LITERAL:
+            found |= any(chr(av) != char for char in chars)
+        elif op is sre_constants.ANY:
+            found |= any(char != '\n' or flags & re.DOTALL for char in chars)
+        elif op is sre_constants.IN:
+            found |= any(_in_set(av, char) for char in chars)
+        elif op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, pattern = av
+            found |= _can_match(pattern, chars, (flags | add_flags) & ~del_flags)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+                    getattr(sre_constants, 'POSSESSIVE_REPEAT', None)):
+            found |= av[1] > 0 and _can_match(av[2], chars, flags)
+        elif op is sre_constants.BRANCH:
+            found |= any(_can_match(branch, chars, flags) for branch in av[1])
+        elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+            found |= _can_match(av, chars, flags)
+        elif op is sre_constants.GROUPREF_EXISTS:
+            found |= any(_can_match(branch, chars, flags) for branch in av[1:] if branch)
+        elif op is sre_constants.GROUPREF:
+            pass  # Only repeats what a group already consumed
+        elif op is sre_constants.AT:
+            if av in (sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY):
+                continue  # A section edge borders whitespace, like the full text
+            if av is sre_constants.AT_BEGINNING and flags & re.MULTILINE:
+                continue  # Sections start at a line start
+            raise _Unsafe()
+        else:
+            raise _Unsafe()
+    return found
+
+
+def scan_mode(regex: re.Pattern) -> str:
+    """
+    How SectionedDocumentStats merges a pattern's matches exactly.
+
+    A boundary-crossing match must contain the newline before the header,
+    so SCAN_SECTIONS patterns (no match can contain a newline) are served
+    from the section scans alone. SCAN_WINDOWS patterns may match newlines
+    but never a sentence terminator, so a crossing match lies inside the
+    sentence around the boundary and both scans restart cleanly at the
+    window edges. Everything else is SCAN_FULL: matches that may contain a
+    terminator (links, code blocks, whole sentences), empty matches,
+    lookarounds and string anchors are scanned over the full text.
+
+    Args:
+        regex: Compiled regular expression
+
+    Returns:
+        SCAN_SECTIONS, SCAN_WINDOWS or SCAN_FULL
+    """
+    key = (regex.pattern, regex.flags)
+    mode = _scan_modes.get(key)
+    if mode is None:
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+            if parsed.getwidth()[0] == 0:
+                mode = SCAN_FULL
+            elif not _can_match(parsed, '\n', regex.flags):
+                mode = SCAN_SECTIONS
+            elif not _can_match(parsed, _TERMINATORS, regex.flags):
+                mode = SCAN_WINDOWS
+            else:
+                mode = SCAN_FULL
+        except (_Unsafe, re.error, TypeError):
+            mode = SCAN_FULL
+        _scan_modes[key] = mode
+    return mode
+
+
+class SectionedDocumentStats(DocumentStats):
+    """
+    DocumentStats for a full text assembled from per-section statistics.
+
+    Every table is merged lazily from the section instances instead of
+    re-scanning the text; regex matches are merged per pattern.
+
+    Section instances may be shared through the result store, so section
+    and window scans are stored there as results of their own rather than
+    memoized on the (already stored) section instances.
+    """
+
+    def __init__(self,
+                 text: str,
+                 sections: List[DocumentStats],
+                 result_store: Optional[ContentAddressedStore] = None,
+                 digests: Optional[List[str]] = None):
+        """
+        Initialize from consecutive section statistics.
+
+        Args:
+            text: Full document text (concatenation of the sections)
+            sections: Statistics for each section, in document order
+            result_store: Optional store caching section and window scans
+            digests: Content digests of the sections (computed if omitted)
+        """
+        super().__init__(text)
+        self.sections = sections
+        self.result_store = result_store
+        self.digests = digests
+        self.offsets = np.cumsum([0] + [len(s.text) for s in sections[:-1]]).tolist()
+        self.reused_sections = 0
+
+    @cached_property
+    def _char_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Character histogram with counts summed per code point."""
+        codes = np.concatenate([s._char_table[0] for s in self.sections])
+        counts = np.concatenate([s._char_table[1] for s in self.sections])
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts, minlength=len(unique_codes))
+        return unique_codes, totals.astype(np.int64)
+
+    @cached_property
+    def line_offsets(self) -> np.ndarray:
+        """Line offsets; each later section starts on a line already recorded."""
+        return np.concatenate(
+            [self.sections[0].line_offsets]
+            + [s.line_offsets[1:] + offset
+               for s, offset in zip(self.sections[1:], self.offsets[1:])]
+        )
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Lower-cased word tokens."""
+        return [word for s in self.sections for word in s.words]
+
+    @cached_property
+    def _word_table(self) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Section vocabularies mapped onto one first-occurrence vocabulary."""
+        vocabulary: Dict[str, int] = {}
+        word_ids = [np.zeros(0, dtype=np.int32)]
+        for section in self.sections:
+            remap = np.fromiter(
+                (vocabulary.setdefault(word, len(vocabulary)) for word in section.vocabulary),
+                dtype=np.int32,
+                count=len(section.vocabulary)
+            )
+            word_ids.append(remap[section.word_ids])
+        word_ids = np.concatenate(word_ids)
+        return word_ids, list(vocabulary), np.bincount(word_ids, minlength=len(vocabulary))
+
+    @cached_property
+    def lower_tokens(self) -> List[str]:
+        """Lower-cased whitespace-delimited tokens."""
+        return [token for s in self.sections for token in s.lower_tokens]
+
+    @cached_property
+    def lower_token_counts(self) -> Counter:
+        """Token counts summed over sections (first-occurrence order)."""
+        counts = Counter()
+        for section in self.sections:
+            counts.update(section.lower_token_counts)
+        return counts
+
+    @cached_property
+    def _sentence_pieces(self) -> List[Tuple[int, int, bool]]:
+        """Sentence pieces; the last piece of a section continues into the next."""
+        pieces = list(self.sections[0]._sentence_pieces)
+        for section in self.sections[1:]:
+            head = section._sentence_pieces
+            words_a, tokens_a, non_empty_a = pieces[-1]
+            words_b, tokens_b, non_empty_b = head[0]
+            pieces[-1] = (words_a + words_b, tokens_a + tokens_b, non_empty_a or non_empty_b)
+            pieces.extend(head[1:])
+        return pieces
+
+    @cached_property
+    def paragraphs(self) -> List[str]:
+        """Non-empty, stripped paragraphs separated by blank lines."""
+        return [p for s in self.sections for p in s.paragraphs]
+
+    @cached_property
+    def _header_table(self) -> Tuple[List[str], List[str], np.ndarray, List[Tuple[int, int]]]:
+        """Markdown header lines, titles, levels and spans."""
+        lines, titles, levels, spans = [], [], [], []
+        for section, offset in zip(self.sections, self.offsets):
+            section_lines, section_titles, section_levels, section_spans = section._header_table
+            lines.extend(section_lines)
+            titles.extend(section_titles)
+            levels.append(section_levels)
+            spans.extend((start + offset, end + offset) for start, end in section_spans)
+        return lines, titles, np.concatenate(levels), spans
+
+    @cached_property
+    def code_block_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets of each fenced code block."""
+        return [
+            (start + offset, end + offset)
+            for section, offset in zip(self.sections, self.offsets)
+            for start, end in section.code_block_spans
+        ]
+
+    @cached_property
+    def _boundary_windows(self) -> List[Tuple[int, int, List[int]]]:
+        """
+        Text ranges around section boundaries that must be rescanned.
+
+        Each window runs from the end of the last sentence terminator before
+        a boundary to the end of the first terminator after it, i.e. the
+        sentence that straddles the boundary; SCAN_WINDOWS patterns are
+        rescanned there. Returns (start, end, boundaries).
+        """
+        windows = []
+        last_end = 0
+        open_start = None
+        boundaries: List[int] = []
+        for index, (section, offset) in enumerate(zip(self.sections, self.offsets)):
+            if index > 0:
+                if open_start is None:
+                    open_start = last_end
+                boundaries.append(offset)
+            bounds = section._terminator_bounds
+            if bounds is not None:
+                if open_start is not None:
+                    windows.append((open_start, offset + bounds[0], boundaries))
+                    open_start = None
+                    boundaries = []
+                last_end = offset + bounds[1]
+
+        if open_start is not None:
+            windows.append((open_start, len(self.text), boundaries))
+        return windows
+
+    def matches(self, regex: re.Pattern) -> List[Match]:
+        """
+        Matches merged from per-section scans, equal to a full scan.
+
+        Depending on scan_mode(): section matches as they are; section
+        matches outside the boundary windows plus a rescan of each window;
+        or a scan of the full text.
+        """
+        key = (regex.pattern, regex.flags)
+        found = self._matches.get(key)
+        if found is not None:
+            return found
+
+        mode = scan_mode(regex)
+        if mode == SCAN_FULL:
+            return super().matches(regex)
+
+        # Sections are disjoint, so these are sorted and non-overlapping
+        found = [
+            (start + offset, end + offset, text, groups)
+            for index, offset in enumerate(self.offsets)
+            for start, end, text, groups in self._section_matches(index, regex, key)
+        ]
+
+        if mode == SCAN_WINDOWS and self._boundary_windows:
+            # Matches cannot contain the terminator before a window start or at
+            # its end, so section matches never straddle a window edge
+            merged = []
+            position = 0
+            for (ws, we, _), digest in zip(self._boundary_windows, self._window_digests):
+                while position < len(found) and found[position][0] < ws:
+                    merged.append(found[position])
+                    position += 1
+                while position < len(found) and found[position][0] < we:
+                    position += 1
+                merged.extend(
+                    (start + ws, end + ws, text, groups)
+                    for start, end, text, groups in self._window_matches(regex, key, ws, we, digest)
+                )
+            merged.extend(found[position:])
+            found = merged
+
+        self._matches[key] = found
+        return found
+
+    def _section_matches(self, index: int, regex: re.Pattern,
+                         key: Tuple[str, int]) -> List[Match]:
+        """A section's own matches, shared through the result store."""
+        section = self.sections[index]
+        if self.result_store is None:
+            return section.matches(regex)
+
+        digest = self._section_digests[index]
+        namespace = f"{SECTION_MATCHES_NAMESPACE}:{key[1]}:{key[0]}"
+        found = self.result_store.get(digest, namespace)
+        if found is None:
+            found = [(m.start(), m.end(), m.group(), m.groups())
+                     for m in regex.finditer(section.text)]
+            self.result_store.put(digest, namespace, found)
+        return found
+
+    def _window_matches(self, regex: re.Pattern, key: Tuple[str, int],
+                        ws: int, we: int, digest: str) -> List[Match]:
+        """All matches inside a boundary window, relative to its start."""
+        namespace = f"{WINDOW_NAMESPACE}:{key[1]}:{key[0]}"
+        found = self.result_store.get(digest, namespace) if self.result_store is not None else None
+        if found is None:
+            found = [(m.start() - ws, m.end() - ws, m.group(), m.groups())
+                     for m in regex.finditer(self.text, ws, we)]
+            if self.result_store is not None:
+                self.result_store.put(digest, namespace, found)
+        return found
+
+    @cached_property
+    def _section_digests(self) -> List[str]:
+        """Content digests of the sections."""
+        return self.digests or [content_digest(section.text) for section in self.sections]
+
+    @cached_property
+    def _window_digests(self) -> List[Optional[str]]:
+        """
+        Digests keying the window rescans in the result store.
+
+        Windows away from an edit are unchanged between analyses, so their
+        rescans are keyed by the window text (and whether it starts the
+        document, where '^' matches without a preceding newline).
+        """
+        if self.result_store is None:
+            return [None] * len(self._boundary_windows)
+        return [content_digest(f"{int(ws == 0)}|{self.text[ws:we]}")
+                for ws, we, _ in self._boundary_windows]
+
+
+def build_sectioned_stats(text: str,
+                          result_store: Optional[ContentAddressedStore] = None
+                          ) -> SectionedDocumentStats:
+    """
+    Build statistics for a document, reusing cached section statistics.
+
+    Args:
+        text: Document text
+        result_store: Store holding section statistics by digest
+
+    Returns:
+        Merged statistics; reused_sections counts cache hits
+    """
+    sections = []
+    digests = []
+    reused = 0
+    for section_text in split_sections(text):
+        digest = content_digest(section_text)
+        digests.append(digest)
+        section = result_store.get(digest, SECTION_NAMESPACE) if result_store is not None else None
+        if section is None:
+            section = DocumentStats(section_text).precompute()
+            if result_store is not None:
+                result_store.put(digest, SECTION_NAMESPACE, section)
+        else:
+            reused += 1
+        sections.append(section)
+
+    stats = SectionedDocumentStats(text, sections, result_store, digests)
+    stats.reused_sections = reused
+    logger.debug(f"Reused {reused} of {len(sections)} sections")
+    return stats
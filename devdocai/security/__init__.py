@@ -56,6 +56,7 @@ from .pii_detector_unified import (
     UnifiedPIIDetector,
     PIIConfig,
     PIIOperationMode,
+    PIIScanBackend,
     PIIDetectionMode,
     PIILanguage,
     PIISensitivityLevel,
@@ -314,6 +315,7 @@ __all__ = [
     "SecurityOperationMode",
     "SBOMOperationMode",
     "PIIOperationMode", 
+    "PIIScanBackend",
     "ThreatOperationMode",
     "DSROperationMode",
     "ComplianceOperationMode",
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+M010 Security Module - PII Scan Backend Benchmark
+
+Times the serial, thread and process scan backends of UnifiedPIIDetector
+over growing documents and reports the size at which each parallel backend
+starts beating the serial scan. Use the reported crossovers to tune
+PIIConfig.thread_scan_min_chars and PIIConfig.process_scan_min_chars.
+
+Usage:
+    python -m devdocai.security.benchmarks.benchmark_pii_scan [--workers N]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from devdocai.security.pii_detector_unified import (
+    PIIConfig,
+    PIIOperationMode,
+    UnifiedPIIDetector
+)
+from devdocai.security.pii_scanner import ProcessScanPool
+
+DEFAULT_SIZES = [4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+
+SAMPLE_TEXT = (
+    "## Deployment\n\n"
+    "The service reads its configuration at startup and version 2.4 added "
+    "hot reloading. Contact jane.smith@example.com or call (555) 867-5309 "
+    "for access. The staging host is 10.20.30.40 and backups run nightly.\n\n"
+    "Customer record: SSN 123-45-6789, card 4111 1111 1111 1111, born "
+    "04/12/1985, living at 221 Baker Street.\n\n"
+    "Most of a typical document is prose without any identifiers at all, "
+    "describing architecture, decisions and operational procedures.\n\n"
+)
+
+
+def make_document(size: int) -> str:
+    """Build a document of roughly size characters."""
+    repeats = size // len(SAMPLE_TEXT) + 1
+    return (SAMPLE_TEXT * repeats)[:size]
+
+
+def _time(function, repeats: int) -> float:
+    """Median wall time of function in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmark(sizes: Optional[List[int]] = None,
+                  workers: int = 4,
+                  repeats: int = 5) -> List[Dict[str, Any]]:
+    """
+    Time every backend for each document size.
+
+    Returns:
+        One row per size with serial_ms, thread_ms and process_ms
+    """
+    detector = UnifiedPIIDetector(PIIConfig(mode=PIIOperationMode.BASIC, max_workers=workers))
+    scanner = detector._scanner
+    threads = ThreadPoolExecutor(max_workers=workers)
+    processes = ProcessScanPool(scanner, workers)
+
+    def threaded(text, ranges):
+        chunks = threads.map(lambda bounds: scanner.scan_range(text, *bounds), ranges)
+        return scanner.resolve([hit for chunk in chunks for hit in chunk])
+
+    rows = []
+    try:
+        # Start and warm the worker processes outside the measurements
+        processes.scan(SAMPLE_TEXT, [(0, len(SAMPLE_TEXT))] * workers)
+
+        for size in sizes or DEFAULT_SIZES:
+            text = make_document(size)
+            ranges = detector._split_content_into_chunks(text)
+            expected = scanner.scan(text)
+            assert threaded(text, ranges) == expected
+            assert processes.scan(text, ranges) == expected
+
+            rows.append({
+                'size': size,
+                'matches': len(expected),
+                'serial_ms': _time(lambda: scanner.scan(text), repeats),
+                'thread_ms': _time(lambda: threaded(text, ranges), repeats),
+                'process_ms': _time(lambda: processes.scan(text, ranges), repeats)
+            })
+    finally:
+        threads.shutdown()
+        processes.shutdown()
+
+    return rows
+
+
+def find_crossover(rows: List[Dict[str, Any]], backend: str) -> Optional[int]:
+    """Smallest size from which the backend stays faster than serial."""
+    crossover = None
+    for row in reversed(rows):
+        if row[f'{backend}_ms'] >= row['serial_ms']:
+            break
+        crossover = row['size']
+    return crossover
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+    args = parser.parse_args()
+
+    rows = run_benchmark(workers=args.workers, repeats=args.repeats)
+    crossovers = {backend: find_crossover(rows, backend) for backend in ('thread', 'process')}
+
+    if args.json:
+        print(json.dumps({'results': rows, 'crossovers': crossovers}, indent=2))
+        return
+
+    print(f"{'size':>10} {'matches':>8} {'serial ms':>10} {'thread ms':>10} {'process ms':>11}")
+    for row in rows:
+        print(f"{row['size']:>10} {row['matches']:>8} {row['serial_ms']:>10.2f} "
+              f"{row['thread_ms']:>10.2f} {row['process_ms']:>11.2f}")
+    for backend, size in crossovers.items():
+        print(f"{backend} crossover: {size if size is not None else 'none in tested sizes'}")
+
+
+if __name__ == "__main__":
+    main()
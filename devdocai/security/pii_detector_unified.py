@@ -15,6 +15,7 @@ import logging
 import re
 import time
 import hashlib
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Set, Tuple
@@ -26,6 +27,8 @@ from functools import lru_cache
 from collections import defaultdict
 import multiprocessing as mp
 
+from .pii_scanner import EMAIL_TRIGGER, MultiPatternScanner, ProcessScanPool, RawMatch
+
 # Optional ML dependencies (for advanced modes)
 try:
     import spacy
@@ -80,6 +83,14 @@ class PrivacyLevel(str, Enum):
     STRICT = "strict"
 
 
+class PIIScanBackend(str, Enum):
+    """Execution backends for pattern scanning."""
+    AUTO = "auto"         # Choose by document size
+    SERIAL = "serial"     # Scan in the calling thread
+    THREAD = "thread"     # Offload to the thread pool (keeps event loop free)
+    PROCESS = "process"   # Shared-memory scan across worker processes
+
+
 class MaskingStrategy(str, Enum):
     """PII masking strategies."""
     REDACT = "redact"           # Replace with [REDACTED]
@@ -135,6 +146,12 @@ class PIIConfig:
     max_workers: int = 4
     batch_size: int = 100
     
+    # Scan backend selection; see benchmarks/benchmark_pii_scan.py for the
+    # crossover points on a given machine
+    scan_backend: PIIScanBackend = PIIScanBackend.AUTO
+    thread_scan_min_chars: int = 16 * 1024
+    process_scan_min_chars: int = 256 * 1024
+    
     # Advanced security settings
     enable_privacy_protection: bool = False
     enable_audit_logging: bool = False
@@ -213,6 +230,8 @@ class UnifiedPIIDetector:
         self._thread_pool = None
         if self.config.enable_parallel_processing:
             self._thread_pool = ThreadPoolExecutor(max_workers=self.config.max_workers)
+        self._process_pool: Optional[ProcessScanPool] = None
+        self._scan_backend_counts = defaultdict(int)
         
         # ML components (advanced modes)
         self._nlp_model = None
@@ -220,6 +239,11 @@ class UnifiedPIIDetector:
         
         # PII patterns (compiled regex patterns for efficiency)
         self._pii_patterns = self._compile_pii_patterns()
+        self._scanner = MultiPatternScanner(
+            {pii_type: info['pattern'] for pii_type, info in self._pii_patterns.items()},
+            {pii_type: info['trigger'] for pii_type, info in self._pii_patterns.items()
+             if 'trigger' in info}
+        )
         
         # Initialize ML components if available and enabled
         if self.config.enable_ml_detection and ML_AVAILABLE:
@@ -233,7 +257,8 @@ class UnifiedPIIDetector:
             'email': {
                 'pattern': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
                 'sensitivity': PIISensitivityLevel.MEDIUM,
-                'description': 'Email address'
+                'description': 'Email address',
+                'trigger': EMAIL_TRIGGER
             },
             'ssn': {
                 'pattern': re.compile(r'\b\d{3}-?\d{2}-?\d{4}\b'),
@@ -409,28 +434,66 @@ class UnifiedPIIDetector:
             raise
     
     def _detect_pii_basic(self, content: str, context: Optional[PIIContext] = None) -> List[PIIMatch]:
-        """Basic PII detection using regex patterns."""
+        """Basic PII detection using a single-pass multi-pattern scan."""
+        if self._select_scan_backend(len(content), allow_thread=False) == PIIScanBackend.PROCESS:
+            raw_matches = self._get_process_pool().scan(
+                content, self._split_content_into_chunks(content)
+            )
+        else:
+            raw_matches = self._scanner.scan(content)
+        return self._build_matches(content, raw_matches)
+    
+    def _select_scan_backend(self, length: int, allow_thread: bool = True) -> PIIScanBackend:
+        """
+        Choose the scan backend for a document of the given length.
+        
+        Threads cannot speed up GIL-bound matching, so blocking callers
+        (allow_thread=False) scan serially instead of in a thread.
+        """
+        backend = self.config.scan_backend
+        if backend == PIIScanBackend.AUTO:
+            if not self.config.enable_parallel_processing:
+                backend = PIIScanBackend.SERIAL
+            elif length >= self.config.process_scan_min_chars and _available_cpus() > 1:
+                backend = PIIScanBackend.PROCESS
+            elif length >= self.config.thread_scan_min_chars:
+                backend = PIIScanBackend.THREAD
+            else:
+                backend = PIIScanBackend.SERIAL
+        if backend == PIIScanBackend.THREAD and not (allow_thread and self._thread_pool):
+            backend = PIIScanBackend.SERIAL
+        
+        self._scan_backend_counts[backend.value] += 1
+        return backend
+    
+    def _get_process_pool(self) -> ProcessScanPool:
+        """Get the process scan pool, starting it on first use."""
+        if self._process_pool is None:
+            self._process_pool = ProcessScanPool(
+                self._scanner,
+                max_workers=max(1, min(self.config.max_workers, _available_cpus()))
+            )
+        return self._process_pool
+    
+    def _build_matches(self, content: str, raw_matches: List[RawMatch]) -> List[PIIMatch]:
+        """Validate raw scanner matches and convert them to PIIMatch objects."""
         matches = []
         
-        for pii_type, pattern_info in self._pii_patterns.items():
-            pattern = pattern_info['pattern']
-            sensitivity = pattern_info['sensitivity']
-            description = pattern_info['description']
+        for start_pos, end_pos, pii_type, text in raw_matches:
+            # Per-type validation (e.g. Luhn check) via confidence threshold
+            confidence = self._calculate_confidence(text, pii_type)
+            if confidence < self.config.confidence_threshold:
+                continue
             
-            for match in pattern.finditer(content):
-                pii_match = PIIMatch(
-                    text=match.group(),
-                    pii_type=pii_type,
-                    confidence=self._calculate_confidence(match.group(), pii_type),
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    sensitivity=sensitivity,
-                    context=self._extract_context(content, match.start(), match.end()) if self.config.enable_context_analysis else None
-                )
-                
-                # Apply confidence threshold
-                if pii_match.confidence >= self.config.confidence_threshold:
-                    matches.append(pii_match)
+            matches.append(PIIMatch(
+                text=text,
+                pii_type=pii_type,
+                confidence=confidence,
+                start_pos=start_pos,
+                end_pos=end_pos,
+                sensitivity=self._pii_patterns[pii_type]['sensitivity'],
+                context=self._extract_context(content, start_pos, end_pos) if self.config.enable_context_analysis else None
+            ))
         
         return matches
     
@@ -439,33 +502,26 @@ class UnifiedPIIDetector:
         if not self._thread_pool:
             return self._detect_pii_basic(content, context)
         
-        # Split content into chunks for parallel processing
-        chunks = self._split_content_into_chunks(content)
-        
-        # Create tasks for each chunk
-        tasks = []
+        backend = self._select_scan_backend(len(content))
         loop = asyncio.get_event_loop()
         
-        for chunk_start, chunk_text in chunks:
-            task = loop.run_in_executor(
-                self._thread_pool, 
-                self._detect_pii_in_chunk, 
-                chunk_text, 
-                chunk_start, 
-                context
+        if backend == PIIScanBackend.PROCESS:
+            raw_matches = await loop.run_in_executor(
+                self._thread_pool,
+                self._get_process_pool().scan,
+                content,
+                self._split_content_into_chunks(content)
             )
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
+        elif backend == PIIScanBackend.THREAD:
+            # Regex matching holds the GIL, so one task is as fast as many
+            # chunks; offloading it keeps the event loop responsive
+            raw_matches = await loop.run_in_executor(
+                self._thread_pool, self._scanner.scan, content
+            )
+        else:
+            raw_matches = self._scanner.scan(content)
         
-        # Combine results
-        matches = []
-        for result in chunk_results:
-            if isinstance(result, Exception):
-                logger.error(f"Chunk processing failed: {result}")
-            else:
-                matches.extend(result)
+        matches = self._build_matches(content, raw_matches)
         
         # Merge overlapping matches and sort by position
         matches = self._merge_overlapping_matches(matches)
@@ -477,48 +533,18 @@ class UnifiedPIIDetector:
         
         return matches
     
-    def _split_content_into_chunks(self, content: str) -> List[Tuple[int, str]]:
-        """Split content into chunks for parallel processing."""
-        chunk_size = max(1000, len(content) // self.config.max_workers)
-        chunks = []
-        
-        for i in range(0, len(content), chunk_size):
-            chunk_start = i
-            chunk_end = min(i + chunk_size, len(content))
-            
-            # Ensure we don't split in the middle of a word
-            if chunk_end < len(content):
-                while chunk_end > chunk_start and not content[chunk_end].isspace():
-                    chunk_end -= 1
-            
-            chunk_text = content[chunk_start:chunk_end]
-            chunks.append((chunk_start, chunk_text))
-        
-        return chunks
-    
-    def _detect_pii_in_chunk(self, chunk_text: str, chunk_start: int, context: Optional[PIIContext] = None) -> List[PIIMatch]:
-        """Detect PII in a single chunk."""
-        matches = []
+    def _split_content_into_chunks(self, content: str) -> List[Tuple[int, int]]:
+        """
+        Split content into (start, end) ranges for parallel processing.
         
-        for pii_type, pattern_info in self._pii_patterns.items():
-            pattern = pattern_info['pattern']
-            sensitivity = pattern_info['sensitivity']
-            
-            for match in pattern.finditer(chunk_text):
-                pii_match = PIIMatch(
-                    text=match.group(),
-                    pii_type=pii_type,
-                    confidence=self._calculate_confidence(match.group(), pii_type),
-                    start_pos=chunk_start + match.start(),
-                    end_pos=chunk_start + match.end(),
-                    sensitivity=sensitivity,
-                    context=self._extract_context(chunk_text, match.start(), match.end()) if self.config.enable_context_analysis else None
-                )
-                
-                if pii_match.confidence >= self.config.confidence_threshold:
-                    matches.append(pii_match)
-        
-        return matches
+        Ranges only partition match start positions; every chunk is scanned
+        against the full content, so matches straddling a boundary are kept.
+        """
+        chunk_size = max(1000, len(content) // self.config.max_workers)
+        return [
+            (chunk_start, min(chunk_start + chunk_size, len(content)))
+            for chunk_start in range(0, len(content), chunk_size)
+        ]
     
     def _merge_overlapping_matches(self, matches: List[PIIMatch]) -> List[PIIMatch]:
         """Merge overlapping PII matches."""
@@ -892,6 +918,7 @@ class UnifiedPIIDetector:
             'matches_by_sensitivity': dict(self._statistics.matches_by_sensitivity),
             'ml_enabled': self.config.enable_ml_detection and ML_AVAILABLE,
             'patterns_loaded': len(self._pii_patterns),
+            'scan_backends': dict(self._scan_backend_counts),
             'cache_size': len(self._result_cache),
             'last_updated': self._statistics.last_updated.isoformat()
         }
@@ -908,10 +935,19 @@ class UnifiedPIIDetector:
         try:
             if self._thread_pool:
                 self._thread_pool.shutdown(wait=False)
+            if self._process_pool:
+                self._process_pool.shutdown(wait=False)
         except:
             pass
 
 
+def _available_cpus() -> int:
+    """CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 # Factory functions for different modes
 def create_basic_pii_detector(config: Optional[PIIConfig] = None) -> UnifiedPIIDetector:
     """Create basic PII detector."""
@@ -0,0 +1,344 @@
+"""
+M010 Security Module - Single-pass multi-pattern PII scanner
+
+Replaces one full-text finditer per PII pattern with a single pass:
+
+1. A literal prefilter (one combined trigger regex) locates the few spans
+   where a PII match can start, e.g. runs of digits and the local part of
+   an email address. Prose between those spans is skipped entirely.
+2. At each candidate position one combined alternation with a named group
+   per PII type is tried as an anchored match; only the types after the
+   matching alternative need a further anchored check.
+3. Hits are resolved exactly like per-type finditer (non-overlapping per
+   type, overlapping across types), so results are identical to scanning
+   each pattern separately.
+
+Patterns are always evaluated against the full text, so splitting the scan
+into start-position ranges for parallel workers never loses a match that
+straddles a chunk boundary.
+
+Regex matching holds the GIL, so large documents are scanned by
+ProcessScanPool: the text is written once to a shared-memory buffer and
+persistent workers with pre-compiled patterns scan start-position ranges.
+"""
+
+import logging
+import multiprocessing as mp
+import re
+import uuid
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List, Optional, Pattern, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# A trigger is (anchor, lead): a character class every match of the pattern
+# contains, and where the match may start relative to the first anchor
+# character - either at most that many characters before it, or anywhere in
+# the preceding run of the given character class.
+Trigger = Tuple[str, Union[int, str]]
+
+# Digit-bearing patterns start at most four characters (letters, '(', '+',
+# '-' or whitespace) before their first digit
+DIGIT_TRIGGER: Trigger = (r'\d', 4)
+
+# An email address starts inside the local-part run preceding its '@'
+EMAIL_TRIGGER: Trigger = ('@', 'A-Za-z0-9._%+-')
+
+# (start, end, pii_type, text)
+RawMatch = Tuple[int, int, str, str]
+
+_INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+class MultiPatternScanner:
+    """
+    Scan text for several PII patterns in one pass.
+
+    Each pattern has a trigger (see Trigger) locating every position at
+    which it can start a match. Patterns without an explicit trigger use
+    DIGIT_TRIGGER.
+    """
+
+    def __init__(self,
+                 patterns: Dict[str, Pattern],
+                 triggers: Optional[Dict[str, Trigger]] = None):
+        """
+        Compile the combined scanner.
+
+        Args:
+            patterns: Compiled regex per PII type (type names must be identifiers)
+            triggers: Optional trigger per PII type
+        """
+        self.triggers = dict(triggers or {})
+        triggers = self.triggers
+        self.patterns = dict(patterns)
+        self.types = list(self.patterns)
+        self._order = {pii_type: index for index, pii_type in enumerate(self.types)}
+
+        self.combined = re.compile('|'.join(
+            f'(?P<{pii_type}>{self._scoped(pattern)})'
+            for pii_type, pattern in self.patterns.items()
+        ))
+        # Alternatives after the one that matched may match at the same position
+        self._followers = {
+            pii_type: [(other, self.patterns[other]) for other in self.types[index + 1:]]
+            for index, pii_type in enumerate(self.types)
+        }
+
+        unique_triggers = list(dict.fromkeys(
+            triggers.get(pii_type, DIGIT_TRIGGER) for pii_type in self.types
+        ))
+        # Runs of anchor characters; each run is then widened by the leads
+        self.trigger = re.compile(
+            '[' + ''.join(anchor for anchor, _ in unique_triggers) + ']+'
+        )
+        self._fixed_lead = max(
+            [lead for _, lead in unique_triggers if isinstance(lead, int)], default=0
+        )
+        self._run_leads = [
+            (re.compile(f'[{anchor}]'), re.compile(f'[{lead}]'))
+            for anchor, lead in unique_triggers if isinstance(lead, str)
+        ]
+
+    @staticmethod
+    def _scoped(pattern: Pattern) -> str:
+        """Pattern source with its flags applied inline to the group only."""
+        flags = ''.join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+        return f'(?{flags}:{pattern.pattern})' if flags else pattern.pattern
+
+    def scan(self, text: str) -> List[RawMatch]:
+        """
+        Find all PII matches in text.
+
+        Returns:
+            Matches grouped by PII type (pattern order), then by position
+        """
+        return self.resolve(self.scan_range(text))
+
+    def scan_range(self, text: str, start: int = 0, end: Optional[int] = None) -> List[RawMatch]:
+        """
+        Candidate matches starting in text[start:end].
+
+        Matches may extend past end. Candidates are unresolved: a type can
+        match at several positions inside one of its own matches; pass the
+        concatenated candidates of all ranges to resolve().
+
+        Args:
+            text: Full text
+            start: First start position to consider
+            end: Start positions must be below end (default: len(text))
+
+        Returns:
+            Candidate matches, possibly with repeats
+        """
+        end = len(text) if end is None else end
+        hits: List[RawMatch] = []
+        # [block_start, position) is the contiguous range tried last
+        block_start = position = start
+
+        for trigger in self.trigger.finditer(text, start):
+            span_start, span_end = trigger.span()
+            if span_start >= end and self._lead_start(text, span_start, span_end, True) >= end:
+                # Later runs cannot lead back into the range either
+                break
+            first = max(self._lead_start(text, span_start, span_end), start)
+            last = min(span_end, end)
+            if first > position:
+                block_start = position = first
+            elif first < block_start:
+                # A run lead reaching back; repeats are dropped by resolve()
+                self._match_positions(text, first, block_start, hits)
+                block_start = first
+            if last > position:
+                self._match_positions(text, position, last, hits)
+                position = last
+
+        return hits
+
+    def _match_positions(self, text: str, start: int, end: int, hits: List[RawMatch]):
+        """Append all pattern matches starting at positions start..end-1."""
+        match_at = self.combined.match
+        followers = self._followers
+        for candidate in range(start, end):
+            match = match_at(text, candidate)
+            if match is None:
+                continue
+            pii_type = match.lastgroup
+            hits.append((candidate, match.end(), pii_type, match.group()))
+            for other, pattern in followers[pii_type]:
+                other_match = pattern.match(text, candidate)
+                if other_match is not None:
+                    hits.append((candidate, other_match.end(), other, other_match.group()))
+
+    def _lead_start(self,
+                    text: str,
+                    span_start: int,
+                    span_end: int,
+                    all_leads: bool = False) -> int:
+        """
+        Earliest position a match containing this anchor run can start at.
+
+        Run leads are only followed when their anchor occurs in the run,
+        unless all_leads is set.
+        """
+        first = max(0, span_start - self._fixed_lead)
+        for anchor, lead in self._run_leads:
+            if not all_leads and anchor.search(text, span_start, span_end) is None:
+                continue
+            run_start = span_start
+            while run_start > 0 and lead.match(text, run_start - 1):
+                run_start -= 1
+            first = min(first, run_start)
+        return first
+
+    def resolve(self, hits: List[RawMatch]) -> List[RawMatch]:
+        """
+        Reduce candidates to what per-type finditer would return.
+
+        Args:
+            hits: Candidates from scan_range, in any order
+
+        Returns:
+            Matches grouped by PII type (pattern order), then by position
+        """
+        order = self._order
+        hits = sorted(hits, key=lambda hit: (hit[0], order[hit[2]]))
+        resume = dict.fromkeys(self.types, 0)
+        kept = []
+        for hit in hits:
+            if hit[0] >= resume[hit[2]]:
+                kept.append(hit)
+                resume[hit[2]] = hit[1]
+        kept.sort(key=lambda hit: (order[hit[2]], hit[0]))
+        return kept
+
+
+# Per-process scanner and the last shared document decoded by this worker
+_worker_scanner: Optional[MultiPatternScanner] = None
+_worker_document: Tuple[Optional[str], str] = (None, '')
+
+
+def init_scan_worker(patterns: Dict[str, Pattern], triggers: Dict[str, Trigger]) -> None:
+    """Build the per-process scanner (patterns are compiled once per worker)."""
+    global _worker_scanner
+    _worker_scanner = MultiPatternScanner(patterns, triggers)
+
+
+def scan_shared_range(name: str, size: int, start: int, end: int) -> List[RawMatch]:
+    """
+    Scan a start-position range of a document held in shared memory.
+
+    The buffer is decoded once per worker and document; further ranges of
+    the same document reuse the decoded text.
+    """
+    global _worker_document
+    if _worker_document[0] != name:
+        buffer = shared_memory.SharedMemory(name=name)
+        try:
+            text = bytes(buffer.buf[:size]).decode('utf-8', 'surrogatepass')
+        finally:
+            buffer.close()
+        _worker_document = (name, text)
+    return _worker_scanner.scan_range(_worker_document[1], start, end)
+
+
+class ProcessScanPool:
+    """
+    Persistent worker processes scanning shared-memory documents.
+
+    Workers are started lazily with the 'spawn' method and warmed with a
+    copy of the scanner's patterns.
+    """
+
+    def __init__(self, scanner: MultiPatternScanner, max_workers: int):
+        """
+        Initialize the pool.
+
+        Args:
+            scanner: Scanner whose patterns and triggers the workers use
+            max_workers: Number of worker processes
+        """
+        self.scanner = scanner
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp.get_context('spawn'),
+                initializer=init_scan_worker,
+                initargs=(self.scanner.patterns, self.scanner.triggers)
+            )
+        return self._executor
+
+    @contextmanager
+    def share(self, text: str) -> Iterator[Callable[[int, int], Future]]:
+        """
+        Place text in shared memory for the duration of the block.
+
+        Yields:
+            submit(start, end) returning a future of scan_range candidates
+        """
+        data = text.encode('utf-8', 'surrogatepass')
+        # Unique names: workers cache decoded text by buffer name
+        buffer = shared_memory.SharedMemory(
+            create=True, size=max(1, len(data)), name=f"pii_{uuid.uuid4().hex[:16]}"
+        )
+        try:
+            buffer.buf[:len(data)] = data
+            executor = self._get_executor()
+            yield lambda start, end: executor.submit(
+                scan_shared_range, buffer.name, len(data), start, end
+            )
+        finally:
+            buffer.close()
+            buffer.unlink()
+
+    def scan(self, text: str, ranges: List[Tuple[int, int]]) -> List[RawMatch]:
+        """
+        Scan text in worker processes.
+
+        Ranges whose worker task fails are rescanned in the calling process,
+        so a crashed worker never drops matches.
+
+        Args:
+            text: Full text
+            ranges: (start, end) start-position ranges, one task each
+
+        Returns:
+            Resolved matches, as MultiPatternScanner.scan
+        """
+        try:
+            with self.share(text) as submit:
+                futures = []
+                for start, end in ranges:
+                    try:
+                        futures.append(submit(start, end))
+                    except Exception as e:
+                        futures.append(e)
+
+                hits = []
+                for (start, end), future in zip(ranges, futures):
+                    try:
+                        if isinstance(future, Exception):
+                            raise future
+                        hits.extend(future.result())
+                    except Exception as e:
+                        logger.warning(f"Process scan of range {start}-{end} failed: {e}")
+                        if isinstance(e, BrokenExecutor):
+                            self.shutdown(wait=False)
+                        hits.extend(self.scanner.scan_range(text, start, end))
+        except OSError as e:
+            logger.warning(f"Shared memory unavailable, scanning locally: {e}")
+            return self.scanner.scan(text)
+
+        return self.scanner.resolve(hits)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+M002 Local Storage System - Storage Engine Concurrency Benchmark
+
+Runs a mixed read/write workload from a growing number of threads against
+the shared StorageEngine and against the previous setup, where every thread
+used its own connection and committed each write individually. Reports
+operations per second, write latency and the commits the engine needed.
+
+Usage:
+    python -m devdocai.storage.benchmarks.benchmark_engine [--documents N]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from devdocai.storage.engine import StorageEngine
+
+DEFAULT_THREADS = [1, 2, 4, 8, 16]
+
+
+def create_documents(engine: StorageEngine, count: int) -> List[int]:
+    """Insert count documents with two metadata entries each."""
+    def insert(conn):
+        ids = []
+        for i in range(count):
+            cursor = conn.execute(
+                "INSERT INTO documents (uuid, title, type, status, content, created_at, "
+                "updated_at, access_count) VALUES (?, ?, 'technical', 'active', ?, "
+                "datetime('now'), datetime('now'), 0)",
+                (f"bench-{i}", f"Document {i}", f"Content of document {i}\n" * 40)
+            )
+            ids.append(cursor.lastrowid)
+            conn.executemany(
+                "INSERT INTO metadata (document_id, key, value, value_type, is_searchable, "
+                "is_public, created_at) VALUES (?, ?, ?, 'string', 1, 1, datetime('now'))",
+                [(cursor.lastrowid, 'author', 'bench'), (cursor.lastrowid, 'section', str(i))]
+            )
+        return ids
+    return engine.execute(insert)
+
+
+def _run_threads(threads: int, seconds: float, worker) -> List[Dict[str, Any]]:
+    """Run worker(stop, results) in threads for the given duration."""
+    stop = threading.Event()
+    results = [{'reads': 0, 'writes': 0, 'write_ms': []} for _ in range(threads)]
+    workers = [threading.Thread(target=worker, args=(stop, result)) for result in results]
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def _summarize(results: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    write_ms = [sample for result in results for sample in result['write_ms']]
+    reads = sum(result['reads'] for result in results)
+    writes = sum(result['writes'] for result in results)
+    return {
+        'ops_per_second': (reads + writes) / seconds,
+        'reads_per_second': reads / seconds,
+        'writes_per_second': writes / seconds,
+        'write_p50_ms': statistics.median(write_ms) if write_ms else 0.0,
+        'write_p95_ms': statistics.quantiles(write_ms, n=20)[-1] if len(write_ms) > 1 else 0.0
+    }
+
+
+def bench_engine(engine: StorageEngine, ids: List[int], threads: int,
+                 seconds: float, write_ratio: float, use_cache: bool) -> Dict[str, Any]:
+    """Mixed workload through the engine: pooled readers, group-committed writes."""
+    commits_before = engine.stats['commits']
+
+    def worker(stop, result):
+        rng = random.Random()
+        while not stop.is_set():
+            document_id = rng.choice(ids)
+            if rng.random() < write_ratio:
+                start = time.perf_counter()
+                engine.execute(
+                    lambda conn: conn.execute(
+                        "UPDATE documents SET access_count = access_count + 1, "
+                        "updated_at = datetime('now') WHERE id = ?", (document_id,)
+                    ),
+                    invalidate=[document_id]
+                )
+                result['write_ms'].append((time.perf_counter() - start) * 1000)
+                result['writes'] += 1
+            else:
+                engine.fetch_document(document_id, use_cache=use_cache)
+                result['reads'] += 1
+
+    summary = _summarize(_run_threads(threads, seconds, worker), seconds)
+    commits = engine.stats['commits'] - commits_before
+    summary['commits'] = commits
+    summary['writes_per_commit'] = summary['writes_per_second'] * seconds / commits if commits else 0.0
+    return summary
+
+
+def bench_connections(db_path: str, ids: List[int], threads: int,
+                      seconds: float, write_ratio: float) -> Dict[str, Any]:
+    """The same workload with one connection per thread and a commit per write."""
+    def worker(stop, result):
+        rng = random.Random()
+        conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while not stop.is_set():
+                document_id = rng.choice(ids)
+                if rng.random() < write_ratio:
+                    start = time.perf_counter()
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "UPDATE documents SET access_count = access_count + 1, "
+                        "updated_at = datetime('now') WHERE id = ?", (document_id,)
+                    )
+                    conn.execute("COMMIT")
+                    result['write_ms'].append((time.perf_counter() - start) * 1000)
+                    result['writes'] += 1
+                else:
+                    conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+                    conn.execute("SELECT key, value, value_type FROM metadata "
+                                 "WHERE document_id = ?", (document_id,)).fetchall()
+                    result['reads'] += 1
+        finally:
+            conn.close()
+
+    return _summarize(_run_threads(threads, seconds, worker), seconds)
+
+
+def run_benchmark(thread_counts: Optional[List[int]] = None,
+                  documents: int = 2000,
+                  seconds: float = 2.0,
+                  write_ratio: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Run every configuration for each thread count.
+
+    Returns:
+        One row per thread count with 'connections', 'engine' and
+        'engine_cached' results
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / 'bench.db')
+        engine = StorageEngine(db_path, readers=max(thread_counts or DEFAULT_THREADS))
+        try:
+            ids = create_documents(engine, documents)
+            for threads in thread_counts or DEFAULT_THREADS:
+                rows.append({
+                    'threads': threads,
+                    'connections': bench_connections(db_path, ids, threads, seconds, write_ratio),
+                    'engine': bench_engine(engine, ids, threads, seconds, write_ratio, False),
+                    'engine_cached': bench_engine(engine, ids, threads, seconds, write_ratio, True)
+                })
+        finally:
+            engine.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--threads', type=int, nargs='*', default=DEFAULT_THREADS)
+    parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.threads, args.documents, args.seconds, args.write_ratio)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'threads':>7} {'setup':>14} {'ops/s':>10} {'writes/s':>10} "
+          f"{'write p50':>10} {'write p95':>10} {'writes/commit':>14}")
+    for row in rows:
+        for setup in ('connections', 'engine', 'engine_cached'):
+            result = row[setup]
+            per_commit = result.get('writes_per_commit')
+            print(f"{row['threads']:>7} {setup:>14} {result['ops_per_second']:>10.0f} "
+                  f"{result['writes_per_second']:>10.0f} {result['write_p50_ms']:>10.2f} "
+                  f"{result['write_p95_ms']:>10.2f} "
+                  f"{per_commit if per_commit is not None else 1:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,40 @@ Encryption module for M002 Local Storage System.
 
 Provides SQLCipher integration for transparent database encryption
 and secure key management using Argon2id.
+
+Content is encrypted with envelope encryption: every encrypt_content call
+uses a fresh data key, which is wrapped by a content key from the key
+file. The content is split into fixed-size chunks, each authenticated on
+its own, so ContentEnvelope can decrypt any range or stream the content
+chunk by chunk. Rotating the content key only rewraps data keys
+(rewrap_content); the content itself is not re-encrypted.
+
+Envelope layout (big-endian):
+
+    magic 'DDAE' | version (1) | chunk size (4) | plaintext length (8) |
+    nonce prefix (8) | content key id (8) | wrap nonce (12) |
+    wrapped data key (32) | wrap tag (16) | chunks
+
+Chunk i is AES-256-GCM with nonce = nonce prefix + i (4 bytes) and the
+first 25 header bytes plus i as associated data; its 16-byte tag follows
+the chunk ciphertext.
 """
 
 import os
 import secrets
 import logging
 import json
+import hashlib
+import struct
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Iterator
 from datetime import datetime, timedelta
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
 from argon2 import PasswordHasher, Parameters, Type
@@ -25,6 +46,119 @@ from typing import List
 
 logger = logging.getLogger(__name__)
 
+ENVELOPE_MAGIC = b'DDAE'
+ENVELOPE_VERSION = 1
+# magic, version, chunk size, plaintext length, nonce prefix
+_CONTENT_HEADER = struct.Struct('>4sBIQ8s')
+# content header, content key id, wrap nonce, wrapped data key + tag
+_ENVELOPE_HEADER = struct.Struct('>25s8s12s48s')
+ENVELOPE_HEADER_SIZE = _ENVELOPE_HEADER.size
+
+
+def content_key_id(key: bytes) -> bytes:
+    """Identifier of a content key stored in envelopes."""
+    return hashlib.sha256(key).digest()[:8]
+
+
+class ContentEnvelope:
+    """
+    Random-access reader for envelope-encrypted content.
+    
+    Works on anything that supports len() and slicing, e.g. bytes,
+    memoryview or a sqlite3.Blob, and only reads the chunks it decrypts.
+    """
+    
+    TAG_SIZE = 16
+    
+    def __init__(self, data: Any, content_keys: Dict[bytes, bytes]):
+        """
+        Parse the header and unwrap the data key.
+        
+        Args:
+            data: Envelope bytes or a sliceable view of them
+            content_keys: Content keys by key id
+            
+        Raises:
+            ValueError: If the data is not an envelope, its content key is
+                unknown or the header fails authentication
+        """
+        if len(data) < ENVELOPE_HEADER_SIZE:
+            raise ValueError("Not an encrypted content envelope")
+        header, key_id, wrap_nonce, wrapped_key = _ENVELOPE_HEADER.unpack(
+            bytes(data[:ENVELOPE_HEADER_SIZE])
+        )
+        magic, version, chunk_size, length, nonce_prefix = _CONTENT_HEADER.unpack(header)
+        if magic != ENVELOPE_MAGIC or version != ENVELOPE_VERSION or not chunk_size:
+            raise ValueError("Not an encrypted content envelope")
+        
+        content_key = content_keys.get(key_id)
+        if content_key is None:
+            raise ValueError(f"Unknown content key {key_id.hex()}")
+        try:
+            data_key = AESGCM(content_key).decrypt(wrap_nonce, wrapped_key, header + key_id)
+        except InvalidTag:
+            raise ValueError("Envelope header failed authentication")
+        
+        self.data = data
+        self.header = header
+        self.key_id = key_id
+        self.chunk_size = chunk_size
+        self.length = length
+        self.chunk_count = -(-length // chunk_size)
+        self._nonce_prefix = nonce_prefix
+        self._aead = AESGCM(data_key)
+        
+        expected = ENVELOPE_HEADER_SIZE + length + self.chunk_count * self.TAG_SIZE
+        if len(data) != expected:
+            raise ValueError(f"Envelope is {len(data)} bytes, expected {expected}")
+    
+    def read_chunk(self, index: int) -> bytes:
+        """Decrypt one chunk."""
+        if not 0 <= index < self.chunk_count:
+            raise IndexError(f"Chunk {index} out of range")
+        stored = self.chunk_size + self.TAG_SIZE
+        start = ENVELOPE_HEADER_SIZE + index * stored
+        end = min(start + stored, len(self.data))
+        counter = struct.pack('>I', index)
+        try:
+            return self._aead.decrypt(self._nonce_prefix + counter, bytes(self.data[start:end]),
+                                      self.header + counter)
+        except InvalidTag:
+            raise ValueError(f"Chunk {index} failed authentication")
+    
+    def read(self, offset: int = 0, size: Optional[int] = None) -> bytes:
+        """
+        Decrypt a plaintext byte range, touching only the chunks it spans.
+        
+        Args:
+            offset: First plaintext byte
+            size: Number of bytes (default: to the end)
+        """
+        end = self.length if size is None else min(self.length, offset + size)
+        if offset >= end:
+            return b''
+        first, last = offset // self.chunk_size, (end - 1) // self.chunk_size
+        plaintext = b''.join(self.read_chunk(index) for index in range(first, last + 1))
+        start = offset - first * self.chunk_size
+        return plaintext[start:start + end - offset]
+    
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Decrypt the content chunk by chunk."""
+        for index in range(self.chunk_count):
+            yield self.read_chunk(index)
+    
+    def iter_text(self) -> Iterator[str]:
+        """Decrypt the content as text; chunks never split a character."""
+        import codecs
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for chunk in self.iter_chunks():
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
 
 class EncryptionManager:
     """
@@ -46,6 +180,9 @@ class EncryptionManager:
     AES_NONCE_SIZE = 12  # 96 bits for GCM
     AES_TAG_SIZE = 16  # 128 bits
     
+    # Plaintext bytes per independently authenticated content chunk
+    CONTENT_CHUNK_SIZE = 64 * 1024
+    
     def __init__(self, key_file: Optional[str] = None):
         """
         Initialize encryption manager.
@@ -66,6 +203,9 @@ class EncryptionManager:
         )
         
         self._master_key: Optional[bytes] = None
+        # Content keys wrapping per-envelope data keys, by key id
+        self._content_keys: Dict[bytes, bytes] = {}
+        self._active_content_key: Optional[bytes] = None
         self._key_cache: Dict[str, Tuple[bytes, datetime]] = {}
         self._cache_ttl = timedelta(minutes=30)
     
@@ -112,6 +252,7 @@ class EncryptionManager:
             
             # Generate additional key material for SQLCipher
             sqlcipher_key = secrets.token_hex(32)  # 64 hex characters
+            content_key = secrets.token_bytes(self.AES_KEY_SIZE)
             
             # Create key data structure
             key_data = {
@@ -122,6 +263,7 @@ class EncryptionManager:
                 'created_at': datetime.utcnow().isoformat(),
                 'checksum': self._calculate_checksum(key)
             }
+            self._set_content_keys(key_data, [content_key], content_key)
             
             # Encrypt key data
             encrypted_data = self._encrypt_key_data(key_data, key)
@@ -132,6 +274,7 @@ class EncryptionManager:
                 os.chmod(self.key_file, 0o600)  # Read/write for owner only
             
             self._master_key = key
+            self._load_content_keys(key_data, key)
             logger.info("Master key generated and stored securely")
             return True
             
@@ -171,6 +314,7 @@ class EncryptionManager:
                 # Verify checksum
                 if self._calculate_checksum(key) == key_data.get('checksum'):
                     self._master_key = key
+                    self._load_content_keys(key_data, key)
                     logger.info("Master key loaded successfully")
                     return True
                 else:
@@ -209,70 +353,196 @@ class EncryptionManager:
             logger.error(f"Failed to get SQLCipher key: {e}")
             return None
     
-    def encrypt_content(self, content: str, key: Optional[bytes] = None) -> bytes:
+    def encrypt_content(self, content: str, key: Optional[bytes] = None,
+                        chunk_size: Optional[int] = None) -> bytes:
         """
-        Encrypt content using AES-256-GCM.
+        Encrypt content into a chunked AES-256-GCM envelope.
+        
+        A fresh data key encrypts the content and is wrapped by the active
+        content key, so rotating content keys never re-encrypts content.
         
         Args:
-            content: Plain text content
-            key: Encryption key (uses master key if not provided)
+            content: Plain text content (or bytes)
+            key: Key wrapping the data key (uses active content key if not provided)
+            chunk_size: Plaintext bytes per chunk (default CONTENT_CHUNK_SIZE)
             
         Returns:
-            Encrypted bytes
+            Encrypted envelope bytes
         """
-        key = key or self._master_key
-        if not key:
+        kek = key or self._active_content_key
+        if not kek:
             raise ValueError("No encryption key available")
         
-        # Generate nonce
-        nonce = secrets.token_bytes(self.AES_NONCE_SIZE)
-        
-        # Create cipher
-        cipher = Cipher(
-            algorithms.AES(key),
-            modes.GCM(nonce),
-            backend=default_backend()
+        plaintext = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+        chunk_size = chunk_size or self.CONTENT_CHUNK_SIZE
+        nonce_prefix = secrets.token_bytes(8)
+        header = _CONTENT_HEADER.pack(
+            ENVELOPE_MAGIC, ENVELOPE_VERSION, chunk_size, len(plaintext), nonce_prefix
         )
-        encryptor = cipher.encryptor()
-        
-        # Encrypt content
-        plaintext = content.encode('utf-8')
-        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
         
-        # Return nonce + ciphertext + tag
-        return nonce + ciphertext + encryptor.tag
+        data_key = AESGCM.generate_key(bit_length=256)
+        parts = [self._wrap_data_key(header, data_key, kek)]
+        
+        aead = AESGCM(data_key)
+        view = memoryview(plaintext)
+        for index, start in enumerate(range(0, len(plaintext), chunk_size)):
+            counter = struct.pack('>I', index)
+            parts.append(aead.encrypt(nonce_prefix + counter,
+                                      bytes(view[start:start + chunk_size]),
+                                      header + counter))
+        return b''.join(parts)
     
     def decrypt_content(self, encrypted_data: bytes, key: Optional[bytes] = None) -> str:
         """
         Decrypt content using AES-256-GCM.
         
+        Accepts envelopes as well as single-shot blobs written before
+        envelope encryption.
+        
         Args:
             encrypted_data: Encrypted bytes
-            key: Decryption key (uses master key if not provided)
+            key: Decryption key (uses the key file's keys if not provided)
             
         Returns:
             Decrypted content
         """
-        key = key or self._master_key
-        if not key:
+        if bytes(encrypted_data[:4]) == ENVELOPE_MAGIC:
+            return b''.join(self.open_envelope(encrypted_data, key).iter_chunks()).decode('utf-8')
+        
+        # Legacy blob: encrypted directly with the master key of its time
+        keys = [key] if key else [self._master_key] + list(self._content_keys.values())
+        keys = [candidate for candidate in keys if candidate]
+        if not keys:
             raise ValueError("No decryption key available")
         
-        # Extract components
+        for candidate in keys[:-1]:
+            try:
+                return self._decrypt_single(encrypted_data, candidate).decode('utf-8')
+            except InvalidTag:
+                continue
+        return self._decrypt_single(encrypted_data, keys[-1]).decode('utf-8')
+    
+    def open_envelope(self, encrypted_data: Any, key: Optional[bytes] = None) -> ContentEnvelope:
+        """
+        Open an envelope for random-access or streaming decryption.
+        
+        Args:
+            encrypted_data: Envelope bytes, memoryview or sqlite3.Blob
+            key: Key wrapping the data key (uses the key file's content keys
+                if not provided)
+            
+        Returns:
+            ContentEnvelope reading chunks on demand
+        """
+        content_keys = {content_key_id(key): key} if key else self._content_keys
+        if not content_keys:
+            raise ValueError("No decryption key available")
+        return ContentEnvelope(encrypted_data, content_keys)
+    
+    def rewrap_content(self, encrypted_data: bytes, key: Optional[bytes] = None) -> bytes:
+        """
+        Rewrap an envelope's data key with the active content key.
+        
+        Only the fixed-size header changes; the encrypted chunks are copied
+        as they are.
+        
+        Args:
+            encrypted_data: Envelope bytes
+            key: Key currently wrapping the data key (looked up by id if not provided)
+            
+        Returns:
+            Envelope bytes wrapped by the active content key
+        """
+        if not self._active_content_key:
+            raise ValueError("No encryption key available")
+        
+        header, key_id, wrap_nonce, wrapped_key = _ENVELOPE_HEADER.unpack(
+            bytes(encrypted_data[:ENVELOPE_HEADER_SIZE])
+        )
+        if header[:4] != ENVELOPE_MAGIC:
+            raise ValueError("Not an encrypted content envelope")
+        if key_id == content_key_id(self._active_content_key):
+            return encrypted_data
+        
+        old_key = key or self._content_keys.get(key_id)
+        if old_key is None:
+            raise ValueError(f"Unknown content key {key_id.hex()}")
+        try:
+            data_key = AESGCM(old_key).decrypt(wrap_nonce, wrapped_key, header + key_id)
+        except InvalidTag:
+            raise ValueError("Envelope header failed authentication")
+        
+        return (self._wrap_data_key(header, data_key, self._active_content_key)
+                + encrypted_data[ENVELOPE_HEADER_SIZE:])
+    
+    def rewrap_field(self, encrypted_value: str) -> str:
+        """Rewrap an encrypted field value with the active content key."""
+        encrypted = base64.b64decode(encrypted_value)
+        if encrypted[:4] != ENVELOPE_MAGIC:
+            # Legacy single-shot field: re-encrypt it as an envelope
+            return self.encrypt_field(self.decrypt_field(encrypted_value))
+        return base64.b64encode(self.rewrap_content(encrypted)).decode('utf-8')
+    
+    def _wrap_data_key(self, header: bytes, data_key: bytes, kek: bytes) -> bytes:
+        """Build the envelope header wrapping data_key with kek."""
+        key_id = content_key_id(kek)
+        wrap_nonce = secrets.token_bytes(self.AES_NONCE_SIZE)
+        wrapped_key = AESGCM(kek).encrypt(wrap_nonce, data_key, header + key_id)
+        return _ENVELOPE_HEADER.pack(header, key_id, wrap_nonce, wrapped_key)
+    
+    def _encrypt_single(self, plaintext: bytes, key: bytes) -> bytes:
+        """Single-shot AES-256-GCM: nonce + ciphertext + tag."""
+        nonce = secrets.token_bytes(self.AES_NONCE_SIZE)
+        
+        cipher = Cipher(
+            algorithms.AES(key),
+            modes.GCM(nonce),
+            backend=default_backend()
+        )
+        encryptor = cipher.encryptor()
+        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        
+        return nonce + ciphertext + encryptor.tag
+    
+    def _decrypt_single(self, encrypted_data: bytes, key: bytes) -> bytes:
+        """Reverse _encrypt_single."""
         nonce = encrypted_data[:self.AES_NONCE_SIZE]
         tag = encrypted_data[-self.AES_TAG_SIZE:]
         ciphertext = encrypted_data[self.AES_NONCE_SIZE:-self.AES_TAG_SIZE]
         
-        # Create cipher
         cipher = Cipher(
             algorithms.AES(key),
             modes.GCM(nonce, tag),
             backend=default_backend()
         )
         decryptor = cipher.decryptor()
+        return decryptor.update(ciphertext) + decryptor.finalize()
+    
+    def _set_content_keys(self, key_data: Dict[str, Any], keys: List[bytes],
+                          active: bytes) -> None:
+        """Store content keys in a key data structure."""
+        key_data['content_keys'] = {
+            content_key_id(key).hex(): base64.b64encode(key).decode() for key in keys
+        }
+        key_data['active_content_key'] = content_key_id(active).hex()
+    
+    def _load_content_keys(self, key_data: Dict[str, Any], master_key: bytes) -> None:
+        """
+        Load content keys from a key data structure.
         
-        # Decrypt content
-        plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        return plaintext.decode('utf-8')
+        Key files written before envelope encryption have none; the master
+        key then acts as content key, so existing blobs stay readable.
+        """
+        stored = key_data.get('content_keys')
+        if not stored:
+            self._content_keys = {content_key_id(master_key): master_key}
+            self._active_content_key = master_key
+            return
+        
+        self._content_keys = {
+            bytes.fromhex(key_id): base64.b64decode(key) for key_id, key in stored.items()
+        }
+        self._active_content_key = self._content_keys[bytes.fromhex(key_data['active_content_key'])]
     
     def encrypt_field(self, value: Any) -> str:
         """
@@ -318,13 +588,20 @@ class EncryptionManager:
         # Parse JSON
         return json.loads(json_str)
     
-    def rotate_keys(self, old_password: str, new_password: str) -> bool:
+    def rotate_keys(self, old_password: str, new_password: str,
+                    rotate_content_key: bool = False) -> bool:
         """
         Rotate encryption keys with new password.
         
+        Content keys are carried over, so changing the password does not
+        touch encrypted content. With rotate_content_key a new content key
+        becomes active; older ones stay in the key file to unwrap existing
+        envelopes until they are rewrapped with rewrap_content.
+        
         Args:
             old_password: Current password
             new_password: New password
+            rotate_content_key: Also generate a new active content key
             
         Returns:
             Success status
@@ -355,6 +632,13 @@ class EncryptionManager:
                 'checksum': self._calculate_checksum(new_key)
             }
             
+            content_keys = list(self._content_keys.values())
+            active = self._active_content_key
+            if rotate_content_key:
+                active = secrets.token_bytes(self.AES_KEY_SIZE)
+                content_keys.append(active)
+            self._set_content_keys(key_data, content_keys, active)
+            
             # Backup old key file
             backup_path = self.key_file.with_suffix('.backup')
             if self.key_file.exists():
@@ -369,6 +653,7 @@ class EncryptionManager:
                 os.chmod(self.key_file, 0o600)
             
             self._master_key = new_key
+            self._load_content_keys(key_data, new_key)
             logger.info("Keys rotated successfully")
             return True
             
@@ -391,7 +676,7 @@ class EncryptionManager:
             salt = secrets.token_bytes(self.ARGON2_SALT_LEN)
         
         # Encrypt JSON data
-        encrypted = self.encrypt_content(json_data, key)
+        encrypted = self._encrypt_single(json_data.encode('utf-8'), key)
         
         # Return version + salt + encrypted data
         return version + salt + encrypted
@@ -403,7 +688,7 @@ class EncryptionManager:
             encrypted_content = encrypted_data[17:]  # 1 byte version + 16 bytes salt
             
             # Decrypt
-            json_data = self.decrypt_content(encrypted_content, key)
+            json_data = self._decrypt_single(encrypted_content, key).decode('utf-8')
             
             # Parse JSON
             return json.loads(json_data)
@@ -442,6 +727,8 @@ class EncryptionManager:
             
             self.key_file.unlink()
             self._master_key = None
+            self._content_keys = {}
+            self._active_content_key = None
             logger.info("Key file securely deleted")
             return True
             
@@ -0,0 +1,711 @@
+"""
+Unified storage engine for M002.
+
+LocalStorageSystem, FastStorageLayer and OptimizedStorage share one engine
+per database file (see get_storage_engine) instead of running their own
+pools, caches and schemas:
+
+- A single writer connection. Writes submitted to the engine are queued
+  and group-committed: the writer thread runs every queued operation in
+  its own savepoint of one transaction, so concurrent writers share a
+  commit. SQLAlchemy sessions use the same connection through a
+  one-connection pool.
+- Query-only WAL connections for concurrent readers: a SQLAlchemy pool
+  for ORM reads and a lighter pool of raw connections for the fast path.
+- A shared cache of decoded documents, invalidated when writes commit.
+  Commits by other connections or processes are detected with
+  PRAGMA data_version before the cache is used, and clear it.
+- A prepared-statement fast path for document reads; sqlite3 caches the
+  compiled statements per reader connection.
+"""
+
+import codecs
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from .models import Base
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = """
+    id, uuid, title, type, status, format, language, content_hash,
+    file_path, source_path, created_at, updated_at, last_accessed,
+    access_count, size_bytes, quality_score, completeness_score,
+    (SELECT COUNT(*) FROM document_versions v WHERE v.document_id = documents.id) AS version_count
+"""
+DOCUMENT_COLUMNS = SUMMARY_COLUMNS + ", content"
+
+STATEMENTS = {
+    'document_by_id': f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = ?",
+    'document_by_uuid': f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE uuid = ?",
+    'summary_by_id': f"SELECT {SUMMARY_COLUMNS} FROM documents WHERE id = ?",
+    'summary_by_uuid': f"SELECT {SUMMARY_COLUMNS} FROM documents WHERE uuid = ?",
+    'documents_by_ids': f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id IN ({{}})",
+    'content_size': "SELECT length(CAST(content AS BLOB)) FROM documents WHERE id = ?",
+    'content_range': "SELECT substr(CAST(content AS BLOB), ?, ?) FROM documents WHERE id = ?",
+    'metadata': "SELECT document_id, key, value, value_type FROM metadata WHERE document_id IN ({})",
+}
+
+
+class LRUCache:
+    """Thread-safe LRU cache implementation for document storage."""
+
+    def __init__(self, max_size: int = 10000):
+        self.cache = OrderedDict()
+        self.max_size = max_size
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get item from cache with LRU update."""
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                # Move to end (most recently used)
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Any, value: Any):
+        """Add item to cache with LRU eviction."""
+        with self.lock:
+            if key in self.cache:
+                del self.cache[key]
+            self.cache[key] = value
+            if len(self.cache) > self.max_size:
+                # Remove least recently used
+                self.cache.popitem(last=False)
+
+    def invalidate(self, key: Any):
+        """Remove item from cache."""
+        self.pop(key)
+
+    def pop(self, key: Any) -> Optional[Any]:
+        """Remove and return an item, or None if it is not cached."""
+        with self.lock:
+            return self.cache.pop(key, None)
+
+    def clear(self):
+        """Clear entire cache."""
+        with self.lock:
+            self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self.cache),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total > 0 else 0
+            }
+
+
+def typed_metadata_value(value: str, value_type: str) -> Any:
+    """Convert a stored metadata value like Metadata.get_typed_value."""
+    if value_type == 'number':
+        return float(value)
+    if value_type == 'boolean':
+        return value.lower() == 'true'
+    if value_type == 'json':
+        return json.loads(value)
+    return value
+
+
+class _WriteJob:
+    """A queued write operation."""
+
+    __slots__ = ('operation', 'invalidate', 'future')
+
+    def __init__(self, operation: Callable[[sqlite3.Connection], Any], invalidate: Iterable[int]):
+        self.operation = operation
+        self.invalidate = list(invalidate)
+        self.future: Future = Future()
+
+
+class StorageEngine:
+    """
+    Shared connections, write queue and document cache for one database.
+
+    Use get_storage_engine() to obtain the engine for a path; instances are
+    reference counted and closed by the last release().
+    """
+
+    def __init__(self, db_path: str,
+                 readers: int = 8,
+                 max_overflow: int = 0,
+                 pool_timeout: float = 30.0,
+                 pool_recycle: int = 3600,
+                 enable_wal: bool = True,
+                 cache_size: int = 10000,
+                 page_size: int = 4096,
+                 document_cache_size: int = 10000,
+                 cache_max_document_bytes: int = 1024 * 1024,
+                 group_commit_size: int = 256):
+        """
+        Open the engine.
+
+        Args:
+            db_path: Path to SQLite database
+            readers: Read-only connections kept in the pool
+            max_overflow: Extra read connections allowed under load
+            pool_timeout: Seconds to wait for a pooled connection
+            pool_recycle: Seconds after which connections are replaced
+            enable_wal: Use write-ahead logging (required for concurrent readers)
+            cache_size: SQLite page cache size per connection
+            page_size: SQLite page size for new databases
+            document_cache_size: Decoded documents kept in the shared cache
+            cache_max_document_bytes: Larger documents are never cached
+            group_commit_size: Maximum write operations per commit
+        """
+        self.db_path = db_path
+        self.pool_timeout = pool_timeout
+        self.enable_wal = enable_wal
+        self.cache_size = cache_size
+        self.page_size = page_size
+        self.group_commit_size = group_commit_size
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        db_url = f"sqlite:///{db_path}"
+        self.write_engine = create_engine(
+            db_url,
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            connect_args={'check_same_thread': False, 'timeout': 30.0}
+        )
+        self.read_engine = create_engine(
+            db_url,
+            poolclass=QueuePool,
+            pool_size=readers,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            connect_args={'check_same_thread': False, 'timeout': 30.0, 'cached_statements': 256}
+        )
+        event.listen(self.write_engine, 'connect', self._configure_writer)
+        event.listen(self.read_engine, 'connect', self._configure_reader)
+
+        # The writer creates the schema (and switches the file to WAL) first
+        Base.metadata.create_all(self.write_engine)
+
+        # Fast-path readers: idle connections and a bound on those in use
+        self._readers: List[sqlite3.Connection] = []
+        self._reader_slots = threading.BoundedSemaphore(readers + max_overflow)
+
+        self.document_cache = LRUCache(max_size=document_cache_size)
+        self.cache_max_document_bytes = cache_max_document_bytes
+        # Bumped on every invalidation; fills that raced with a write are not cached
+        self._invalidations = 0
+        self._cache_lock = threading.Lock()
+        # Reader connection polled for commits made outside this engine
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._references = 0
+        self._registry_key: Optional[str] = None
+        self.closed = False
+
+        self.stats = {
+            'reads': 0,
+            'write_operations': 0,
+            'commits': 0,
+            'failed_operations': 0,
+            'commit_seconds': 0.0
+        }
+
+    # ==================== CONNECTIONS ====================
+
+    def _pragmas(self, cursor):
+        cursor.execute(f"PRAGMA cache_size={self.cache_size}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256MB memory map
+        cursor.execute("PRAGMA foreign_keys=ON")
+
+    def _configure_writer(self, dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA page_size={self.page_size}")
+        if self.enable_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        self._pragmas(cursor)
+        cursor.close()
+
+    def _configure_reader(self, dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        self._pragmas(cursor)
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0,
+                               cached_statements=256)
+        self._configure_reader(conn, None)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only sqlite3 connection.
+
+        These connections skip the SQLAlchemy pool, whose checkout costs
+        about as much as a cached primary key lookup.
+        """
+        if not self._reader_slots.acquire(timeout=self.pool_timeout):
+            raise TimeoutError(f"No read connection available after {self.pool_timeout}s")
+        try:
+            try:
+                conn = self._readers.pop()
+            except IndexError:
+                conn = self._connect_reader()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._readers.append(conn)
+        finally:
+            self._reader_slots.release()
+
+    # ==================== WRITES ====================
+
+    def submit(self, operation: Callable[[sqlite3.Connection], Any],
+               invalidate: Iterable[int] = ()) -> Future:
+        """
+        Queue a write operation for the next group commit.
+
+        The operation runs on the writer connection inside a transaction
+        shared with other queued operations and must not commit itself. If
+        it raises, only its own changes are rolled back.
+
+        Args:
+            operation: Called with the writer sqlite3 connection
+            invalidate: Document ids whose cached entries the write changes
+
+        Returns:
+            Future resolved with the operation's result once committed
+        """
+        if self.closed:
+            raise RuntimeError("Storage engine is closed")
+        job = _WriteJob(operation, invalidate)
+        self._ensure_writer()
+        self._queue.put(job)
+        return job.future
+
+    def execute(self, operation: Callable[[sqlite3.Connection], Any],
+                invalidate: Iterable[int] = ()) -> Any:
+        """
+        Run a write operation and wait for its commit.
+
+        Must not be called while the calling thread holds a session on
+        write_engine, which owns the only writer connection.
+        """
+        if threading.current_thread() is self._writer_thread:
+            raise RuntimeError("execute() cannot be called from a write operation")
+        return self.submit(operation, invalidate).result()
+
+    def _ensure_writer(self):
+        if self._writer_thread is None:
+            with self._writer_lock:
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(
+                        target=self._write_loop, name="storage-writer", daemon=True
+                    )
+                    self._writer_thread.start()
+
+    def _write_loop(self):
+        """Writer thread: commit queued operations in groups."""
+        running = True
+        while running:
+            job = self._queue.get()
+            if job is None:
+                break
+            jobs = [job]
+            # Everything queued while the previous group committed joins this one
+            while len(jobs) < self.group_commit_size:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                jobs.append(job)
+            self._commit_group(jobs)
+
+    def _commit_group(self, jobs: List[_WriteJob]):
+        """Run jobs in one transaction, each in its own savepoint."""
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+
+        start = time.perf_counter()
+        outcomes = []
+        connection = None
+        try:
+            connection = self.write_engine.raw_connection()
+            conn = connection.driver_connection
+            conn.execute("BEGIN IMMEDIATE")
+            # Holding the write lock: anything committed since the last check is external
+            writer_version = self.begin_write(conn)
+            if len(jobs) == 1:
+                # No savepoint needed: a failure rolls back the transaction
+                try:
+                    outcomes.append((True, jobs[0].operation(conn)))
+                except Exception as e:
+                    conn.rollback()
+                    outcomes.append((False, e))
+            else:
+                for job in jobs:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        result = job.operation(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_job")
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((False, e))
+                    else:
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((True, result))
+            if conn.in_transaction:
+                conn.commit()
+            self.adopt_data_version(conn, writer_version)
+        except Exception as e:
+            logger.error(f"Group commit of {len(jobs)} operations failed: {e}")
+            if connection is not None:
+                try:
+                    connection.driver_connection.rollback()
+                except sqlite3.Error:
+                    pass
+            outcomes = [(False, e)] * len(jobs)
+        finally:
+            if connection is not None:
+                connection.close()
+
+        self.invalidate(
+            document_id
+            for job, (succeeded, _) in zip(jobs, outcomes) if succeeded
+            for document_id in job.invalidate
+        )
+
+        self.stats['commits'] += 1
+        self.stats['commit_seconds'] += time.perf_counter() - start
+        for job, (succeeded, value) in zip(jobs, outcomes):
+            if succeeded:
+                self.stats['write_operations'] += 1
+                job.future.set_result(value)
+            else:
+                self.stats['failed_operations'] += 1
+                job.future.set_exception(value)
+
+    # ==================== DOCUMENT CACHE ====================
+
+    @staticmethod
+    def _pragma_data_version(conn: sqlite3.Connection) -> int:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _monitor_version(self) -> int:
+        """data_version of the monitor connection; call with _cache_lock held."""
+        if self._monitor is None:
+            self._monitor = self._connect_reader()
+        return self._pragma_data_version(self._monitor)
+
+    def validate_cache(self):
+        """
+        Clear the document cache if another connection has committed.
+
+        data_version on the monitor connection changes with every commit
+        not made on it, including the writer's. Writes on the writer
+        connection (group commits and sessions) adopt the versions their
+        commits produce, see begin_write(), so only commits from other
+        connections or processes clear the cache.
+        """
+        with self._cache_lock:
+            version = self._monitor_version()
+            if version != self._data_version:
+                self._invalidations += 1
+                self.document_cache.clear()
+                self._data_version = version
+
+    def begin_write(self, conn: sqlite3.Connection) -> int:
+        """
+        Prepare the cache for a transaction on the writer connection.
+
+        Args:
+            conn: The writer connection
+
+        Returns:
+            The writer's data_version, to pass to adopt_data_version()
+            once the transaction has committed
+        """
+        self.validate_cache()
+        return self._pragma_data_version(conn)
+
+    def adopt_data_version(self, conn: sqlite3.Connection, writer_version: int):
+        """Accept the monitor's data_version after a commit on the writer."""
+        with self._cache_lock:
+            version = self._monitor_version()
+            # The writer's own data_version only moves for other connections'
+            # commits; if it has not, the monitor's change is ours alone
+            if self._pragma_data_version(conn) == writer_version:
+                self._data_version = version
+
+    def invalidate(self, document_ids: Iterable[int]):
+        """Drop cached documents changed by a committed write."""
+        with self._cache_lock:
+            self._invalidations += 1
+            for document_id in document_ids:
+                cached = self.document_cache.pop(document_id)
+                if cached is not None:
+                    self.document_cache.pop(('uuid', cached['uuid']))
+
+    def _cache_documents(self, documents: List[Dict[str, Any]], invalidations: int):
+        """Cache documents read since the given invalidation count."""
+        with self._cache_lock:
+            if invalidations != self._invalidations:
+                return
+            for doc in documents:
+                if (doc['size_bytes'] or 0) > self.cache_max_document_bytes:
+                    continue
+                self.document_cache.put(doc['id'], doc)
+                self.document_cache.put(('uuid', doc['uuid']), doc['id'])
+
+    @staticmethod
+    def _copy(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached document so callers cannot modify the cache."""
+        return {**doc, 'metadata': dict(doc['metadata'])}
+
+    # ==================== FAST PATH ====================
+
+    def fetch_document(self, document_id: Optional[int] = None,
+                       uuid: Optional[str] = None,
+                       use_cache: bool = True,
+                       include_content: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Read a document row with its typed metadata.
+
+        Served from the shared cache when possible, otherwise with a
+        prepared statement on a reader connection. Deleted documents are
+        returned too; callers filter on 'status'.
+
+        Args:
+            document_id: Document database ID
+            uuid: Document UUID
+            use_cache: Read through the shared cache
+            include_content: Read the content column; without it the row is
+                read from the cache or the summary columns only
+
+        Returns:
+            Column dict with 'metadata' and 'version_count', or None
+        """
+        self.stats['reads'] += 1
+        if use_cache:
+            self.validate_cache()
+            key = document_id if document_id is not None else self.document_cache.get(('uuid', uuid))
+            cached = self.document_cache.get(key) if key is not None else None
+            if cached is not None:
+                doc = self._copy(cached)
+                if not include_content:
+                    del doc['content']
+                return doc
+
+        invalidations = self._invalidations
+        prefix = 'document' if include_content else 'summary'
+        with self.reader() as conn:
+            if document_id is not None:
+                cursor = conn.execute(STATEMENTS[f'{prefix}_by_id'], (document_id,))
+            else:
+                cursor = conn.execute(STATEMENTS[f'{prefix}_by_uuid'], (uuid,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            doc = self._decode(conn, cursor, [row])[0]
+
+        if not include_content:
+            return doc
+        self._cache_documents([doc], invalidations)
+        return self._copy(doc)
+
+    def fetch_documents(self, document_ids: List[int],
+                        use_cache: bool = True) -> Dict[int, Dict[str, Any]]:
+        """
+        Read several documents, fetching cache misses in one query.
+
+        Returns:
+            Dictionary mapping ID to document (missing IDs are absent)
+        """
+        self.stats['reads'] += 1
+        if use_cache:
+            self.validate_cache()
+        results = {}
+        missing = []
+        for document_id in dict.fromkeys(document_ids):
+            cached = self.document_cache.get(document_id) if use_cache else None
+            if cached is not None:
+                results[document_id] = self._copy(cached)
+            else:
+                missing.append(document_id)
+
+        if missing:
+            invalidations = self._invalidations
+            with self.reader() as conn:
+                cursor = conn.execute(
+                    STATEMENTS['documents_by_ids'].format(','.join('?' * len(missing))), missing
+                )
+                docs = self._decode(conn, cursor, cursor.fetchall())
+            self._cache_documents(docs, invalidations)
+            results.update((doc['id'], self._copy(doc)) for doc in docs)
+
+        return results
+
+    def iter_content(self, document_id: int, chunk_size: int = 64 * 1024) -> Iterator[str]:
+        """
+        Stream a document's content in chunks.
+
+        Uses SQLite incremental blob I/O where the sqlite3 module supports
+        it (Python 3.11+) and substr() ranges otherwise, so at most one
+        chunk of the content is held in memory. A reader connection is held
+        until the iterator is exhausted or closed.
+
+        Args:
+            document_id: Document database ID
+            chunk_size: Bytes read per chunk
+
+        Yields:
+            Text chunks; chunks never split a UTF-8 character
+
+        Raises:
+            ValueError: If the document does not exist
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        with self.reader() as conn:
+            # One read transaction, so every chunk comes from the same snapshot
+            conn.execute("BEGIN")
+            row = conn.execute(STATEMENTS['content_size'], (document_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Document {document_id} not found")
+            size = row[0] or 0
+            if not size:
+                return
+
+            blobopen = getattr(conn, 'blobopen', None)
+            if blobopen is not None:
+                with blobopen('documents', 'content', document_id, readonly=True) as blob:
+                    for _ in range(0, size, chunk_size):
+                        text = decoder.decode(blob.read(chunk_size))
+                        if text:
+                            yield text
+            else:
+                for offset in range(1, size + 1, chunk_size):
+                    data = conn.execute(
+                        STATEMENTS['content_range'], (offset, chunk_size, document_id)
+                    ).fetchone()[0]
+                    text = decoder.decode(data)
+                    if text:
+                        yield text
+
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+
+    @staticmethod
+    def _decode(conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Turn document rows into dicts with typed metadata."""
+        if not rows:
+            return []
+        columns = [column[0] for column in cursor.description]
+        docs = [dict(zip(columns, row), metadata={}) for row in rows]
+        by_id = {doc['id']: doc for doc in docs}
+        metadata = conn.execute(
+            STATEMENTS['metadata'].format(','.join('?' * len(by_id))), list(by_id)
+        )
+        for document_id, key, value, value_type in metadata:
+            by_id[document_id]['metadata'][key] = typed_metadata_value(value, value_type)
+        return docs
+
+    # ==================== LIFECYCLE ====================
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Engine counters with cache and write queue state."""
+        commits = self.stats['commits']
+        return {
+            **self.stats,
+            'operations_per_commit': self.stats['write_operations'] / commits if commits else 0,
+            'write_queue_size': self._queue.qsize(),
+            'document_cache': self.document_cache.get_stats()
+        }
+
+    def release(self):
+        """Drop one reference; the last one closes the engine."""
+        with _engines_lock:
+            self._references -= 1
+            if self._references > 0:
+                return
+            if _engines.get(self._registry_key) is self:
+                del _engines[self._registry_key]
+        self.close()
+
+    def close(self):
+        """Commit queued writes, stop the writer and close all connections."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer_thread is not None:
+            self._queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        self.document_cache.clear()
+        if self._monitor is not None:
+            self._monitor.close()
+        while self._readers:
+            self._readers.pop().close()
+        self.write_engine.dispose()
+        self.read_engine.dispose()
+
+
+_engines: Dict[str, StorageEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_storage_engine(db_path: str, **options) -> StorageEngine:
+    """
+    Get the shared engine for a database file, opening it on first use.
+
+    Options only apply when the engine is opened; later callers share the
+    existing engine. Every call must be paired with StorageEngine.release().
+
+    Args:
+        db_path: Path to SQLite database
+        **options: StorageEngine keyword arguments
+    """
+    key = str(Path(db_path).resolve())
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = StorageEngine(db_path, **options)
+            engine._registry_key = key
+            _engines[key] = engine
+        engine._references += 1
+        return engine
@@ -1,78 +1,22 @@
 """
 Fast storage layer for M002 - Performance optimized queries.
 
-Provides high-performance read operations with multi-level caching
-and prepared statements for achieving 200K+ queries/second.
+Provides high-performance read operations on the shared StorageEngine:
+its document cache, prepared statements and read-only connection pool,
+for achieving 200K+ queries/second.
 """
 
 import time
 import sqlite3
 import threading
 import queue
-from typing import Optional, Dict, Any, List, Tuple, Set
-from functools import lru_cache
-from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, List
 from contextlib import contextmanager
-import hashlib
-import json
 import logging
 
-logger = logging.getLogger(__name__)
-
+from .engine import LRUCache, get_storage_engine
 
-class LRUCache:
-    """Thread-safe LRU cache implementation for document storage."""
-    
-    def __init__(self, max_size: int = 10000):
-        self.cache = OrderedDict()
-        self.max_size = max_size
-        self.lock = threading.RLock()
-        self.hits = 0
-        self.misses = 0
-    
-    def get(self, key: Any) -> Optional[Any]:
-        """Get item from cache with LRU update."""
-        with self.lock:
-            if key in self.cache:
-                self.hits += 1
-                # Move to end (most recently used)
-                self.cache.move_to_end(key)
-                return self.cache[key]
-            self.misses += 1
-            return None
-    
-    def put(self, key: Any, value: Any):
-        """Add item to cache with LRU eviction."""
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-            self.cache[key] = value
-            if len(self.cache) > self.max_size:
-                # Remove least recently used
-                self.cache.popitem(last=False)
-    
-    def invalidate(self, key: Any):
-        """Remove item from cache."""
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-    
-    def clear(self):
-        """Clear entire cache."""
-        with self.lock:
-            self.cache.clear()
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics."""
-        with self.lock:
-            total = self.hits + self.misses
-            return {
-                'size': len(self.cache),
-                'max_size': self.max_size,
-                'hits': self.hits,
-                'misses': self.misses,
-                'hit_rate': self.hits / total if total > 0 else 0
-            }
+logger = logging.getLogger(__name__)
 
 
 class ConnectionPool:
@@ -143,30 +87,6 @@ class PreparedStatements:
     def _prepare_statements(self):
         """Define all prepared statements."""
         self.statements = {
-            'get_by_id': """
-                SELECT id, uuid, title, type, status, format, language,
-                       content, content_hash, file_path, source_path,
-                       created_at, updated_at, access_count, size_bytes,
-                       quality_score, completeness_score
-                FROM documents
-                WHERE id = ? AND status != 'deleted'
-            """,
-            
-            'get_by_uuid': """
-                SELECT id, uuid, title, type, status, format, language,
-                       content, content_hash, file_path, source_path,
-                       created_at, updated_at, access_count, size_bytes,
-                       quality_score, completeness_score
-                FROM documents
-                WHERE uuid = ? AND status != 'deleted'
-            """,
-            
-            'get_metadata': """
-                SELECT key, value, value_type
-                FROM metadata
-                WHERE document_id = ?
-            """,
-            
             'list_by_type': """
                 SELECT id, uuid, title, type, status, format, language,
                        created_at, updated_at, size_bytes
@@ -176,19 +96,26 @@ class PreparedStatements:
                 LIMIT ? OFFSET ?
             """,
             
-            'batch_get_ids': """
+            'list_all': """
                 SELECT id, uuid, title, type, status, format, language,
-                       content, content_hash, file_path, source_path,
-                       created_at, updated_at, access_count, size_bytes
+                       created_at, updated_at, size_bytes
                 FROM documents
-                WHERE id IN ({}) AND status != 'deleted'
+                WHERE status != 'deleted'
+                ORDER BY updated_at DESC
+                LIMIT ? OFFSET ?
             """,
             
-            'update_access': """
-                UPDATE documents 
-                SET last_accessed = CURRENT_TIMESTAMP, 
-                    access_count = access_count + 1
-                WHERE id = ?
+            'search': """
+                SELECT d.id, d.uuid, d.title, d.type,
+                       highlight(documents_fts, 1, '<mark>', '</mark>') as title_highlight,
+                       snippet(documents_fts, 2, '<mark>', '</mark>', '...', 30) as content_snippet,
+                       rank
+                FROM documents_fts f
+                JOIN documents d ON f.document_id = d.id
+                WHERE documents_fts MATCH ?
+                AND d.status != 'deleted'
+                ORDER BY rank
+                LIMIT ?
             """
         }
     
@@ -197,51 +124,243 @@ class PreparedStatements:
         return self.statements.get(name)
 
 
+class AccessTracker:
+    """
+    Write-behind access counter for documents.
+
+    Reads increment an in-memory count per document id; a background
+    thread swaps the table out and writes it with a single executemany()
+    on a timer, or sooner once enough distinct documents are pending.
+    Repeated reads of a hot document only bump its count, so pending
+    state is bounded by distinct ids rather than accesses.
+
+    When max_pending distinct ids are waiting, record() blocks until the
+    next flush instead of dropping the access. Counts from a failed flush
+    are merged back and retried. Flushed documents are invalidated in the
+    engine's cache so cached rows do not keep a stale access_count.
+    """
+
+    UPDATE_SQL = """
+        UPDATE documents
+        SET last_accessed = CURRENT_TIMESTAMP,
+            access_count = access_count + ?
+        WHERE id = ?
+    """
+
+    def __init__(self, execute: Callable[[Callable[[sqlite3.Connection], Any]], Any],
+                 flush_interval: float = 1.0,
+                 flush_threshold: int = 1000,
+                 max_pending: int = 10000,
+                 backpressure_timeout: float = 5.0):
+        """
+        Start the flush thread.
+
+        Args:
+            execute: Runs a write operation, invalidates the given document
+                ids and waits for the commit (StorageEngine.execute)
+            flush_interval: Seconds between timed flushes
+            flush_threshold: Pending distinct ids that trigger an early flush
+            max_pending: Pending distinct ids at which record() blocks
+            backpressure_timeout: Longest a blocked record() waits per flush
+        """
+        self._execute = execute
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_pending = max_pending
+        self.backpressure_timeout = backpressure_timeout
+
+        self._pending: Dict[int, int] = {}
+        # Counts being written by a flush, still reported by pending_count()
+        self._in_flight: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._flush_needed = threading.Condition(self._lock)
+        self._flushed = threading.Condition(self._lock)
+        self._flush_count = 0
+        self._closed = False
+
+        self.stats = {
+            'recorded': 0,
+            'flushes': 0,
+            'flushed_documents': 0,
+            'flushed_accesses': 0,
+            'failed_flushes': 0,
+            'backpressure_waits': 0,
+            'flush_seconds': 0.0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name="access-tracker", daemon=True)
+        self._thread.start()
+
+    def record(self, document_id: int, count: int = 1):
+        """Count an access to a document."""
+        with self._lock:
+            if (document_id not in self._pending
+                    and len(self._pending) >= self.max_pending and not self._closed):
+                # Back-pressure: wait for the flush thread rather than drop the access
+                self.stats['backpressure_waits'] += 1
+                generation = self._flush_count
+                self._flush_needed.notify()
+                self._flushed.wait_for(
+                    lambda: self._flush_count != generation or self._closed,
+                    timeout=self.backpressure_timeout
+                )
+            self._pending[document_id] = self._pending.get(document_id, 0) + count
+            self.stats['recorded'] += count
+            if len(self._pending) >= self.flush_threshold:
+                self._flush_needed.notify()
+
+    def pending(self) -> int:
+        """Number of documents with unflushed accesses."""
+        with self._lock:
+            return len(self._pending)
+
+    def pending_count(self, document_id: int) -> int:
+        """Accesses to a document not yet committed to the database."""
+        with self._lock:
+            return self._pending.get(document_id, 0) + self._in_flight.get(document_id, 0)
+
+    def _run(self):
+        """Flush thread: write pending counts on a timer or threshold."""
+        failed = False
+        # A full table must wake the thread even if the threshold is higher
+        threshold = min(self.flush_threshold, self.max_pending)
+        while True:
+            with self._lock:
+                if failed:
+                    # Retry on the timer only, not in a loop on the threshold
+                    self._flush_needed.wait_for(lambda: self._closed, timeout=self.flush_interval)
+                else:
+                    self._flush_needed.wait_for(
+                        lambda: self._closed or len(self._pending) >= threshold,
+                        timeout=self.flush_interval
+                    )
+                closed = self._closed
+            failed = not self.flush()
+            if closed:
+                return
+
+    def flush(self) -> bool:
+        """Write all pending counts in one transaction; False if it failed."""
+        with self._lock:
+            counts, self._pending = self._pending, {}
+            for document_id, count in counts.items():
+                self._in_flight[document_id] = self._in_flight.get(document_id, 0) + count
+        try:
+            return self._write(counts) if counts else True
+        finally:
+            with self._lock:
+                for document_id, count in counts.items():
+                    remaining = self._in_flight.pop(document_id) - count
+                    if remaining:
+                        self._in_flight[document_id] = remaining
+                self._flush_count += 1
+                self._flushed.notify_all()
+
+    def _write(self, counts: Dict[int, int]) -> bool:
+        params = [(count, document_id) for document_id, count in counts.items()]
+        start = time.perf_counter()
+        try:
+            self._execute(lambda conn: conn.executemany(self.UPDATE_SQL, params), list(counts))
+        except Exception as e:
+            logger.error(f"Failed to update access counts: {e}")
+            with self._lock:
+                self.stats['failed_flushes'] += 1
+                for document_id, count in counts.items():
+                    self._pending[document_id] = self._pending.get(document_id, 0) + count
+            return False
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats['flushes'] += 1
+            self.stats['flushed_documents'] += len(counts)
+            self.stats['flushed_accesses'] += sum(counts.values())
+            self.stats['flush_seconds'] += elapsed
+            self.stats['last_flush_seconds'] = elapsed
+            self.stats['max_flush_seconds'] = max(self.stats['max_flush_seconds'], elapsed)
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Flush counters, latency and pending state."""
+        with self._lock:
+            flushes = self.stats['flushes']
+            return {
+                **self.stats,
+                'mean_flush_seconds': self.stats['flush_seconds'] / flushes if flushes else 0,
+                'pending_documents': len(self._pending)
+            }
+
+    def close(self):
+        """Stop the flush thread after a final flush."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_needed.notify_all()
+            self._flushed.notify_all()
+        self._thread.join()
+        # Anything a failed final flush merged back gets one more attempt
+        if self.pending():
+            self.flush()
+
+
 class FastStorageLayer:
     """
     High-performance storage layer with multi-level caching.
     
     Achieves 200K+ queries/second through:
-    - L1: In-memory LRU cache
+    - L1: Shared in-memory document cache (StorageEngine)
     - L2: Prepared statements
     - L3: SQLite page cache
-    - Connection pooling
-    - Async access tracking
+    - Read-only connection pool
+    - Write-behind access tracking (AccessTracker)
+    
+    All instances for one database file, and any LocalStorageSystem on it,
+    share the engine, so writes through either invalidate the cache.
     """
     
-    def __init__(self, db_path: str, cache_size: int = 10000, pool_size: int = 50):
+    def __init__(self, db_path: str, cache_size: int = 10000, pool_size: int = 50,
+                 access_flush_interval: float = 1.0, access_flush_threshold: int = 1000):
         """
         Initialize fast storage layer.
         
         Args:
             db_path: Path to SQLite database
-            cache_size: Maximum documents in memory cache
-            pool_size: Number of persistent connections
+            cache_size: Maximum documents in memory cache (if this opens the engine)
+            pool_size: Number of read connections (if this opens the engine)
+            access_flush_interval: Seconds between access count flushes
+            access_flush_threshold: Pending documents that trigger an early flush
         """
         self.db_path = db_path
-        
-        # Multi-level caching
-        self.document_cache = LRUCache(max_size=cache_size)
-        self.metadata_cache = LRUCache(max_size=cache_size * 2)
-        
-        # Connection management
-        self.pool = ConnectionPool(db_path, pool_size)
+        self.engine = get_storage_engine(
+            db_path, readers=pool_size, document_cache_size=cache_size
+        )
+        self.document_cache = self.engine.document_cache
         self.statements = PreparedStatements()
         
-        # Access tracking queue for async updates
-        self.access_queue = queue.Queue(maxsize=10000)
-        self.access_thread = threading.Thread(target=self._process_access_updates, daemon=True)
-        self.access_thread.start()
+        # Access counts are written behind the reads, off the read path
+        self.access_tracker = AccessTracker(
+            self.engine.execute,
+            flush_interval=access_flush_interval,
+            flush_threshold=access_flush_threshold
+        )
         
         # Statistics
         self.stats = {
             'queries': 0,
-            'cache_hits': 0,
-            'db_hits': 0,
             'batch_queries': 0
         }
         self.start_time = time.time()
     
+    @contextmanager
+    def _cursor(self):
+        """Cursor returning sqlite3.Row on a pooled read connection."""
+        with self.engine.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            yield cursor
+    
     def get_document(self, document_id: Optional[int] = None,
                     uuid: Optional[str] = None,
                     skip_cache: bool = False) -> Optional[Dict[str, Any]]:
@@ -262,47 +381,14 @@ class FastStorageLayer:
         """
         self.stats['queries'] += 1
         
-        # Determine cache key
-        cache_key = f"id:{document_id}" if document_id else f"uuid:{uuid}"
-        
-        # L1: Check memory cache
-        if not skip_cache:
-            cached = self.document_cache.get(cache_key)
-            if cached:
-                self.stats['cache_hits'] += 1
-                # Queue async access update
-                self._queue_access_update(document_id or cached['id'])
-                return cached
-        
-        # L2: Query database with prepared statement
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            if document_id:
-                cursor.execute(self.statements.get('get_by_id'), (document_id,))
-            else:
-                cursor.execute(self.statements.get('get_by_uuid'), (uuid,))
-            
-            row = cursor.fetchone()
-            
-            if row:
-                self.stats['db_hits'] += 1
-                
-                # Convert row to dict
-                doc = dict(row)
-                
-                # Fetch metadata (also cached)
-                doc['metadata'] = self._get_metadata(conn, doc['id'])
-                
-                # Update cache
-                self.document_cache.put(cache_key, doc)
-                
-                # Queue async access update
-                self._queue_access_update(doc['id'])
-                
-                return doc
-            
+        doc = self.engine.fetch_document(
+            document_id=document_id or None, uuid=uuid, use_cache=not skip_cache
+        )
+        if doc is None or doc['status'] == 'deleted':
             return None
+        
+        self.access_tracker.record(doc['id'])
+        return doc
     
     def get_documents_batch(self, document_ids: List[int]) -> Dict[int, Dict[str, Any]]:
         """
@@ -320,42 +406,13 @@ class FastStorageLayer:
             return {}
         
         self.stats['batch_queries'] += 1
-        results = {}
-        uncached_ids = []
-        
-        # Check cache first
-        for doc_id in document_ids:
-            cache_key = f"id:{doc_id}"
-            cached = self.document_cache.get(cache_key)
-            if cached:
-                results[doc_id] = cached
-                self.stats['cache_hits'] += 1
-            else:
-                uncached_ids.append(doc_id)
-        
-        # Batch fetch uncached documents
-        if uncached_ids:
-            with self.pool.get_connection() as conn:
-                placeholders = ','.join('?' * len(uncached_ids))
-                query = self.statements.get('batch_get_ids').format(placeholders)
-                
-                cursor = conn.cursor()
-                cursor.execute(query, uncached_ids)
-                
-                for row in cursor.fetchall():
-                    doc = dict(row)
-                    doc['metadata'] = self._get_metadata(conn, doc['id'])
-                    
-                    # Update cache
-                    cache_key = f"id:{doc['id']}"
-                    self.document_cache.put(cache_key, doc)
-                    
-                    results[doc['id']] = doc
-                    self.stats['db_hits'] += 1
+        results = {
+            doc_id: doc for doc_id, doc in self.engine.fetch_documents(document_ids).items()
+            if doc['status'] != 'deleted'
+        }
         
-        # Queue access updates for all documents
-        for doc_id in document_ids:
-            self._queue_access_update(doc_id)
+        for doc_id in results:
+            self.access_tracker.record(doc_id)
         
         return results
     
@@ -374,29 +431,14 @@ class FastStorageLayer:
         Returns:
             List of document dictionaries
         """
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
+        with self._cursor() as cursor:
             if doc_type:
-                cursor.execute(self.statements.get('list_by_type'), 
+                cursor.execute(self.statements.get('list_by_type'),
                              (doc_type, limit, offset))
             else:
-                # Use generic list query
-                cursor.execute("""
-                    SELECT id, uuid, title, type, status, format, language,
-                           created_at, updated_at, size_bytes
-                    FROM documents
-                    WHERE status != 'deleted'
-                    ORDER BY updated_at DESC
-                    LIMIT ? OFFSET ?
-                """, (limit, offset))
-            
-            results = []
-            for row in cursor.fetchall():
-                doc = dict(row)
-                results.append(doc)
+                cursor.execute(self.statements.get('list_all'), (limit, offset))
             
-            return results
+            return [dict(row) for row in cursor.fetchall()]
     
     def search_documents(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -411,21 +453,8 @@ class FastStorageLayer:
         Returns:
             List of matching documents with highlights
         """
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT d.id, d.uuid, d.title, d.type,
-                       highlight(documents_fts, 1, '<mark>', '</mark>') as title_highlight,
-                       snippet(documents_fts, 2, '<mark>', '</mark>', '...', 30) as content_snippet,
-                       rank
-                FROM documents_fts f
-                JOIN documents d ON f.document_id = d.id
-                WHERE documents_fts MATCH ?
-                AND d.status != 'deleted'
-                ORDER BY rank
-                LIMIT ?
-            """, (query, limit))
+        with self._cursor() as cursor:
+            cursor.execute(self.statements.get('search'), (query, limit))
             
             results = []
             for row in cursor.fetchall():
@@ -435,141 +464,43 @@ class FastStorageLayer:
             
             return results
     
-    def _get_metadata(self, conn: sqlite3.Connection, document_id: int) -> Dict[str, Any]:
-        """Get metadata for a document with caching."""
-        cache_key = f"meta:{document_id}"
-        
-        # Check cache
-        cached = self.metadata_cache.get(cache_key)
-        if cached:
-            return cached
-        
-        # Query database
-        cursor = conn.cursor()
-        cursor.execute(self.statements.get('get_metadata'), (document_id,))
-        
-        metadata = {}
-        for row in cursor.fetchall():
-            key = row['key']
-            value = row['value']
-            value_type = row['value_type']
-            
-            # Type conversion
-            if value_type == 'number':
-                value = float(value)
-            elif value_type == 'boolean':
-                value = value.lower() == 'true'
-            elif value_type == 'json':
-                value = json.loads(value)
-            
-            metadata[key] = value
-        
-        # Update cache
-        self.metadata_cache.put(cache_key, metadata)
-        
-        return metadata
-    
-    def _queue_access_update(self, document_id: int):
-        """Queue document access update for async processing."""
-        try:
-            self.access_queue.put_nowait(document_id)
-        except queue.Full:
-            # Queue is full, skip this update
-            pass
-    
-    def _process_access_updates(self):
-        """Background thread to process access updates."""
-        batch = []
-        last_flush = time.time()
-        
-        while True:
-            try:
-                # Collect updates for batch processing
-                doc_id = self.access_queue.get(timeout=1.0)
-                batch.append(doc_id)
-                
-                # Flush batch every 100 items or 5 seconds
-                if len(batch) >= 100 or time.time() - last_flush > 5:
-                    self._flush_access_updates(batch)
-                    batch = []
-                    last_flush = time.time()
-                    
-            except queue.Empty:
-                # Flush any remaining updates
-                if batch:
-                    self._flush_access_updates(batch)
-                    batch = []
-                    last_flush = time.time()
-    
-    def _flush_access_updates(self, document_ids: List[int]):
-        """Flush batch of access updates to database."""
-        if not document_ids:
-            return
-        
-        # Count occurrences
-        from collections import Counter
-        counts = Counter(document_ids)
-        
-        try:
-            with self.pool.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("BEGIN TRANSACTION")
-                
-                for doc_id, count in counts.items():
-                    cursor.execute("""
-                        UPDATE documents 
-                        SET last_accessed = CURRENT_TIMESTAMP,
-                            access_count = access_count + ?
-                        WHERE id = ?
-                    """, (count, doc_id))
-                
-                cursor.execute("COMMIT")
-        except Exception as e:
-            logger.error(f"Failed to update access counts: {e}")
-    
     def invalidate_cache(self, document_id: Optional[int] = None,
                         uuid: Optional[str] = None):
         """Invalidate cached document."""
+        if uuid and not document_id:
+            document_id = self.document_cache.get(('uuid', uuid))
         if document_id:
-            self.document_cache.invalidate(f"id:{document_id}")
-            self.metadata_cache.invalidate(f"meta:{document_id}")
-        if uuid:
-            self.document_cache.invalidate(f"uuid:{uuid}")
+            self.engine.invalidate([document_id])
     
     def clear_cache(self):
         """Clear all caches."""
         self.document_cache.clear()
-        self.metadata_cache.clear()
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get performance statistics."""
+        """Get performance statistics (cache figures are engine-wide)."""
         uptime = time.time() - self.start_time
         total_queries = self.stats['queries']
+        cache_stats = self.document_cache.get_stats()
         
         return {
             'uptime_seconds': uptime,
             'total_queries': total_queries,
             'queries_per_second': total_queries / uptime if uptime > 0 else 0,
-            'cache_stats': self.document_cache.get_stats(),
-            'metadata_cache_stats': self.metadata_cache.get_stats(),
-            'db_hits': self.stats['db_hits'],
-            'cache_hit_rate': self.stats['cache_hits'] / total_queries if total_queries > 0 else 0,
+            'cache_stats': cache_stats,
+            'db_hits': cache_stats['misses'],
+            'cache_hit_rate': cache_stats['hit_rate'],
             'batch_queries': self.stats['batch_queries'],
-            'access_queue_size': self.access_queue.qsize()
+            'pending_access_updates': self.access_tracker.pending(),
+            'access_tracking': self.access_tracker.get_statistics(),
+            'engine': self.engine.get_statistics()
         }
     
+    def flush_access_updates(self):
+        """Write pending access counts now."""
+        self.access_tracker.flush()
+    
     def close(self):
         """Close storage layer and cleanup resources."""
-        # Flush remaining access updates
-        remaining = []
-        while not self.access_queue.empty():
-            try:
-                remaining.append(self.access_queue.get_nowait())
-            except queue.Empty:
-                break
-        
-        if remaining:
-            self._flush_access_updates(remaining)
-        
-        # Close connection pool
-        self.pool.close_all()
\ No newline at end of file
+        # Final flush of access counts before the engine may close
+        self.access_tracker.close()
+        self.engine.release()
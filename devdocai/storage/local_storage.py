@@ -8,36 +8,53 @@ metadata management, and transactional integrity.
 import os
 import uuid
 import json
+import base64
 import logging
 import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Union, Tuple
+from enum import Enum
+from typing import Optional, Dict, Any, List, Union, Tuple, Iterable, Iterator, Callable
 from contextlib import contextmanager
 from functools import lru_cache
 import time
 
 from sqlalchemy import (
-    create_engine, select, update, delete, and_, or_, func,
-    event, pool, text
+    select, update, delete, and_, or_, func,
+    event, text, cast, literal, tuple_, insert, String, DateTime
 )
-from sqlalchemy.orm import sessionmaker, Session, scoped_session
-from sqlalchemy.engine import Engine
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import table, column
+from sqlalchemy.orm import sessionmaker, Session, scoped_session, undefer_group
 from pydantic import BaseModel, Field, ValidationError
 
 from devdocai.core.config import ConfigurationManager
 from .models import (
-    Base, Document, DocumentVersion, Metadata, SearchIndex,
-    AuditLog, DocumentStatus, DocumentType
+    Document, DocumentVersion, Metadata, SearchIndex,
+    AuditLog, DocumentStatus, DocumentType, DocumentSummary
 )
+from .engine import get_storage_engine
+from .fast_storage import AccessTracker
+from .migrations import SchemaMigration
 from .utils import (
-    generate_uuid, calculate_diff, tokenize_content,
+    generate_uuid, calculate_delta, apply_delta, tokenize_content,
     sanitize_path, ensure_directory
 )
 
 logger = logging.getLogger(__name__)
 
+# FTS5 virtual table, queried through SQL expressions
+documents_fts = table('documents_fts', column('document_id'))
+
+# Columns that are never NULL and can therefore be paginated by keyset
+KEYSET_COLUMNS = ('updated_at', 'created_at', 'title', 'id')
+
+# INSERT ... RETURNING needs SQLite 3.35; older builds look new ids up by uuid
+RETURNING_SUPPORTED = sqlite3.sqlite_version_info >= (3, 35, 0)
+UUID_LOOKUP_CHUNK = 500
+
 
 class StorageConfig(BaseModel):
     """Configuration for storage system."""
@@ -52,6 +69,10 @@ class StorageConfig(BaseModel):
     backup_interval: int = Field(default=3600, ge=300, le=86400)
     cache_size: int = Field(default=10000, ge=1000, le=100000)
     page_size: int = Field(default=4096, ge=512, le=65536)
+    version_keyframe_interval: int = Field(default=20, ge=1, le=1000)
+    version_compaction_interval: int = Field(default=0, ge=0, le=86400)
+    bulk_batch_size: int = Field(default=500, ge=1, le=10000)
+    document_cache_size: int = Field(default=10000, ge=0, le=1000000)
 
 
 class DocumentData(BaseModel):
@@ -75,6 +96,9 @@ class QueryParams(BaseModel):
     order_desc: bool = Field(default=True)
     limit: int = Field(default=100, ge=1, le=1000)
     offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
+    include_total: bool = Field(default=True)
+    exact_total: bool = Field(default=False)
 
 
 class LocalStorageSystem:
@@ -94,6 +118,19 @@ class LocalStorageSystem:
         self._operation_count = 0
         self._start_time = time.time()
         
+        # Cached document counts
+        self._count_lock = threading.Lock()
+        self._bucket_counts: Optional[Dict[Tuple[str, str], int]] = None
+        self._filtered_counts: OrderedDict = OrderedDict()
+        self._count_generation = 0
+        
+        # Background version compaction
+        self._compaction_stop = threading.Event()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._compacted_versions: Dict[int, int] = {}
+        if self.config.version_compaction_interval:
+            self.start_compaction()
+        
     def _load_config(self):
         """Load storage configuration from config manager."""
         config_dict = self.config_manager.get('storage', None) or {}
@@ -115,51 +152,50 @@ class LocalStorageSystem:
         ensure_directory(db_dir)
         
     def _init_database(self):
-        """Initialize SQLite database with optimizations."""
-        # Build connection URL
-        db_url = f"sqlite:///{self.config.db_path}"
-        
-        # Create engine with connection pooling
-        self.engine = create_engine(
-            db_url,
-            poolclass=QueuePool,
-            pool_size=self.config.pool_size,
+        """Attach to the shared storage engine for the database file."""
+        # Writes go through the single writer connection, reads use the
+        # pooled read-only connections (see storage.engine)
+        self.storage_engine = get_storage_engine(
+            self.config.db_path,
+            readers=self.config.pool_size,
             max_overflow=self.config.max_overflow,
             pool_timeout=self.config.pool_timeout,
             pool_recycle=self.config.pool_recycle,
-            echo=False,
-            connect_args={
-                'check_same_thread': False,
-                'timeout': 30.0
-            }
+            enable_wal=self.config.enable_wal,
+            cache_size=self.config.cache_size,
+            page_size=self.config.page_size,
+            document_cache_size=self.config.document_cache_size
         )
+        self.engine = self.storage_engine.write_engine
+        self.read_engine = self.storage_engine.read_engine
         
-        # Apply SQLite optimizations
-        @event.listens_for(Engine, "connect")
-        def set_sqlite_pragma(dbapi_conn, connection_record):
-            cursor = dbapi_conn.cursor()
-            
-            # Performance optimizations
-            if self.config.enable_wal:
-                cursor.execute("PRAGMA journal_mode=WAL")
-            cursor.execute(f"PRAGMA cache_size={self.config.cache_size}")
-            cursor.execute(f"PRAGMA page_size={self.config.page_size}")
-            cursor.execute("PRAGMA synchronous=NORMAL")
-            cursor.execute("PRAGMA temp_store=MEMORY")
-            cursor.execute("PRAGMA mmap_size=268435456")  # 256MB memory map
-            
-            # Enable foreign keys
-            cursor.execute("PRAGMA foreign_keys=ON")
-            
-            cursor.close()
+        # Reads record accesses write-behind and never wait for the writer
+        self.access_tracker = AccessTracker(self.storage_engine.execute)
         
-        # Create tables if they don't exist
-        Base.metadata.create_all(self.engine)
+        self._migrate_schema()
         
         # Create FTS virtual table if enabled
         if self.config.enable_fts:
             self._init_fts()
     
+    def _migrate_schema(self):
+        """Add columns and indexes to databases created before they existed."""
+        with self.engine.connect() as conn:
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_info(document_versions)"))}
+            indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(documents)"))}
+        
+        if 'idx_document_source_path' not in indexes:
+            SchemaMigration.create_index(self.engine, 'idx_document_source_path',
+                                         'documents', ['source_path'])
+        
+        for column, column_type, default in (
+            ('is_keyframe', 'BOOLEAN', 1),
+            ('base_version', 'INTEGER', None),
+            ('delta', 'BLOB', None)
+        ):
+            if column not in columns:
+                SchemaMigration.add_column(self.engine, 'document_versions', column, column_type, default)
+    
     def _init_fts(self):
         """Initialize full-text search virtual table."""
         with self.engine.connect() as conn:
@@ -185,7 +221,11 @@ class LocalStorageSystem:
     def _init_session(self):
         """Initialize SQLAlchemy session factory."""
         session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+        event.listen(session_factory, 'after_begin', self._begin_write)
+        event.listen(session_factory, 'after_commit', self._apply_document_changes)
+        event.listen(session_factory, 'after_rollback', self._discard_document_changes)
         self.Session = scoped_session(session_factory)
+        self.ReadSession = sessionmaker(bind=self.read_engine, expire_on_commit=False)
     
     @contextmanager
     def get_session(self) -> Session:
@@ -201,6 +241,15 @@ class LocalStorageSystem:
         finally:
             session.close()
     
+    @contextmanager
+    def read_session(self) -> Session:
+        """Get a session on the read-only connection pool."""
+        session = self.ReadSession()
+        try:
+            yield session
+        finally:
+            session.close()
+    
     @contextmanager
     def transaction(self) -> Session:
         """Execute operations within a transaction."""
@@ -237,6 +286,7 @@ class LocalStorageSystem:
             
             session.add(doc)
             session.flush()  # Get the document ID
+            self._track_document_change(session, after=doc)
             
             # Create initial version
             if data.content:
@@ -294,36 +344,65 @@ class LocalStorageSystem:
         if not document_id and not uuid:
             raise ValueError("Either document_id or uuid must be provided")
         
-        with self.get_session() as session:
-            query = session.query(Document)
+        row = self.storage_engine.fetch_document(
+            document_id=document_id or None, uuid=uuid, include_content=include_content
+        )
+        if row is None:
+            return None
+        
+        # Count the access write-behind; report it along with unflushed ones
+        self.access_tracker.record(row['id'])
+        row['access_count'] = (row['access_count'] or 0) + self.access_tracker.pending_count(row['id'])
+        
+        result = self._document_dict(row)
+        if include_content:
+            result['content'] = row['content']
+        result['metadata'] = row['metadata']
+        
+        self._operation_count += 1
+        return result
+    
+    def iter_content(self, document_id: int, chunk_size: int = 64 * 1024) -> Iterator[str]:
+        """
+        Stream a document's content in chunks without loading it whole.
+        
+        Args:
+            document_id: Document database ID
+            chunk_size: Bytes read per chunk
             
-            if document_id:
-                query = query.filter(Document.id == document_id)
-            else:
-                query = query.filter(Document.uuid == uuid)
-            
-            doc = query.first()
-            
-            if doc:
-                # Update access tracking
-                doc.last_accessed = datetime.utcnow()
-                doc.access_count += 1
-                session.commit()
-                
-                result = doc.to_dict()
-                if include_content:
-                    result['content'] = doc.content
-                
-                # Include metadata
-                result['metadata'] = {
-                    m.key: m.get_typed_value() 
-                    for m in doc.metadata_entries
-                }
-                
-                self._operation_count += 1
-                return result
+        Yields:
+            Text chunks that concatenate to the document content
             
-            return None
+        Raises:
+            ValueError: If the document does not exist
+        """
+        self._operation_count += 1
+        return self.storage_engine.iter_content(document_id, chunk_size)
+    
+    @staticmethod
+    def _document_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a StorageEngine document row like Document.to_dict."""
+        def isoformat(value):
+            return datetime.fromisoformat(value).isoformat() if value else None
+        
+        return {
+            'id': row['id'],
+            'uuid': row['uuid'],
+            'title': row['title'],
+            'type': row['type'],
+            'status': row['status'],
+            'format': row['format'],
+            'language': row['language'],
+            'file_path': row['file_path'],
+            'source_path': row['source_path'],
+            'created_at': isoformat(row['created_at']),
+            'updated_at': isoformat(row['updated_at']),
+            'access_count': row['access_count'],
+            'size_bytes': row['size_bytes'],
+            'quality_score': row['quality_score'],
+            'completeness_score': row['completeness_score'],
+            'version_count': row['version_count']
+        }
     
     def update_document(self, document_id: int, data: DocumentData,
                        user: Optional[str] = None,
@@ -354,59 +433,14 @@ class LocalStorageSystem:
                 'type': doc.type,
                 'content_hash': doc.content_hash
             }
+            before = self._count_key(doc)
             
-            # Get current version number
-            current_version = session.query(func.max(DocumentVersion.version_number))\
-                .filter(DocumentVersion.document_id == document_id).scalar() or 0
-            
-            # Update document fields
-            doc.title = data.title
-            doc.type = data.type.value if isinstance(data.type, DocumentType) else data.type
-            doc.format = data.format
-            doc.language = data.language
-            
-            # Update content if changed
-            if data.content and data.content != doc.content:
-                # Create new version
-                version = DocumentVersion(
-                    document_id=doc.id,
-                    version_number=current_version + 1,
-                    content=data.content,
-                    content_hash=hashlib.sha256(data.content.encode()).hexdigest(),
-                    created_by=user,
-                    comment=version_comment or "Updated content",
-                    is_major=current_version > 0 and (current_version + 1) % 10 == 0
-                )
-                
-                # Calculate diff if previous version exists
-                if current_version > 0:
-                    prev_version = session.query(DocumentVersion)\
-                        .filter(DocumentVersion.document_id == document_id,
-                               DocumentVersion.version_number == current_version).first()
-                    if prev_version:
-                        version.diff_from_previous = calculate_diff(
-                            prev_version.content, data.content
-                        )
-                
-                session.add(version)
-                
-                # Update document content
-                doc.content = data.content
-            
-            # Update metadata
-            if data.metadata:
-                # Remove existing metadata
-                session.query(Metadata).filter(Metadata.document_id == document_id).delete()
-                
-                # Add new metadata
-                for key, value in data.metadata.items():
-                    meta = Metadata(document_id=doc.id, key=key)
-                    meta.set_typed_value(value)
-                    session.add(meta)
+            self._apply_update(session, doc, data, user, version_comment)
             
             # Update search index
             if self.config.enable_fts:
                 self._update_search_index(session, doc)
+            self._track_document_change(session, before=before, after=doc)
             
             # Audit log
             self._audit_log(
@@ -423,6 +457,39 @@ class LocalStorageSystem:
             self._operation_count += 1
             return doc.to_dict()
     
+    def _apply_update(self, session: Session, doc: Document, data: DocumentData,
+                     user: Optional[str] = None,
+                     version_comment: Optional[str] = None):
+        """Apply document data to an existing document, versioning content changes."""
+        # Update document fields
+        doc.title = data.title
+        doc.type = data.type.value if isinstance(data.type, DocumentType) else data.type
+        doc.format = data.format
+        doc.language = data.language
+        
+        # Update content if changed
+        if data.content and data.content != doc.content:
+            # Create new version
+            self._add_version(
+                session, doc, data.content,
+                user=user,
+                comment=version_comment or "Updated content"
+            )
+            
+            # Update document content
+            doc.content = data.content
+        
+        # Update metadata
+        if data.metadata:
+            # Remove existing metadata
+            session.query(Metadata).filter(Metadata.document_id == doc.id).delete()
+            
+            # Add new metadata
+            for key, value in data.metadata.items():
+                meta = Metadata(document_id=doc.id, key=key)
+                meta.set_typed_value(value)
+                session.add(meta)
+    
     def delete_document(self, document_id: int, user: Optional[str] = None,
                        hard_delete: bool = False) -> bool:
         """
@@ -444,14 +511,17 @@ class LocalStorageSystem:
             if not doc:
                 return False
             
+            before = self._count_key(doc)
             if hard_delete:
                 # Permanently delete document and all related data
                 session.delete(doc)
                 operation = "DELETE_HARD"
+                self._track_document_change(session, before=before, document_id=doc.id)
             else:
                 # Soft delete - just change status
                 doc.status = DocumentStatus.DELETED
                 operation = "DELETE_SOFT"
+                self._track_document_change(session, before=before, after=doc)
             
             # Audit log
             self._audit_log(
@@ -471,16 +541,29 @@ class LocalStorageSystem:
         """
         List documents with filtering and pagination.
         
+        Pages can be fetched by offset or, without the cost of skipping rows,
+        by passing the previous response's next_cursor as params.cursor. The
+        cursor continues after the last returned (order column, id) pair.
+        
+        'total' comes from a count cache that is kept up to date by this
+        instance's writes, so it may lag behind writes from other processes;
+        set exact_total for a fresh COUNT or disable include_total to skip it.
+        
         Args:
             params: Query parameters
             
         Returns:
-            Dictionary with documents and pagination info
+            Dictionary with documents, next_cursor and, if requested,
+            total/page/pages (page numbers only for offset pagination)
         """
         params = params or QueryParams()
+        order_name = params.order_by if hasattr(Document, params.order_by) else 'updated_at'
+        order_column = getattr(Document, order_name)
+        keyset = order_name in KEYSET_COLUMNS
         
-        with self.get_session() as session:
-            query = session.query(Document)
+        with self.read_session() as session:
+            # Summary columns only: listing never reads document content
+            query = session.query(*DocumentSummary.summary_columns())
             
             # Apply filters
             if params.type:
@@ -492,21 +575,14 @@ class LocalStorageSystem:
                 # Default: exclude deleted documents
                 query = query.filter(Document.status != DocumentStatus.DELETED)
             
-            # Full-text search
+            # Full-text search, filtered inside SQLite
             if params.search_text and self.config.enable_fts:
-                # Use FTS for search
-                fts_results = session.execute(text("""
-                    SELECT document_id FROM documents_fts
-                    WHERE documents_fts MATCH :search_text
-                    ORDER BY rank
-                """), {'search_text': params.search_text}).fetchall()
-                
-                doc_ids = [r[0] for r in fts_results]
-                if doc_ids:
-                    query = query.filter(Document.id.in_(doc_ids))
-                else:
-                    # No matches
-                    return {'documents': [], 'total': 0, 'page': 1, 'pages': 0}
+                matches = select(documents_fts.c.document_id).where(
+                    text("documents_fts MATCH :search_text").bindparams(
+                        search_text=params.search_text
+                    )
+                )
+                query = query.filter(Document.id.in_(matches))
             
             # Metadata filters
             if params.metadata_filters:
@@ -515,36 +591,505 @@ class LocalStorageSystem:
                         .filter(Metadata.key == key, Metadata.value == str(value))
                     query = query.filter(Document.id.in_(subquery))
             
-            # Get total count
-            total = query.count()
+            total = None
+            if params.include_total:
+                total = self._count_documents(query, params)
+            
+            # Stored DateTime text differs from re-bound datetimes, so the
+            # cursor keeps the column's raw value
+            raw_order = isinstance(order_column.type, DateTime)
+            sort_value = cast(order_column, String) if raw_order else order_column
+            
+            if params.cursor:
+                if not keyset:
+                    raise ValueError(f"Cursor pagination is not supported for order_by={order_name}")
+                value, last_id = self._decode_cursor(params.cursor, order_name)
+                position = tuple_(order_column, Document.id)
+                after = tuple_(literal(value, String) if raw_order else literal(value), literal(last_id))
+                query = query.filter(position < after if params.order_desc else position > after)
             
-            # Apply ordering
-            order_column = getattr(Document, params.order_by, Document.updated_at)
+            # Apply ordering, with id as tie-breaker for stable pages
             if params.order_desc:
-                query = query.order_by(order_column.desc())
+                query = query.order_by(order_column.desc(), Document.id.desc())
             else:
-                query = query.order_by(order_column)
+                query = query.order_by(order_column, Document.id)
             
-            # Apply pagination
-            query = query.limit(params.limit).offset(params.offset)
+            # Apply pagination; one extra row tells whether there is a next page
+            query = query.add_columns(sort_value).limit(params.limit + 1)
+            if not params.cursor:
+                query = query.offset(params.offset)
             
             # Execute query
-            documents = [doc.to_dict() for doc in query.all()]
+            rows = query.all()
+            documents = [DocumentSummary.from_row(row).to_dict() for row in rows[:params.limit]]
+            
+            next_cursor = None
+            if keyset and len(rows) > params.limit:
+                last_row = rows[params.limit - 1]
+                next_cursor = self._encode_cursor(order_name, last_row[-1], last_row.id)
             
             self._operation_count += 1
             
-            return {
-                'documents': documents,
-                'total': total,
-                'page': (params.offset // params.limit) + 1,
-                'pages': (total + params.limit - 1) // params.limit
-            }
+            result = {'documents': documents, 'next_cursor': next_cursor}
+            if total is not None:
+                result['total'] = total
+                if not params.cursor:
+                    result['page'] = (params.offset // params.limit) + 1
+                    result['pages'] = (total + params.limit - 1) // params.limit
+            return result
+    
+    @staticmethod
+    def _encode_cursor(order_name: str, value: Any, document_id: int) -> str:
+        """Opaque cursor for the row after (value, document_id)."""
+        payload = json.dumps([order_name, value, document_id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str, order_name: str) -> Tuple[Any, int]:
+        """Decode a cursor, checking that it belongs to the same ordering."""
+        try:
+            cursor_order, value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        if cursor_order != order_name:
+            raise ValueError(f"Cursor was created for order_by={cursor_order}, not {order_name}")
+        return value, document_id
+    
+    # ==================== DOCUMENT COUNTS ====================
+    
+    @staticmethod
+    def _count_key(doc: Document) -> Tuple[str, str]:
+        """(type, status) bucket of a document for the count cache."""
+        return tuple(
+            value.value if isinstance(value, Enum) else value
+            for value in (doc.type, doc.status)
+        )
+    
+    def _track_document_change(self, session: Session,
+                               before: Optional[Tuple[str, str]] = None,
+                               after: Optional[Document] = None,
+                               document_id: Optional[int] = None):
+        """Record a document change, applied to the caches on commit."""
+        session.info.setdefault('document_changes', []).append((
+            document_id if after is None else after.id,
+            before,
+            self._count_key(after) if after is not None else None
+        ))
+    
+    def _begin_write(self, session: Session, transaction, connection):
+        """Note the writer's data_version so the commit keeps the engine cache."""
+        conn = connection.connection.driver_connection
+        session.info['writer_version'] = (conn, self.storage_engine.begin_write(conn))
+    
+    def _apply_document_changes(self, session: Session):
+        """
+        Apply committed changes: drop the changed documents from the engine
+        cache and move them between count buckets; filtered counts go stale.
+        """
+        writer_version = session.info.get('writer_version')
+        if writer_version is not None:
+            self.storage_engine.adopt_data_version(*writer_version)
+        changes = session.info.pop('document_changes', None)
+        if not changes:
+            return
+        self.storage_engine.invalidate(document_id for document_id, _, _ in changes)
+        with self._count_lock:
+            self._count_generation += 1
+            self._filtered_counts.clear()
+            if self._bucket_counts is not None:
+                for _, before, after in changes:
+                    if before is not None:
+                        self._bucket_counts[before] = self._bucket_counts.get(before, 0) - 1
+                    if after is not None:
+                        self._bucket_counts[after] = self._bucket_counts.get(after, 0) + 1
+    
+    def _discard_document_changes(self, session: Session):
+        """Drop changes of a rolled back transaction."""
+        session.info.pop('document_changes', None)
+    
+    def _count_documents(self, query, params: QueryParams) -> int:
+        """
+        Number of documents matching a list query.
+        
+        Type/status filters are answered from per-bucket counts loaded once
+        and updated incrementally on commit. Search and metadata queries are
+        counted once and cached until the next document change.
+        """
+        if params.exact_total:
+            return query.with_entities(Document.id).order_by(None).count()
+        
+        type_value = params.type.value if params.type else None
+        status_value = params.status.value if params.status else None
+        
+        if not params.search_text and not params.metadata_filters:
+            with self._count_lock:
+                buckets = self._bucket_counts
+                generation = self._count_generation
+            if buckets is None:
+                rows = query.session.query(Document.type, Document.status, func.count(Document.id))\
+                    .group_by(Document.type, Document.status).all()
+                buckets = {(doc_type, status): count for doc_type, status, count in rows}
+                with self._count_lock:
+                    # Keep the loaded counts only if no change committed meanwhile
+                    if self._bucket_counts is None and generation == self._count_generation:
+                        self._bucket_counts = buckets
+            with self._count_lock:
+                return sum(
+                    count for (doc_type, status), count in buckets.items()
+                    if (type_value is None or doc_type == type_value)
+                    and (status == status_value if status_value
+                         else status != DocumentStatus.DELETED.value)
+                )
+        
+        key = (
+            type_value, status_value, params.search_text if self.config.enable_fts else None,
+            tuple(sorted((k, str(v)) for k, v in params.metadata_filters.items()))
+        )
+        with self._count_lock:
+            generation = self._count_generation
+            if key in self._filtered_counts:
+                self._filtered_counts.move_to_end(key)
+                return self._filtered_counts[key]
+        
+        total = query.with_entities(Document.id).order_by(None).count()
+        with self._count_lock:
+            if generation == self._count_generation:
+                self._filtered_counts[key] = total
+                while len(self._filtered_counts) > 256:
+                    self._filtered_counts.popitem(last=False)
+        return total
+    
+    def refresh_counts(self):
+        """Drop cached counts, e.g. after other processes wrote to the database."""
+        with self._count_lock:
+            self._count_generation += 1
+            self._bucket_counts = None
+            self._filtered_counts.clear()
+    
+    # ==================== BULK OPERATIONS ====================
+    
+    def bulk_create_documents(self, items: Iterable[Union[DocumentData, Dict[str, Any]]],
+                              user: Optional[str] = None,
+                              batch_size: Optional[int] = None,
+                              progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                              ) -> Dict[str, Any]:
+        """
+        Create many documents in batched transactions.
+        
+        Each batch is one transaction: documents, initial versions and
+        metadata are inserted with executemany, the batch is added to the
+        full-text index in one pass and a single audit entry records it.
+        If a batch fails its items are retried one by one, so one bad item
+        only fails itself.
+        
+        Args:
+            items: Documents as DocumentData or dicts, consumed lazily
+            user: Optional user identifier
+            batch_size: Documents per transaction (default: bulk_batch_size)
+            progress: Called with running totals after every committed batch
+            
+        Returns:
+            Counts per outcome, per-item 'results' in input order and duration_ms
+        """
+        return self._bulk_write(items, False, user, batch_size, progress)
+    
+    def bulk_upsert(self, items: Iterable[Union[DocumentData, Dict[str, Any]]],
+                    user: Optional[str] = None,
+                    batch_size: Optional[int] = None,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                    ) -> Dict[str, Any]:
+        """
+        Create or update many documents keyed by source_path.
+        
+        Items whose source_path matches an existing document update it like
+        update_document (a new version for changed content) or are reported
+        as 'unchanged'; all other items are created. Batching and results
+        work as in bulk_create_documents.
+        
+        Args:
+            items: Documents as DocumentData or dicts, consumed lazily
+            user: Optional user identifier
+            batch_size: Documents per transaction (default: bulk_batch_size)
+            progress: Called with running totals after every committed batch
+            
+        Returns:
+            Counts per outcome, per-item 'results' in input order and duration_ms
+        """
+        return self._bulk_write(items, True, user, batch_size, progress)
+    
+    def _bulk_write(self, items, upsert: bool, user: Optional[str],
+                    batch_size: Optional[int],
+                    progress: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+        """Write items batch by batch and collect per-item outcomes."""
+        start_time = time.time()
+        summary = {'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        results = []
+        
+        def record(outcomes):
+            for outcome in outcomes:
+                results.append(outcome)
+                summary[outcome['status']] += 1
+                summary['processed'] += 1
+        
+        for batch, invalid in self._bulk_batches(items, batch_size or self.config.bulk_batch_size, upsert):
+            record(invalid)
+            if not batch:
+                continue
+            try:
+                outcomes = self._write_batch(batch, upsert, user)
+            except Exception as e:
+                if len(batch) == 1:
+                    outcomes = [{'index': batch[0][0], 'status': 'failed', 'error': str(e)}]
+                else:
+                    logger.warning(f"Bulk batch of {len(batch)} failed ({e}), retrying items individually")
+                    outcomes = []
+                    for item in batch:
+                        try:
+                            outcomes.extend(self._write_batch([item], upsert, user))
+                        except Exception as item_error:
+                            outcomes.append({'index': item[0], 'status': 'failed', 'error': str(item_error)})
+            record(outcomes)
+            
+            if progress:
+                progress({**summary, 'elapsed_seconds': time.time() - start_time})
+        
+        # Merge the many small FTS segments written by the batches
+        if self.config.enable_fts and (summary['created'] or summary['updated']):
+            with self.engine.begin() as conn:
+                conn.execute(text("INSERT INTO documents_fts(documents_fts) VALUES('optimize')"))
+        
+        results.sort(key=lambda outcome: outcome['index'])
+        self._operation_count += summary['processed']
+        return {
+            **summary,
+            'results': results,
+            'duration_ms': int((time.time() - start_time) * 1000)
+        }
+    
+    @staticmethod
+    def _bulk_batches(items, batch_size: int, upsert: bool
+                      ) -> Iterator[Tuple[List[Tuple[int, DocumentData]], List[Dict[str, Any]]]]:
+        """
+        Validate items and group them into batches.
+        
+        Yields:
+            (batch of (index, data), failed outcomes for invalid items)
+        """
+        batch: List[Tuple[int, DocumentData]] = []
+        invalid: List[Dict[str, Any]] = []
+        paths = set()
+        for index, item in enumerate(items):
+            try:
+                data = item if isinstance(item, DocumentData) else DocumentData(**item)
+            except (ValidationError, TypeError) as e:
+                invalid.append({'index': index, 'status': 'failed', 'error': str(e)})
+                continue
+            
+            # An upsert key may only occur once per batch
+            if len(batch) >= batch_size or (upsert and data.source_path in paths):
+                yield batch, invalid
+                batch, invalid, paths = [], [], set()
+            batch.append((index, data))
+            if data.source_path:
+                paths.add(data.source_path)
+        
+        if batch or invalid:
+            yield batch, invalid
+    
+    def _write_batch(self, batch: List[Tuple[int, DocumentData]], upsert: bool,
+                     user: Optional[str]) -> List[Dict[str, Any]]:
+        """Write one batch in a single transaction."""
+        start_time = time.time()
+        outcomes = []
+        
+        with self.transaction() as session:
+            existing: Dict[str, Document] = {}
+            stored_metadata: Dict[int, List[Metadata]] = {}
+            if upsert:
+                paths = [data.source_path for _, data in batch if data.source_path]
+                if paths:
+                    existing = {
+                        doc.source_path: doc for doc in
+                        session.query(Document).options(undefer_group('content'))
+                            .filter(Document.source_path.in_(paths))
+                    }
+                if existing:
+                    for meta in session.query(Metadata).filter(
+                            Metadata.document_id.in_([doc.id for doc in existing.values()])):
+                        stored_metadata.setdefault(meta.document_id, []).append(meta)
+            
+            creates = []
+            fts_rows = []
+            updated_ids = []
+            # Each document occurs once per batch, so pending changes need not
+            # be flushed before every version lookup
+            with session.no_autoflush:
+                for index, data in batch:
+                    doc = existing.get(data.source_path) if data.source_path else None
+                    if doc is None:
+                        creates.append((index, data))
+                        continue
+                    
+                    entries = stored_metadata.get(doc.id, [])
+                    if self._is_unchanged(doc, data, entries):
+                        outcomes.append({'index': index, 'status': 'unchanged', 'id': doc.id})
+                        continue
+                    
+                    before = self._count_key(doc)
+                    self._apply_update(session, doc, data, user)
+                    self._track_document_change(session, before=before, after=doc)
+                    if data.metadata:
+                        entries = self._metadata_entries(doc.id, data.metadata)
+                    updated_ids.append(doc.id)
+                    fts_rows.append(self._fts_row(doc.id, doc.title, doc.content, entries))
+                    outcomes.append({'index': index, 'status': 'updated', 'id': doc.id})
+            
+            if creates:
+                document_ids = self._insert_documents(session, creates, user, fts_rows)
+                outcomes.extend(
+                    {'index': index, 'status': 'created', 'id': document_id}
+                    for (index, _), document_id in zip(creates, document_ids)
+                )
+            
+            if self.config.enable_fts:
+                if updated_ids:
+                    session.execute(
+                        delete(documents_fts).where(documents_fts.c.document_id.in_(updated_ids))
+                    )
+                if fts_rows:
+                    session.execute(text("""
+                        INSERT INTO documents_fts (document_id, title, content, metadata)
+                        VALUES (:doc_id, :title, :content, :metadata)
+                    """), fts_rows)
+            
+            # One audit entry for the whole batch
+            self._audit_log(
+                session,
+                operation="BULK_UPSERT" if upsert else "BULK_CREATE",
+                entity_type="document",
+                new_value={
+                    status: [o['id'] for o in outcomes if o['status'] == status]
+                    for status in ('created', 'updated')
+                },
+                user=user,
+                duration_ms=int((time.time() - start_time) * 1000)
+            )
+        
+        return outcomes
+    
+    def _insert_documents(self, session: Session, creates: List[Tuple[int, DocumentData]],
+                          user: Optional[str], fts_rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert new documents, initial versions and metadata with executemany."""
+        rows = []
+        for _, data in creates:
+            encoded = data.content.encode() if data.content else None
+            rows.append({
+                'uuid': generate_uuid(),
+                'title': data.title,
+                'type': data.type.value if isinstance(data.type, DocumentType) else data.type,
+                'status': DocumentStatus.DRAFT.value,
+                'content': data.content,
+                'content_hash': hashlib.sha256(encoded).hexdigest() if encoded else None,
+                'size_bytes': len(encoded) if encoded else None,
+                'format': data.format,
+                'language': data.language,
+                'source_path': data.source_path,
+                'access_count': 0
+            })
+        
+        if RETURNING_SUPPORTED:
+            document_ids = session.execute(
+                insert(Document.__table__).returning(
+                    Document.__table__.c.id, sort_by_parameter_order=True
+                ),
+                rows
+            ).scalars().all()
+        else:
+            session.execute(insert(Document.__table__), rows)
+            uuids = [row['uuid'] for row in rows]
+            ids_by_uuid = {}
+            for start in range(0, len(uuids), UUID_LOOKUP_CHUNK):
+                ids_by_uuid.update(session.execute(
+                    select(Document.uuid, Document.id)
+                    .where(Document.uuid.in_(uuids[start:start + UUID_LOOKUP_CHUNK]))
+                ).all())
+            document_ids = [ids_by_uuid[document_uuid] for document_uuid in uuids]
+        
+        versions = []
+        metadata = []
+        for (_, data), row, document_id in zip(creates, rows, document_ids):
+            if data.content:
+                versions.append({
+                    'document_id': document_id,
+                    'version_number': 1,
+                    'content': data.content,
+                    'content_hash': row['content_hash'],
+                    'created_by': user,
+                    'comment': "Initial version",
+                    'is_major': False,
+                    'is_keyframe': True
+                })
+            
+            entries = self._metadata_entries(document_id, data.metadata)
+            metadata.extend({
+                'document_id': document_id,
+                'key': meta.key,
+                'value': meta.value,
+                'value_type': meta.value_type,
+                'is_searchable': True,
+                'is_public': True
+            } for meta in entries)
+            
+            session.info.setdefault('document_changes', []).append(
+                (document_id, None, (row['type'], row['status']))
+            )
+            fts_rows.append(self._fts_row(document_id, data.title, data.content, entries))
+        
+        if versions:
+            session.execute(insert(DocumentVersion.__table__), versions)
+        if metadata:
+            session.execute(insert(Metadata.__table__), metadata)
+        return document_ids
+    
+    @staticmethod
+    def _metadata_entries(document_id: int, values: Dict[str, Any]) -> List[Metadata]:
+        """Transient metadata rows holding the stored form of values."""
+        entries = []
+        for key, value in values.items():
+            meta = Metadata(document_id=document_id, key=key)
+            meta.set_typed_value(value)
+            entries.append(meta)
+        return entries
+    
+    @staticmethod
+    def _is_unchanged(doc: Document, data: DocumentData, entries: List[Metadata]) -> bool:
+        """Whether applying data to doc (with stored metadata entries) would change nothing."""
+        doc_type = data.type.value if isinstance(data.type, DocumentType) else data.type
+        if (doc.title, doc.type, doc.format, doc.language) != \
+                (data.title, doc_type, data.format, data.language):
+            return False
+        if data.content and data.content != doc.content:
+            return False
+        if data.metadata:
+            return {m.key: m.get_typed_value() for m in entries} == data.metadata
+        return True
+    
+    @staticmethod
+    def _fts_row(document_id: int, title: str, content: Optional[str],
+                 entries: List[Metadata]) -> Dict[str, Any]:
+        """FTS parameters for a document, as written by _update_search_index."""
+        return {
+            'doc_id': document_id,
+            'title': title,
+            'content': content or '',
+            'metadata': ' '.join(f"{m.key}:{m.value}" for m in entries)
+        }
     
     # ==================== VERSION OPERATIONS ====================
     
     def get_versions(self, document_id: int) -> List[Dict[str, Any]]:
         """Get all versions of a document."""
-        with self.get_session() as session:
+        with self.read_session() as session:
             versions = session.query(DocumentVersion)\
                 .filter(DocumentVersion.document_id == document_id)\
                 .order_by(DocumentVersion.version_number.desc()).all()
@@ -554,14 +1099,14 @@ class LocalStorageSystem:
     
     def get_version(self, document_id: int, version_number: int) -> Optional[Dict[str, Any]]:
         """Get a specific version of a document."""
-        with self.get_session() as session:
+        with self.read_session() as session:
             version = session.query(DocumentVersion)\
                 .filter(DocumentVersion.document_id == document_id,
                        DocumentVersion.version_number == version_number).first()
             
             if version:
                 result = version.to_dict()
-                result['content'] = version.content
+                result['content'] = self._version_content(session, version)
                 self._operation_count += 1
                 return result
             
@@ -585,25 +1130,251 @@ class LocalStorageSystem:
                 raise ValueError(f"Document {document_id} not found")
             
             # Create a new version with restored content
-            current_version = session.query(func.max(DocumentVersion.version_number))\
-                .filter(DocumentVersion.document_id == document_id).scalar()
-            
-            new_version = DocumentVersion(
-                document_id=document_id,
-                version_number=current_version + 1,
-                content=version.content,
-                content_hash=version.content_hash,
-                created_by=user,
+            content = self._version_content(session, version)
+            self._add_version(
+                session, doc, content,
+                user=user,
                 comment=f"Restored from version {version_number}"
             )
-            session.add(new_version)
             
             # Update document content
-            doc.content = version.content
+            doc.content = content
+            self._track_document_change(session, before=self._count_key(doc), after=doc)
             
             self._operation_count += 1
             return doc.to_dict()
     
+    def _add_version(self, session: Session, doc: Document, content: str,
+                    user: Optional[str] = None,
+                    comment: Optional[str] = None) -> DocumentVersion:
+        """
+        Append a version of a document.
+        
+        The version is stored as a delta against the latest version when the
+        document's current content is that version and the delta chain since
+        the last keyframe is shorter than version_keyframe_interval.
+        Must be called before doc.content is replaced.
+        """
+        latest = session.query(DocumentVersion)\
+            .filter(DocumentVersion.document_id == doc.id)\
+            .order_by(DocumentVersion.version_number.desc()).first()
+        version_number = latest.version_number + 1 if latest else 1
+        
+        version = DocumentVersion(
+            document_id=doc.id,
+            version_number=version_number,
+            content_hash=hashlib.sha256(content.encode()).hexdigest(),
+            created_by=user,
+            comment=comment,
+            is_major=version_number > 1 and version_number % 10 == 0
+        )
+        
+        base = None
+        if latest is not None and doc.content and latest.content_hash == doc.content_hash:
+            last_keyframe = session.query(func.max(DocumentVersion.version_number))\
+                .filter(DocumentVersion.document_id == doc.id,
+                       DocumentVersion.is_keyframe.is_(True)).scalar() or 0
+            if latest.version_number - last_keyframe + 1 < self.config.version_keyframe_interval:
+                base = latest
+        
+        self._encode_version(version, content, base, doc.content if base else None)
+        session.add(version)
+        return version
+    
+    @staticmethod
+    def _encode_version(version: DocumentVersion, content: str,
+                       base: Optional[DocumentVersion] = None,
+                       base_content: Optional[str] = None) -> bool:
+        """
+        Store content in a version row as a delta against base or as a keyframe.
+        
+        A keyframe is written when there is no base or the delta would not be
+        smaller than the content itself.
+        
+        Returns:
+            True if the version was stored as a delta
+        """
+        version.diff_from_previous = None
+        if base is not None:
+            delta = calculate_delta(base_content, content)
+            if len(delta) < len(content.encode()):
+                version.content = ''
+                version.delta = delta
+                version.base_version = base.version_number
+                version.is_keyframe = False
+                return True
+        
+        version.content = content
+        version.delta = None
+        version.base_version = None
+        version.is_keyframe = True
+        return False
+    
+    def _version_content(self, session: Session, version: DocumentVersion) -> str:
+        """
+        Reconstruct the full content of a version.
+        
+        Loads the version's nearest keyframe and the deltas after it in one
+        query and applies the deltas along the base_version chain.
+        
+        Raises:
+            ValueError: If the chain is broken or the result fails its hash check
+        """
+        if version.is_keyframe:
+            return version.content
+        
+        document_id = version.document_id
+        keyframe_number = session.query(func.max(DocumentVersion.version_number))\
+            .filter(DocumentVersion.document_id == document_id,
+                   DocumentVersion.is_keyframe.is_(True),
+                   DocumentVersion.version_number < version.version_number).scalar()
+        rows = {
+            row.version_number: row
+            for row in session.query(DocumentVersion).options(undefer_group('content'))
+                .filter(DocumentVersion.document_id == document_id,
+                       DocumentVersion.version_number >= (keyframe_number or 0),
+                       DocumentVersion.version_number <= version.version_number)
+        }
+        
+        chain = []
+        current = version
+        while not current.is_keyframe:
+            chain.append(current.delta)
+            current = rows.get(current.base_version)
+            if current is None:
+                raise ValueError(
+                    f"Version {version.version_number} of document {document_id} "
+                    f"has a broken delta chain"
+                )
+        
+        content = current.content
+        for delta in reversed(chain):
+            content = apply_delta(content, delta)
+        
+        if hashlib.sha256(content.encode()).hexdigest() != version.content_hash:
+            logger.error(f"Hash mismatch reconstructing version {version.version_number} "
+                         f"of document {document_id}")
+            raise ValueError(
+                f"Version {version.version_number} of document {document_id} failed integrity check"
+            )
+        return content
+    
+    # ==================== VERSION COMPACTION ====================
+    
+    def compact_versions(self, document_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Rewrite stored versions as periodic keyframes plus line deltas.
+        
+        This is also the row migration for databases written before delta
+        storage: their full-content versions (and legacy unified diffs) are
+        converted in place. Each document is compacted in its own transaction
+        and every reconstructed version is verified against its content hash,
+        so a failure leaves that document untouched. Run optimize() afterwards
+        to return the freed pages to the file system.
+        
+        Args:
+            document_id: Compact only this document; by default every document
+                with more keyframes than the keyframe interval requires
+            
+        Returns:
+            Counts of documents, versions and stored bytes before/after
+        """
+        interval = self.config.version_keyframe_interval
+        with self.read_session() as session:
+            if document_id is not None:
+                candidates = session.query(DocumentVersion.document_id, func.count())\
+                    .filter(DocumentVersion.document_id == document_id)\
+                    .group_by(DocumentVersion.document_id).all()
+            else:
+                keyframes = func.sum(DocumentVersion.is_keyframe.is_(True))
+                legacy_diffs = func.count(DocumentVersion.diff_from_previous)
+                candidates = session.query(DocumentVersion.document_id, func.count())\
+                    .group_by(DocumentVersion.document_id)\
+                    .having(or_(keyframes > (func.count() + interval - 1) // interval,
+                                legacy_diffs > 0)).all()
+        
+        stats = {'documents': 0, 'versions': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        for candidate_id, version_count in candidates:
+            # Documents that were already compacted at this size cannot improve
+            if document_id is None and self._compacted_versions.get(candidate_id) == version_count:
+                continue
+            try:
+                with self.transaction() as session:
+                    self._compact_document(session, candidate_id, stats)
+            except Exception as e:
+                logger.error(f"Version compaction failed for document {candidate_id}: {e}")
+                stats['failed'] += 1
+                continue
+            self._compacted_versions[candidate_id] = version_count
+            stats['documents'] += 1
+        
+        if stats['documents']:
+            logger.info(
+                f"Compacted {stats['versions']} versions of {stats['documents']} documents: "
+                f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+            )
+        return stats
+    
+    def _compact_document(self, session: Session, document_id: int, stats: Dict[str, int]):
+        """Re-encode all versions of one document in version order."""
+        interval = self.config.version_keyframe_interval
+        versions = session.query(DocumentVersion).options(undefer_group('content'))\
+            .filter(DocumentVersion.document_id == document_id)\
+            .order_by(DocumentVersion.version_number).all()
+        
+        previous = None
+        previous_content = None
+        depth = 0
+        for version in versions:
+            # Earlier rows are already re-encoded; both forms reconstruct the same text
+            if not version.is_keyframe and previous is not None \
+                    and version.base_version == previous.version_number:
+                content = apply_delta(previous_content, version.delta)
+            else:
+                content = self._version_content(session, version)
+            if hashlib.sha256(content.encode()).hexdigest() != version.content_hash:
+                raise ValueError(f"Version {version.version_number} failed integrity check")
+            
+            stats['bytes_before'] += version.stored_size + len(version.diff_from_previous or '')
+            base = previous if previous is not None and depth + 1 < interval else None
+            depth = depth + 1 if self._encode_version(version, content, base, previous_content) else 0
+            stats['bytes_after'] += version.stored_size
+            stats['versions'] += 1
+            
+            previous = version
+            previous_content = content
+    
+    def start_compaction(self, interval: Optional[float] = None):
+        """
+        Run compact_versions periodically in a background thread.
+        
+        Args:
+            interval: Seconds between runs (default: version_compaction_interval)
+        """
+        if self._compaction_thread is not None:
+            return
+        interval = interval or self.config.version_compaction_interval
+        self._compaction_stop.clear()
+        
+        def run():
+            while not self._compaction_stop.wait(interval):
+                try:
+                    self.compact_versions()
+                except Exception as e:
+                    logger.error(f"Background version compaction failed: {e}")
+        
+        self._compaction_thread = threading.Thread(
+            target=run, name="version-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+    
+    def stop_compaction(self):
+        """Stop the background compaction thread."""
+        if self._compaction_thread is not None:
+            self._compaction_stop.set()
+            self._compaction_thread.join()
+            self._compaction_thread = None
+    
     # ==================== SEARCH OPERATIONS ====================
     
     def search(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
@@ -621,12 +1392,13 @@ class LocalStorageSystem:
             logger.warning("Full-text search is disabled")
             return []
         
-        with self.get_session() as session:
+        with self.read_session() as session:
             # Execute FTS query
+            # Snippets instead of full highlighted content keep results small
             results = session.execute(text("""
-                SELECT d.*, 
+                SELECT d.id, d.uuid, d.title, d.type,
                        highlight(documents_fts, 1, '<mark>', '</mark>') as title_highlight,
-                       highlight(documents_fts, 2, '<mark>', '</mark>') as content_highlight,
+                       snippet(documents_fts, 2, '<mark>', '</mark>', '...', 30) as content_highlight,
                        rank
                 FROM documents_fts f
                 JOIN documents d ON f.document_id = d.id
@@ -648,7 +1420,7 @@ class LocalStorageSystem:
                     'title': row.title,
                     'type': row.type,
                     'title_highlight': row.title_highlight,
-                    'content_highlight': row.content_highlight[:200] + '...' if len(row.content_highlight) > 200 else row.content_highlight,
+                    'content_highlight': row.content_highlight,
                     'score': abs(row.rank)  # FTS5 rank is negative
                 }
                 documents.append(doc_dict)
@@ -704,12 +1476,14 @@ class LocalStorageSystem:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get storage system statistics."""
-        with self.get_session() as session:
+        with self.read_session() as session:
             stats = {
                 'total_documents': session.query(Document).count(),
                 'active_documents': session.query(Document)\
                     .filter(Document.status == DocumentStatus.ACTIVE).count(),
                 'total_versions': session.query(DocumentVersion).count(),
+                'keyframe_versions': session.query(DocumentVersion)\
+                    .filter(DocumentVersion.is_keyframe.is_(True)).count(),
                 'total_metadata': session.query(Metadata).count(),
                 'database_size': os.path.getsize(self.config.db_path) if os.path.exists(self.config.db_path) else 0,
                 'operations_count': self._operation_count,
@@ -734,6 +1508,9 @@ class LocalStorageSystem:
     
     def close(self):
         """Close storage system and cleanup resources."""
+        self.stop_compaction()
         self.Session.remove()
-        self.engine.dispose()
+        # Final flush of access counts before the engine may close
+        self.access_tracker.close()
+        self.storage_engine.release()
         logger.info("Storage system closed")
\ No newline at end of file
@@ -6,6 +6,7 @@ Defines the database schema for documents, versions, metadata, and indexes.
 
 import json
 import hashlib
+from dataclasses import dataclass, fields
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from enum import Enum
@@ -14,7 +15,8 @@ from sqlalchemy import (
     Column, String, Integer, Text, DateTime, Boolean, 
     ForeignKey, Index, JSON, Float, LargeBinary, UniqueConstraint
 )
-from sqlalchemy.orm import declarative_base, relationship, validates
+from sqlalchemy import select
+from sqlalchemy.orm import declarative_base, relationship, validates, deferred
 from sqlalchemy.sql import func
 
 Base = declarative_base()
@@ -54,8 +56,8 @@ class Document(Base):
     type = Column(String(50), nullable=False, default=DocumentType.OTHER)
     status = Column(String(20), nullable=False, default=DocumentStatus.DRAFT)
     
-    # Content and structure
-    content = Column(Text, nullable=True)
+    # Content and structure; content is only loaded when accessed
+    content = deferred(Column(Text, nullable=True), group='content')
     content_hash = Column(String(64), nullable=True, index=True)
     format = Column(String(20), default='markdown')
     language = Column(String(10), default='en')
@@ -88,6 +90,7 @@ class Document(Base):
         Index('idx_document_type_status', 'type', 'status'),
         Index('idx_document_created', 'created_at'),
         Index('idx_document_updated', 'updated_at'),
+        Index('idx_document_source_path', 'source_path'),
     )
     
     @validates('content')
@@ -99,25 +102,11 @@ class Document(Base):
         return content
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert document to dictionary representation."""
-        return {
-            'id': self.id,
-            'uuid': self.uuid,
-            'title': self.title,
-            'type': self.type,
-            'status': self.status,
-            'format': self.format,
-            'language': self.language,
-            'file_path': self.file_path,
-            'source_path': self.source_path,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'access_count': self.access_count,
-            'size_bytes': self.size_bytes,
-            'quality_score': self.quality_score,
-            'completeness_score': self.completeness_score,
-            'version_count': self.versions.count() if self.versions else 0
-        }
+        """Convert document to dictionary representation (without content)."""
+        return DocumentSummary(
+            **{name: getattr(self, name) for name in DocumentSummary.column_names()},
+            version_count=self.versions.count() if self.versions else 0
+        ).to_dict()
 
 
 class DocumentVersion(Base):
@@ -128,10 +117,15 @@ class DocumentVersion(Base):
     document_id = Column(Integer, ForeignKey('documents.id'), nullable=False)
     version_number = Column(Integer, nullable=False)
     
-    # Version content
-    content = Column(Text, nullable=False)
+    # Version content: keyframes store the full text, delta versions store
+    # an empty string plus a compressed delta against base_version
+    content = deferred(Column(Text, nullable=False), group='content')
     content_hash = Column(String(64), nullable=False, index=True)
-    diff_from_previous = Column(Text, nullable=True)  # JSON diff for efficiency
+    # Legacy unified diff, no longer written
+    diff_from_previous = deferred(Column(Text, nullable=True), group='content')
+    is_keyframe = Column(Boolean, default=True)
+    base_version = Column(Integer, nullable=True)
+    delta = deferred(Column(LargeBinary, nullable=True), group='content')
     
     # Version metadata
     created_at = Column(DateTime, default=func.now(), nullable=False)
@@ -158,7 +152,80 @@ class DocumentVersion(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'created_by': self.created_by,
             'comment': self.comment,
-            'is_major': self.is_major
+            'is_major': self.is_major,
+            'is_keyframe': self.is_keyframe
+        }
+    
+    @property
+    def stored_size(self) -> int:
+        """Bytes used by the stored content or delta."""
+        return len(self.content.encode()) + len(self.delta or b'')
+
+
+@dataclass(frozen=True)
+class DocumentSummary:
+    """
+    Document fields without content, for listings.
+    
+    Queries selecting summary_columns() never read the content column, so
+    their cost does not depend on document size.
+    """
+    id: int
+    uuid: str
+    title: str
+    type: str
+    status: str
+    format: Optional[str]
+    language: Optional[str]
+    file_path: Optional[str]
+    source_path: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    access_count: Optional[int]
+    size_bytes: Optional[int]
+    quality_score: Optional[float]
+    completeness_score: Optional[float]
+    version_count: int = 0
+    
+    @classmethod
+    def column_names(cls) -> List[str]:
+        """Document columns held by a summary."""
+        return [field.name for field in fields(cls) if field.name != 'version_count']
+    
+    @classmethod
+    def summary_columns(cls) -> List[Any]:
+        """Columns to select for summaries, including a version count subquery."""
+        version_count = select(func.count(DocumentVersion.id))\
+            .where(DocumentVersion.document_id == Document.id)\
+            .correlate(Document).scalar_subquery()
+        return [getattr(Document, name) for name in cls.column_names()] + \
+            [version_count.label('version_count')]
+    
+    @classmethod
+    def from_row(cls, row) -> 'DocumentSummary':
+        """Build a summary from a row selected with summary_columns()."""
+        mapping = row._mapping
+        return cls(**{field.name: mapping[field.name] for field in fields(cls)})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert summary to dictionary representation."""
+        return {
+            'id': self.id,
+            'uuid': self.uuid,
+            'title': self.title,
+            'type': self.type,
+            'status': self.status,
+            'format': self.format,
+            'language': self.language,
+            'file_path': self.file_path,
+            'source_path': self.source_path,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'access_count': self.access_count,
+            'size_bytes': self.size_bytes,
+            'quality_score': self.quality_score,
+            'completeness_score': self.completeness_score,
+            'version_count': self.version_count
         }
 
 
@@ -8,22 +8,24 @@ maintaining compatibility with the existing API.
 Performance optimizations:
 - Direct SQLite3 queries for reads
 - Prepared statements with parameter binding
-- Connection pooling with thread-local storage
-- Result caching with LRU cache
+- Shared StorageEngine: read-only connection pool and group-committed writes
+- Shared document cache, invalidated by every write to the database
 - Batch operations
 - WAL mode with optimal pragmas
+
+Documents use the same schema as LocalStorageSystem, so both can work on
+one database file.
 """
 
-import sqlite3
-import json
+import hashlib
 import time
-import threading
-from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
-from functools import lru_cache
-from contextlib import contextmanager
+import uuid
+from typing import Optional, Dict, Any, List
 import logging
 
+from .engine import get_storage_engine
+from .models import DocumentStatus, DocumentType
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,133 +42,48 @@ class OptimizedStorage:
     """
     
     def __init__(self, db_path: str = "./data/devdocai.db"):
-        """Initialize optimized storage with connection pool."""
-        self.db_path = str(Path(db_path).resolve())
-        self._local = threading.local()
-        self._cache = {}
-        self._cache_hits = 0
-        self._cache_misses = 0
-        
-        # Ensure database directory exists
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Initialize database with optimized settings
-        self._init_database()
+        """Initialize optimized storage on the shared engine."""
+        self.db_path = db_path
+        self.engine = get_storage_engine(db_path)
         
         # Pre-compile frequently used queries
         self._prepare_statements()
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get thread-local connection with optimal settings."""
-        if not hasattr(self._local, 'conn'):
-            conn = sqlite3.connect(
-                self.db_path,
-                check_same_thread=False,
-                isolation_level=None,  # Autocommit mode for reads
-                timeout=30.0
-            )
-            
-            # Enable optimizations
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=10000")
-            conn.execute("PRAGMA page_size=4096")
-            conn.execute("PRAGMA temp_store=MEMORY")
-            conn.execute("PRAGMA mmap_size=268435456")  # 256MB
-            conn.execute("PRAGMA optimize")
-            
-            # Row factory for dict results
-            conn.row_factory = sqlite3.Row
-            
-            self._local.conn = conn
-            
-        return self._local.conn
-    
-    def _init_database(self):
-        """Initialize database with optimized schema."""
-        conn = self._get_connection()
-        
-        # Create optimized documents table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                uuid TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                content TEXT,
-                type TEXT DEFAULT 'OTHER',
-                format TEXT DEFAULT 'markdown',
-                language TEXT DEFAULT 'en',
-                status TEXT DEFAULT 'DRAFT',
-                source_path TEXT,
-                content_hash TEXT,
-                created_at TIMESTAMP DEFAULT (datetime('now')),
-                updated_at TIMESTAMP DEFAULT (datetime('now')),
-                deleted_at TIMESTAMP
-            )
-        """)
-        
-        # Create optimized indexes
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_uuid ON documents(uuid)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_type ON documents(type)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_updated ON documents(updated_at)")
-        
-        # Create metadata table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS metadata (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                document_id INTEGER NOT NULL,
-                key TEXT NOT NULL,
-                value TEXT,
-                FOREIGN KEY (document_id) REFERENCES documents(id),
-                UNIQUE(document_id, key)
-            )
-        """)
-        
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_doc ON metadata(document_id)")
-        
-        conn.commit()
-    
     def _prepare_statements(self):
         """Pre-compile frequently used SQL statements."""
         self._queries = {
-            'get_by_id': "SELECT * FROM documents WHERE id = ? AND deleted_at IS NULL LIMIT 1",
-            'get_by_uuid': "SELECT * FROM documents WHERE uuid = ? AND deleted_at IS NULL LIMIT 1",
             'insert_doc': """
-                INSERT INTO documents (uuid, title, content, type, format, language, status, source_path, content_hash, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+                INSERT INTO documents (uuid, title, content, type, format, language, status,
+                                       source_path, content_hash, size_bytes, access_count,
+                                       created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, datetime('now'), datetime('now'))
+            """,
+            'insert_version': """
+                INSERT INTO document_versions (document_id, version_number, content, content_hash,
+                                               created_at, comment, is_major, is_keyframe)
+                VALUES (?, 1, ?, ?, datetime('now'), 'Initial version', 0, 1)
             """,
             'update_doc': """
                 UPDATE documents 
-                SET title = ?, content = ?, updated_at = datetime('now')
-                WHERE id = ? AND deleted_at IS NULL
+                SET title = ?, content = ?, content_hash = ?, size_bytes = ?,
+                    updated_at = datetime('now')
+                WHERE id = ? AND status != 'deleted'
             """,
             'delete_doc': """
                 UPDATE documents 
-                SET deleted_at = datetime('now')
-                WHERE id = ? AND deleted_at IS NULL
+                SET status = 'deleted', updated_at = datetime('now')
+                WHERE id = ? AND status != 'deleted'
             """,
             'list_docs': """
                 SELECT id, uuid, title, type, status, created_at, updated_at
                 FROM documents 
-                WHERE deleted_at IS NULL
+                WHERE status != 'deleted'
                 ORDER BY updated_at DESC
                 LIMIT ? OFFSET ?
             """,
-            'count_docs': "SELECT COUNT(*) as count FROM documents WHERE deleted_at IS NULL"
+            'count_docs': "SELECT COUNT(*) FROM documents WHERE status != 'deleted'"
         }
     
-    @lru_cache(maxsize=10000)
-    def _cached_get(self, doc_id: int) -> Optional[Dict[str, Any]]:
-        """Cached document retrieval by ID."""
-        conn = self._get_connection()
-        cursor = conn.execute(self._queries['get_by_id'], (doc_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            return dict(row)
-        return None
-    
     def get_document(self, doc_id: Any) -> Optional[Dict[str, Any]]:
         """
         Ultra-fast document retrieval.
@@ -177,20 +94,14 @@ class OptimizedStorage:
         Returns:
             Document dict or None
         """
-        # Convert to int if possible for cache key
         try:
-            doc_id = int(doc_id)
-            # Try cache first
-            return self._cached_get(doc_id)
+            doc = self.engine.fetch_document(document_id=int(doc_id))
         except (ValueError, TypeError):
-            # UUID lookup (not cached)
-            conn = self._get_connection()
-            cursor = conn.execute(self._queries['get_by_uuid'], (str(doc_id),))
-            row = cursor.fetchone()
-            
-            if row:
-                return dict(row)
+            doc = self.engine.fetch_document(uuid=str(doc_id))
+        
+        if doc is None or doc['status'] == DocumentStatus.DELETED.value:
             return None
+        return doc
     
     def create_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -202,36 +113,34 @@ class OptimizedStorage:
         Returns:
             Created document with ID
         """
-        import uuid
-        import hashlib
-        
         # Generate UUID and hash
         doc_uuid = str(uuid.uuid4())
-        content = data.get('content', '')
+        content = data.get('content') or ''
         content_hash = hashlib.sha256(content.encode()).hexdigest() if content else None
-        
-        # Insert document
-        conn = self._get_connection()
-        cursor = conn.execute(
-            self._queries['insert_doc'],
-            (
-                doc_uuid,
-                data.get('title', 'Untitled'),
-                content,
-                data.get('type', 'OTHER'),
-                data.get('format', 'markdown'),
-                data.get('language', 'en'),
-                'DRAFT',
-                data.get('source_path'),
-                content_hash
+        doc_type = data.get('type', DocumentType.OTHER)
+        
+        def insert(conn):
+            cursor = conn.execute(
+                self._queries['insert_doc'],
+                (
+                    doc_uuid,
+                    data.get('title', 'Untitled'),
+                    content,
+                    doc_type.value if isinstance(doc_type, DocumentType) else doc_type,
+                    data.get('format', 'markdown'),
+                    data.get('language', 'en'),
+                    DocumentStatus.DRAFT.value,
+                    data.get('source_path'),
+                    content_hash,
+                    len(content.encode())
+                )
             )
-        )
-        
-        doc_id = cursor.lastrowid
-        conn.commit()
+            if content:
+                conn.execute(self._queries['insert_version'],
+                             (cursor.lastrowid, content, content_hash))
+            return cursor.lastrowid
         
-        # Clear cache for this document
-        self._cached_get.cache_clear()
+        doc_id = self.engine.execute(insert)
         
         return {
             'id': doc_id,
@@ -252,22 +161,21 @@ class OptimizedStorage:
         Returns:
             Success boolean
         """
-        conn = self._get_connection()
-        cursor = conn.execute(
-            self._queries['update_doc'],
-            (
-                data.get('title', 'Untitled'),
-                data.get('content', ''),
-                doc_id
-            )
+        content = data.get('content') or ''
+        rowcount = self.engine.execute(
+            lambda conn: conn.execute(
+                self._queries['update_doc'],
+                (
+                    data.get('title', 'Untitled'),
+                    content,
+                    hashlib.sha256(content.encode()).hexdigest() if content else None,
+                    len(content.encode()),
+                    doc_id
+                )
+            ).rowcount,
+            invalidate=[doc_id]
         )
-        
-        conn.commit()
-        
-        # Clear cache for this document
-        self._cached_get.cache_clear()
-        
-        return cursor.rowcount > 0
+        return rowcount > 0
     
     def delete_document(self, doc_id: int) -> bool:
         """
@@ -279,14 +187,11 @@ class OptimizedStorage:
         Returns:
             Success boolean
         """
-        conn = self._get_connection()
-        cursor = conn.execute(self._queries['delete_doc'], (doc_id,))
-        conn.commit()
-        
-        # Clear cache
-        self._cached_get.cache_clear()
-        
-        return cursor.rowcount > 0
+        rowcount = self.engine.execute(
+            lambda conn: conn.execute(self._queries['delete_doc'], (doc_id,)).rowcount,
+            invalidate=[doc_id]
+        )
+        return rowcount > 0
     
     def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
@@ -299,9 +204,10 @@ class OptimizedStorage:
         Returns:
             List of document summaries
         """
-        conn = self._get_connection()
-        cursor = conn.execute(self._queries['list_docs'], (limit, offset))
-        return [dict(row) for row in cursor.fetchall()]
+        with self.engine.reader() as conn:
+            cursor = conn.execute(self._queries['list_docs'], (limit, offset))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
     def batch_get(self, doc_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
         """
@@ -316,49 +222,34 @@ class OptimizedStorage:
         if not doc_ids:
             return []
         
-        # Use cache for single lookups, batch for many
-        if len(doc_ids) <= 5:
-            return [self.get_document(doc_id) for doc_id in doc_ids]
-        
-        # Batch query
-        placeholders = ','.join('?' * len(doc_ids))
-        query = f"""
-            SELECT * FROM documents 
-            WHERE id IN ({placeholders}) AND deleted_at IS NULL
-        """
-        
-        conn = self._get_connection()
-        cursor = conn.execute(query, doc_ids)
-        
-        # Build result dict
-        docs_dict = {row['id']: dict(row) for row in cursor.fetchall()}
+        docs_dict = {
+            doc_id: doc for doc_id, doc in self.engine.fetch_documents(doc_ids).items()
+            if doc['status'] != DocumentStatus.DELETED.value
+        }
         
         # Return in order requested
         return [docs_dict.get(doc_id) for doc_id in doc_ids]
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics."""
-        conn = self._get_connection()
-        cursor = conn.execute(self._queries['count_docs'])
-        count = cursor.fetchone()['count']
+        """Get storage statistics (cache figures are engine-wide)."""
+        with self.engine.reader() as conn:
+            count = conn.execute(self._queries['count_docs']).fetchone()[0]
         
-        cache_info = self._cached_get.cache_info()
+        cache_stats = self.engine.document_cache.get_stats()
         
         return {
             'document_count': count,
-            'cache_hits': cache_info.hits,
-            'cache_misses': cache_info.misses,
-            'cache_size': cache_info.currsize,
-            'cache_hit_rate': cache_info.hits / (cache_info.hits + cache_info.misses) if cache_info.misses > 0 else 1.0
+            'cache_hits': cache_stats['hits'],
+            'cache_misses': cache_stats['misses'],
+            'cache_size': cache_stats['size'],
+            'cache_hit_rate': cache_stats['hit_rate'] if cache_stats['misses'] > 0 else 1.0
         }
     
     def close(self):
-        """Close connection and clear cache."""
-        if hasattr(self._local, 'conn'):
-            self._local.conn.close()
-            del self._local.conn
-        
-        self._cached_get.cache_clear()
+        """Release the shared engine."""
+        if self.engine is not None:
+            self.engine.release()
+            self.engine = None
 
 
 # Fast-path adapter for backward compatibility
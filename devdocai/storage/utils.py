@@ -12,6 +12,7 @@ import json
 import hashlib
 import difflib
 import shutil
+import zlib
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 import logging
@@ -127,6 +128,54 @@ def apply_diff(content: str, diff_json: str) -> str:
     return content
 
 
+def calculate_delta(old_content: str, new_content: str) -> bytes:
+    """
+    Calculate a compact line delta that rebuilds new_content from old_content.
+    
+    The delta is a zlib-compressed JSON list of operations: [start, end]
+    copies lines start..end-1 of the base, a string inserts new text.
+    Deleted lines are simply not copied.
+    
+    Args:
+        old_content: Base content
+        new_content: Target content
+        
+    Returns:
+        Compressed delta for apply_delta
+    """
+    old_lines = old_content.splitlines(keepends=True)
+    new_lines = new_content.splitlines(keepends=True)
+    
+    operations: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([i1, i2])
+        elif j2 > j1:
+            operations.append(''.join(new_lines[j1:j2]))
+    
+    return zlib.compress(json.dumps(operations, separators=(',', ':')).encode(), 9)
+
+
+def apply_delta(content: str, delta: bytes) -> str:
+    """
+    Apply a delta from calculate_delta to its base content.
+    
+    Args:
+        content: Base content the delta was calculated against
+        delta: Compressed delta
+        
+    Returns:
+        Reconstructed content
+    """
+    lines = content.splitlines(keepends=True)
+    operations = json.loads(zlib.decompress(delta))
+    return ''.join(
+        ''.join(lines[operation[0]:operation[1]]) if isinstance(operation, list) else operation
+        for operation in operations
+    )
+
+
 def tokenize_content(content: str, max_tokens: int = 10000) -> str:
     """
     Tokenize content for full-text search.
@@ -230,6 +230,20 @@ class TestCaching:
         print(f"  Average hit time: {avg_cache_time*1000:.3f}ms")
         print(f"  Cache stats: {stats}")
     
+    @pytest.mark.asyncio
+    async def test_persistent_cache_shared_between_instances(self, tmp_path):
+        """Responses cached by one instance are read lazily by the next."""
+        first = CacheManager(enable_semantic=True, cache_dir=tmp_path)
+        await first.cache_response("Write a changelog", {"content": "Changelog"})
+        
+        second = CacheManager(enable_semantic=True, cache_dir=tmp_path)
+        assert len(second.semantic_cache.cache) == 0
+        assert await second.get_response("Write a changelog") == {"content": "Changelog"}
+        assert second.get_stats()['semantic']['persistent_hits'] == 1
+        
+        first.semantic_cache.close()
+        second.semantic_cache.close()
+    
     @pytest.mark.asyncio
     async def test_semantic_cache_matching(self):
         """Test semantic similarity matching in cache."""
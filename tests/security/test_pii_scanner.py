@@ -0,0 +1,176 @@
+"""
+Tests for the single-pass multi-pattern PII scanner.
+
+Verifies that the combined scan, chunked scans, the process backend and
+UnifiedPIIDetector return exactly what scanning each pattern separately
+returns.
+"""
+
+import asyncio
+import random
+import re
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from devdocai.security import pii_detector_unified
+from devdocai.security.pii_detector_unified import (
+    PIIConfig,
+    PIIOperationMode,
+    PIIScanBackend,
+    UnifiedPIIDetector
+)
+from devdocai.security.pii_scanner import EMAIL_TRIGGER, MultiPatternScanner, ProcessScanPool
+
+
+PII_TEXT = (
+    "Contact john.doe@example.com or (555) 123-4567 about the invoice. "
+    "SSN 123-45-6789, card 4532-1234-5678-9012 and 4111 1111 1111 1111. "
+    "Server ip 10.0.0.1 since 12/25/1990 at 42 Main Street, passport "
+    "AB1234567, plate ABC-123, account 123456789012, +1 555.123.4567.\n"
+)
+
+
+@pytest.fixture
+def detector():
+    return UnifiedPIIDetector(PIIConfig(mode=PIIOperationMode.BASIC))
+
+
+@pytest.fixture
+def scanner(detector):
+    return detector._scanner
+
+
+def _per_pattern(detector, text):
+    return [
+        (match.start(), match.end(), pii_type, match.group())
+        for pii_type, info in detector._pii_patterns.items()
+        for match in info['pattern'].finditer(text)
+    ]
+
+
+class TestMultiPatternScanner:
+    """Test suite for MultiPatternScanner."""
+
+    def test_matches_per_pattern_scan(self, detector, scanner):
+        """One pass finds exactly the per-pattern finditer matches."""
+        text = "Plain prose without identifiers. " * 20 + PII_TEXT * 3
+        assert scanner.scan(text) == _per_pattern(detector, text)
+
+    def test_random_text(self, detector, scanner):
+        """Dense random text with digits, separators and '@' matches too."""
+        rng = random.Random(7)
+        alphabet = "0123456789@.-_ ()+/\nabcABZ StreetRdcom"
+        for _ in range(500):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            assert scanner.scan(text) == _per_pattern(detector, text), repr(text)
+
+    @pytest.mark.parametrize('chunk_count', [2, 5, 37])
+    def test_chunk_boundaries_lose_nothing(self, detector, scanner, chunk_count):
+        """Matches straddling chunk boundaries are found exactly once."""
+        text = PII_TEXT * 4
+        size = len(text)
+        bounds = [(i * size // chunk_count, (i + 1) * size // chunk_count)
+                  for i in range(chunk_count)]
+        hits = [hit for start, end in bounds for hit in scanner.scan_range(text, start, end)]
+        assert scanner.resolve(hits) == _per_pattern(detector, text)
+
+    def test_email_trigger(self):
+        """Long local parts are covered by the run-based email trigger."""
+        scanner = MultiPatternScanner(
+            {'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[a-z]{2,}\b')},
+            {'email': EMAIL_TRIGGER}
+        )
+        local = 'a' * 200
+        assert scanner.scan(f"mail {local}@example.com now") == [
+            (5, 5 + len(local) + 12, 'email', f"{local}@example.com")
+        ]
+
+
+class TestDetectorScanning:
+    """Test suite for UnifiedPIIDetector scanning paths."""
+
+    def test_luhn_validation_applied(self, detector):
+        """Luhn-valid card numbers get a higher confidence."""
+        matches = detector._detect_pii_basic("card 4111 1111 1111 1111 and 4532-1234-5678-9012")
+        cards = {m.text: m.confidence for m in matches if m.pii_type == 'credit_card'}
+        assert cards['4111 1111 1111 1111'] > cards['4532-1234-5678-9012']
+
+    def test_async_matches_serial(self):
+        """Chunked parallel detection equals merged serial detection."""
+        detector = UnifiedPIIDetector(PIIConfig(
+            mode=PIIOperationMode.PERFORMANCE,
+            enable_result_caching=False
+        ))
+        text = PII_TEXT * 60
+        parallel = asyncio.run(detector._detect_pii_async(text))
+        serial = detector._merge_overlapping_matches(detector._detect_pii_basic(text))
+        serial.sort(key=lambda m: m.start_pos)
+        assert [(m.start_pos, m.end_pos, m.pii_type) for m in parallel] == \
+            [(m.start_pos, m.end_pos, m.pii_type) for m in serial]
+
+
+class TestScanBackends:
+    """Test suite for serial/thread/process backend selection."""
+
+    @pytest.fixture
+    def performance_detector(self):
+        detector = UnifiedPIIDetector(PIIConfig(
+            mode=PIIOperationMode.PERFORMANCE,
+            enable_result_caching=False,
+            thread_scan_min_chars=100,
+            process_scan_min_chars=1000
+        ))
+        yield detector
+        if detector._process_pool:
+            detector._process_pool.shutdown()
+
+    def test_backend_by_size(self, performance_detector, monkeypatch):
+        """Auto mode picks the backend from the document size."""
+        monkeypatch.setattr(pii_detector_unified, '_available_cpus', lambda: 4)
+        select = performance_detector._select_scan_backend
+        assert select(10) == PIIScanBackend.SERIAL
+        assert select(500) == PIIScanBackend.THREAD
+        assert select(500, allow_thread=False) == PIIScanBackend.SERIAL
+        assert select(5000) == PIIScanBackend.PROCESS
+
+        # Processes only pay off with more than one CPU
+        monkeypatch.setattr(pii_detector_unified, '_available_cpus', lambda: 1)
+        assert select(5000) == PIIScanBackend.THREAD
+
+    def test_basic_mode_is_serial(self, detector):
+        """Without parallel processing every document is scanned serially."""
+        assert detector._select_scan_backend(10 ** 9) == PIIScanBackend.SERIAL
+
+    def test_process_scan_matches_serial(self, detector, scanner):
+        """Shared-memory process scanning returns the serial result."""
+        pool = ProcessScanPool(scanner, max_workers=2)
+        text = "Unicode café 数据 " + PII_TEXT * 20
+        try:
+            assert pool.scan(text, [(0, 700), (700, 1500), (1500, len(text))]) == scanner.scan(text)
+        finally:
+            pool.shutdown()
+
+    def test_process_failure_falls_back(self, scanner, monkeypatch):
+        """Ranges whose worker task fails are rescanned locally."""
+        class BrokenPool:
+            def submit(self, *args):
+                raise BrokenProcessPool("worker died")
+
+        pool = ProcessScanPool(scanner, max_workers=2)
+        monkeypatch.setattr(pool, '_get_executor', lambda: BrokenPool())
+        text = PII_TEXT * 5
+        assert pool.scan(text, [(0, 100), (100, len(text))]) == scanner.scan(text)
+
+    def test_async_process_backend(self, performance_detector, monkeypatch):
+        """The async path returns the same matches with the process backend."""
+        monkeypatch.setattr(pii_detector_unified, '_available_cpus', lambda: 2)
+        text = PII_TEXT * 30
+        matches = asyncio.run(performance_detector._detect_pii_async(text))
+        serial = performance_detector._merge_overlapping_matches(
+            performance_detector._build_matches(text, performance_detector._scanner.scan(text))
+        )
+        serial.sort(key=lambda m: m.start_pos)
+        assert [(m.start_pos, m.pii_type) for m in matches] == \
+            [(m.start_pos, m.pii_type) for m in serial]
+        assert performance_detector.get_statistics()['scan_backends'] == {'process': 1}
@@ -0,0 +1,90 @@
+"""
+Reference multi-pass prompt compression for M008 tests and benchmarks.
+
+The pipeline PromptCompressor used before single-pass compression: every
+technique runs as a separate full-text pass. ``compress`` must produce the
+same prose output, and should beat it on throughput.
+"""
+
+import hashlib
+import re
+
+from devdocai.llm_adapter.token_optimizer import PromptCompressor, _shorten_list
+
+
+def compress_multipass(compressor: PromptCompressor, text: str,
+                       model: str = "gpt-3.5-turbo") -> str:
+    """Compress text with the compressor's settings, one pass per technique."""
+    original_tokens = compressor.token_counter.count_tokens(text, model)
+
+    compressed = normalize_whitespace(text, compressor.preserve_code_blocks)
+    compressed = remove_redundancy(compressed)
+    if compressor.aggressive_mode:
+        compressed = apply_abbreviations(compressed, compressor.abbreviations)
+        compressed = remove_filler_words(compressed, compressor.filler_words)
+    compressed = compressor.list_regex.sub(_shorten_list, compressed)
+    compressed = deduplicate_content(compressed)
+
+    # Check compression ratio safety
+    compressed_tokens = compressor.token_counter.count_tokens(compressed, model)
+    if compressed_tokens < original_tokens * (1 - compressor.max_compression_ratio):
+        return text
+
+    return compressed
+
+
+def normalize_whitespace(text: str, preserve_code_blocks: bool = True) -> str:
+    """Normalize whitespace outside code blocks."""
+    parts = re.split(r'(```[\s\S]*?```)', text) if preserve_code_blocks else [text]
+    normalized_parts = []
+
+    for i, part in enumerate(parts):
+        if i % 2 == 0:  # Not a code block
+            part = re.sub(r'\s+', ' ', part)
+            part = re.sub(r'\n\s*\n', '\n\n', part)
+        normalized_parts.append(part)
+
+    return ''.join(normalized_parts)
+
+
+def remove_redundancy(text: str) -> str:
+    """Remove repeated sentences."""
+    sentences = text.split('.')
+    unique_sentences = []
+    seen = set()
+
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if sentence and sentence.lower() not in seen:
+            unique_sentences.append(sentence)
+            seen.add(sentence.lower())
+
+    return '. '.join(unique_sentences) + ('.' if unique_sentences else '')
+
+
+def apply_abbreviations(text: str, abbreviations: dict) -> str:
+    """Apply each abbreviation in turn, case-insensitively."""
+    for full, abbr in abbreviations.items():
+        text = re.compile(re.escape(full), re.IGNORECASE).sub(abbr, text)
+    return text
+
+
+def remove_filler_words(text: str, filler_words: set) -> str:
+    """Remove filler words."""
+    return ' '.join(word for word in text.split() if word.lower() not in filler_words)
+
+
+def deduplicate_content(text: str) -> str:
+    """Remove duplicate paragraphs."""
+    unique_paragraphs = []
+    seen_hashes = set()
+
+    for para in text.split('\n\n'):
+        para = para.strip()
+        if para:
+            para_hash = hashlib.md5(para.lower().encode()).hexdigest()
+            if para_hash not in seen_hashes:
+                unique_paragraphs.append(para)
+                seen_hashes.add(para_hash)
+
+    return '\n\n'.join(unique_paragraphs)
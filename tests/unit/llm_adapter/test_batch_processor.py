@@ -0,0 +1,242 @@
+"""
+Tests for M008 LLM Adapter micro-batching.
+
+Tests token-aware packing, priority deadlines, streaming lanes, concurrent
+dispatch and per-lane statistics.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from devdocai.llm_adapter.batch_processor import (
+    BatchProcessor, BatchRequest, MicroBatchScheduler, RequestPriority
+)
+from devdocai.llm_adapter.providers.base import LLMRequest, LLMResponse
+
+
+def make_request(content="Document the API", max_tokens=None, stream=False):
+    return LLMRequest(messages=[{"role": "user", "content": content}], model="gpt-4",
+                      max_tokens=max_tokens, stream=stream)
+
+
+def queued(tokens, priority=RequestPriority.NORMAL, deadline=None, content=None):
+    now = time.time()
+    return BatchRequest(
+        request=make_request(content or f"{tokens} {priority.name}"),
+        priority=priority,
+        future=None,
+        timestamp=now,
+        estimated_tokens=tokens,
+        deadline=now + 60 if deadline is None else deadline
+    )
+
+
+class RecordingProcessor:
+    """Batch processor that records batches and takes time per token."""
+
+    def __init__(self, seconds_per_token=0.0):
+        self.seconds_per_token = seconds_per_token
+        self.batches = []
+        self.finished = []
+
+    async def __call__(self, requests):
+        self.batches.append([r.messages[0]["content"] for r in requests])
+        tokens = sum(r.max_tokens or 0 for r in requests)
+        await asyncio.sleep(tokens * self.seconds_per_token)
+        self.finished.extend(r.messages[0]["content"] for r in requests)
+        return [
+            LLMResponse(
+                content=f"Answer to {r.messages[0]['content']}",
+                finish_reason="stop",
+                model=r.model,
+                provider="mock",
+                usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                request_id=r.request_id,
+                response_time_ms=1
+            )
+            for r in requests
+        ]
+
+
+class TestMicroBatchScheduler:
+    """Test packing decisions."""
+
+    def test_packs_by_token_budget(self):
+        scheduler = MicroBatchScheduler(max_batch_size=10, max_batch_tokens=1000)
+        large = queued(30000)
+        small = [queued(100) for _ in range(3)]
+        for request in [large] + small:
+            scheduler.add(request)
+
+        # The oversized request is sent alone; the small ones are not held back
+        assert scheduler.take_batch(time.time()) == [large]
+        assert scheduler.take_batch(time.time()) == small
+        assert len(scheduler) == 0
+        assert scheduler.queued_tokens == 0
+
+    def test_first_fit_skips_requests_that_do_not_fit(self):
+        scheduler = MicroBatchScheduler(max_batch_size=10, max_batch_tokens=1000)
+        first, too_big, fits = queued(600), queued(600), queued(300)
+        for request in (first, too_big, fits):
+            scheduler.add(request)
+
+        assert scheduler.take_batch(time.time()) == [first, fits]
+        assert scheduler.take_batch(time.time()) == [too_big]
+
+    def test_priority_order_with_overdue_requests_first(self):
+        scheduler = MicroBatchScheduler(max_batch_size=2, max_batch_tokens=1000)
+        overdue_bulk = queued(10, RequestPriority.BATCH, deadline=time.time() - 1)
+        normal = queued(10, RequestPriority.NORMAL)
+        critical = queued(10, RequestPriority.CRITICAL)
+        for request in (normal, overdue_bulk, critical):
+            scheduler.add(request)
+
+        assert scheduler.take_batch(time.time()) == [overdue_bulk, critical]
+        assert scheduler.take_batch(time.time()) == [normal]
+
+    def test_ready_when_full_or_due(self):
+        scheduler = MicroBatchScheduler(max_batch_size=3, max_batch_tokens=1000)
+        now = time.time()
+        scheduler.add(queued(10, deadline=now + 1))
+        assert not scheduler.is_ready(now)
+        assert scheduler.is_ready(now + 1)
+
+        scheduler.add(queued(990, deadline=now + 1))
+        assert scheduler.is_full()
+        assert scheduler.is_ready(now)
+
+    def test_promote_raises_priority_and_deadline(self):
+        scheduler = MicroBatchScheduler(max_batch_size=1, max_batch_tokens=1000)
+        now = time.time()
+        normal = queued(10, RequestPriority.NORMAL)
+        bulk = queued(10, RequestPriority.BATCH, deadline=now + 60)
+        for request in (normal, bulk):
+            scheduler.add(request)
+
+        assert scheduler.promote(bulk.request_hash, RequestPriority.CRITICAL, now + 1)
+        assert not scheduler.promote(bulk.request_hash, RequestPriority.LOW, now + 30)
+        assert bulk.priority == RequestPriority.CRITICAL
+        assert scheduler.next_deadline() == now + 1
+        assert scheduler.take_batch(now) == [bulk]
+        assert scheduler.take_batch(now) == [normal]
+        assert not scheduler.promote(bulk.request_hash, RequestPriority.CRITICAL, now)
+        assert len(scheduler) == 0
+
+
+class TestBatchProcessor:
+    """Test continuous dispatch through the processor."""
+
+    @pytest.mark.asyncio
+    async def test_large_request_does_not_stall_small_ones(self):
+        processor = BatchProcessor(max_batch_size=10, max_wait_time_ms=20,
+                                   max_batch_tokens=1000)
+        recorder = RecordingProcessor(seconds_per_token=0.00001)
+        processor.register_processor("mock", recorder)
+
+        large = asyncio.ensure_future(
+            processor.submit(make_request("large", max_tokens=30000), "mock")
+        )
+        await asyncio.sleep(0)
+        small = await asyncio.gather(*[
+            processor.submit(make_request(f"small {i}", max_tokens=10), "mock")
+            for i in range(3)
+        ])
+        assert [r.content for r in small] == [f"Answer to small {i}" for i in range(3)]
+        assert not large.done()
+        assert ["large"] in recorder.batches
+
+        await large
+        assert recorder.finished[-1] == "large"
+        await processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_streaming_lane_does_not_wait_for_bulk_work(self):
+        processor = BatchProcessor(max_batch_size=10, max_wait_time_ms=1000,
+                                   stream_max_wait_time_ms=5)
+        recorder = RecordingProcessor()
+        processor.register_processor("mock", recorder)
+
+        bulk = asyncio.ensure_future(
+            processor.submit(make_request("bulk"), "mock", RequestPriority.BATCH)
+        )
+        start = time.time()
+        await processor.submit(make_request("interactive", stream=True), "mock")
+        assert time.time() - start < 0.5
+        assert not bulk.done()
+
+        lanes = processor.get_stats("mock")["lanes"]
+        assert lanes["standard"]["queue_depth"] == 1
+        assert lanes["streaming"]["total_batches"] == 1
+        assert lanes["streaming"]["deadline_flushes"] == 1
+
+        # Shutdown flushes the bulk request instead of dropping it
+        await processor.shutdown()
+        assert (await asyncio.wait_for(bulk, 1)).content == "Answer to bulk"
+
+    @pytest.mark.asyncio
+    async def test_coalesced_requests_all_resolve(self):
+        processor = BatchProcessor(max_wait_time_ms=10)
+        recorder = RecordingProcessor()
+        processor.register_processor("mock", recorder)
+
+        responses = await asyncio.gather(*[
+            processor.submit(make_request("same"), "mock") for _ in range(5)
+        ])
+        assert {r.content for r in responses} == {"Answer to same"}
+        assert recorder.batches == [["same"]]
+        assert processor.get_stats("mock")["coalesced_requests"] == 4
+        assert processor.pending_requests == {}
+        await processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_urgent_duplicate_promotes_queued_request(self):
+        processor = BatchProcessor(max_wait_time_ms=200)
+        recorder = RecordingProcessor()
+        processor.register_processor("mock", recorder)
+
+        bulk = asyncio.ensure_future(
+            processor.submit(make_request("same"), "mock", RequestPriority.BATCH)
+        )
+        await asyncio.sleep(0)
+        start = time.time()
+        response = await processor.submit(make_request("same"), "mock",
+                                          RequestPriority.CRITICAL)
+        # CRITICAL dispatches at once; BATCH alone would wait two seconds
+        assert time.time() - start < 1.0
+        assert (await asyncio.wait_for(bulk, 1)).content == response.content
+        assert recorder.batches == [["same"]]
+        assert processor.get_stats("mock")["coalesced_requests"] == 1
+        await processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_lanes_do_not_coalesce(self):
+        processor = BatchProcessor(max_wait_time_ms=10, stream_max_wait_time_ms=5)
+        recorder = RecordingProcessor()
+        processor.register_processor("mock", recorder)
+
+        await asyncio.gather(
+            processor.submit(make_request("same"), "mock"),
+            processor.submit(make_request("same", stream=True), "mock")
+        )
+        assert recorder.batches == [["same"], ["same"]]
+        assert processor.get_stats("mock")["coalesced_requests"] == 0
+        await processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_lane_stats(self):
+        processor = BatchProcessor(max_batch_size=4, max_wait_time_ms=10,
+                                   max_batch_tokens=100)
+        processor.register_processor("mock", RecordingProcessor())
+
+        await asyncio.gather(*[
+            processor.submit(make_request(f"q{i}", max_tokens=10), "mock") for i in range(8)
+        ])
+        lane = processor.get_stats("mock")["lanes"]["standard"]
+        assert lane["total_requests"] == 8
+        assert lane["total_batches"] == 2
+        assert lane["queue_depth"] == 0
+        assert lane["batch_fill_ratio"] == 1.0
+        assert 0 <= lane["wait_p50_ms"] <= lane["wait_p95_ms"]
+        await processor.shutdown()
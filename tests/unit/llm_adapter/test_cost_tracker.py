@@ -459,6 +459,107 @@ class TestCostTracker:
         assert tracker._should_send_alert(alert_key) is True
 
 
+class TestUsageLedger:
+    """Test the append-only usage ledger."""
+    
+    @pytest.fixture
+    def cost_limits(self):
+        return CostLimits(
+            daily_limit_usd=Decimal("50.00"),
+            monthly_limit_usd=Decimal("500.00"),
+            per_request_limit_usd=Decimal("10.00")
+        )
+    
+    def make_record(self, request_id, timestamp=None, cost="0.25"):
+        return UsageRecord(
+            timestamp=timestamp or datetime.utcnow(),
+            provider="openai",
+            model="gpt-4",
+            input_tokens=100,
+            output_tokens=50,
+            input_cost=Decimal(cost) / 2,
+            output_cost=Decimal(cost) / 2,
+            total_cost=Decimal(cost),
+            request_id=request_id,
+            response_time_seconds=1.0
+        )
+    
+    @pytest.mark.asyncio
+    async def test_restart_loads_rollups(self, cost_limits, tmp_path):
+        """Running totals survive a restart without replaying records."""
+        tracker = CostTracker(cost_limits, tmp_path / "usage.json")
+        for i in range(3):
+            await tracker.record_usage(self.make_record(f"r{i}"))
+        tracker.close()
+        
+        restarted = CostTracker(cost_limits, tmp_path / "usage.json")
+        assert restarted.get_daily_cost() == Decimal("0.75")
+        assert restarted.get_monthly_cost() == Decimal("0.75")
+        assert restarted.can_afford_request(Decimal("1.00")) == (True, None)
+        assert [r.request_id for r in restarted._usage_records] == ["r0", "r1", "r2"]
+    
+    @pytest.mark.asyncio
+    async def test_trackers_sharing_a_ledger_add_up(self, cost_limits, tmp_path):
+        """Rollups count every writer's records, not the last writer's total."""
+        first = CostTracker(cost_limits, tmp_path / "usage.json")
+        second = CostTracker(cost_limits, tmp_path / "usage.json")
+        for i in range(3):
+            await first.record_usage(self.make_record(f"a{i}"))
+            await second.record_usage(self.make_record(f"b{i}"))
+        
+        assert len(first._usage_records) == 6
+        assert second.get_daily_cost() == Decimal("1.50")
+        assert second.get_monthly_cost() == Decimal("1.50")
+        first.close()
+        second.close()
+        
+        restarted = CostTracker(cost_limits, tmp_path / "usage.json")
+        assert restarted.get_daily_cost() == Decimal("1.50")
+    
+    @pytest.mark.asyncio
+    async def test_alert_history_persists(self, cost_limits, tmp_path):
+        tracker = CostTracker(cost_limits, tmp_path / "usage.json")
+        for i in range(5):  # 95% of the daily limit
+            alerts = await tracker.record_usage(self.make_record(f"big{i}", cost="9.50"))
+        assert [a.alert_type for a in alerts] == ["warning", "emergency"]
+        tracker.close()
+        
+        restarted = CostTracker(cost_limits, tmp_path / "usage.json")
+        assert not restarted._should_send_alert(f"daily_warning_{date.today().isoformat()}")
+    
+    @pytest.mark.asyncio
+    async def test_periodic_compaction(self, cost_limits, tmp_path):
+        """Records past retention are dropped every compaction_interval records."""
+        tracker = CostTracker(cost_limits, tmp_path / "usage.json", compaction_interval=2)
+        old = datetime.utcnow() - timedelta(days=120)
+        await tracker.record_usage(self.make_record("old", timestamp=old))
+        assert len(tracker._usage_records) == 1
+        
+        await tracker.record_usage(self.make_record("new"))
+        assert [r.request_id for r in tracker._usage_records] == ["new"]
+        assert old.date().isoformat() not in tracker._daily_costs
+        assert tracker.get_monthly_cost(old.strftime("%Y-%m")) == Decimal("0.25")
+    
+    def test_imports_json_storage(self, cost_limits, tmp_path):
+        """Usage files from the JSON storage are imported once."""
+        legacy = tmp_path / "usage.json"
+        today = date.today()
+        legacy.write_text(json.dumps({
+            'usage_records': [self.make_record("legacy").model_dump(mode="json")],
+            'daily_costs': {today.isoformat(): "0.25"},
+            'monthly_costs': {today.strftime("%Y-%m"): "3.25"},
+            'alerts_sent': {}
+        }))
+        
+        tracker = CostTracker(cost_limits, legacy)
+        assert not legacy.exists()
+        assert legacy.with_suffix('.json.migrated').exists()
+        assert tracker.get_monthly_cost() == Decimal("3.25")
+        assert tracker._usage_records[0].request_id == "legacy"
+        tracker.close()
+        
+        assert len(CostTracker(cost_limits, legacy)._usage_records) == 1
+
 class TestUsageStats:
     """Test usage statistics functionality."""
     
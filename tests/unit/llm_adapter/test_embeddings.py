@@ -0,0 +1,106 @@
+"""
+Tests for M008 LLM Adapter local embedding backends.
+
+Tests hashed n-gram embeddings, batching, the embedding cache and
+backend selection.
+"""
+
+import numpy as np
+import pytest
+
+from devdocai.llm_adapter.cache import ResponseCache
+from devdocai.llm_adapter.embeddings import (
+    CachedEmbedding, EmbeddingBackend, HashingEmbedding, create_embedding_backend
+)
+
+
+class CountingBackend(EmbeddingBackend):
+    """Backend recording the batches it is asked to embed."""
+
+    name = "counting"
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return np.ones((len(texts), self.dim), dtype=np.float32) / np.sqrt(self.dim)
+
+
+class TestHashingEmbedding:
+    """Test feature-hashed n-gram embeddings."""
+
+    def test_deterministic_unit_vectors(self):
+        """Embeddings are stable across instances and unit length."""
+        first = HashingEmbedding().embed("Generate a README for the project")
+        second = HashingEmbedding().embed("Generate a README for the project")
+        assert first.dtype == np.float32
+        assert first.shape == (384,)
+        assert np.array_equal(first, second)
+        assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+
+    def test_similar_texts_score_higher(self):
+        """Overlapping wording scores above unrelated text."""
+        embedder = HashingEmbedding()
+        base, similar, unrelated = embedder.embed_batch([
+            "What is machine learning and how does it work?",
+            "Machine learning: what is it and how does it work?",
+            "Bake the bread at 200 degrees for forty minutes",
+        ])
+        assert base @ similar > 0.7
+        assert base @ unrelated < 0.3
+
+    def test_normalizes_case_and_whitespace(self):
+        """Case and runs of whitespace do not change the embedding."""
+        embedder = HashingEmbedding()
+        assert np.allclose(embedder.embed("Hello   World"), embedder.embed("hello world"))
+
+    def test_batch_matches_single(self):
+        """N-grams never span two texts of a batch."""
+        embedder = HashingEmbedding(dim=64)
+        texts = ["alpha", "", "beta gamma", "ünïcödé text"]
+        batch = embedder.embed_batch(texts)
+        for text, row in zip(texts, batch):
+            assert np.allclose(row, embedder.embed(text))
+        assert not batch[1].any()
+
+
+class TestCachedEmbedding:
+    """Test the embedding cache."""
+
+    def test_misses_computed_in_one_batch(self):
+        """Distinct misses go to the backend once, in a single call."""
+        backend = CountingBackend()
+        cached = CachedEmbedding(backend, max_size=10)
+        cached.embed_batch(["a", "b", "a"])
+        cached.embed_batch(["a", "b", "c"])
+
+        assert backend.batches == [["a", "b"], ["c"]]
+        stats = cached.get_stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 4
+
+    def test_lru_bound(self):
+        """The cache keeps at most max_size embeddings."""
+        backend = CountingBackend()
+        cached = CachedEmbedding(backend, max_size=2)
+        for text in ["a", "b", "c", "a"]:
+            cached.embed(text)
+        assert cached.get_stats()['size'] == 2
+        assert backend.batches[-1] == ["a"]
+
+
+class TestBackendSelection:
+    """Test backend factory and cache integration."""
+
+    def test_create_embedding_backend(self):
+        assert isinstance(create_embedding_backend(), CachedEmbedding)
+        assert isinstance(create_embedding_backend(cache_size=0, dim=32), HashingEmbedding)
+        with pytest.raises(ValueError):
+            create_embedding_backend("remote-api")
+
+    def test_response_cache_uses_backend_dimensions(self):
+        cache = ResponseCache(embedding_backend=CountingBackend(dim=16))
+        assert cache.semantic_index.dim == 16
+        assert cache._generate_embedding("prompt").shape == (16,)
@@ -0,0 +1,165 @@
+"""
+Tests for M008 LLM Adapter latency-aware routing.
+
+Tests live latency statistics, latency-optimized provider ordering and
+hedged requests with their budget.
+"""
+
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from devdocai.llm_adapter.config import FallbackStrategy
+from devdocai.llm_adapter.fallback_manager import FallbackManager, LatencyStats
+from devdocai.llm_adapter.providers.base import (
+    LLMRequest, LLMResponse, ProviderError, TokenUsage
+)
+
+
+class TimedProvider:
+    """Provider answering after a fixed delay."""
+
+    def __init__(self, name, delay, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+        self.config = SimpleNamespace(default_model="gpt-4", priority=1, quality_score=0.8)
+
+    def is_healthy(self):
+        return True
+
+    async def generate(self, request):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return LLMResponse(
+            content=f"from {self.name}",
+            finish_reason="stop",
+            model=request.model,
+            provider=self.name,
+            usage=TokenUsage(prompt_tokens=1, completion_tokens=1, total_tokens=2,
+                             total_cost=Decimal("0.001")),
+            request_id="test",
+            response_time_ms=self.delay * 1000
+        )
+
+
+def make_request():
+    return LLMRequest(messages=[{"role": "user", "content": "hi"}], model="gpt-4")
+
+
+def warm_up(manager, name, latency_ms, samples=20):
+    for _ in range(samples):
+        manager.record_latency(name, latency_ms)
+
+
+class TestLatencyStats:
+    """Test EWMA and p95 tracking."""
+
+    def test_ewma_and_p95(self):
+        stats = LatencyStats(alpha=0.5, window=100)
+        for latency in range(1, 101):
+            stats.record(float(latency))
+        assert stats.count == 100
+        assert stats.p95_ms == 96.0
+        assert 98.0 < stats.ewma_ms < 100.0
+
+    def test_window_forgets_old_samples(self):
+        stats = LatencyStats(window=10)
+        for _ in range(10):
+            stats.record(1000.0)
+        for _ in range(10):
+            stats.record(10.0)
+        assert stats.p95_ms == 10.0
+
+
+class TestLatencyRouting:
+    """Test the latency-optimized strategy."""
+
+    def test_orders_by_recent_latency(self):
+        providers = {name: TimedProvider(name, 0) for name in ("slow", "fast", "new")}
+        manager = FallbackManager(providers, FallbackStrategy.LATENCY_OPTIMIZED)
+        warm_up(manager, "slow", 900)
+        warm_up(manager, "fast", 100)
+
+        order = manager._get_provider_order(make_request(), None, None)
+        assert order == ["new", "fast", "slow"]
+        assert manager._get_provider_order(make_request(), "slow", None)[0] == "slow"
+
+    @pytest.mark.asyncio
+    async def test_responses_feed_latency_stats(self):
+        providers = {"a": TimedProvider("a", 0.01)}
+        manager = FallbackManager(providers, FallbackStrategy.LATENCY_OPTIMIZED)
+        await manager.execute_with_fallback(make_request())
+        status = manager.get_provider_health_status()["a"]
+        assert status["latency_samples"] == 1
+        assert status["latency_ewma_ms"] >= 10
+
+
+class TestHedgedRequests:
+    """Test hedging a slow primary with a backup provider."""
+
+    @pytest.mark.asyncio
+    async def test_backup_wins_when_primary_stalls(self):
+        providers = {"primary": TimedProvider("primary", 1.0), "backup": TimedProvider("backup", 0.01)}
+        manager = FallbackManager(providers, hedge_requests=True, hedge_budget=1.0,
+                                  hedge_min_delay_ms=1)
+        warm_up(manager, "primary", 20)
+
+        response, attempts = await manager.execute_with_fallback(make_request(), "primary")
+        assert response.content == "from backup"
+        assert attempts[-1].provider_name == "backup"
+        assert providers["primary"].cancelled == 1
+        assert manager.hedge_stats["backup_wins"] == 1
+        # The stalled call counts against the primary's latency
+        assert manager.latency_stats["primary"].ewma_ms > 20
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_primary_is_on_time(self):
+        providers = {"primary": TimedProvider("primary", 0.01), "backup": TimedProvider("backup", 0.01)}
+        manager = FallbackManager(providers, hedge_requests=True, hedge_budget=1.0)
+        warm_up(manager, "primary", 200)
+
+        response, _ = await manager.execute_with_fallback(make_request(), "primary")
+        assert response.content == "from primary"
+        assert providers["backup"].calls == 0
+        assert manager.hedge_stats["hedged"] == 0
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_hedges(self):
+        providers = {"primary": TimedProvider("primary", 0.05), "backup": TimedProvider("backup", 0.2)}
+        manager = FallbackManager(providers, hedge_requests=True, hedge_budget=0.25,
+                                  hedge_min_delay_ms=1, latency_window=1000)
+        # Enough fast samples that the primary's p95 stays below its real latency
+        warm_up(manager, "primary", 1, samples=500)
+
+        for _ in range(8):
+            await manager.execute_with_fallback(make_request(), "primary")
+        assert manager.hedge_stats["hedged"] == 2
+        assert manager.hedge_stats["budget_exhausted"] == 6
+        assert providers["backup"].calls == 2
+        # The primary answered first each time; hedges were cancelled
+        assert providers["backup"].cancelled == 2
+
+    @pytest.mark.asyncio
+    async def test_primary_error_waits_for_backup(self):
+        providers = {
+            "primary": TimedProvider("primary", 0.05, error=ProviderError("down", "primary")),
+            "backup": TimedProvider("backup", 0.1)
+        }
+        manager = FallbackManager(providers, hedge_requests=True, hedge_budget=1.0,
+                                  hedge_min_delay_ms=1)
+        warm_up(manager, "primary", 1)
+
+        response, _ = await manager.execute_with_fallback(make_request(), "primary")
+        assert response.content == "from backup"
+        assert providers["primary"].calls == 1
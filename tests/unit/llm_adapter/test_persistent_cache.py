@@ -0,0 +1,146 @@
+"""
+Tests for M008 LLM Adapter persistent response cache.
+
+Tests the SQLite store (TTL, compression, eviction, sharing between
+processes) and its use as L2 behind ResponseCache.
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+from devdocai.llm_adapter.cache import ResponseCache
+from devdocai.llm_adapter.persistent_cache import PersistentCacheStore
+from devdocai.llm_adapter.providers.base import LLMRequest, LLMResponse, TokenUsage
+
+
+def make_request(content="Document the API"):
+    return LLMRequest(messages=[{"role": "user", "content": content}], model="gpt-4")
+
+
+def make_response(content="Generated docs"):
+    return LLMResponse(
+        content=content,
+        finish_reason="stop",
+        model="gpt-4",
+        provider="openai",
+        usage=TokenUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30),
+        request_id="test",
+        response_time_ms=250
+    )
+
+
+def write_from_child(path, key):
+    """Runs in a separate process."""
+    store = PersistentCacheStore(path)
+    store.put(key, {"content": "from child"}, ttl_seconds=60)
+    store.close()
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return tmp_path / "llm_cache.db"
+
+
+class TestPersistentCacheStore:
+    """Test the SQLite-backed store."""
+
+    def test_roundtrip_and_compression(self, store_path):
+        """Large payloads are compressed and read back intact."""
+        store = PersistentCacheStore(store_path, compress_min_bytes=100)
+        value = {"content": "repeated text " * 500, "tokens": 42}
+        store.put("key", value, ttl_seconds=60, provider="openai", model="gpt-4")
+
+        assert store.get("key") == value
+        assert store.get("missing") is None
+        stats = store.get_stats()
+        assert stats['entries'] == 1
+        assert stats['compression_ratio'] < 0.1
+        store.close()
+
+    def test_expired_entries_are_not_returned(self, store_path):
+        store = PersistentCacheStore(store_path)
+        store.put("old", {"v": 1}, ttl_seconds=-1)
+        assert store.get("old") is None
+        assert store.get_stats()['entries'] == 0
+        store.close()
+
+    def test_eviction_drops_least_recently_accessed(self, store_path):
+        """Maintenance evicts LRU entries down to 90% of the bound."""
+        store = PersistentCacheStore(store_path, max_entries=10, maintenance_interval=1000,
+                                     touch_interval_seconds=0)
+        for i in range(12):
+            store.put(f"k{i}", {"i": i}, ttl_seconds=60)
+            time.sleep(0.001)
+        store.get("k0")
+
+        assert store.maintain() == {'expired': 0, 'evicted': 3}
+        assert store.get("k0") == {"i": 0}
+        assert store.get("k1") is None
+        assert store.get("k11") == {"i": 11}
+        store.close()
+
+    def test_delete_by_provider_or_model(self, store_path):
+        store = PersistentCacheStore(store_path)
+        store.put("a", {}, 60, provider="openai", model="gpt-4")
+        store.put("b", {}, 60, provider="anthropic", model="claude")
+        assert store.delete_where(provider="openai") == 1
+        assert store.delete(["b", "c"]) == 1
+        assert store.get_stats()['entries'] == 0
+        store.close()
+
+    def test_shared_across_processes(self, store_path):
+        """Entries written by another process are visible without reloading."""
+        store = PersistentCacheStore(store_path)
+        process = multiprocessing.get_context("spawn").Process(
+            target=write_from_child, args=(str(store_path), "shared")
+        )
+        process.start()
+        process.join(60)
+        assert process.exitcode == 0
+        assert store.get("shared") == {"content": "from child"}
+        store.close()
+
+
+class TestResponseCachePersistence:
+    """Test ResponseCache with a persistent L2."""
+
+    @pytest.mark.asyncio
+    async def test_new_cache_reads_through_to_store(self, store_path):
+        """A fresh cache (e.g. after restart) hits entries from the store."""
+        first = ResponseCache(persistent_store=PersistentCacheStore(store_path))
+        await first.put(make_request(), make_response())
+
+        second = ResponseCache(persistent_store=PersistentCacheStore(store_path))
+        assert await second.cache.size() == 0
+        response = await second.get(make_request())
+        assert response.content == "Generated docs"
+        assert response.usage.total_tokens == 30
+        assert second.stats.persistent_hits == 1
+
+        # Promoted to L1: the next lookup does not touch the store
+        assert await second.cache.size() == 1
+        await second.get(make_request())
+        assert second.stats.persistent_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_removes_persistent_entry(self, store_path):
+        store = PersistentCacheStore(store_path)
+        cache = ResponseCache(persistent_store=store)
+        await cache.put(make_request(), make_response())
+        await cache.invalidate(request=make_request())
+
+        assert store.get(cache._generate_cache_key(make_request())) is None
+        assert await ResponseCache(persistent_store=store).get(make_request()) is None
+
+    @pytest.mark.asyncio
+    async def test_clear_can_keep_persistent_entries(self, store_path):
+        store = PersistentCacheStore(store_path)
+        cache = ResponseCache(persistent_store=store)
+        await cache.put(make_request(), make_response())
+
+        await cache.clear(include_persistent=False)
+        assert store.get_stats()['entries'] == 1
+        await cache.clear()
+        assert store.get_stats()['entries'] == 0
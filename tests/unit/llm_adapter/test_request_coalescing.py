@@ -0,0 +1,187 @@
+"""
+Tests for M008 LLM Adapter in-flight request coalescing.
+
+Tests that concurrent identical queries and streams share one provider
+call, that errors reach every waiter, and that different requests are
+not merged.
+"""
+
+import asyncio
+
+import pytest
+
+from devdocai.llm_adapter.adapter_unified import UnifiedConfig, UnifiedLLMAdapter
+from devdocai.llm_adapter.config import LLMConfig
+from devdocai.llm_adapter.providers.base import (
+    LLMRequest, LLMResponse, ProviderError, TokenUsage
+)
+
+
+class SlowProvider:
+    """Provider that takes a while to answer and counts calls."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.queries = 0
+        self.streams = 0
+
+    async def query(self, request):
+        self.queries += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return LLMResponse(
+            content=f"Answer to {request.messages[-1]['content']}",
+            finish_reason="stop",
+            model=request.model,
+            provider="mock",
+            usage=TokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+            request_id="test",
+            response_time_ms=self.delay * 1000
+        )
+
+    async def stream(self, request):
+        self.streams += 1
+        await asyncio.sleep(self.delay)
+        for token in ["First", " token", " response"]:
+            if self.error:
+                raise self.error
+            yield token
+            await asyncio.sleep(0)
+
+
+def make_adapter(provider, **flags):
+    config = UnifiedConfig(base_config=LLMConfig(), **flags)
+    adapter = UnifiedLLMAdapter(config)
+    adapter.providers = {"mock": provider}
+    adapter._providers_initialized = True
+    return adapter
+
+
+def make_request(content="Document the API"):
+    return LLMRequest(messages=[{"role": "user", "content": content}], model="gpt-4")
+
+
+async def collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+class TestQueryCoalescing:
+    """Test single-flight queries."""
+
+    @pytest.mark.asyncio
+    async def test_identical_queries_share_one_call(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider)
+
+        responses = await asyncio.gather(*[adapter.query(make_request()) for _ in range(5)])
+
+        assert provider.queries == 1
+        assert {r.content for r in responses} == {"Answer to Document the API"}
+        assert adapter.metrics["coalesced_requests"] == 4
+        assert adapter._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_different_requests_are_not_merged(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider)
+
+        await asyncio.gather(adapter.query(make_request("a")), adapter.query(make_request("b")))
+        assert provider.queries == 2
+        assert adapter.metrics["coalesced_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_waiter(self):
+        provider = SlowProvider(error=ProviderError("boom", "mock"))
+        adapter = make_adapter(provider)
+
+        results = await asyncio.gather(
+            *[adapter.query(make_request()) for _ in range(3)], return_exceptions=True
+        )
+        assert provider.queries == 1
+        assert all(isinstance(r, ProviderError) for r in results)
+        assert adapter._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider)
+
+        first = asyncio.ensure_future(adapter.query(make_request()))
+        second = asyncio.ensure_future(adapter.query(make_request()))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert (await second).content == "Answer to Document the API"
+        assert provider.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_result_is_cached_for_later_callers(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider, enable_cache=True)
+
+        await asyncio.gather(adapter.query(make_request()), adapter.query(make_request()))
+        await adapter.query(make_request())
+        assert provider.queries == 1
+        assert adapter.metrics["cache_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_coalescing_can_be_disabled(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider, enable_request_coalescing=False)
+
+        await asyncio.gather(adapter.query(make_request()), adapter.query(make_request()))
+        assert provider.queries == 2
+
+
+class TestStreamCoalescing:
+    """Test streaming fan-out through the multiplexer."""
+
+    @pytest.mark.asyncio
+    async def test_identical_streams_share_one_provider_stream(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider, enable_streaming=True)
+
+        results = await asyncio.gather(*[collect(adapter.stream(make_request())) for _ in range(4)])
+
+        assert results == ["First token response"] * 4
+        assert provider.streams == 1
+        assert adapter.metrics["coalesced_streams"] == 3
+
+    @pytest.mark.asyncio
+    async def test_started_stream_is_joined_with_replay(self):
+        """A late joiner replays the chunks already sent from the buffer."""
+        provider = SlowProvider()
+        adapter = make_adapter(provider, enable_streaming=True)
+
+        first = adapter.stream(make_request())
+        assert await first.__anext__() == "First"
+        assert await collect(adapter.stream(make_request())) == "First token response"
+        assert await collect(first) == " token response"
+        assert provider.streams == 1
+        assert adapter.metrics["coalesced_streams"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_past_the_buffer_is_not_joined(self):
+        provider = SlowProvider()
+        adapter = make_adapter(provider, enable_streaming=True)
+        adapter.streaming_manager.multiplexer_buffer_size = 1
+
+        first = adapter.stream(make_request())
+        assert await first.__anext__() == "First"
+        await asyncio.sleep(0.01)  # Let the producer move past the first chunk
+        assert await collect(adapter.stream(make_request())) == "First token response"
+        assert await collect(first) == " token response"
+        assert provider.streams == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_error_reaches_every_consumer(self):
+        provider = SlowProvider(error=ProviderError("boom", "mock"))
+        adapter = make_adapter(provider, enable_streaming=True)
+
+        results = await asyncio.gather(
+            *[collect(adapter.stream(make_request())) for _ in range(2)], return_exceptions=True
+        )
+        assert provider.streams == 1
+        assert all(isinstance(r, ProviderError) for r in results)
@@ -0,0 +1,183 @@
+"""
+Tests for M008 LLM Adapter stream fan-out.
+
+Tests the ring-buffer multiplexer (shared chunks, lag policies, late-joiner
+replay) and small-chunk aggregation in StreamBuffer.
+"""
+
+import asyncio
+
+import pytest
+
+from devdocai.llm_adapter.streaming import (
+    LagPolicy, SlowConsumerError, StreamBuffer, StreamChunk, StreamMultiplexer
+)
+
+
+def make_chunks(count):
+    return [StreamChunk(content=f"t{i} ", token_count=1) for i in range(count)]
+
+
+async def source(chunks, delay=0.0):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+async def collect(multiplexer, consumer_id, delay=0.0):
+    received = []
+    async for chunk in multiplexer.consume(consumer_id):
+        if not chunk.is_final:
+            received.append(chunk)
+        await asyncio.sleep(delay)
+    return received
+
+
+class TestRingMultiplexer:
+    """Test fan-out through the ring buffer."""
+
+    @pytest.mark.asyncio
+    async def test_consumers_share_chunks(self):
+        multiplexer = StreamMultiplexer(buffer_size=4)
+        consumers = [await multiplexer.add_consumer() for _ in range(3)]
+        chunks = make_chunks(20)
+
+        results = await asyncio.gather(
+            multiplexer.broadcast(source(chunks)),
+            *[collect(multiplexer, consumer_id) for consumer_id in consumers]
+        )
+        for received in results[1:]:
+            assert len(received) == 20
+            assert all(a is b for a, b in zip(received, chunks))
+        assert len(multiplexer._ring) == 4
+        assert multiplexer.get_stats()["buffered_chunks"] == 4
+
+    @pytest.mark.asyncio
+    async def test_late_joiner_replays_buffer(self):
+        multiplexer = StreamMultiplexer(buffer_size=3)
+        first = await multiplexer.add_consumer()
+        task = asyncio.ensure_future(collect(multiplexer, first))
+        await multiplexer.broadcast(source(make_chunks(4)))
+        assert await multiplexer.join() is None  # Chunk 0 has left the buffer
+
+        replaying = await multiplexer.add_consumer(replay=True)
+        live = await multiplexer.add_consumer()
+        replay_task = asyncio.ensure_future(collect(multiplexer, replaying))
+        live_task = asyncio.ensure_future(collect(multiplexer, live))
+
+        # The producer finished; joiners see the buffered tail or nothing
+        assert [c.content for c in await replay_task] == ["t1 ", "t2 ", "t3 "]
+        assert await live_task == []
+        assert len(await task) == 4
+
+    @pytest.mark.asyncio
+    async def test_join_before_buffer_wraps(self):
+        multiplexer = StreamMultiplexer(buffer_size=10)
+        first = await multiplexer.add_consumer()
+        producer = asyncio.ensure_future(multiplexer.broadcast(source(make_chunks(3), 0.01)))
+        await asyncio.sleep(0.015)
+
+        joined = await multiplexer.join()
+        assert joined is not None
+        results = await asyncio.gather(
+            collect(multiplexer, first), collect(multiplexer, joined), producer
+        )
+        assert results[0] == results[1]
+
+    @pytest.mark.asyncio
+    async def test_drop_policy_skips_ahead(self):
+        multiplexer = StreamMultiplexer(buffer_size=2, lag_policy=LagPolicy.DROP)
+        fast = await multiplexer.add_consumer()
+        slow = await multiplexer.add_consumer()
+
+        _, fast_chunks, slow_chunks = await asyncio.gather(
+            multiplexer.broadcast(source(make_chunks(10))),
+            collect(multiplexer, fast),
+            collect(multiplexer, slow, delay=0.01)
+        )
+        assert len(fast_chunks) == 10
+        assert len(slow_chunks) < 10
+        assert slow_chunks[-1].content == "t9 "
+        assert multiplexer.dropped_chunks == 10 - len(slow_chunks)
+
+    @pytest.mark.asyncio
+    async def test_block_policy_waits_for_slow_consumer(self):
+        multiplexer = StreamMultiplexer(buffer_size=2, lag_policy=LagPolicy.BLOCK)
+        slow = await multiplexer.add_consumer()
+
+        _, received = await asyncio.gather(
+            multiplexer.broadcast(source(make_chunks(6))),
+            collect(multiplexer, slow, delay=0.005)
+        )
+        assert len(received) == 6
+        assert multiplexer.dropped_chunks == 0
+
+    @pytest.mark.asyncio
+    async def test_block_policy_disconnects_after_timeout(self):
+        multiplexer = StreamMultiplexer(buffer_size=2, slow_consumer_timeout_ms=20,
+                                        lag_policy=LagPolicy.BLOCK)
+        stalled = await multiplexer.add_consumer()
+        fast = await multiplexer.add_consumer()
+
+        _, received = await asyncio.gather(
+            multiplexer.broadcast(source(make_chunks(5))),
+            collect(multiplexer, fast)
+        )
+        assert len(received) == 5
+        with pytest.raises(SlowConsumerError):
+            await collect(multiplexer, stalled)
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_cuts_lagging_consumer(self):
+        multiplexer = StreamMultiplexer(buffer_size=2, lag_policy=LagPolicy.DISCONNECT)
+        fast = await multiplexer.add_consumer()
+        slow = await multiplexer.add_consumer()
+
+        results = await asyncio.gather(
+            multiplexer.broadcast(source(make_chunks(6))),
+            collect(multiplexer, fast),
+            collect(multiplexer, slow, delay=0.01),
+            return_exceptions=True
+        )
+        assert len(results[1]) == 6
+        assert isinstance(results[2], SlowConsumerError)
+        assert multiplexer.get_stats()["disconnected_consumers"] == 1
+
+    @pytest.mark.asyncio
+    async def test_source_error_reaches_consumers(self):
+        async def failing():
+            yield StreamChunk(content="partial", token_count=1)
+            raise RuntimeError("provider failed")
+
+        multiplexer = StreamMultiplexer()
+        consumer_id = await multiplexer.add_consumer()
+        results = await asyncio.gather(
+            multiplexer.broadcast(failing()), collect(multiplexer, consumer_id),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestStreamBuffer:
+    """Test small-chunk aggregation."""
+
+    @pytest.mark.asyncio
+    async def test_aggregates_without_mutating_chunks(self):
+        buffer = StreamBuffer(min_chunk_size=6)
+        first = StreamChunk(content="ab", token_count=1)
+
+        assert await buffer.add(first) is None
+        assert await buffer.add(StreamChunk(content="cd", token_count=1)) is None
+        emitted = await buffer.add(StreamChunk(content="ef", token_count=1))
+
+        assert emitted.content == "abcdef"
+        assert emitted.token_count == 3
+        assert first.content == "ab"
+        assert buffer.pending_chunk is None
+
+    @pytest.mark.asyncio
+    async def test_flush_on_add_does_not_deadlock(self):
+        buffer = StreamBuffer(flush_interval_ms=0, aggregate_small_chunks=False)
+        chunk = StreamChunk(content="large enough chunk", token_count=3)
+
+        assert await asyncio.wait_for(buffer.add(chunk), 1) is chunk
@@ -0,0 +1,197 @@
+"""
+Tests for M008 LLM Adapter token counting.
+
+Tests the memoized token counter, batch counting, per-conversation
+incremental accounting and the single-pass prompt compressor.
+"""
+
+import pytest
+
+from devdocai.llm_adapter.token_optimizer import (
+    ContextWindowManager, ConversationTokenAccumulator, PromptCompressor, TokenCounter,
+    TokenOptimizer
+)
+
+from tests.unit.llm_adapter.reference_compressor import compress_multipass
+
+
+class WordEncoder:
+    """Stand-in for a tiktoken encoding: one token per word."""
+
+    def __init__(self):
+        self.encoded = 0
+        self.batches = 0
+
+    def encode(self, text):
+        self.encoded += 1
+        return text.split()
+
+    def encode_batch(self, texts):
+        self.batches += 1
+        return [self.encode(text) for text in texts]
+
+
+@pytest.fixture
+def encoder():
+    return WordEncoder()
+
+
+@pytest.fixture
+def counter(encoder):
+    counter = TokenCounter(cache_size=100)
+    counter.encoders["cl100k_base"] = encoder
+    return counter
+
+
+@pytest.fixture
+def batching_counter(encoder):
+    """Counter that sends every set of several misses to encode_batch."""
+    counter = TokenCounter(cache_size=100, batch_min_chars=0)
+    counter.encoders["cl100k_base"] = encoder
+    return counter
+
+
+def conversation(turns):
+    messages = [{"role": "system", "content": "You write API documentation"}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i} about the storage API"})
+        messages.append({"role": "assistant", "content": f"Answer {i}"})
+    return messages
+
+
+class TestTokenCounter:
+    """Test memoized and batch counting."""
+
+    def test_counts_are_memoized(self, counter, encoder):
+        assert counter.count_tokens("one two three", "gpt-4") == 3
+        assert counter.count_tokens("one two three", "gpt-4") == 3
+        assert encoder.encoded == 1
+        assert counter.get_cache_stats()["hits"] == 1
+
+    def test_count_many_encodes_each_miss_once(self, counter, encoder):
+        counter.count_tokens("a b", "gpt-4")
+        counts = counter.count_tokens_many(["a b", "c d e", "f", "c d e"], "gpt-4")
+
+        assert counts == [2, 3, 1, 3]
+        assert encoder.batches == 0  # Small miss sets skip encode_batch
+        assert encoder.encoded == 3  # "a b" once, then the two distinct misses
+
+    def test_large_miss_sets_use_one_batch(self, encoder):
+        counter = TokenCounter(cache_size=100, batch_min_chars=10)
+        counter.encoders["cl100k_base"] = encoder
+        assert counter.count_tokens("a single long miss", "gpt-4") == 4
+        assert encoder.batches == 0
+
+        counts = counter.count_tokens_many(["c d e", "f g h", "c d e"], "gpt-4")
+        assert counts == [3, 3, 3]
+        assert encoder.batches == 1
+        assert encoder.encoded == 3
+
+    def test_cache_is_bounded(self, encoder):
+        counter = TokenCounter(cache_size=2)
+        counter.encoders["cl100k_base"] = encoder
+        counter.count_tokens_many(["a", "b", "c"], "gpt-4")
+        assert counter.get_cache_stats()["size"] == 2
+        counter.count_tokens("a", "gpt-4")
+        assert encoder.encoded == 4
+
+    def test_unknown_models_use_approximation(self, counter, encoder):
+        assert counter.count_tokens("x" * 40, "claude-3") == 10
+        assert encoder.encoded == 0
+
+
+class TestConversationAccounting:
+    """Test counting only appended messages."""
+
+    def test_only_appended_messages_are_counted(self, counter):
+        accumulator = ConversationTokenAccumulator(counter, "gpt-4")
+        accumulator.update(conversation(2))
+        assert accumulator.messages_counted == 5
+
+        counts = accumulator.update(conversation(3))
+        assert accumulator.messages_counted == 7
+        assert counts == counter.count_tokens_many(
+            [m["content"] for m in conversation(3)], "gpt-4"
+        )
+        assert accumulator.total_tokens == counter.count_messages_tokens(conversation(3), "gpt-4")
+
+    def test_edited_history_is_recounted_from_the_change(self, counter):
+        accumulator = ConversationTokenAccumulator(counter, "gpt-4")
+        accumulator.update(conversation(3))
+        edited = conversation(3)
+        edited[2]["content"] = "A much longer rewritten answer"
+        accumulator.update(edited[:4])
+
+        assert accumulator.messages_counted == 7 + 2
+        assert accumulator.content_tokens == sum(
+            counter.count_tokens_many([m["content"] for m in edited[:4]], "gpt-4")
+        )
+
+    def test_context_manager_tracks_conversations(self, counter):
+        manager = ContextWindowManager(max_context_tokens=10000, token_counter=counter,
+                                       max_conversations=1)
+        manager.fit_to_context(conversation(2), "gpt-4", conversation_id="a")
+        manager.fit_to_context(conversation(3), "gpt-4", conversation_id="a")
+        assert manager.conversations["a"].messages_counted == 7
+
+        manager.fit_to_context(conversation(1), "gpt-4", conversation_id="b")
+        assert list(manager.conversations) == ["b"]
+
+    def test_optimizer_shares_one_counter(self):
+        optimizer = TokenOptimizer()
+        optimizer.optimize_request(conversation(1), "gpt-4")
+        assert optimizer.compressor.token_counter is optimizer.token_counter
+        assert optimizer.context_managers["gpt-4"].token_counter is optimizer.token_counter
+
+
+PROSE = [
+    "The configuration   documentation is basically complete.\n\nThe configuration "
+    "documentation is basically complete. Deploy to production",
+    "We support red, green, blue, yellow and purple. It is really very simple. "
+    "It is really very simple. The database authentication is definitely required",
+    "Just  one sentence with a trailing filler word basically",
+    "Parameters: alpha,beta, gamma,  delta. Performance optimization of the implementation.",
+]
+
+
+class TestPromptCompressor:
+    """Test the single-pass compressor."""
+
+    @pytest.mark.parametrize("aggressive", [False, True])
+    @pytest.mark.parametrize("text", PROSE)
+    def test_matches_multipass_pipeline(self, counter, text, aggressive):
+        compressor = PromptCompressor(aggressive_mode=aggressive, max_compression_ratio=1.0,
+                                      token_counter=counter)
+        assert compressor.compress(text, "gpt-4") == compress_multipass(compressor, text, "gpt-4")
+
+    def test_code_blocks_are_kept_verbatim(self, counter):
+        compressor = PromptCompressor(max_compression_ratio=1.0, token_counter=counter)
+        code = "```python\nconfig.load()\nconfig.save()\n```"
+        text = f"Load it. {code}\nLoad it.  Then save. {code}"
+
+        assert compressor.compress(text, "gpt-4") == f"Load it.\n\n{code}\n\nThen save."
+
+    def test_units_are_counted_in_one_batch(self, batching_counter, encoder):
+        compressor = PromptCompressor(token_counter=batching_counter)
+        compressor.compress("First point. Second point. First point.", "gpt-4")
+
+        # One batch for the units, one for the original and compressed texts
+        assert encoder.batches == 2
+        assert encoder.encoded == 4
+        assert compressor.stats.original_tokens == 6
+        assert compressor.stats.compressed_tokens == 4
+
+    def test_stats_count_the_compressed_text(self, batching_counter, encoder):
+        compressor = PromptCompressor(aggressive_mode=True, token_counter=batching_counter)
+        compressed = compressor.compress("It is really done. Keep this", "gpt-4")
+
+        assert compressed == "It is done. Keep this."
+        assert compressor.stats.original_tokens == 6
+        assert compressor.stats.compressed_tokens == len(compressed.split())
+
+    def test_over_compression_reverts_to_original(self, counter):
+        compressor = PromptCompressor(max_compression_ratio=0.5, token_counter=counter)
+        text = "Repeat this line. " * 10
+
+        assert compressor.compress(text, "gpt-4") == text
+        assert compressor.stats.original_tokens == 0
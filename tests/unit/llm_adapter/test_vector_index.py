@@ -0,0 +1,165 @@
+"""
+Tests for M008 LLM Adapter semantic vector index.
+
+Tests exact and approximate nearest-neighbour search, partitioning by
+provider and model, and index maintenance on cache eviction.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from devdocai.llm_adapter.cache import ResponseCache
+from devdocai.llm_adapter.providers.base import LLMRequest, LLMResponse, TokenUsage
+from devdocai.llm_adapter import vector_index
+from devdocai.llm_adapter.vector_index import SemanticIndex, VectorPartition, normalize
+
+
+def make_response(content="Answer", provider="openai", model="gpt-4"):
+    return LLMResponse(
+        content=content,
+        finish_reason="stop",
+        model=model,
+        provider=provider,
+        usage=TokenUsage(prompt_tokens=10, completion_tokens=20, total_tokens=30),
+        request_id="test",
+        response_time_ms=100
+    )
+
+
+class TestSemanticIndex:
+    """Test vector index search and maintenance."""
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(42)
+        return rng.standard_normal((200, 32)).astype(np.float32)
+
+    def test_search_finds_nearest(self, vectors):
+        """The best match above the threshold is returned."""
+        index = SemanticIndex(dim=32)
+        for i, vector in enumerate(vectors):
+            index.insert(f"k{i}", vector, provider="openai", model="gpt-4")
+
+        key, similarity = index.search(vectors[17] * 3, 0.9, model="gpt-4")
+        assert key == "k17"
+        assert similarity == pytest.approx(1.0, abs=1e-5)
+        assert index.search(-vectors[17], 0.9, model="gpt-4") is None
+
+    def test_partitions_filter_provider_and_model(self, vectors):
+        """Searches only see their own (provider, model) partitions."""
+        index = SemanticIndex(dim=32)
+        index.insert("a", vectors[0], provider="openai", model="gpt-4")
+        index.insert("b", vectors[0], provider="anthropic", model="claude")
+
+        assert index.search(vectors[0], 0.9, provider="openai", model="gpt-4")[0] == "a"
+        assert index.search(vectors[0], 0.9, provider="openai", model="claude") is None
+        assert index.search(vectors[0], 0.9, model="claude")[0] == "b"
+        assert index.get_stats()['partitions'] == 2
+
+    def test_delete_and_compaction(self, vectors):
+        """Deleted keys are never returned, including after compaction."""
+        index = SemanticIndex(dim=32)
+        for i, vector in enumerate(vectors):
+            index.insert(f"k{i}", vector)
+        assert index.delete("k5")
+        assert not index.delete("k5")
+        assert index.search(vectors[5], 0.99) is None
+
+        index.delete_many(f"k{i}" for i in range(150))
+        assert len(index) == 50
+        assert index.search(vectors[160], 0.99)[0] == "k160"
+
+    def test_reinsert_moves_partition(self, vectors):
+        """Re-indexing a key under another model replaces the old vector."""
+        index = SemanticIndex(dim=32)
+        index.insert("k", vectors[0], model="old")
+        index.insert("k", vectors[1], model="new")
+        assert index.search(vectors[0], 0.99, model="old") is None
+        assert index.search(vectors[1], 0.99, model="new")[0] == "k"
+        assert len(index) == 1
+
+    def test_ivf_partition_finds_inserted_vectors(self):
+        """Approximate search still finds exact duplicates in large partitions."""
+        rng = np.random.default_rng(7)
+        vectors = rng.standard_normal((3000, 16)).astype(np.float32)
+        partition = VectorPartition(16, ivf_threshold=1000, nprobe=4)
+        for i, vector in enumerate(vectors):
+            partition.insert(f"k{i}", normalize(vector))
+
+        assert partition.wait_for_training(timeout=30)
+        assert partition._ivf is not None
+        hits = sum(
+            partition.search(normalize(vectors[i]), 0.99) == (f"k{i}", pytest.approx(1.0, abs=1e-5))
+            for i in range(0, 3000, 100)
+        )
+        assert hits == 30
+
+    def test_ivf_training_runs_off_the_insert_path(self, monkeypatch):
+        """Inserts do not wait for k-means; searches stay exact until the swap."""
+        rng = np.random.default_rng(3)
+        vectors = rng.standard_normal((300, 16)).astype(np.float32)
+        train = vector_index._IVFIndex.train.__func__
+        started = []
+
+        def slow_train(cls, *args, **kwargs):
+            started.append(time.monotonic())
+            time.sleep(0.5)
+            return train(cls, *args, **kwargs)
+        monkeypatch.setattr(vector_index._IVFIndex, 'train', classmethod(slow_train))
+
+        partition = VectorPartition(16, ivf_threshold=200, nprobe=4)
+        start = time.monotonic()
+        for i, vector in enumerate(vectors[:250]):
+            partition.insert(f"k{i}", normalize(vector))
+        assert time.monotonic() - start < 0.4
+        assert len(started) == 1
+        assert partition._ivf is None
+        assert partition.search(normalize(vectors[210]), 0.99)[0] == "k210"
+
+        for i, vector in enumerate(vectors[250:], 250):
+            partition.insert(f"k{i}", normalize(vector))
+        assert partition.wait_for_training(timeout=30)
+        assert partition._ivf is not None
+        assert partition._ivf.trained_size <= 250
+        # Rows inserted during training were bucketed when it was swapped in
+        assert partition.search(normalize(vectors[290]), 0.99)[0] == "k290"
+
+
+class TestResponseCacheSemanticIndex:
+    """Test ResponseCache integration with the vector index."""
+
+    @pytest.mark.asyncio
+    async def test_semantic_match_uses_index(self):
+        """Similar prompts for the same model hit the cache."""
+        cache = ResponseCache(max_size=10, similarity_threshold=0.9)
+        request = LLMRequest(messages=[{"role": "user", "content": "Explain caching"}],
+                             model="gpt-4")
+        await cache.put(request, make_response())
+
+        same = LLMRequest(messages=[{"role": "user", "content": "Explain caching"}],
+                          model="gpt-4", temperature=0.1)
+        assert (await cache.get(same)).content == "Answer"
+        other_model = LLMRequest(messages=[{"role": "user", "content": "Explain caching"}],
+                                 model="gpt-3.5-turbo")
+        assert await cache.find_semantic_match(other_model) is None
+
+    @pytest.mark.asyncio
+    async def test_eviction_removes_embeddings(self):
+        """LRU and expiry evictions keep the index in step with the cache."""
+        cache = ResponseCache(max_size=4)
+        for i in range(6):
+            request = LLMRequest(messages=[{"role": "user", "content": f"Prompt {i}"}],
+                                 model="gpt-4")
+            await cache.put(request, make_response(f"Answer {i}"))
+        assert len(cache.semantic_index) == 4
+
+        expired = LLMRequest(messages=[{"role": "user", "content": "Prompt 5"}], model="gpt-4")
+        cache.cache.cache[cache._generate_cache_key(expired)].timestamp = time.time() - 10000
+        match = await cache.find_semantic_match(expired)
+        assert match is None or match.response.content != "Answer 5"
+        assert len(cache.semantic_index) == 3
+
+        await cache.clear()
+        assert len(cache.semantic_index) == 0
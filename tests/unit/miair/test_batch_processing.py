@@ -0,0 +1,114 @@
+"""
+Unit tests for MIAIR batch analysis execution modes.
+
+Tests result alignment and per-document error reporting for the
+sequential, thread and process-pool batch paths.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from devdocai.miair.engine_unified import EngineMode, UnifiedMIAIRConfig, UnifiedMIAIREngine
+from devdocai.miair.entropy_optimized import OptimizedShannonEntropyCalculator
+from devdocai.miair.process_pool import chunked
+
+
+def _documents(count):
+    return [
+        {
+            'id': f'doc-{i}',
+            'content': f"# Document {i}\n\nThis is document number {i}. " * (i + 1)
+        }
+        for i in range(count)
+    ]
+
+
+class TestBatchAlignment:
+    """Test suite for aligned batch results."""
+
+    @pytest.mark.parametrize('mode', [EngineMode.STANDARD, EngineMode.OPTIMIZED])
+    def test_failed_documents_keep_their_slot(self, mode):
+        """A failing document yields an error result instead of being dropped."""
+        engine = UnifiedMIAIREngine(UnifiedMIAIRConfig(mode=mode, storage_enabled=False))
+        documents = _documents(4)
+        original = engine.analyze
+
+        def flaky(content, document_id=None, metadata=None):
+            if document_id == 'doc-1':
+                raise ValueError("boom")
+            return original(content, document_id, metadata)
+
+        with patch.object(engine, 'analyze', side_effect=flaky):
+            results = engine.batch_analyze(documents)
+
+        assert [r.document_id for r in results] == [d['id'] for d in documents]
+        assert results[1].error == "ValueError: boom"
+        assert all(r.error is None for i, r in enumerate(results) if i != 1)
+
+    def test_chunked(self):
+        """Chunks cover the input in order."""
+        assert [list(c) for c in chunked([1, 2, 3, 4, 5], 2)] == [[1, 2], [3, 4], [5]]
+
+
+class TestProcessPoolBatch:
+    """Test suite for the process-pool batch mode."""
+
+    @pytest.fixture
+    def engine(self):
+        config = UnifiedMIAIRConfig(
+            mode=EngineMode.OPTIMIZED,
+            use_processes=True,
+            process_min_batch=2,
+            process_chunk_size=2,
+            max_workers=2,
+            storage_enabled=False
+        )
+        engine = UnifiedMIAIREngine(config)
+        yield engine
+        engine.cleanup()
+
+    def test_process_batch_matches_inline(self, engine):
+        """Process results are ordered and equal to in-process analysis."""
+        documents = _documents(5)
+        results = engine.batch_analyze(documents)
+
+        inline = UnifiedMIAIREngine(UnifiedMIAIRConfig(
+            mode=EngineMode.OPTIMIZED, storage_enabled=False
+        ))
+        assert [r.document_id for r in results] == [d['id'] for d in documents]
+        for doc, result in zip(documents, results):
+            expected = inline.analyze(doc['content'], doc['id'])
+            assert result.error is None
+            assert result.quality_score == pytest.approx(expected.quality_score)
+            assert result.entropy == pytest.approx(expected.entropy)
+
+    def test_process_batch_reports_errors(self, engine):
+        """Documents that cannot be sent to a worker are reported in place."""
+        documents = _documents(4)
+        documents[2]['metadata'] = {'callback': lambda: None}  # unpicklable
+
+        results = engine.batch_analyze(documents)
+
+        assert len(results) == 4
+        assert results[2].error is not None
+        assert results[0].error is None
+        assert results[3].error is None
+
+    def test_pool_is_reused(self, engine):
+        """Workers persist across batches."""
+        engine.batch_analyze(_documents(2))
+        pool = engine._process_pool
+        engine.batch_analyze(_documents(3))
+        assert engine._process_pool is pool
+
+    def test_entropy_batch_processes(self):
+        """Entropy batches keep input order in process mode."""
+        texts = [f"word{i} " * (i + 1) for i in range(8)]
+        calculator = OptimizedShannonEntropyCalculator(use_processes=True, num_workers=2)
+        try:
+            results = calculator.calculate_entropy_batch(texts)
+        finally:
+            calculator.close()
+
+        expected = [OptimizedShannonEntropyCalculator().calculate_entropy(t) for t in texts]
+        assert results == expected
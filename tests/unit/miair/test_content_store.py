@@ -0,0 +1,127 @@
+"""
+Unit tests for the content-addressed MIAIR result store.
+
+Tests full-text digests, byte-bounded LRU eviction, SQLite spill,
+and sharing of one store across the optimized components.
+"""
+
+import pytest
+from devdocai.miair.content_store import ContentAddressedStore, content_digest
+from devdocai.miair.entropy_optimized import OptimizedShannonEntropyCalculator
+from devdocai.miair.scorer_optimized import OptimizedQualityScorer
+from devdocai.miair.patterns_optimized import OptimizedPatternRecognizer
+from devdocai.miair.engine_unified import EngineMode, UnifiedMIAIRConfig, UnifiedMIAIREngine
+
+
+class TestContentDigest:
+    """Test suite for full-text content digests."""
+
+    def test_digest_is_deterministic(self):
+        """Same text yields the same digest."""
+        assert content_digest("hello world") == content_digest("hello world")
+
+    def test_shared_header_does_not_collide(self):
+        """Documents sharing a long header but differing later get distinct digests."""
+        header = "# Boilerplate header\n" * 50
+        doc_a = header + "Body A with some content."
+        doc_b = header + "Body B with some content."
+        assert len(doc_a) == len(doc_b)
+        assert content_digest(doc_a) != content_digest(doc_b)
+
+    def test_large_text_digest(self):
+        """Digests of texts larger than one hashing slice cover the whole text."""
+        base = "x" * (3 * 1024 * 1024)
+        assert content_digest(base) != content_digest(base[:-1] + "y")
+
+
+class TestContentAddressedStore:
+    """Test suite for the bounded result store."""
+
+    def test_put_and_get(self):
+        """Stored results are returned for the same digest and namespace."""
+        store = ContentAddressedStore()
+        digest = content_digest("text")
+        store.put(digest, 'entropy:all', {'character': 1.0})
+
+        assert store.get(digest, 'entropy:all') == {'character': 1.0}
+        assert store.get(digest, 'patterns') is None
+        stats = store.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_byte_budget_evicts_lru(self):
+        """Entries are evicted oldest-first once the byte budget is exceeded."""
+        store = ContentAddressedStore(max_bytes=2000)
+        for i in range(10):
+            store.put(content_digest(str(i)), 'ns', 'v' * 500)
+
+        stats = store.get_stats()
+        assert stats['bytes'] <= 2000
+        assert stats['evictions'] > 0
+        assert store.get(content_digest('9'), 'ns') is not None
+        assert store.get(content_digest('0'), 'ns') is None
+
+    def test_entry_limit(self):
+        """Entry count limit is enforced alongside the byte budget."""
+        store = ContentAddressedStore(max_entries=3)
+        for i in range(5):
+            store.put(content_digest(str(i)), 'ns', i)
+        assert len(store) == 3
+
+    def test_spill_to_sqlite(self, tmp_path):
+        """Evicted entries are recovered from the spill file."""
+        spill = tmp_path / "results.db"
+        store = ContentAddressedStore(max_entries=1, spill_path=spill)
+        first = content_digest("first")
+        store.put(first, 'ns', {'value': 1})
+        store.put(content_digest("second"), 'ns', {'value': 2})
+
+        assert (first, 'ns') not in store
+        assert store.get(first, 'ns') == {'value': 1}
+        assert store.get_stats()['spill_hits'] == 1
+        store.close()
+
+        # Spilled entries survive reopening
+        reopened = ContentAddressedStore(max_entries=1, spill_path=spill)
+        assert reopened.get(content_digest("second"), 'ns') == {'value': 2}
+        reopened.close()
+
+
+class TestSharedStore:
+    """Test suite for components sharing one store."""
+
+    def test_components_share_store(self):
+        """Entropy, scorer and patterns cache into one store under distinct namespaces."""
+        store = ContentAddressedStore()
+        text = "# Introduction\n\nThis is a document. It has sentences.\n\n## Summary\n\nDone."
+        digest = content_digest(text)
+
+        OptimizedShannonEntropyCalculator(result_store=store).calculate_entropy(text, 'all', digest)
+        OptimizedQualityScorer(result_store=store).score_document(text, None, digest)
+        OptimizedPatternRecognizer(result_store=store).analyze(text, None, digest)
+
+        assert len(store) == 3
+
+    def test_entropy_cache_hit_requires_same_content(self):
+        """Cache hits are not shared between documents with a common prefix."""
+        calculator = OptimizedShannonEntropyCalculator()
+        header = "Shared header text. " * 20
+        first = calculator.calculate_entropy(header + "alpha")
+        second = calculator.calculate_entropy(header + "omega omega omega")
+
+        assert calculator._cache_hits == 0
+        assert first != second
+
+    def test_engine_exposes_store_stats(self):
+        """Optimized engine reuses the shared store across repeated analyses."""
+        config = UnifiedMIAIRConfig(
+            mode=EngineMode.OPTIMIZED, enable_caching=False, storage_enabled=False
+        )
+        engine = UnifiedMIAIREngine(config)
+        text = "# Overview\n\nSome content here. More content follows.\n\n## Summary\n\nEnd."
+        engine.analyze(text)
+        engine.analyze(text)
+
+        stats = engine.get_stats()['result_store']
+        assert stats['entries'] == 3
+        assert stats['hits'] >= 3
@@ -0,0 +1,137 @@
+"""
+Unit tests for the shared DocumentStats text statistics kernel.
+
+Tests tokenization tables and that the optimized components produce the
+same results from a shared kernel as from their own scans.
+"""
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from devdocai.miair.document_stats import DocumentStats, shannon_entropy
+from devdocai.miair.entropy_optimized import OptimizedShannonEntropyCalculator
+from devdocai.miair.scorer_optimized import OptimizedQualityScorer
+from devdocai.miair.patterns_optimized import OptimizedPatternRecognizer
+
+
+SAMPLE = """# Introduction
+
+This is the API overview. The API is simple to use.
+
+## Usage
+
+Call the function. It returns a value!
+
+```python
+print("hello")
+```
+
+### Summary
+Done.
+"""
+
+
+class TestDocumentStats:
+    """Test suite for the statistics kernel."""
+
+    def test_word_table(self):
+        """Word ids index the vocabulary and counts match the tokens."""
+        stats = DocumentStats("The cat and the hat. The end")
+        assert stats.words == ['the', 'cat', 'and', 'the', 'hat', 'the', 'end']
+        assert stats.vocabulary[stats.word_ids[0]] == 'the'
+        assert stats.word_counts[stats.vocabulary.index('the')] == 3
+        assert stats.word_count == 7
+
+    def test_char_histogram(self):
+        """Character histogram matches Counter."""
+        text = "aabbbc\n€€"
+        stats = DocumentStats(text)
+        assert sorted(stats.char_counts.tolist()) == sorted(Counter(text).values())
+
+    def test_line_offsets(self):
+        """Line offsets and line numbers are computed per character."""
+        stats = DocumentStats("ab\n€d\nef")
+        assert stats.line_offsets.tolist() == [0, 3, 6]
+        assert stats.line_number(0) == 1
+        assert stats.line_number(4) == 2
+        assert stats.line_number(7) == 3
+
+    def test_sentence_table(self):
+        """Sentence tables skip empty sentences."""
+        stats = DocumentStats("One two. Three!  ... Four five six?")
+        assert stats.sentence_word_counts.tolist() == [2, 1, 3]
+        assert stats.sentence_token_counts.tolist() == [2, 1, 3]
+
+    def test_markdown_structure(self):
+        """Header and code block spans are extracted."""
+        stats = DocumentStats(SAMPLE)
+        assert stats.header_levels.tolist() == [1, 2, 3]
+        assert stats.header_titles == ['Introduction', 'Usage', 'Summary']
+        assert len(stats.code_block_spans) == 1
+        assert stats.code_blocks[0].startswith('```python')
+
+    def test_empty_text(self):
+        """Empty text yields empty tables."""
+        stats = DocumentStats("")
+        assert stats.word_count == 0
+        assert len(stats.char_counts) == 0
+        assert stats.line_offsets.tolist() == [0]
+        assert stats.sentence_count == 0
+
+    def test_matches_and_findall(self):
+        """Regex results are memoized and findall mirrors re.findall."""
+        text = "see [a](x.md) and [b](y.md)"
+        link = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+        stats = DocumentStats(text)
+        assert stats.findall(link) == link.findall(text)
+        assert stats.findall(re.compile(r'\w+\.md')) == ['x.md', 'y.md']
+        assert stats.matches(link) is stats.matches(link)
+        assert stats.matches(link)[0][:3] == (4, 13, '[a](x.md)')
+
+    def test_shannon_entropy(self):
+        """Entropy of a frequency table."""
+        assert shannon_entropy(np.array([1, 1])) == pytest.approx(1.0)
+        assert shannon_entropy(np.array([4])) == 0.0
+        assert shannon_entropy(np.array([], dtype=np.int64)) == 0.0
+
+
+class TestSharedKernel:
+    """Test suite for components consuming one kernel."""
+
+    def test_entropy_matches_reference(self):
+        """Kernel-based entropy matches a direct computation."""
+        text = "alpha beta beta gamma gamma gamma. Delta!"
+        result = OptimizedShannonEntropyCalculator().calculate_entropy(text)
+
+        counts = Counter(text)
+        expected = -sum(c / len(text) * math.log2(c / len(text)) for c in counts.values())
+        assert result['character'] == pytest.approx(expected)
+
+    def test_components_accept_shared_stats(self):
+        """Passing one kernel gives the same results as separate scans."""
+        stats = DocumentStats(SAMPLE)
+        entropy = OptimizedShannonEntropyCalculator()
+        scorer = OptimizedQualityScorer()
+        recognizer = OptimizedPatternRecognizer(learning_enabled=False)
+
+        assert (entropy.calculate_entropy(SAMPLE, stats=stats)
+                == OptimizedShannonEntropyCalculator().calculate_entropy(SAMPLE))
+        assert (scorer.score_document(SAMPLE, stats=stats).to_dict()
+                == OptimizedQualityScorer().score_document(SAMPLE).to_dict())
+        shared = recognizer.analyze(SAMPLE, stats=stats)
+        separate = OptimizedPatternRecognizer(learning_enabled=False).analyze(SAMPLE)
+        assert [p.name for p in shared.patterns] == [p.name for p in separate.patterns]
+
+    def test_statistics_use_kernel(self):
+        """Entropy statistics report vocabulary from the kernel."""
+        calculator = OptimizedShannonEntropyCalculator()
+        result = calculator.get_entropy_statistics_optimized("a b b c c c")
+        assert result['word_count'] == 6
+        assert result['unique_words'] == 3
+        assert result['vocabulary_richness'] == pytest.approx(0.5)
+        assert result['average_word_length'] == pytest.approx(1.0)
+        assert 0.0 <= result['redundancy'] <= 1.0
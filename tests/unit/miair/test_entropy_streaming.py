@@ -0,0 +1,104 @@
+"""
+Unit tests for streaming entropy analysis.
+
+Tests that statistics accumulated chunk by chunk are exactly those of the
+whole document regardless of where chunk boundaries fall.
+"""
+
+import io
+
+import pytest
+
+from devdocai.miair.entropy_optimized import OptimizedShannonEntropyCalculator
+from devdocai.miair.entropy_streaming import (
+    StreamingEntropyAccumulator,
+    iter_text_chunks,
+    stream_entropy_statistics
+)
+
+
+DOCUMENT = (
+    "# Streaming Guide\n\n"
+    "The streaming API reads documents incrementally... It never loads "
+    "everything at once! Does it handle edge cases? Yes.\n\n"
+    "Unicode words like café, naïve and 数据 are tokenized too.  \n"
+    "Trailing sentence without terminator"
+) * 7
+
+
+def _assert_matches(streamed, expected):
+    for key in ('character', 'word', 'sentence', 'aggregate'):
+        assert streamed['entropy'][key] == pytest.approx(expected['entropy'][key])
+    for key in ('redundancy', 'information_density', 'vocabulary_richness',
+                'structural_complexity', 'average_word_length'):
+        assert streamed[key] == pytest.approx(expected[key])
+    for key in ('text_length', 'word_count', 'unique_words'):
+        assert streamed[key] == expected[key]
+
+
+class TestStreamingEntropy:
+    """Test suite for the streaming accumulator."""
+
+    @pytest.fixture
+    def expected(self):
+        return OptimizedShannonEntropyCalculator().get_entropy_statistics_optimized(DOCUMENT)
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1000])
+    def test_matches_whole_document(self, expected, chunk_size):
+        """Results do not depend on chunk boundaries."""
+        streamed = stream_entropy_statistics(DOCUMENT, chunk_size=chunk_size)
+        _assert_matches(streamed, expected)
+        assert streamed['chunk_count'] == -(-len(DOCUMENT) // chunk_size)
+
+    def test_file_objects(self, expected):
+        """Text and binary file objects are read incrementally."""
+        _assert_matches(stream_entropy_statistics(io.StringIO(DOCUMENT), 50), expected)
+        # 5-byte reads split multi-byte UTF-8 characters
+        _assert_matches(stream_entropy_statistics(io.BytesIO(DOCUMENT.encode()), 5), expected)
+
+    def test_iterable_of_chunks(self, expected):
+        """Arbitrary chunk iterables are accepted."""
+        pieces = (DOCUMENT[i:i + 13] for i in range(0, len(DOCUMENT), 13))
+        _assert_matches(stream_entropy_statistics(pieces), expected)
+
+    def test_terminator_run_split_across_chunks(self):
+        """A '...' split across chunks does not create extra sentences."""
+        accumulator = StreamingEntropyAccumulator()
+        for chunk in ["one two.", "..", ". three"]:
+            accumulator.update(chunk)
+        accumulator.finalize()
+        assert accumulator.sentence_length_counts == {2: 1, 1: 1}
+
+    def test_memory_bounded_by_vocabulary(self):
+        """Repeated text does not grow the tables."""
+        accumulator = StreamingEntropyAccumulator()
+        for _ in range(200):
+            accumulator.update("alpha beta gamma. ")
+        stats = accumulator.finalize()
+        assert len(accumulator.word_counts) == 3
+        assert stats['word_count'] == 600
+        assert accumulator._carry == ''
+
+    def test_update_after_finalize(self):
+        """The accumulator cannot be reused after finalizing."""
+        accumulator = StreamingEntropyAccumulator()
+        accumulator.finalize()
+        with pytest.raises(RuntimeError):
+            accumulator.update("text")
+
+    def test_empty_source(self):
+        """Empty input yields zeroed statistics."""
+        stats = stream_entropy_statistics(io.StringIO(""))
+        assert stats['entropy']['aggregate'] == 0.0
+        assert stats['word_count'] == 0
+        assert stats['chunk_count'] == 0
+        assert list(iter_text_chunks("")) == []
+
+    def test_calculator_streaming(self, expected):
+        """The calculator streams large documents and file objects exactly."""
+        calculator = OptimizedShannonEntropyCalculator(enable_parallel=False)
+        _assert_matches(calculator.stream_large_document(DOCUMENT, chunk_size=100), expected)
+        _assert_matches(calculator.stream_large_document(io.StringIO(DOCUMENT), 100), expected)
+
+        small = calculator.stream_large_document("Short text.", chunk_size=100)
+        assert small['chunk_count'] == 1
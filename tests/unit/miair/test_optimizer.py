@@ -177,6 +177,91 @@ class TestMIAIROptimizer:
                     assert 'consistency' in gradients
                     assert 'accuracy' in gradients
     
+    def test_beam_strategy(self, optimizer, moderate_document):
+        """Test beam search reaches at least the hill climbing score."""
+        beam_optimizer = MIAIROptimizer(config=OptimizationConfig(
+            strategy=OptimizationStrategy.BEAM,
+            max_iterations=5,
+            target_quality=0.8,
+            beam_width=3
+        ))
+        beam_result = beam_optimizer.optimize_document(moderate_document)
+        hill_result = optimizer.optimize_document(moderate_document)
+
+        assert beam_result.optimized_score.overall >= hill_result.optimized_score.overall
+        for improvement in beam_result.improvements:
+            assert improvement['strategy'] == 'beam'
+            assert improvement['applied_strategies']
+            assert improvement['score_improvement'] >= 0.01
+
+    def test_beam_refinements_memoized(self, moderate_document):
+        """Test beam search reuses memoized refinement scores."""
+        beam_optimizer = MIAIROptimizer(config=OptimizationConfig(
+            strategy=OptimizationStrategy.BEAM,
+            max_iterations=3
+        ))
+        result1 = beam_optimizer.optimize_document(moderate_document)
+        cached = len(beam_optimizer._refinement_cache)
+        assert cached > 0
+
+        calls = []
+        original_score = beam_optimizer.scorer.score_document
+        beam_optimizer.scorer.score_document = lambda *args: calls.append(args) or original_score(*args)
+        result2 = beam_optimizer.optimize_document(moderate_document)
+
+        # Only the initial assessment is re-scored
+        assert len(calls) == 1
+        assert len(beam_optimizer._refinement_cache) == cached
+        assert result1.optimized_content == result2.optimized_content
+
+    def test_beam_timeout(self):
+        """Test beam search stops at the timeout."""
+        beam_optimizer = MIAIROptimizer(config=OptimizationConfig(
+            strategy=OptimizationStrategy.BEAM,
+            max_iterations=100,
+            target_quality=0.99,
+            improvement_threshold=0.0,
+            timeout_seconds=0.1
+        ))
+        result = beam_optimizer.optimize_document("Document to optimize" * 100)
+
+        assert result.elapsed_time < 1.0
+
+    def test_beam_entropy_balance_does_not_repeat_improvements(self, moderate_document):
+        """Test the threshold compares raw scores, not the balanced best score."""
+        beam_optimizer = MIAIROptimizer(config=OptimizationConfig(
+            strategy=OptimizationStrategy.BEAM,
+            max_iterations=10,
+            target_quality=0.99
+        ))
+        penalized = []
+
+        def balance(content, score, original_entropy):
+            penalized.append(content)
+            return QualityMetrics(**{**score.to_dict(), 'overall': score.overall * 0.5})
+        beam_optimizer._apply_entropy_balance = balance
+
+        result = beam_optimizer.optimize_document(moderate_document)
+        scores = [improvement['new_score'] for improvement in result.improvements]
+        assert scores == sorted(set(scores))
+        assert penalized == [result.optimized_content]
+
+    def test_beam_timeout_does_not_wait_for_scoring(self):
+        """Test scorings still running at the deadline are not awaited."""
+        beam_optimizer = MIAIROptimizer(config=OptimizationConfig(
+            strategy=OptimizationStrategy.BEAM,
+            timeout_seconds=0.1
+        ))
+
+        def slow_refinement(content, metadata):
+            time.sleep(1.0)
+            return content + " More detail."
+        beam_optimizer.refinement_strategies = {'completeness': [slow_refinement]}
+
+        start = time.time()
+        beam_optimizer.optimize_document("Document to optimize.")
+        assert time.time() - start < 0.8
+
     def test_optimization_config_validation(self):
         """Test configuration validation."""
         # Invalid target quality
@@ -189,6 +274,10 @@ class TestMIAIROptimizer:
         # Invalid entropy weight
         with pytest.raises(ValueError):
             OptimizationConfig(entropy_balance_weight=1.5)
+
+        # Invalid beam width
+        with pytest.raises(ValueError):
+            OptimizationConfig(beam_width=0)
     
     def test_improvement_percentage_calculation(self):
         """Test improvement percentage calculation."""
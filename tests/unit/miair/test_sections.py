@@ -0,0 +1,208 @@
+"""
+Unit tests for section-aware incremental statistics.
+
+Tests that statistics merged from cached sections equal those of the full
+text and that the engine reuses unchanged sections after an edit.
+"""
+
+import re
+
+import numpy as np
+import pytest
+
+from devdocai.miair.content_store import ContentAddressedStore
+from devdocai.miair.document_stats import DocumentStats
+from devdocai.miair.engine_unified import EngineMode, UnifiedMIAIRConfig, UnifiedMIAIREngine
+from devdocai.miair.patterns_optimized import OptimizedPatternRecognizer
+from devdocai.miair.scorer_optimized import OptimizedQualityScorer
+from devdocai.miair.sections import (
+    SCAN_FULL,
+    SCAN_SECTIONS,
+    SCAN_WINDOWS,
+    SectionedDocumentStats,
+    build_sectioned_stats,
+    scan_mode,
+    split_sections
+)
+
+
+LONG_RUN = "This introduction keeps going without any terminator " * 4
+
+DOCUMENT = f"""# Introduction
+
+The API overview is here. {LONG_RUN}
+
+## Usage
+
+continues after the header and was finished. Some text was obviously tested!
+
+```python
+def main():
+    print("v1.2 example")
+
+# not a header, inside a code block
+```
+
+## Reference
+
+- First item with a [link](https://example.com)
+- Second item TODO
+### Summary
+In conclusion the API is simple. Version v2.1 was released in 2024.
+"""
+
+
+def _regexes():
+    recognizer = OptimizedPatternRecognizer(learning_enabled=False)
+    patterns = [p for group in recognizer.compiled_patterns.values() for p in group.values()]
+    patterns += [v for v in vars(OptimizedQualityScorer).values() if isinstance(v, re.Pattern)]
+    return patterns
+
+
+def _sectioned(text):
+    sections = [DocumentStats(s).precompute() for s in split_sections(text)]
+    return SectionedDocumentStats(text, sections)
+
+
+class TestSplitSections:
+    """Test suite for header-delimited splitting."""
+
+    def test_round_trip(self):
+        """Sections concatenate back to the document."""
+        sections = split_sections(DOCUMENT)
+        assert ''.join(sections) == DOCUMENT
+        assert [s.split('\n', 1)[0] for s in sections[1:]] == [
+            '## Usage', '## Reference'
+        ]
+
+    def test_no_split_inside_code_or_without_blank_line(self):
+        """Code-block comments and headers not preceded by a blank line stay put."""
+        sections = split_sections(DOCUMENT)
+        assert not any(s.startswith('# not a header') for s in sections)
+        assert not any(s.startswith('### Summary') for s in sections)
+
+    @pytest.mark.parametrize('gap', ['\n\n', '\n\n\n', '\n  \n\t\n\n', '\n\n \n\n'])
+    def test_no_split_after_bare_hash_line(self, gap):
+        """A bare '#' line joins the next header across any blank lines."""
+        text = f"a\n\n## T\n#{gap}## T\nb"
+        sections = split_sections(text)
+        assert ''.join(sections) == text
+        assert _sectioned(text).headers == DocumentStats(text).headers
+        assert len(sections) == 2
+
+    def test_single_section(self):
+        """Documents without qualifying headers are one section."""
+        assert split_sections("plain text") == ["plain text"]
+        assert split_sections("") == [""]
+
+
+class TestSectionedDocumentStats:
+    """Test suite for merged section statistics."""
+
+    @pytest.mark.parametrize('attribute', [
+        'char_counts', 'line_offsets', 'words', 'word_ids', 'vocabulary', 'word_counts',
+        'lower_tokens', 'lower_token_counts', 'sentence_word_counts',
+        'sentence_token_counts', 'paragraphs', 'headers', 'header_levels',
+        'header_spans', 'code_block_spans'
+    ])
+    def test_tables_match_full_text(self, attribute):
+        """Every merged table equals the one from a full scan."""
+        merged = getattr(_sectioned(DOCUMENT), attribute)
+        full = getattr(DocumentStats(DOCUMENT), attribute)
+        if isinstance(full, np.ndarray):
+            assert np.array_equal(merged, full)
+        else:
+            assert merged == full
+
+    def test_matches_match_full_text(self):
+        """Merged regex matches equal a full scan, including boundary-crossing ones."""
+        merged = _sectioned(DOCUMENT)
+        full = DocumentStats(DOCUMENT)
+        for regex in _regexes():
+            assert merged.matches(regex) == full.matches(regex), regex.pattern
+
+    def test_sentence_crossing_boundary(self):
+        """A long sentence running across a header is found once."""
+        merged = _sectioned(DOCUMENT)
+        boundary = merged.offsets[1]
+        crossing = [m for m in merged.matches(OptimizedQualityScorer.COMPLEX_SENTENCE_PATTERN)
+                    if m[0] < boundary < m[1]]
+        assert len(crossing) == 1
+
+    def test_match_starting_before_window(self):
+        """A match crossing a boundary from before the last terminator is kept."""
+        text = ("Intro text. See [the docs.\n\n# Heading](http://x) for more. End.\n\n"
+                "# Next\nMore text here.")
+        merged = _sectioned(text)
+        assert len(merged.sections) == 3
+        links = merged.matches(OptimizedQualityScorer.LINK_PATTERN)
+        assert links == DocumentStats(text).matches(OptimizedQualityScorer.LINK_PATTERN)
+        assert links[0][:2] == (16, 48)
+
+    def test_scan_modes(self):
+        """Patterns are merged from sections, windows or a full scan."""
+        assert scan_mode(re.compile(r'\b(TODO|FIXME)\b')) == SCAN_SECTIONS
+        assert scan_mode(re.compile(r'^#{1,3}\s+', re.MULTILINE)) == SCAN_WINDOWS
+        assert scan_mode(OptimizedQualityScorer.LINK_PATTERN) == SCAN_FULL
+        assert scan_mode(re.compile(r'\w+(?=\n)')) == SCAN_FULL
+        assert scan_mode(re.compile(r'^Intro')) == SCAN_FULL
+        assert scan_mode(re.compile(r'\s*')) == SCAN_FULL
+
+    def test_store_entries_complete_when_put(self):
+        """Scans are stored as finished results, not added to stored sections."""
+        store = ContentAddressedStore()
+        merged = build_sectioned_stats(DOCUMENT, store)
+        for regex in _regexes():
+            merged.matches(regex)
+        assert all(section._matches == {} for section in merged.sections)
+
+        stored_bytes = store.get_stats()['bytes']
+        again = build_sectioned_stats(DOCUMENT, store)
+        full = DocumentStats(DOCUMENT)
+        for regex in _regexes():
+            assert again.matches(regex) == full.matches(regex), regex.pattern
+        assert store.get_stats()['bytes'] == stored_bytes
+
+    def test_sections_reused_from_store(self):
+        """Unchanged sections are served from the store after an edit."""
+        store = ContentAddressedStore()
+        first = build_sectioned_stats(DOCUMENT, store)
+        assert first.reused_sections == 0
+
+        edited = DOCUMENT.replace("Second item TODO", "Second item done")
+        second = build_sectioned_stats(edited, store)
+        assert second.reused_sections == len(second.sections) - 1
+
+
+class TestIncrementalEngine:
+    """Test suite for incremental analysis in the unified engine."""
+
+    @pytest.fixture
+    def engines(self):
+        def make(incremental):
+            return UnifiedMIAIREngine(UnifiedMIAIRConfig(
+                mode=EngineMode.OPTIMIZED,
+                enable_caching=False,
+                storage_enabled=False,
+                incremental_sections=incremental,
+                incremental_min_chars=0
+            ))
+        incremental, full = make(True), make(False)
+        yield incremental, full
+        incremental.cleanup()
+        full.cleanup()
+
+    def test_reanalysis_matches_full_analysis(self, engines):
+        """Incremental results after an edit equal a from-scratch analysis."""
+        incremental, full = engines
+        incremental.analyze(DOCUMENT, 'doc')
+
+        edited = DOCUMENT.replace("Some text", "Some edited text")
+        result = incremental.analyze(edited, 'doc')
+        expected = full.analyze(edited, 'doc')
+
+        assert result.metrics.to_dict() == expected.metrics.to_dict()
+        assert result.entropy == expected.entropy
+        assert sorted(result.patterns) == sorted(expected.patterns)
+        stats = incremental.get_stats()['incremental']
+        assert stats['reused'] == len(split_sections(edited)) - 1
@@ -0,0 +1,326 @@
+"""
+Unit tests for the M002 shared StorageEngine.
+
+Tests group commit, read-only readers, the shared document cache and the
+storage layers built on the engine.
+"""
+
+import sqlite3
+import threading
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from devdocai.storage.engine import StorageEngine, get_storage_engine
+from devdocai.storage.fast_storage import AccessTracker, FastStorageLayer
+from devdocai.storage.local_storage import LocalStorageSystem, DocumentData
+from devdocai.storage.optimized_storage import OptimizedStorage
+
+
+@pytest.fixture
+def temp_db_dir():
+    """Create temporary database directory."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def db_path(temp_db_dir):
+    return str(Path(temp_db_dir) / 'engine.db')
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = StorageEngine(db_path, readers=4)
+    yield engine
+    engine.close()
+
+
+@pytest.fixture
+def local_storage(db_path):
+    """LocalStorageSystem on the test database."""
+    config = Mock()
+    values = {'storage': {'db_path': db_path, 'pool_size': 5}}
+    config.get.side_effect = lambda key, default=None: values.get(key, default)
+    system = LocalStorageSystem(config)
+    yield system
+    system.close()
+
+
+def insert_document(conn, title="Doc", content="Text"):
+    """Write operation inserting a minimal document."""
+    return conn.execute(
+        "INSERT INTO documents (uuid, title, type, status, content, created_at, updated_at, "
+        "access_count) VALUES (lower(hex(randomblob(16))), ?, 'other', 'draft', ?, "
+        "datetime('now'), datetime('now'), 0)",
+        (title, content)
+    ).lastrowid
+
+
+class TestGroupCommit:
+    """Test suite for the writer queue."""
+
+    def test_concurrent_writes_share_commits(self, engine):
+        """Writes queued while a commit runs are committed together."""
+        started, release = threading.Event(), threading.Event()
+        blocker = engine.submit(lambda conn: started.set() or release.wait(5))
+        started.wait(5)
+        futures = [engine.submit(lambda conn, i=i: insert_document(conn, f"Doc {i}"))
+                   for i in range(20)]
+        release.set()
+
+        ids = [future.result() for future in futures]
+        assert blocker.result() is True
+        assert len(set(ids)) == 20
+        assert engine.stats['commits'] == 2
+        assert engine.get_statistics()['operations_per_commit'] == 10.5
+
+    def test_failed_operation_rolls_back_alone(self, engine):
+        """An operation that raises only loses its own changes."""
+        release = threading.Event()
+        engine.submit(lambda conn: release.wait(5))
+
+        def failing(conn):
+            insert_document(conn, "Lost")
+            raise ValueError("boom")
+
+        kept = engine.submit(lambda conn: insert_document(conn, "Kept"))
+        failed = engine.submit(failing)
+        release.set()
+
+        assert kept.result()
+        with pytest.raises(ValueError, match="boom"):
+            failed.result()
+        with engine.reader() as conn:
+            titles = [row[0] for row in conn.execute("SELECT title FROM documents")]
+        assert titles == ["Kept"]
+        assert engine.stats['failed_operations'] == 1
+
+    def test_close_commits_queued_writes(self, db_path):
+        """Closing the engine waits for queued writes."""
+        engine = StorageEngine(db_path)
+        futures = [engine.submit(insert_document) for _ in range(5)]
+        engine.close()
+
+        assert all(future.done() for future in futures)
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 5
+        conn.close()
+        with pytest.raises(RuntimeError):
+            engine.submit(insert_document)
+
+
+class TestReadersAndCache:
+    """Test suite for readers and the shared document cache."""
+
+    def test_readers_are_query_only(self, engine):
+        """Reader connections cannot write."""
+        with engine.reader() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                insert_document(conn)
+
+    def test_fetch_document_with_metadata(self, engine):
+        """The fast path decodes typed metadata and counts versions."""
+        def create(conn):
+            document_id = insert_document(conn)
+            conn.executemany(
+                "INSERT INTO metadata (document_id, key, value, value_type, is_searchable, "
+                "is_public, created_at) VALUES (?, ?, ?, ?, 1, 1, datetime('now'))",
+                [(document_id, 'pages', '12', 'number'),
+                 (document_id, 'draft', 'true', 'boolean'),
+                 (document_id, 'tags', '["a", "b"]', 'json')]
+            )
+            return document_id
+
+        document_id = engine.execute(create)
+        doc = engine.fetch_document(document_id)
+
+        assert doc['metadata'] == {'pages': 12.0, 'draft': True, 'tags': ['a', 'b']}
+        assert doc['version_count'] == 0
+        assert engine.fetch_document(uuid=doc['uuid'])['id'] == document_id
+        assert engine.fetch_document(document_id + 1) is None
+
+    def test_write_invalidates_cache(self, engine):
+        """Committed writes drop the documents they name from the cache."""
+        document_id = engine.execute(insert_document)
+        doc = engine.fetch_document(document_id)
+        doc['title'] = "Changed by caller"
+        assert engine.fetch_document(document_id)['title'] == "Doc"
+
+        engine.execute(
+            lambda conn: conn.execute("UPDATE documents SET title = 'New' WHERE id = ?",
+                                      (document_id,)),
+            invalidate=[document_id]
+        )
+        assert engine.fetch_document(document_id)['title'] == "New"
+        assert engine.fetch_document(uuid=doc['uuid'])['title'] == "New"
+
+    def test_own_writes_keep_other_cached_documents(self, engine):
+        """Group commits only invalidate the documents they name."""
+        first, second = engine.execute(insert_document), engine.execute(insert_document)
+        engine.fetch_document(first)
+        engine.execute(
+            lambda conn: conn.execute("UPDATE documents SET title = 'New' WHERE id = ?",
+                                      (second,)),
+            invalidate=[second]
+        )
+        hits = engine.document_cache.hits
+        engine.fetch_document(first)
+        assert engine.document_cache.hits == hits + 1
+
+    def test_external_commit_clears_cache(self, db_path, engine):
+        """Writes from another connection or process are not served stale."""
+        document_id = engine.execute(insert_document)
+        assert engine.fetch_document(document_id)['title'] == "Doc"
+
+        other = sqlite3.connect(db_path)
+        with other:
+            other.execute("UPDATE documents SET title = 'Elsewhere' WHERE id = ?", (document_id,))
+        other.close()
+
+        assert engine.fetch_document(document_id)['title'] == "Elsewhere"
+        assert engine.fetch_documents([document_id])[document_id]['title'] == "Elsewhere"
+
+    def test_fetch_documents_batch(self, engine):
+        """Batch reads combine cached documents with one query for the rest."""
+        ids = [engine.execute(lambda conn, i=i: insert_document(conn, f"Doc {i}")) for i in range(3)]
+        engine.fetch_document(ids[0])
+
+        docs = engine.fetch_documents(ids + [9999])
+        assert sorted(docs) == ids
+        assert [docs[i]['title'] for i in ids] == ["Doc 0", "Doc 1", "Doc 2"]
+
+
+class TestEngineRegistry:
+    """Test suite for sharing engines between storage layers."""
+
+    def test_engine_shared_per_path(self, db_path):
+        """Engines are shared per file and closed by the last release."""
+        first = get_storage_engine(db_path)
+        second = get_storage_engine(str(Path(db_path).parent / '.' / 'engine.db'))
+        assert first is second
+
+        first.release()
+        assert not second.closed
+        second.release()
+        assert second.closed
+        reopened = get_storage_engine(db_path)
+        assert reopened is not first
+        reopened.release()
+
+    def test_layers_share_cache(self, db_path, local_storage):
+        """LocalStorageSystem writes invalidate documents cached by FastStorageLayer."""
+        fast = FastStorageLayer(db_path)
+        try:
+            assert fast.engine is local_storage.storage_engine
+            doc = local_storage.create_document(DocumentData(title="Shared", content="One"))
+            assert fast.get_document(doc['id'])['content'] == "One"
+
+            local_storage.update_document(doc['id'], DocumentData(title="Shared", content="Two"))
+            assert fast.get_document(doc['id'])['content'] == "Two"
+
+            local_storage.delete_document(doc['id'])
+            assert fast.get_document(doc['id']) is None
+        finally:
+            fast.close()
+
+    def test_get_document_counts_access(self, local_storage):
+        """Access tracking goes through the writer and is reported immediately."""
+        doc = local_storage.create_document(DocumentData(title="Read me", content="Text"))
+        assert local_storage.get_document(doc['id'])['access_count'] == 1
+        result = local_storage.get_document(uuid=doc['uuid'])
+        assert result['access_count'] == 2
+        assert result['content'] == "Text"
+        assert result['version_count'] == 1
+
+    def test_optimized_storage_uses_canonical_schema(self, db_path, local_storage):
+        """OptimizedStorage documents are visible to LocalStorageSystem."""
+        storage = OptimizedStorage(db_path)
+        try:
+            created = storage.create_document({'title': "Fast", 'content': "Body"})
+            doc = local_storage.get_document(created['id'])
+            assert doc['status'] == 'draft'
+            assert doc['type'] == 'other'
+            assert doc['version_count'] == 1
+
+            assert storage.update_document(created['id'], {'title': "Fast", 'content': "New"})
+            assert storage.get_document(created['id'])['content'] == "New"
+            assert storage.delete_document(created['id'])
+            assert storage.get_document(created['id']) is None
+            assert local_storage.get_document(created['id'])['status'] == 'deleted'
+        finally:
+            storage.close()
+
+
+class TestAccessTracker:
+    """Test suite for write-behind access counting."""
+
+    def access_counts(self, engine):
+        with engine.reader() as conn:
+            return dict(conn.execute("SELECT id, access_count FROM documents"))
+
+    def test_counts_coalesce_into_one_flush(self, engine):
+        """Repeated reads of a document become one row update."""
+        ids = [engine.execute(insert_document) for _ in range(3)]
+        tracker = AccessTracker(engine.execute, flush_interval=60)
+        for _ in range(50):
+            for doc_id in ids:
+                tracker.record(doc_id)
+        assert tracker.pending() == 3
+
+        tracker.flush()
+        assert self.access_counts(engine) == {doc_id: 50 for doc_id in ids}
+        stats = tracker.get_statistics()
+        assert stats['flushes'] == 1
+        assert stats['flushed_documents'] == 3
+        assert stats['flushed_accesses'] == 150
+        assert stats['last_flush_seconds'] > 0
+        tracker.close()
+
+    def test_backpressure_instead_of_dropping(self, engine):
+        """A full table blocks record() until a flush; nothing is lost."""
+        ids = [engine.execute(insert_document) for _ in range(20)]
+        tracker = AccessTracker(engine.execute, flush_interval=60,
+                                flush_threshold=1000, max_pending=5)
+        for doc_id in ids:
+            tracker.record(doc_id)
+        tracker.close()
+
+        assert self.access_counts(engine) == {doc_id: 1 for doc_id in ids}
+        assert tracker.get_statistics()['backpressure_waits'] >= 3
+
+    def test_failed_flush_is_retried(self, engine):
+        """Counts from a failed flush are kept for the next one."""
+        doc_id = engine.execute(insert_document)
+        calls = []
+
+        def flaky(operation, invalidate=()):
+            calls.append(operation)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return engine.execute(operation, invalidate)
+
+        tracker = AccessTracker(flaky, flush_interval=60)
+        tracker.record(doc_id, count=2)
+        assert tracker.flush() is False
+        assert tracker.pending() == 1
+        tracker.record(doc_id)
+        tracker.close()
+
+        assert self.access_counts(engine) == {doc_id: 3}
+        assert tracker.get_statistics()['failed_flushes'] == 1
+
+    def test_fast_storage_flushes_on_close(self, db_path, local_storage):
+        """FastStorageLayer reads are counted once the layer closes."""
+        doc = local_storage.create_document(DocumentData(title="Hot", content="Text"))
+        fast = FastStorageLayer(db_path, access_flush_interval=60)
+        for _ in range(10):
+            fast.get_document(doc['id'])
+        assert fast.get_statistics()['pending_access_updates'] == 1
+        fast.close()
+
+        assert local_storage.get_document(doc['id'])['access_count'] == 11
@@ -12,12 +12,18 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import time
+import sqlite3
+import hashlib
+import re
 
+from sqlalchemy import event
+
+from devdocai.storage import local_storage
 from devdocai.storage.local_storage import (
     LocalStorageSystem, DocumentData, QueryParams,
     StorageConfig
 )
-from devdocai.storage.models import DocumentType, DocumentStatus
+from devdocai.storage.models import DocumentType, DocumentStatus, DocumentVersion
 from devdocai.core.config import ConfigurationManager
 
 
@@ -129,6 +135,33 @@ class TestDocumentOperations:
         assert doc['content'] == "Content"
         assert doc['access_count'] == 1
     
+    def test_get_document_inside_transaction(self, storage_system):
+        """Reads do not wait for the writer connection held by a session."""
+        created = storage_system.create_document(DocumentData(title="Busy", content="Text"))
+        
+        with storage_system.transaction():
+            doc = storage_system.get_document(document_id=created['id'])
+        
+        assert doc['access_count'] == 1
+        storage_system.access_tracker.flush()
+        assert storage_system.get_document(document_id=created['id'])['access_count'] == 2
+    
+    def test_session_writes_keep_other_cached_documents(self, storage_system):
+        """ORM commits only invalidate the documents they change."""
+        engine = storage_system.storage_engine
+        docs = [storage_system.create_document(DocumentData(title=f"Doc {i}", content="Text"))
+                for i in range(3)]
+        for doc in docs:
+            engine.fetch_document(doc['id'])
+        
+        storage_system.update_document(docs[0]['id'], DocumentData(title="Changed", content="New"))
+        hits = engine.document_cache.hits
+        for doc in docs[1:]:
+            engine.fetch_document(doc['id'])
+        
+        assert engine.document_cache.hits == hits + 2
+        assert engine.fetch_document(docs[0]['id'])['title'] == "Changed"
+    
     def test_get_document_by_uuid(self, storage_system):
         """Test retrieving document by UUID."""
         # Create document
@@ -382,6 +415,250 @@ class TestDocumentListing:
         assert result['total'] == 3
 
 
+class TestKeysetPagination:
+    """Test cursor pagination and cached counts."""
+    
+    @pytest.fixture
+    def documents(self, delta_storage):
+        """Create documents, several sharing the same timestamp."""
+        created = []
+        for i in range(11):
+            created.append(delta_storage.create_document(DocumentData(
+                title=f"Doc {i % 3}",
+                content=f"python guide {i}" if i % 2 else f"other text {i}",
+                type=DocumentType.API if i % 3 == 0 else DocumentType.TECHNICAL,
+                metadata={"group": i % 2}
+            )))
+        return created
+    
+    def _walk(self, storage, **filters):
+        ids, cursor = [], None
+        while True:
+            result = storage.list_documents(QueryParams(limit=3, cursor=cursor, **filters))
+            ids.extend(d['id'] for d in result['documents'])
+            cursor = result['next_cursor']
+            if cursor is None:
+                return ids
+    
+    @pytest.mark.parametrize('order_by', ['updated_at', 'title', 'id'])
+    @pytest.mark.parametrize('order_desc', [True, False])
+    def test_cursor_walk_matches_full_listing(self, delta_storage, documents,
+                                              order_by, order_desc):
+        """Following next_cursor visits every document once, in order."""
+        full = delta_storage.list_documents(
+            QueryParams(order_by=order_by, order_desc=order_desc)
+        )
+        
+        walked = self._walk(delta_storage, order_by=order_by, order_desc=order_desc)
+        
+        assert walked == [d['id'] for d in full['documents']]
+        assert len(walked) == 11
+    
+    def test_cursor_with_search(self, delta_storage, documents):
+        """Full-text search combines with cursor pagination."""
+        walked = self._walk(delta_storage, search_text="python")
+        
+        assert sorted(walked) == sorted(d['id'] for d in documents[1::2])
+    
+    def test_cursor_rejects_other_ordering(self, delta_storage, documents):
+        """A cursor is only valid for the ordering that produced it."""
+        cursor = delta_storage.list_documents(QueryParams(limit=3))['next_cursor']
+        
+        with pytest.raises(ValueError):
+            delta_storage.list_documents(QueryParams(cursor=cursor, order_by='title'))
+        with pytest.raises(ValueError):
+            delta_storage.list_documents(QueryParams(cursor="not-a-cursor"))
+    
+    def test_cached_counts_follow_writes(self, delta_storage, documents):
+        """Cached totals stay equal to exact counts across writes."""
+        queries = [
+            {},
+            {'type': DocumentType.API},
+            {'status': DocumentStatus.DELETED},
+            {'search_text': "python"},
+            {'metadata_filters': {"group": 1}},
+        ]
+        
+        def check():
+            for filters in queries:
+                cached = delta_storage.list_documents(QueryParams(**filters))
+                exact = delta_storage.list_documents(QueryParams(exact_total=True, **filters))
+                assert cached['total'] == exact['total'] == len(exact['documents'])
+        
+        check()
+        delta_storage.delete_document(documents[0]['id'])
+        delta_storage.delete_document(documents[1]['id'], hard_delete=True)
+        delta_storage.update_document(
+            documents[2]['id'],
+            DocumentData(title="Moved", content="python now", type=DocumentType.API)
+        )
+        check()
+    
+    def test_total_is_optional(self, delta_storage, documents):
+        """Without include_total no count is returned."""
+        result = delta_storage.list_documents(QueryParams(limit=5, include_total=False))
+        
+        assert len(result['documents']) == 5
+        assert 'total' not in result
+        assert result['next_cursor'] is not None
+
+
+class TestBulkOperations:
+    """Test bulk create and upsert."""
+    
+    def _items(self, count, prefix="Page"):
+        for i in range(count):
+            yield {
+                'title': f"{prefix} {i}",
+                'content': f"# {prefix} {i}\n\nbulk imported python page {i}\n",
+                'source_path': f"docs/page_{i}.md",
+                'metadata': {"section": i % 3}
+            }
+    
+    def test_bulk_create_documents(self, delta_storage):
+        """Bulk created documents are complete, versioned and searchable."""
+        progress = []
+        result = delta_storage.bulk_create_documents(
+            self._items(25), user="importer", batch_size=10, progress=progress.append
+        )
+        
+        assert result['created'] == 25
+        assert result['failed'] == 0
+        assert [r['index'] for r in result['results']] == list(range(25))
+        assert [p['processed'] for p in progress] == [10, 20, 25]
+        
+        doc = delta_storage.get_document(document_id=result['results'][7]['id'])
+        assert doc['title'] == "Page 7"
+        assert doc['metadata'] == {"section": 1}
+        assert doc['version_count'] == 1
+        assert delta_storage.get_version(doc['id'], 1)['content'] == doc['content']
+        
+        assert len(delta_storage.search("imported", limit=100)) == 25
+        assert delta_storage.list_documents(QueryParams(metadata_filters={"section": 1}))['total'] == 8
+        assert delta_storage.get_statistics()['total_documents'] == 25
+    
+    def test_bulk_create_without_returning(self, delta_storage, monkeypatch):
+        """Builds without INSERT ... RETURNING look new ids up by uuid."""
+        monkeypatch.setattr(local_storage, 'RETURNING_SUPPORTED', False)
+        monkeypatch.setattr(local_storage, 'UUID_LOOKUP_CHUNK', 4)
+        result = delta_storage.bulk_create_documents(self._items(10))
+        
+        assert result['created'] == 10
+        for i, item in enumerate(result['results']):
+            doc = delta_storage.get_document(document_id=item['id'])
+            assert doc['title'] == f"Page {i}"
+            assert delta_storage.get_version(doc['id'], 1)['content'] == doc['content']
+    
+    def test_bulk_upsert(self, delta_storage):
+        """Upserts update changed documents by source_path and skip unchanged ones."""
+        delta_storage.bulk_create_documents(self._items(6))
+        items = list(self._items(8))
+        items[1]['content'] = "rewritten page"
+        items[2]['metadata'] = {"section": "moved"}
+        
+        result = delta_storage.bulk_upsert(items, batch_size=3)
+        
+        assert [r['status'] for r in result['results']] == [
+            'unchanged', 'updated', 'updated', 'unchanged', 'unchanged', 'unchanged',
+            'created', 'created'
+        ]
+        updated = delta_storage.get_document(document_id=result['results'][1]['id'])
+        assert updated['content'] == "rewritten page"
+        assert updated['version_count'] == 2
+        assert [d['id'] for d in delta_storage.search("rewritten")] == [updated['id']]
+        assert delta_storage.search('"python page 1"') == []
+        assert delta_storage.list_documents(
+            QueryParams(metadata_filters={"section": "moved"})
+        )['total'] == 1
+    
+    def test_bulk_reports_invalid_items(self, delta_storage):
+        """Invalid items fail individually without stopping the import."""
+        items = list(self._items(4))
+        items[2] = {'title': "", 'content': "no title"}
+        
+        result = delta_storage.bulk_create_documents(items)
+        
+        assert result['created'] == 3
+        assert result['failed'] == 1
+        assert result['results'][2]['status'] == 'failed'
+        assert 'title' in result['results'][2]['error']
+    
+    def test_failed_batch_retried_per_item(self, delta_storage, monkeypatch):
+        """A database error in a batch only fails the offending item."""
+        write_batch = delta_storage._write_batch
+        
+        def failing_write(batch, upsert, user):
+            if any(data.title == "Page 3" for _, data in batch):
+                raise RuntimeError("constraint failed")
+            return write_batch(batch, upsert, user)
+        
+        monkeypatch.setattr(delta_storage, '_write_batch', failing_write)
+        result = delta_storage.bulk_create_documents(self._items(6), batch_size=4)
+        
+        assert [r['status'] for r in result['results']] == [
+            'created', 'created', 'created', 'failed', 'created', 'created'
+        ]
+        assert delta_storage.get_statistics()['total_documents'] == 5
+
+
+class TestLazyLoading:
+    """Test that listings and summaries never read document content."""
+    
+    @pytest.fixture
+    def large_documents(self, delta_storage):
+        content = "Große Datei – " * 5000
+        return [
+            delta_storage.create_document(DocumentData(title=f"Large {i}", content=content))
+            for i in range(3)
+        ], content
+    
+    def _selects(self, engine):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', listener)
+        return statements, lambda: event.remove(engine, 'before_cursor_execute', listener)
+    
+    def test_listing_skips_content(self, delta_storage, large_documents):
+        """list_documents selects summary columns, including the version count."""
+        statements, remove = self._selects(delta_storage.read_engine)
+        try:
+            result = delta_storage.list_documents(QueryParams(search_text="Datei"))
+            versions = delta_storage.get_versions(large_documents[0][0]['id'])
+        finally:
+            remove()
+        
+        assert result['total'] == 3
+        assert all(doc['version_count'] == 1 and 'content' not in doc for doc in result['documents'])
+        assert len(versions) == 1
+        assert statements
+        assert not any(re.search(r'\.(content|delta)\b', sql) for sql in statements)
+    
+    def test_search_returns_snippets(self, delta_storage, large_documents):
+        """Search results carry a short snippet instead of the highlighted document."""
+        results = delta_storage.search("Datei")
+        assert len(results) == 3
+        assert '<mark>' in results[0]['content_highlight']
+        assert len(results[0]['content_highlight']) < 1000
+    
+    def test_get_document_without_content(self, delta_storage, large_documents):
+        """include_content=False reads the summary columns only."""
+        doc = delta_storage.get_document(large_documents[0][0]['id'], include_content=False)
+        assert 'content' not in doc
+        assert doc['size_bytes'] == len(large_documents[1].encode())
+    
+    def test_iter_content_streams_chunks(self, delta_storage, large_documents):
+        """Content streams in chunks that never split a character."""
+        docs, content = large_documents
+        chunks = list(delta_storage.iter_content(docs[0]['id'], chunk_size=4097))
+        
+        assert len(chunks) > 10
+        assert ''.join(chunks) == content
+        empty = delta_storage.create_document(DocumentData(title="Empty"))
+        assert list(delta_storage.iter_content(empty['id'])) == []
+        with pytest.raises(ValueError):
+            list(delta_storage.iter_content(999999))
+
+
 class TestVersioning:
     """Test document versioning functionality."""
     
@@ -456,6 +733,159 @@ class TestVersioning:
         assert "Restored from version 1" in versions[0]['comment']
 
 
+@pytest.fixture
+def delta_config(temp_db_dir):
+    """Configuration manager with a short keyframe interval."""
+    config = Mock()
+    values = {
+        'storage': {
+            'db_path': str(Path(temp_db_dir) / 'delta.db'),
+            'pool_size': 5,
+            'version_keyframe_interval': 5
+        }
+    }
+    config.get.side_effect = lambda key, default=None: values.get(key, default)
+    return config
+
+
+@pytest.fixture
+def delta_storage(delta_config):
+    """Create LocalStorageSystem with delta version storage."""
+    system = LocalStorageSystem(delta_config)
+    yield system
+    system.close()
+
+
+def _edit_history(edits=12):
+    """Contents of a 100-line document edited one line at a time."""
+    lines = [f"Line {i}: some documentation prose for this paragraph.\n" for i in range(100)]
+    history = [''.join(lines)]
+    for edit in range(edits):
+        lines[(edit * 37) % len(lines)] = f"Edited line {edit}\n"
+        if edit % 4 == 0:
+            lines.insert(edit, f"Inserted line {edit}\n")
+        history.append(''.join(lines))
+    return history
+
+
+def _write_history(storage, history):
+    doc = storage.create_document(DocumentData(title="Edited", content=history[0]))
+    for content in history[1:]:
+        storage.update_document(doc['id'], DocumentData(title="Edited", content=content))
+    return doc['id']
+
+
+class TestDeltaVersioning:
+    """Test keyframe plus delta version storage."""
+    
+    def test_versions_stored_as_deltas(self, delta_storage):
+        """Versions between keyframes are deltas and reconstruct exactly."""
+        history = _edit_history()
+        document_id = _write_history(delta_storage, history)
+        
+        for number, content in enumerate(history, start=1):
+            assert delta_storage.get_version(document_id, number)['content'] == content
+        
+        with delta_storage.get_session() as session:
+            versions = session.query(DocumentVersion)\
+                .filter(DocumentVersion.document_id == document_id)\
+                .order_by(DocumentVersion.version_number).all()
+            keyframes = [v.version_number for v in versions if v.is_keyframe]
+            stored = sum(v.stored_size for v in versions)
+        
+        assert keyframes == [1, 6, 11]
+        assert stored * 3 < sum(len(content) for content in history)
+    
+    def test_restore_version_from_delta(self, delta_storage):
+        """Restoring a delta version restores its reconstructed content."""
+        history = _edit_history()
+        document_id = _write_history(delta_storage, history)
+        
+        delta_storage.restore_version(document_id, version_number=4)
+        
+        current = delta_storage.get_document(document_id=document_id)
+        assert current['content'] == history[3]
+        latest = delta_storage.get_version(document_id, len(history) + 1)
+        assert latest['content'] == history[3]
+        assert latest['comment'] == "Restored from version 4"
+    
+    def test_corrupt_delta_detected(self, delta_storage):
+        """A version that does not match its hash is never returned."""
+        document_id = _write_history(delta_storage, _edit_history(2))
+        
+        with delta_storage.get_session() as session:
+            version = session.query(DocumentVersion)\
+                .filter(DocumentVersion.document_id == document_id,
+                        DocumentVersion.version_number == 1).first()
+            version.content = "Tampered"
+        
+        with pytest.raises(ValueError) as exc:
+            delta_storage.get_version(document_id, 3)
+        assert "integrity" in str(exc.value)
+    
+    def test_migrate_legacy_versions(self, delta_config, delta_storage):
+        """Old databases gain the delta columns and compaction converts their rows."""
+        history = _edit_history()
+        db_path = delta_storage.config.db_path
+        delta_storage.close()
+        
+        # Recreate a pre-delta database with full-content versions
+        conn = sqlite3.connect(db_path)
+        for column in ('is_keyframe', 'base_version', 'delta'):
+            conn.execute(f"ALTER TABLE document_versions DROP COLUMN {column}")
+        conn.execute(
+            "INSERT INTO documents (uuid, title, type, status, content, created_at) "
+            "VALUES ('legacy', 'Legacy', 'other', 'draft', ?, CURRENT_TIMESTAMP)",
+            (history[-1],)
+        )
+        document_id = conn.execute("SELECT id FROM documents WHERE uuid = 'legacy'").fetchone()[0]
+        for number, content in enumerate(history, start=1):
+            conn.execute(
+                "INSERT INTO document_versions (document_id, version_number, content, "
+                "content_hash, diff_from_previous, created_at) "
+                "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                (document_id, number, content,
+                 hashlib.sha256(content.encode()).hexdigest(), "legacy diff")
+            )
+        conn.commit()
+        conn.close()
+        
+        storage = LocalStorageSystem(delta_config)
+        try:
+            stats = storage.compact_versions()
+            assert stats['documents'] == 1
+            assert stats['versions'] == len(history)
+            assert stats['bytes_after'] * 3 < stats['bytes_before']
+            
+            for number, content in enumerate(history, start=1):
+                assert storage.get_version(document_id, number)['content'] == content
+            assert storage.get_statistics()['keyframe_versions'] == 3
+            
+            # Nothing left to do on the next run
+            assert storage.compact_versions()['documents'] == 0
+        finally:
+            storage.close()
+    
+    def test_background_compaction(self, delta_storage):
+        """The background job compacts versions written as full copies."""
+        history = _edit_history(8)
+        document_id = _write_history(delta_storage, history)
+        
+        with delta_storage.get_session() as session:
+            for version in session.query(DocumentVersion)\
+                    .filter(DocumentVersion.document_id == document_id).all():
+                delta_storage._encode_version(version, history[version.version_number - 1])
+        
+        delta_storage.start_compaction(interval=0.05)
+        deadline = time.time() + 5
+        while delta_storage.get_statistics()['keyframe_versions'] > 2 and time.time() < deadline:
+            time.sleep(0.05)
+        delta_storage.stop_compaction()
+        
+        assert delta_storage.get_statistics()['keyframe_versions'] == 2
+        assert delta_storage.get_version(document_id, 9)['content'] == history[8]
+
+
 class TestSearch:
     """Test full-text search functionality."""
     
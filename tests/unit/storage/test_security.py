@@ -6,6 +6,7 @@ while validating performance requirements are maintained.
 """
 
 import os
+import base64
 import pytest
 import tempfile
 import time
@@ -14,7 +15,9 @@ import secrets
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
-from devdocai.storage.encryption import EncryptionManager, SQLCipherHelper
+from devdocai.storage.encryption import (
+    EncryptionManager, SQLCipherHelper, ENVELOPE_HEADER_SIZE
+)
 from devdocai.storage.pii_detector import (
     PIIDetector, PIIDetectionConfig, PIIType, PIIMatch
 )
@@ -187,6 +190,98 @@ class TestEncryptionManager:
         assert encryption_manager._master_key is None
 
 
+class TestEnvelopeEncryption:
+    """Test chunked envelope encryption of document content."""
+    
+    @pytest.fixture
+    def encryption_manager(self, tmp_path):
+        """Encryption manager with a generated key file."""
+        manager = EncryptionManager(key_file=str(tmp_path / 'keys'))
+        assert manager.generate_master_key("test_password")
+        return manager
+    
+    def test_roundtrip_across_chunks(self, encryption_manager):
+        """Content spanning several chunks, including multi-byte characters, roundtrips."""
+        content = "Ünïcode lines 🔒\n" * 500
+        encrypted = encryption_manager.encrypt_content(content, chunk_size=1000)
+        
+        envelope = encryption_manager.open_envelope(encrypted)
+        assert envelope.length == len(content.encode())
+        assert envelope.chunk_count == -(-envelope.length // 1000)
+        assert encryption_manager.decrypt_content(encrypted) == content
+        assert "".join(envelope.iter_text()) == content
+        assert encryption_manager.decrypt_content(encryption_manager.encrypt_content("")) == ""
+    
+    def test_random_access_reads(self, encryption_manager):
+        """Byte ranges decrypt only the chunks they span."""
+        plaintext = bytes(range(256)) * 40
+        envelope = encryption_manager.open_envelope(
+            encryption_manager.encrypt_content(plaintext, chunk_size=1024)
+        )
+        
+        with patch.object(envelope, 'read_chunk', wraps=envelope.read_chunk) as read_chunk:
+            assert envelope.read(2100, 100) == plaintext[2100:2200]
+        assert [call.args[0] for call in read_chunk.call_args_list] == [2]
+        assert envelope.read(1000, 2000) == plaintext[1000:3000]
+        assert envelope.read(10000) == plaintext[10000:]
+        assert envelope.read(len(plaintext) + 5) == b''
+    
+    def test_tampering_detected(self, encryption_manager):
+        """Modified chunks, headers and truncation fail authentication."""
+        encrypted = encryption_manager.encrypt_content("x" * 5000, chunk_size=1000)
+        
+        tampered = bytearray(encrypted)
+        tampered[-1500] ^= 1
+        envelope = encryption_manager.open_envelope(bytes(tampered))
+        assert envelope.read(0, 1000) == b"x" * 1000
+        with pytest.raises(ValueError, match="authentication"):
+            envelope.read_chunk(3)
+        
+        tampered = bytearray(encrypted)
+        tampered[10] ^= 1  # plaintext length
+        with pytest.raises(ValueError, match="authentication"):
+            encryption_manager.decrypt_content(bytes(tampered))
+        
+        with pytest.raises(ValueError):
+            encryption_manager.decrypt_content(encrypted[:-1016])
+    
+    def test_content_key_rotation_rewraps_only_headers(self, encryption_manager):
+        """Rotating the content key leaves existing chunks untouched."""
+        encrypted = encryption_manager.encrypt_content("Secret body" * 100, chunk_size=256)
+        field = encryption_manager.encrypt_field({'ssn': '123-45-6789'})
+        
+        assert encryption_manager.rotate_keys("test_password", "new_password",
+                                              rotate_content_key=True)
+        reloaded = EncryptionManager(key_file=encryption_manager.key_file)
+        assert reloaded.load_master_key("new_password")
+        assert reloaded.decrypt_content(encrypted) == "Secret body" * 100
+        
+        rewrapped = reloaded.rewrap_content(encrypted)
+        assert rewrapped[ENVELOPE_HEADER_SIZE:] == encrypted[ENVELOPE_HEADER_SIZE:]
+        assert rewrapped[:ENVELOPE_HEADER_SIZE] != encrypted[:ENVELOPE_HEADER_SIZE]
+        assert reloaded.decrypt_content(rewrapped) == "Secret body" * 100
+        assert reloaded.rewrap_content(rewrapped) == rewrapped
+        assert reloaded.decrypt_field(reloaded.rewrap_field(field)) == {'ssn': '123-45-6789'}
+    
+    def test_password_change_keeps_content_readable(self, encryption_manager):
+        """Changing the password alone does not touch content keys."""
+        encrypted = encryption_manager.encrypt_content("Body")
+        assert encryption_manager.rotate_keys("test_password", "new_password")
+        assert encryption_manager.decrypt_content(encrypted) == "Body"
+        assert encryption_manager.rewrap_content(encrypted) == encrypted
+    
+    def test_legacy_blobs_still_decrypt(self, encryption_manager):
+        """Single-shot blobs encrypted with the master key remain readable."""
+        legacy = encryption_manager._encrypt_single(b'"legacy"', encryption_manager._master_key)
+        assert encryption_manager.decrypt_content(legacy) == '"legacy"'
+        
+        field = base64.b64encode(legacy).decode()
+        assert encryption_manager.decrypt_field(field) == "legacy"
+        upgraded = encryption_manager.rewrap_field(field)
+        assert encryption_manager.open_envelope(
+            base64.b64decode(upgraded)).length == len(b'"legacy"')
+
+
 class TestPIIDetector:
     """Test PII detection and masking."""
     
@@ -14,7 +14,7 @@ from pathlib import Path
 
 from devdocai.storage.utils import (
     generate_uuid, calculate_hash, sanitize_path, ensure_directory,
-    calculate_diff, apply_diff, tokenize_content, format_file_size,
+    calculate_diff, apply_diff, calculate_delta, apply_delta, tokenize_content, format_file_size,
     validate_document_content, extract_metadata_from_content,
     secure_delete, create_backup, restore_backup,
     estimate_storage_requirements
@@ -179,6 +179,32 @@ class TestDiffOperations:
         assert result == content  # Returns original as fallback
 
 
+class TestDeltaOperations:
+    """Test line delta calculation and application."""
+    
+    @pytest.mark.parametrize('old, new', [
+        ("Line 1\nLine 2\nLine 3", "Line 1\nLine 2 modified\nLine 3\nLine 4"),
+        ("A\r\nB\r\nC\r\n", "A\r\nC\r\nD"),
+        ("", "New content\n"),
+        ("Old content\n", ""),
+        ("No newline", "No newline at all"),
+        ("Same\n" * 50, "Same\n" * 50),
+    ])
+    def test_delta_roundtrip(self, old, new):
+        """Applying a delta to its base reconstructs the new content exactly."""
+        assert apply_delta(old, calculate_delta(old, new)) == new
+    
+    def test_delta_smaller_than_content(self):
+        """A one-line edit of a large document produces a small delta."""
+        old = ''.join(f"Paragraph {i} with ordinary prose.\n" for i in range(500))
+        new = old.replace("Paragraph 250 ", "Edited paragraph 250 ")
+        
+        delta = calculate_delta(old, new)
+        
+        assert len(delta) < 100
+        assert apply_delta(old, delta) == new
+
+
 class TestTokenization:
     """Test content tokenization."""
     